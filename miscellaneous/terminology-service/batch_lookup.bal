@@ -0,0 +1,187 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.store;
+
+import ballerina/http;
+import ballerina/log;
+import ballerina/persist;
+import ballerina/sql;
+import ballerina/time;
+import ballerinax/health.fhir.r4;
+import ballerinax/health.fhir.r4.international401;
+
+// name of the parameter holding the result of one code of a multi-code `$lookup`
+const LOOKUP_GROUP = "lookup";
+
+// operation answering an entry of a batch Bundle
+enum BatchEntryResult {
+    BATCH_VALIDATE_CODE,
+    BATCH_LOOKUP,
+    // entries without a system or code
+    BATCH_INVALID
+}
+
+# Looks up the codes of a multi-code `$lookup` request. Codes are grouped by CodeSystem url and version, each
+# CodeSystem is resolved once and the distinct codes of its group are read with one `IN`-list query per
+# `CONCEPT_LOOKUP_CHUNK_SIZE` codes.
+#
+# + items - Requested codes
+# + return - Lookup result of every code, in the order of `items`, as the parameters of a single `$lookup` or a
+# `message` parameter if the code was not found
+isolated function lookupCodesInBatch(BatchLookupItem[] items) returns international401:Parameters[] {
+    if items.length() == 0 {
+        return [];
+    }
+    decimal startTime = time:monotonicNow();
+
+    map<BatchLookupItem[]> groups = {};
+    foreach BatchLookupItem item in items {
+        string key = string `${item.system}|${item.version ?: ""}`;
+        BatchLookupItem[] group = groups[key] ?: [];
+        group.push(item);
+        groups[key] = group;
+    }
+
+    map<international401:Parameters> results = {};
+    foreach BatchLookupItem[] group in groups {
+        string[] codes = from BatchLookupItem item in group
+            select item.code;
+        map<r4:CodeSystemConcept>|r4:FHIRError concepts = getCodeSystemConcepts(group[0].system, group[0].version, codes);
+        foreach BatchLookupItem item in group {
+            results[item.index.toString()] = toLookupParameters(item, concepts);
+        }
+    }
+
+    international401:Parameters[] ordered = from BatchLookupItem item in items
+        select results.get(item.index.toString());
+
+    log:printInfo("Batch $lookup completed",
+            codes = items.length(),
+            codeSystems = groups.length(),
+            elapsedSeconds = time:monotonicNow() - startTime);
+    return ordered;
+}
+
+# Wraps the results of a multi-code `$lookup` in one `lookup` parameter per code, each holding the code and
+# system it answers followed by the parameters of its result.
+#
+# + items - Requested codes
+# + results - Lookup result of every code, in the order of `items`
+# + return - The `$lookup` response
+isolated function toBatchLookupParameters(BatchLookupItem[] items, international401:Parameters[] results) returns international401:Parameters {
+    international401:ParametersParameter[] groups = [];
+    foreach int i in 0 ..< items.length() {
+        groups.push({
+            name: LOOKUP_GROUP,
+            part: [
+                {name: "code", valueCode: items[i].code},
+                {name: "system", valueUri: items[i].system},
+                ...(results[i].'parameter ?: [])
+            ]
+        });
+    }
+    return {'parameter: groups};
+}
+
+isolated function toLookupParameters(BatchLookupItem item, map<r4:CodeSystemConcept>|r4:FHIRError concepts) returns international401:Parameters {
+    if concepts is r4:FHIRError {
+        return {'parameter: [{name: "message", valueString: concepts.message()}]};
+    }
+
+    r4:CodeSystemConcept? concept = concepts[item.code];
+    if concept is () {
+        return {
+            'parameter: [
+                {name: "message", valueString: string `Can not find the code: ${item.code} in CodeSystem: ${item.system}`}
+            ]
+        };
+    }
+    return codesystemConceptsToParameters(concept);
+}
+
+# Reads the concepts of many codes of one CodeSystem. Codes the membership filter rules out are not queried,
+# unless the store was written since the filter was built.
+#
+# + system - Canonical url of the CodeSystem
+# + version - Optional version of the CodeSystem
+# + codes - Codes to read, duplicates are read once
+# + return - Found concepts keyed by code, or an error if the CodeSystem could not be resolved or read
+isolated function getCodeSystemConcepts(string system, string? version, string[] codes) returns map<r4:CodeSystemConcept>|r4:FHIRError {
+    map<r4:CodeSystemConcept> concepts = {};
+    TerminologySnapshot? snapshot = terminologySnapshot;
+    if snapshot is TerminologySnapshot {
+        SnapshotCodeSystem codeSystem = check findSnapshotCodeSystem(snapshot, system, (), version);
+        foreach string code in codes {
+            int? index = codeSystem.codes[code];
+            if index is int {
+                concepts[code] = check getSnapshotConcept(snapshot, index);
+            }
+        }
+        return concepts;
+    }
+
+    store:CodeSystem|error codeSystem = getStoreCodeSystemByURL(system, version);
+    if codeSystem is error {
+        return r4:createFHIRError(
+                "CodeSystem not found",
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = codeSystem,
+                httpStatusCode = http:STATUS_NOT_FOUND);
+    }
+
+    map<()> distinctCodes = {};
+    map<()> rejectedCodes = {};
+    foreach string code in codes {
+        if codeMembershipFilter.mightContain(system, code) {
+            distinctCodes[code] = ();
+        } else {
+            rejectedCodes[code] = ();
+        }
+    }
+    if rejectedCodes.length() > 0 && !isCodeMembershipFilterCurrent() {
+        foreach string code in rejectedCodes.keys() {
+            distinctCodes[code] = ();
+        }
+    }
+    string[] pending = distinctCodes.keys();
+
+    do {
+        int chunkStart = 0;
+        while chunkStart < pending.length() {
+            string[] chunk = pending.slice(chunkStart, int:min(chunkStart + CONCEPT_LOOKUP_CHUNK_SIZE, pending.length()));
+            stream<ConceptColumns, persist:Error?> rowStream = sClient->queryNativeSQL(sql:queryConcat(
+                    selectConceptColumns(),
+                    ` WHERE c.`, escapeToQuery("codesystemCodeSystemId"), ` = ${codeSystem.codeSystemId} AND c.`, escapeToQuery("code"),
+                    ` IN (`, sql:arrayFlattenQuery(chunk), `)`
+            ));
+            ConceptColumns[] rows = check from ConceptColumns row in rowStream
+                select row;
+            foreach r4:CodeSystemConcept concept in check toCodeSystemConcepts(rows) {
+                concepts[concept.code] = concept;
+            }
+            chunkStart += CONCEPT_LOOKUP_CHUNK_SIZE;
+        }
+    } on fail error e {
+        return r4:createFHIRError(
+                "Error while searching for Concepts, " + e.message(),
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = e,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+    return concepts;
+}
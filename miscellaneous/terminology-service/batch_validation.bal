@@ -0,0 +1,143 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import ballerina/log;
+import ballerina/persist;
+import ballerina/sql;
+import ballerina/time;
+import ballerinax/health.fhir.r4.international401;
+
+// distinct codes checked per membership query, kept below the bind parameter limit of every dialect
+const BATCH_VALIDATION_CODE_CHUNK_SIZE = 1000;
+
+# Validates the codes of a batch `$validate-code` request. Entries are grouped by ValueSet url and version,
+# each ValueSet is resolved once and the distinct codes of its group are checked with one set-membership
+# query. Up to `batch_validation_workers` groups are validated in parallel.
+#
+# + items - Parsed entries of the batch
+# + return - Validation result of every entry, in the order of `items`
+isolated function validateCodesInBatch(BatchValidationItem[] items) returns international401:Parameters[] {
+    decimal startTime = time:monotonicNow();
+
+    map<BatchValidationItem[]> groups = {};
+    foreach BatchValidationItem item in items {
+        string key = string `${item.system}|${item.version ?: ""}`;
+        BatchValidationItem[] group = groups[key] ?: [];
+        group.push(item);
+        groups[key] = group;
+    }
+
+    BatchValidationItem[][] pendingGroups = groups.toArray();
+    map<international401:Parameters> results = {};
+    int workers = int:max(batch_validation_workers, 1);
+
+    int waveStart = 0;
+    while waveStart < pendingGroups.length() {
+        future<BatchValidationResult[]>[] running = [];
+        foreach BatchValidationItem[] group in pendingGroups.slice(waveStart, int:min(waveStart + workers, pendingGroups.length())) {
+            running.push(start validateValueSetGroup(group.cloneReadOnly()));
+        }
+        foreach future<BatchValidationResult[]> validation in running {
+            foreach BatchValidationResult result in wait validation {
+                results[result.index.toString()] = result.parameters;
+            }
+        }
+        waveStart += workers;
+    }
+
+    international401:Parameters[] ordered = from BatchValidationItem item in items
+        select results.get(item.index.toString());
+
+    log:printInfo("Batch $validate-code completed",
+            entries = items.length(),
+            valueSets = pendingGroups.length(),
+            elapsedSeconds = time:monotonicNow() - startTime);
+    return ordered;
+}
+
+isolated function validateValueSetGroup(readonly & BatchValidationItem[] group) returns BatchValidationResult[] {
+    map<ValueSetMember>|error members = getValueSetMembers(group[0].system, group[0].version, from BatchValidationItem item in group
+        select item.code);
+
+    return from BatchValidationItem item in group
+        select {index: item.index, parameters: toValidationParameters(item, members)};
+}
+
+isolated function toValidationParameters(BatchValidationItem item, map<ValueSetMember>|error members) returns international401:Parameters {
+    if members is error {
+        return {'parameter: [{name: "result", valueBoolean: false}, {name: "message", valueString: members.message()}]};
+    }
+
+    ValueSetMember? member = members[item.code];
+    if member is () {
+        return {
+            'parameter: [
+                {name: "result", valueBoolean: false},
+                {name: "message", valueString: string `Can not find any valid concepts for the code: ${item.code} in ValueSet: ${item.system}`}
+            ]
+        };
+    }
+
+    international401:ParametersParameter[] params = [
+        {name: "result", valueBoolean: true},
+        {name: "display", valueString: member.display}
+    ];
+    string? definition = member.definition;
+    if definition is string {
+        params.push({name: "definition", valueString: definition});
+    }
+    return {'parameter: params};
+}
+
+# Finds which of the given codes belong to a stored ValueSet, through its membership index, which covers the
+# concepts and CodeSystems it includes directly and through nested ValueSets, like the single `$validate-code`.
+#
+# + url - Canonical url of the ValueSet
+# + version - Optional version of the ValueSet
+# + codes - Codes to check, duplicates are checked once
+# + return - Matching concepts keyed by code, or an error if the ValueSet could not be resolved
+isolated function getValueSetMembers(string url, string? version, string[] codes) returns map<ValueSetMember>|error {
+    int valueSetId = (check getStoreValueSetByURL(url, version)).valueSetId;
+
+    map<()> distinctCodes = {};
+    foreach string code in codes {
+        distinctCodes[code] = ();
+    }
+    string[] pending = distinctCodes.keys();
+
+    map<ValueSetMember> members = {};
+    int chunkStart = 0;
+    while chunkStart < pending.length() {
+        string[] chunk = pending.slice(chunkStart, int:min(chunkStart + BATCH_VALIDATION_CODE_CHUNK_SIZE, pending.length()));
+
+        // one probe of the (valueSetId, code) index per code
+        sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+                `SELECT c.`, escapeToQuery("code"), `, c.`, escapeToQuery("display"), `, c.`, escapeToQuery("definition"),
+                ` FROM `, escapeToQuery(CODE_MEMBERSHIPS_TABLE), ` m JOIN `, escapeToQuery("concepts"), ` c ON c.`,
+                escapeToQuery("conceptId"), ` = m.`, escapeToQuery("conceptId"),
+                ` WHERE m.`, escapeToQuery("valueSetId"), ` = ${valueSetId} AND m.`, escapeToQuery("code"),
+                ` IN (`, sql:arrayFlattenQuery(chunk), `) ORDER BY c.`, escapeToQuery("conceptId")
+        );
+        stream<ValueSetMember, persist:Error?> memberStream = sClient->queryNativeSQL(sqlQuery);
+        check from ValueSetMember member in memberStream
+            where !members.hasKey(member.code)
+            do {
+                members[member.code] = member;
+            };
+
+        chunkStart += BATCH_VALIDATION_CODE_CHUNK_SIZE;
+    }
+    return members;
+}
@@ -0,0 +1,513 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.store;
+
+import ballerina/log;
+import ballerina/persist;
+import ballerina/sql;
+
+// bits of the membership filter per expected entry, about 1% false positives with 7 hash functions
+const CODE_FILTER_BITS_PER_ENTRY = 10;
+const CODE_FILTER_HASH_COUNT = 7;
+// entries the filter is sized for when the store is empty
+const CODE_FILTER_MIN_CAPACITY = 16384;
+const FNV_OFFSET_BASIS = 2166136261;
+const FNV_PRIME = 16777619;
+// offset basis of the second hash, any odd value other than the FNV one
+const FNV_SECOND_OFFSET_BASIS = 1540483477;
+// key of the single row of the store generation table
+const STORE_GENERATION_ROW = 1;
+
+final CodeMembershipFilter codeMembershipFilter = new;
+
+# Bloom filter over the (system, code) pairs of the store, where the system is the url of a CodeSystem or of a
+# ValueSet containing the code. It answers "not in the store" without a query, and "maybe" otherwise. Until it
+# has been built from the store it answers "maybe" for everything, so an unbuilt filter never rejects a code.
+# Entries are added as CodeSystems and ValueSets are ingested and the filter is rebuilt, twice as large, once
+# it holds more entries than it was sized for.
+#
+# The filter knows the store generation it holds every code of. Its "not in the store" only stands while that
+# is still the generation of the store, see `isCodeMembershipFilterCurrent`.
+isolated class CodeMembershipFilter {
+    private int[] words = [];
+    private int bitCount = 0;
+    private int capacity = 0;
+    private int entryCount = 0;
+    private boolean ready = false;
+    // store generation the filter holds every code of
+    private int generation = -1;
+    // incremented by every reset, so that a rebuild or an update started before it is not applied after it
+    private int epoch = 0;
+    private boolean rebuilding = false;
+
+    # Empties the filter and sizes it for twice the expected entries. It rejects no code until `markReady`.
+    #
+    # + expectedEntries - Number of entries about to be added
+    # + return - The epoch of the emptied filter, to be passed to `markReady`
+    isolated function reset(int expectedEntries) returns int {
+        int capacity = int:max(expectedEntries * 2, CODE_FILTER_MIN_CAPACITY);
+        int wordCount = (capacity * CODE_FILTER_BITS_PER_ENTRY + 63) / 64;
+        lock {
+            self.words = [];
+            self.words.setLength(wordCount);
+            self.bitCount = wordCount * 64;
+            self.capacity = capacity;
+            self.entryCount = 0;
+            self.ready = false;
+            self.generation = -1;
+            self.epoch += 1;
+            return self.epoch;
+        }
+    }
+
+    # Makes the filter reject codes, unless it was reset again since the given epoch.
+    #
+    # + epoch - Epoch returned by the `reset` the filter was built after
+    # + generation - Store generation read before the filter was built
+    isolated function markReady(int epoch, int generation) {
+        lock {
+            if self.epoch == epoch {
+                self.ready = true;
+                self.generation = generation;
+            }
+        }
+    }
+
+    isolated function getEpoch() returns int {
+        lock {
+            return self.epoch;
+        }
+    }
+
+    # Moves the filter to the generation of a write whose codes were just added to it. The filter only moves if
+    # it held the generation just before, otherwise a write of another instance may be missing from it.
+    #
+    # + epoch - Epoch of the filter before the codes were added
+    # + generation - Store generation of the write
+    isolated function advance(int epoch, int generation) {
+        lock {
+            if self.ready && self.epoch == epoch && self.generation == generation - 1 {
+                self.generation = generation;
+            }
+        }
+    }
+
+    # Checks whether the filter holds every code of a store generation.
+    #
+    # + generation - Current store generation
+    # + return - True if the negative answers of the filter can be trusted
+    isolated function isCurrent(int generation) returns boolean {
+        lock {
+            return self.ready && self.generation == generation;
+        }
+    }
+
+    # Claims the background rebuild of the filter.
+    #
+    # + return - False if a rebuild is already running
+    isolated function startRebuild() returns boolean {
+        lock {
+            if self.rebuilding {
+                return false;
+            }
+            self.rebuilding = true;
+            return true;
+        }
+    }
+
+    isolated function finishRebuild() {
+        lock {
+            self.rebuilding = false;
+        }
+    }
+
+    # Makes the filter accept every code, when it could not be kept in step with the store.
+    isolated function disable() {
+        lock {
+            self.ready = false;
+        }
+    }
+
+    isolated function add(string system, string code) {
+        [int, int] [first, second] = codeFilterHashes(system, code);
+        lock {
+            if self.bitCount == 0 {
+                return;
+            }
+            foreach int i in 0 ..< CODE_FILTER_HASH_COUNT {
+                int position = (first + i * second) % self.bitCount;
+                self.words[position / 64] |= 1 << (position % 64);
+            }
+            self.entryCount += 1;
+        }
+    }
+
+    # Checks whether a code may be in the store.
+    #
+    # + system - Url of the CodeSystem or ValueSet
+    # + code - Code to check
+    # + return - False if the code is certainly not in the system, true if it may be
+    isolated function mightContain(string system, string code) returns boolean {
+        [int, int] [first, second] = codeFilterHashes(system, code);
+        lock {
+            if !self.ready {
+                return true;
+            }
+            foreach int i in 0 ..< CODE_FILTER_HASH_COUNT {
+                int position = (first + i * second) % self.bitCount;
+                if (self.words[position / 64] & (1 << (position % 64))) == 0 {
+                    return false;
+                }
+            }
+            return true;
+        }
+    }
+
+    isolated function isOverCapacity() returns boolean {
+        lock {
+            return self.entryCount > self.capacity;
+        }
+    }
+}
+
+isolated function codeFilterHashes(string system, string code) returns [int, int] {
+    byte[] key = string `${system}|${code}`.toBytes();
+    int first = FNV_OFFSET_BASIS;
+    int second = FNV_SECOND_OFFSET_BASIS;
+    foreach byte b in key {
+        // 32 bit FNV-1a, the product stays well inside 64 bits
+        first = ((first ^ b) * FNV_PRIME) & 0xFFFFFFFF;
+        second = ((second ^ b) * FNV_PRIME) & 0xFFFFFFFF;
+    }
+    // an even step could cycle through a fraction of the bits only
+    return [first, second | 1];
+}
+
+# Rebuilds the code membership filter from every concept and ValueSet membership in the store. The store
+# generation is read first, so a write committed while the filter is built leaves it behind the store.
+#
+# + dbClient - Store client the memberships are read with
+# + return - An error if the store could not be read, the filter then keeps accepting every code
+isolated function rebuildCodeMembershipFilter(store:Client dbClient = sClient) returns error? {
+    int generation = check getStoreGeneration(dbClient);
+    sql:ParameterizedQuery countQuery = sql:queryConcat(
+            `SELECT (SELECT COUNT(*) FROM `, escapeToQuery("concepts"), `) + (SELECT COUNT(*) FROM `,
+            escapeToQuery(CODE_MEMBERSHIPS_TABLE), `) AS `, escapeToQuery("total")
+    );
+    stream<ExpansionState, persist:Error?> countStream = dbClient->queryNativeSQL(countQuery);
+    ExpansionState[] counts = check from ExpansionState state in countStream
+        select state;
+    int expectedEntries = counts.length() > 0 ? counts[0].total : 0;
+
+    int epoch = codeMembershipFilter.reset(expectedEntries);
+    check addCodeSystemsToFilter((), dbClient);
+    check addValueSetsToFilter((), dbClient);
+    codeMembershipFilter.markReady(epoch, generation);
+    log:printInfo("Code membership filter rebuilt", entries = expectedEntries, generation = generation);
+}
+
+# Checks whether a code the membership filter rejects is certainly not in the store. The filter only answers
+# for the store generation it holds, once a write has been committed after it, by this or by another instance
+# sharing the database, the code must be looked up in the store and the filter is rebuilt in the background.
+#
+# + return - True if the negative answers of the filter can be trusted
+isolated function isCodeMembershipFilterCurrent() returns boolean {
+    int|error generation = getStoreGeneration();
+    if generation is error {
+        log:printWarn("Store generation could not be read, the code is looked up in the store", generation);
+        return false;
+    }
+    if codeMembershipFilter.isCurrent(generation) {
+        return true;
+    }
+    if codeMembershipFilter.startRebuild() {
+        _ = start refreshCodeMembershipFilter();
+    }
+    return false;
+}
+
+isolated function refreshCodeMembershipFilter() {
+    error? rebuilt = rebuildCodeMembershipFilter();
+    codeMembershipFilter.finishRebuild();
+    if rebuilt is error {
+        log:printWarn("Code membership filter not rebuilt, every code is looked up in the store", rebuilt);
+    }
+}
+
+# Reads the store generation, the number of committed writes that added codes to the store.
+#
+# + dbClient - Store client the generation is read with
+# + return - The store generation or an error
+isolated function getStoreGeneration(store:Client dbClient = sClient) returns int|error {
+    int? generation = check readStoreGeneration(dbClient);
+    if generation is () {
+        return error("The store generation is not initialized");
+    }
+    return generation;
+}
+
+# Increments the store generation. Called in the transaction of every write adding codes, the update locks the
+# generation row until the write is committed, so concurrent writes get consecutive generations.
+#
+# + dbClient - Store client of the transaction
+# + return - The generation of the write or an error
+isolated function advanceStoreGeneration(store:Client dbClient = sClient) returns int|error {
+    _ = check dbClient->executeNativeSQL(sql:queryConcat(
+            `UPDATE `, escapeToQuery(STORE_GENERATION_TABLE), ` SET `, escapeToQuery("generation"), ` = `,
+            escapeToQuery("generation"), ` + 1 WHERE `, escapeToQuery("generationId"), ` = ${STORE_GENERATION_ROW}`
+    ));
+    return getStoreGeneration(dbClient);
+}
+
+# Inserts the store generation row if it does not exist yet.
+#
+# + dbClient - Store client of the database to migrate
+# + return - An error if the row could not be inserted
+isolated function initStoreGeneration(store:Client dbClient) returns error? {
+    int? generation = check readStoreGeneration(dbClient);
+    if generation is int {
+        return;
+    }
+    _ = check dbClient->executeNativeSQL(sql:queryConcat(
+            `INSERT INTO `, escapeToQuery(STORE_GENERATION_TABLE), ` (`, escapeToQuery("generationId"), `, `,
+            escapeToQuery("generation"), `) VALUES (${STORE_GENERATION_ROW}, 0)`
+    ));
+}
+
+isolated function readStoreGeneration(store:Client dbClient) returns int?|error {
+    stream<StoreGeneration, persist:Error?> generationStream = dbClient->queryNativeSQL(sql:queryConcat(
+            `SELECT `, escapeToQuery("generation"), ` FROM `, escapeToQuery(STORE_GENERATION_TABLE),
+            ` WHERE `, escapeToQuery("generationId"), ` = ${STORE_GENERATION_ROW}`
+    ));
+    StoreGeneration[] generations = check from StoreGeneration generation in generationStream
+        select generation;
+    return generations.length() > 0 ? generations[0].generation : ();
+}
+
+# Adds the codes of a stored CodeSystem to the membership filter.
+#
+# + codeSystemId - Database id of the CodeSystem, or nil for every CodeSystem
+# + dbClient - Store client the codes are read with
+# + return - An error if the codes could not be read
+isolated function addCodeSystemsToFilter(int? codeSystemId, store:Client dbClient = sClient) returns error? {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT cs.`, escapeToQuery("url"), ` AS `, escapeToQuery("system"), `, c.`, escapeToQuery("code"),
+            ` FROM `, escapeToQuery("concepts"), ` c JOIN `, escapeToQuery("codesystems"), ` cs ON cs.`, escapeToQuery("codeSystemId"),
+            ` = c.`, escapeToQuery("codesystemCodeSystemId"),
+            codeSystemId is int ? sql:queryConcat(` WHERE cs.`, escapeToQuery("codeSystemId"), ` = ${codeSystemId}`) : ``
+    );
+    check addFilterEntries(sqlQuery, dbClient);
+}
+
+# Adds the codes of a stored ValueSet, as recorded in its membership index, to the membership filter.
+#
+# + valueSetId - Database id of the ValueSet, or nil for every ValueSet
+# + dbClient - Store client the codes are read with
+# + return - An error if the codes could not be read
+isolated function addValueSetsToFilter(int? valueSetId, store:Client dbClient = sClient) returns error? {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT vs.`, escapeToQuery("url"), ` AS `, escapeToQuery("system"), `, m.`, escapeToQuery("code"),
+            ` FROM `, escapeToQuery(CODE_MEMBERSHIPS_TABLE), ` m JOIN `, escapeToQuery("valuesets"), ` vs ON vs.`, escapeToQuery("valueSetId"),
+            ` = m.`, escapeToQuery("valueSetId"),
+            valueSetId is int ? sql:queryConcat(` WHERE vs.`, escapeToQuery("valueSetId"), ` = ${valueSetId}`) : ``
+    );
+    check addFilterEntries(sqlQuery, dbClient);
+}
+
+isolated function addFilterEntries(sql:ParameterizedQuery sqlQuery, store:Client dbClient) returns error? {
+    stream<CodeFilterEntry, persist:Error?> entryStream = dbClient->queryNativeSQL(sqlQuery);
+    check from CodeFilterEntry entry in entryStream
+        do {
+            codeMembershipFilter.add(entry.system, entry.code);
+        };
+}
+
+# Keeps the membership filter in step with a CodeSystem that was just stored. A filter that could not be
+# updated is disabled until it is rebuilt.
+#
+# + codeSystemId - Database id of the stored CodeSystem
+# + generation - Store generation of the write storing the CodeSystem
+# + return - An error if the filter could not be updated
+isolated function indexCodeSystemMemberships(int codeSystemId, int generation) returns error? {
+    int epoch = codeMembershipFilter.getEpoch();
+    error? added = addCodeSystemsToFilter(codeSystemId);
+    if added is () && codeMembershipFilter.isOverCapacity() {
+        added = rebuildCodeMembershipFilter();
+    } else if added is () {
+        codeMembershipFilter.advance(epoch, generation);
+    }
+    if added is error {
+        // a filter missing the new codes would reject them
+        codeMembershipFilter.disable();
+        return added;
+    }
+}
+
+# Builds the membership index of a ValueSet that is being stored. The ValueSets nesting any version of it are
+# indexed again, transitively, like their expansions are dropped by `invalidateNestingValueSetExpansions`. Their
+# index follows the nested ValueSets they were stored with, a version of the url stored later is only indexed
+# into ValueSets stored after it. Runs in the transaction storing the ValueSet, the membership filter is
+# updated by `indexValueSetMemberships` once it is committed.
+#
+# + valueSetId - Database id of the ValueSet being stored
+# + return - Database ids of the ValueSets whose index was built, or an error if the index could not be written
+isolated function rebuildValueSetMemberships(int valueSetId) returns int[]|error {
+    int[] valueSetIds = [valueSetId, ...check getNestingValueSetIdsByUrl(valueSetId)];
+    foreach int id in valueSetIds {
+        check rebuildCodeMemberships(id);
+    }
+    return valueSetIds;
+}
+
+# Keeps the membership filter in step with the membership index of ValueSets that were just stored. A filter
+# that could not be updated is disabled until it is rebuilt.
+#
+# + valueSetIds - Database ids of the ValueSets whose index was built
+# + generation - Store generation of the write storing the ValueSet
+# + return - An error if the filter could not be updated
+isolated function indexValueSetMemberships(int[] valueSetIds, int generation) returns error? {
+    int epoch = codeMembershipFilter.getEpoch();
+    error? added = ();
+    foreach int valueSetId in valueSetIds {
+        added = addValueSetsToFilter(valueSetId);
+        if added is error {
+            break;
+        }
+    }
+    if added is () && codeMembershipFilter.isOverCapacity() {
+        added = rebuildCodeMembershipFilter();
+    } else if added is () {
+        codeMembershipFilter.advance(epoch, generation);
+    }
+    if added is error {
+        // a filter missing the new codes would reject them
+        codeMembershipFilter.disable();
+        return added;
+    }
+}
+
+# Collects a ValueSet and every ValueSet it nests, at any depth.
+#
+# + valueSetId - Database id of the outermost ValueSet
+# + dbClient - Store client the ValueSets are read with
+# + return - Database ids of the ValueSet and its nested ValueSets or an error
+isolated function getValueSetWithNestedIds(int valueSetId, store:Client dbClient = sClient) returns int[]|error {
+    map<int> visited = {[valueSetId.toString()]: valueSetId};
+    int[] level = [valueSetId];
+
+    while level.length() > 0 {
+        sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+                `SELECT vcivs.`, escapeToQuery("valuesetValueSetId"), ` AS `, escapeToQuery("valueSetId"),
+                ` FROM `, escapeToQuery("valueset_compose_includes"), ` vci JOIN `, escapeToQuery("valueset_compose_include_value_sets"),
+                ` vcivs ON vcivs.`, escapeToQuery("valuesetcomposeValueSetComposeIncludeId"), ` = vci.`, escapeToQuery("valueSetComposeIncludeId"),
+                ` WHERE vci.`, escapeToQuery("valuesetValueSetId"), ` IN (`, sql:arrayFlattenQuery(level), `)`
+        );
+        int[] next = [];
+        foreach int nestedValueSetId in check queryValueSetIds(sqlQuery, dbClient) {
+            if !visited.hasKey(nestedValueSetId.toString()) {
+                visited[nestedValueSetId.toString()] = nestedValueSetId;
+                next.push(nestedValueSetId);
+            }
+        }
+        level = next;
+    }
+    return visited.toArray();
+}
+
+# Rebuilds the membership index of a ValueSet: one row for every concept it contains, listed, through a whole
+# CodeSystem or through nested ValueSets at any depth, so that finding a code in the ValueSet is one probe of
+# the (valueSetId, code) index.
+#
+# + valueSetId - Database id of the ValueSet
+# + dbClient - Store client the index is written with
+# + return - An error if the index could not be written
+isolated function rebuildCodeMemberships(int valueSetId, store:Client dbClient = sClient) returns error? {
+    sql:ParameterizedQuery valueSetIdList = sql:arrayFlattenQuery(check getValueSetWithNestedIds(valueSetId, dbClient));
+
+    _ = check dbClient->executeNativeSQL(sql:queryConcat(
+            `DELETE FROM `, escapeToQuery(CODE_MEMBERSHIPS_TABLE), ` WHERE `, escapeToQuery("valueSetId"), ` = ${valueSetId}`
+    ));
+    // the id is inlined, a bind parameter in a select list has no type on some dialects
+    _ = check dbClient->executeNativeSQL(sql:queryConcat(
+            `INSERT INTO `, escapeToQuery(CODE_MEMBERSHIPS_TABLE), ` (`, escapeToQuery("valueSetId"), `, `,
+            escapeToQuery("conceptId"), `, `, escapeToQuery("code"), `) SELECT `, stringToParameterizedQuery(valueSetId.toString()),
+            `, m.`, escapeToQuery("conceptId"), `, m.`, escapeToQuery("code"), ` FROM (`,
+            `SELECT c.`, escapeToQuery("conceptId"), `, c.`, escapeToQuery("code"),
+            ` FROM `, escapeToQuery("concepts"), ` c JOIN `, escapeToQuery("valueset_compose_include_concepts"), ` vcic ON vcic.`,
+            escapeToQuery("conceptConceptId"), ` = c.`, escapeToQuery("conceptId"),
+            ` JOIN `, escapeToQuery("valueset_compose_includes"), ` vci ON vci.`, escapeToQuery("valueSetComposeIncludeId"),
+            ` = vcic.`, escapeToQuery("valuesetcomposeValueSetComposeIncludeId"),
+            ` WHERE vci.`, escapeToQuery("valuesetValueSetId"), ` IN (`, valueSetIdList, `)`,
+            ` UNION SELECT c.`, escapeToQuery("conceptId"), `, c.`, escapeToQuery("code"),
+            ` FROM `, escapeToQuery("concepts"), ` c JOIN `, escapeToQuery("valueset_compose_includes"), ` vci ON vci.`,
+            escapeToQuery("codeSystemId"), ` = c.`, escapeToQuery("codesystemCodeSystemId"),
+            ` WHERE vci.`, escapeToQuery("valuesetValueSetId"), ` IN (`, valueSetIdList, `)) m`
+    ));
+}
+
+# Builds the membership index of every stored ValueSet and then the membership filter. Used when the index is
+# introduced on an existing database.
+#
+# + dbClient - Store client the index is written with
+# + return - An error if a ValueSet could not be indexed
+isolated function rebuildCodeMembershipIndex(store:Client dbClient = sClient) returns error? {
+    int[] valueSetIds = check queryValueSetIds(sql:queryConcat(
+            `SELECT `, escapeToQuery("valueSetId"), ` FROM `, escapeToQuery("valuesets"), ` ORDER BY `, escapeToQuery("valueSetId")
+    ), dbClient);
+    foreach int valueSetId in valueSetIds {
+        check rebuildCodeMemberships(valueSetId, dbClient);
+    }
+    log:printInfo("Code membership index rebuilt", valueSets = valueSetIds.length());
+    check rebuildCodeMembershipFilter(dbClient);
+}
+
+# Finds the ValueSets nesting any version of a ValueSet, directly or through other nested ValueSets.
+#
+# + valueSetId - Database id of the ValueSet
+# + return - Database ids of the nesting ValueSets or an error
+isolated function getNestingValueSetIdsByUrl(int valueSetId) returns int[]|error {
+    int[] pending = check queryValueSetIds(sql:queryConcat(
+            `SELECT v.`, escapeToQuery("valueSetId"), ` FROM `, escapeToQuery("valuesets"), ` v JOIN `, escapeToQuery("valuesets"),
+            ` s ON s.`, escapeToQuery("url"), ` = v.`, escapeToQuery("url"), ` WHERE s.`, escapeToQuery("valueSetId"), ` = ${valueSetId}`
+    ));
+    map<int> visited = {[valueSetId.toString()]: valueSetId};
+    int[] nesting = [];
+    while pending.length() > 0 {
+        int[] next = [];
+        foreach int id in pending {
+            foreach int nestingValueSetId in check getNestingValueSetIds(id) {
+                if !visited.hasKey(nestingValueSetId.toString()) {
+                    visited[nestingValueSetId.toString()] = nestingValueSetId;
+                    nesting.push(nestingValueSetId);
+                    next.push(nestingValueSetId);
+                }
+            }
+        }
+        pending = next;
+    }
+    return nesting;
+}
+
+# Finds the ValueSets containing a concept, directly or through nested ValueSets.
+#
+# + conceptId - Database id of the concept
+# + return - Database ids of the containing ValueSets or an error
+isolated function getContainingValueSetIds(int conceptId) returns int[]|error {
+    return queryValueSetIds(sql:queryConcat(
+            `SELECT `, escapeToQuery("valueSetId"), ` FROM `, escapeToQuery(CODE_MEMBERSHIPS_TABLE),
+            ` WHERE `, escapeToQuery("conceptId"), ` = ${conceptId} ORDER BY `, escapeToQuery("valueSetId")
+    ));
+}
@@ -0,0 +1,118 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.concept_chunks;
+
+import ballerina/http;
+import ballerina/log;
+import ballerina/time;
+import ballerinax/health.fhir.r4;
+
+# Reads the concepts of a CodeSystem from its source files and hands them to `consume` in chunks.
+type ConceptChunkProducer isolated function (concept_chunks:ConceptChunkConsumer consume) returns error?;
+
+# How the concepts handed to a chunk consumer are related to each other.
+enum ConceptHierarchy {
+    # Child concepts are nested in the `concept` element of their parent
+    NESTED_CONCEPTS,
+    # Concepts name their parents in `parent` properties, every parent comes before its children
+    PARENT_PROPERTIES
+}
+
+# Running totals of a chunked CodeSystem import, shared with the chunk consumer.
+isolated class ImportProgress {
+    private int conceptCount = 0;
+    private int levelCount = 0;
+
+    isolated function add(ConceptIngestionSummary chunk) returns int {
+        lock {
+            self.conceptCount += chunk.conceptCount;
+            self.levelCount = int:max(self.levelCount, chunk.levelCount);
+            return self.conceptCount;
+        }
+    }
+
+    isolated function getConceptCount() returns int {
+        lock {
+            return self.conceptCount;
+        }
+    }
+
+    isolated function getLevelCount() returns int {
+        lock {
+            return self.levelCount;
+        }
+    }
+}
+
+# Stores a CodeSystem whose concepts are too many to hold in memory at once. The resource itself is stored
+# without concepts, then every chunk supplied by `produce` is written through the regular concept ingestion,
+# so peak memory is bounded by the chunk size. The CodeSystem and all chunks are written in one transaction.
+#
+# + codeSystem - CodeSystem resource, without concepts
+# + produce - Function supplying the concepts, in chunks of top level concepts
+# + hierarchy - How the supplied concepts are related to each other
+# + return - Ingestion summary or an error if the CodeSystem could not be stored
+isolated function importCodeSystemInChunks(r4:CodeSystem codeSystem, ConceptChunkProducer produce,
+        ConceptHierarchy hierarchy = NESTED_CONCEPTS) returns ConceptIngestionSummary|r4:FHIRError {
+    decimal startTime = time:monotonicNow();
+    final string label = string `${codeSystem.url ?: ""}|${codeSystem.version ?: ""}`;
+    final ImportProgress progress = new;
+
+    transaction {
+        int[] codeSystemIds = check sClient->/codesystems.post([check codeSystemToInsert(codeSystem)]);
+        final int codeSystemId = codeSystemIds[0];
+
+        check produce(isolated function(r4:CodeSystemConcept[] concepts) returns error? {
+            ConceptIngestionSummary chunk = hierarchy == PARENT_PROPERTIES
+                ? check ingestConceptGraphChunk(concepts, codeSystemId)
+                : check ingestCodeSystemConcepts(concepts, codeSystemId);
+            log:printInfo(string `CodeSystem ${label} import in progress`,
+                    concepts = progress.add(chunk),
+                    rowsPerSecond = chunk.rowsPerSecond);
+        });
+        check saveResourceVersion(RESOURCE_VERSION_CODESYSTEM, codeSystemId, label);
+        int generation = check advanceStoreGeneration();
+        check commit;
+
+        decimal elapsedSeconds = time:monotonicNow() - startTime;
+        int conceptCount = progress.getConceptCount();
+        ConceptIngestionSummary summary = {
+            codeSystemId,
+            conceptCount,
+            levelCount: progress.getLevelCount(),
+            elapsedSeconds,
+            rowsPerSecond: elapsedSeconds > 0d ? <int>(<decimal>conceptCount / elapsedSeconds) : conceptCount
+        };
+        logConceptIngestionSummary(label, summary);
+        error? indexed = indexCodeSystemMemberships(codeSystemId, generation);
+        if indexed is error {
+            log:printWarn("Code membership filter disabled, CodeSystem codes not added", indexed);
+        }
+
+        r4:FHIRError? invalidated = invalidateCodeSystem(codeSystem);
+        if invalidated is r4:FHIRError {
+            return invalidated;
+        }
+        return summary;
+    } on fail error e {
+        return r4:createFHIRError(
+                "Error while adding CodeSystem, " + e.message(),
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = e,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+}
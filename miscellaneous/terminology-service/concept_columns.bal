@@ -0,0 +1,477 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.store;
+
+import ballerina/log;
+import ballerina/persist;
+import ballerina/sql;
+import ballerinax/health.fhir.r4;
+
+// rows per INSERT statement, kept low enough to stay below the bind parameter limit of every dialect
+const CONCEPT_COLUMNS_INSERT_CHUNK_SIZE = 125;
+
+// concepts read per query while rebuilding the columns
+const CONCEPT_COLUMNS_REBUILD_BATCH_SIZE = 1000;
+
+// Type of a property value, named after the `value[x]` choice it came from
+const PROPERTY_VALUE_CODE = "code";
+const PROPERTY_VALUE_CODING = "Coding";
+const PROPERTY_VALUE_STRING = "string";
+const PROPERTY_VALUE_INTEGER = "integer";
+const PROPERTY_VALUE_BOOLEAN = "boolean";
+const PROPERTY_VALUE_DATE_TIME = "dateTime";
+const PROPERTY_VALUE_DECIMAL = "decimal";
+
+// Concept properties that carry the status of a concept
+const STATUS_PROPERTY = "status";
+const INACTIVE_PROPERTY = "inactive";
+const INACTIVE_STATUS = "inactive";
+
+// Concept property naming a parent of the concept, for concepts with more than one parent
+const PARENT_PROPERTY = "parent";
+
+// Concept fields the columns represent, anything else is only kept in the JSON document
+final readonly & string[] columnarConceptFields = ["code", "display", "definition", "property", "designation", "concept"];
+
+# Writes the status, properties and designations of a batch of freshly inserted concepts to their columns.
+# A concept whose content can not be rebuilt exactly from the columns (extensions, element ids, property
+# values without a type) is flagged opaque, so that readers fall back to its JSON document.
+#
+# + concepts - Concepts of the batch
+# + conceptIds - Generated ids of the concepts, in the same order
+# + codeSystemId - Database id of the CodeSystem the concepts belong to
+# + dbClient - Store client of the database holding the columns
+# + return - An error if the rows could not be written
+isolated function saveConceptColumnsBatch(r4:CodeSystemConcept[] concepts, int[] conceptIds, int codeSystemId, store:Client dbClient = sClient) returns error? {
+    sql:ParameterizedQuery[] attributeRows = [];
+    sql:ParameterizedQuery[] propertyRows = [];
+    sql:ParameterizedQuery[] designationRows = [];
+
+    foreach int i in 0 ..< concepts.length() {
+        r4:CodeSystemConcept concept = concepts[i];
+        int conceptId = conceptIds[i];
+
+        ConceptPropertyRow[] properties = getConceptPropertyRows(concept, conceptId);
+        ConceptDesignationRow[] designations = getConceptDesignationRows(concept, conceptId);
+        boolean opaque = !isColumnarConcept(concept, check buildConceptFromColumns(concept.code, (), (), properties, designations));
+
+        attributeRows.push(`(${conceptId}, ${codeSystemId}, ${getConceptStatus(concept)}, ${properties.length()}, ${designations.length()}, ${opaque})`);
+        foreach ConceptPropertyRow row in properties {
+            propertyRows.push(`(${conceptId}, ${codeSystemId}, ${row.code}, ${row.valueType}, ${row.value}, ${row.valueSystem}, ${row.valueDisplay})`);
+        }
+        foreach ConceptDesignationRow row in designations {
+            designationRows.push(`(${conceptId}, ${codeSystemId}, ${row.language}, ${row.useSystem}, ${row.useCode}, ${row.useDisplay}, ${row.value})`);
+        }
+    }
+
+    check insertConceptColumnRows(dbClient, CONCEPT_ATTRIBUTES_TABLE,
+            ["conceptId", "codeSystemId", "status", "propertyCount", "designationCount", "opaque"], attributeRows);
+    check insertConceptColumnRows(dbClient, CONCEPT_PROPERTIES_TABLE,
+            ["conceptId", "codeSystemId", "code", "valueType", "value", "valueSystem", "valueDisplay"], propertyRows);
+    check insertConceptColumnRows(dbClient, CONCEPT_DESIGNATIONS_TABLE,
+            ["conceptId", "codeSystemId", "language", "useSystem", "useCode", "useDisplay", "value"], designationRows);
+}
+
+isolated function insertConceptColumnRows(store:Client dbClient, string tableName, string[] columns, sql:ParameterizedQuery[] rows) returns error? {
+    sql:ParameterizedQuery[] columnList = [];
+    foreach int i in 0 ..< columns.length() {
+        if i > 0 {
+            columnList.push(`, `);
+        }
+        columnList.push(escapeToQuery(columns[i]));
+    }
+
+    int chunkStart = 0;
+    while chunkStart < rows.length() {
+        int chunkEnd = int:min(chunkStart + CONCEPT_COLUMNS_INSERT_CHUNK_SIZE, rows.length());
+
+        sql:ParameterizedQuery[] queryParts = [`INSERT INTO `, escapeToQuery(tableName), ` (`, ...columnList, `) VALUES `];
+        foreach int i in chunkStart ..< chunkEnd {
+            if i > chunkStart {
+                queryParts.push(`, `);
+            }
+            queryParts.push(rows[i]);
+        }
+        _ = check dbClient->executeNativeSQL(sql:queryConcat(...queryParts));
+
+        chunkStart = chunkEnd;
+    }
+}
+
+# Fills the concept columns from the JSON documents of every concept already in the store. Used when the
+# columns are introduced on an existing database.
+#
+# + dbClient - Store client of the database to fill
+# + return - An error if the concepts could not be read or written
+isolated function rebuildConceptColumns(store:Client dbClient = sClient) returns error? {
+    foreach string tableName in [CONCEPT_ATTRIBUTES_TABLE, CONCEPT_PROPERTIES_TABLE, CONCEPT_DESIGNATIONS_TABLE] {
+        _ = check dbClient->executeNativeSQL(sql:queryConcat(`DELETE FROM `, escapeToQuery(tableName)));
+    }
+
+    int lastConceptId = 0;
+    int rebuiltCount = 0;
+    while true {
+        sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+                `SELECT `, escapeToQuery("conceptId"), `, `, escapeToQuery("codesystemCodeSystemId"), ` AS `, escapeToQuery("codeSystemId"),
+                `, `, escapeToQuery("concept"), ` FROM `, escapeToQuery("concepts"),
+                ` WHERE `, escapeToQuery("conceptId"), ` > ${lastConceptId} ORDER BY `, escapeToQuery("conceptId"), ` `,
+                getLimitClause(CONCEPT_COLUMNS_REBUILD_BATCH_SIZE, 0)
+        );
+        stream<ConceptDocument, persist:Error?> documentStream = dbClient->queryNativeSQL(sqlQuery);
+        ConceptDocument[] documents = check from ConceptDocument document in documentStream
+            select document;
+        if documents.length() == 0 {
+            break;
+        }
+
+        // a batch may span CodeSystems, the rows of each CodeSystem are written together
+        map<[r4:CodeSystemConcept[], int[]]> byCodeSystem = {};
+        foreach ConceptDocument document in documents {
+            string key = document.codeSystemId.toString();
+            [r4:CodeSystemConcept[], int[]] group = byCodeSystem[key] ?: [[], []];
+            group[0].push(check byteToConcept(document.concept));
+            group[1].push(document.conceptId);
+            byCodeSystem[key] = group;
+        }
+        foreach [string, [r4:CodeSystemConcept[], int[]]] [codeSystemId, [concepts, conceptIds]] in byCodeSystem.entries() {
+            check saveConceptColumnsBatch(concepts, conceptIds, check int:fromString(codeSystemId), dbClient);
+        }
+
+        lastConceptId = documents[documents.length() - 1].conceptId;
+        rebuiltCount += documents.length();
+    }
+    log:printInfo("Concept columns rebuilt", concepts = rebuiltCount);
+}
+
+# Status of a concept, taken from its `status` property, or `inactive` when its `inactive` property is true.
+#
+# + concept - Concept to read the status of
+# + return - Status code, or nil if the concept has none
+isolated function getConceptStatus(r4:CodeSystemConcept concept) returns string? {
+    boolean inactive = false;
+    foreach r4:CodeSystemConceptProperty property in concept.property ?: [] {
+        if property.code.toLowerAscii() == STATUS_PROPERTY {
+            string? status = property.valueCode ?: property.valueString ?: property.valueCoding?.code;
+            if status is string {
+                return status;
+            }
+        } else if property.code.toLowerAscii() == INACTIVE_PROPERTY && property.valueBoolean == true {
+            inactive = true;
+        }
+    }
+    return inactive ? INACTIVE_STATUS : ();
+}
+
+isolated function getConceptPropertyRows(r4:CodeSystemConcept concept, int conceptId) returns ConceptPropertyRow[] {
+    ConceptPropertyRow[] rows = [];
+    foreach r4:CodeSystemConceptProperty property in concept.property ?: [] {
+        ConceptPropertyRow row = {conceptId, code: property.code, valueType: PROPERTY_VALUE_STRING, value: ""};
+        r4:Coding? coding = property.valueCoding;
+        if property.valueCode is string {
+            row.valueType = PROPERTY_VALUE_CODE;
+            row.value = <string>property.valueCode;
+        } else if coding is r4:Coding {
+            row.valueType = PROPERTY_VALUE_CODING;
+            row.value = coding.code ?: "";
+            row.valueSystem = coding.system;
+            row.valueDisplay = coding.display;
+        } else if property.valueString is string {
+            row.value = <string>property.valueString;
+        } else if property.valueInteger is int {
+            row.valueType = PROPERTY_VALUE_INTEGER;
+            row.value = (<int>property.valueInteger).toString();
+        } else if property.valueBoolean is boolean {
+            row.valueType = PROPERTY_VALUE_BOOLEAN;
+            row.value = (<boolean>property.valueBoolean).toString();
+        } else if property.valueDateTime is string {
+            row.valueType = PROPERTY_VALUE_DATE_TIME;
+            row.value = <string>property.valueDateTime;
+        } else if property.valueDecimal is decimal {
+            row.valueType = PROPERTY_VALUE_DECIMAL;
+            row.value = (<decimal>property.valueDecimal).toString();
+        } else {
+            // no value, the concept is flagged opaque as the rebuilt property will not match
+            continue;
+        }
+        rows.push(row);
+    }
+    return rows;
+}
+
+isolated function getConceptDesignationRows(r4:CodeSystemConcept concept, int conceptId) returns ConceptDesignationRow[] {
+    ConceptDesignationRow[] rows = [];
+    foreach r4:CodeSystemConceptDesignation designation in concept.designation ?: [] {
+        r4:Coding? designationUse = designation.use;
+        rows.push({
+            conceptId,
+            language: designation.language,
+            useSystem: designationUse is r4:Coding ? designationUse.system : (),
+            useCode: designationUse is r4:Coding ? designationUse.code : (),
+            useDisplay: designationUse is r4:Coding ? designationUse.display : (),
+            value: designation.value
+        });
+    }
+    return rows;
+}
+
+# Builds a concept from its columns. `property` and `designation` are only set when there are rows for them.
+#
+# + code - Code of the concept
+# + display - Display of the concept
+# + definition - Definition of the concept
+# + properties - Property rows of the concept, in insertion order
+# + designations - Designation rows of the concept, in insertion order
+# + return - The concept or an error if a property value does not match its type
+isolated function buildConceptFromColumns(string code, string? display, string? definition,
+        ConceptPropertyRow[] properties, ConceptDesignationRow[] designations) returns r4:CodeSystemConcept|error {
+    r4:CodeSystemConcept concept = {code};
+    if display is string {
+        concept.display = display;
+    }
+    if definition is string {
+        concept.definition = definition;
+    }
+
+    if properties.length() > 0 {
+        r4:CodeSystemConceptProperty[] conceptProperties = [];
+        foreach ConceptPropertyRow row in properties {
+            r4:CodeSystemConceptProperty property = {code: row.code};
+            match row.valueType {
+                PROPERTY_VALUE_CODE => {
+                    property.valueCode = row.value;
+                }
+                PROPERTY_VALUE_CODING => {
+                    r4:Coding coding = {code: row.value};
+                    string? valueSystem = row.valueSystem;
+                    if valueSystem is string {
+                        coding.system = valueSystem;
+                    }
+                    string? valueDisplay = row.valueDisplay;
+                    if valueDisplay is string {
+                        coding.display = valueDisplay;
+                    }
+                    property.valueCoding = coding;
+                }
+                PROPERTY_VALUE_INTEGER => {
+                    property.valueInteger = check int:fromString(row.value);
+                }
+                PROPERTY_VALUE_BOOLEAN => {
+                    property.valueBoolean = row.value == "true";
+                }
+                PROPERTY_VALUE_DATE_TIME => {
+                    property.valueDateTime = row.value;
+                }
+                PROPERTY_VALUE_DECIMAL => {
+                    property.valueDecimal = check decimal:fromString(row.value);
+                }
+                _ => {
+                    property.valueString = row.value;
+                }
+            }
+            conceptProperties.push(property);
+        }
+        concept.property = conceptProperties;
+    }
+
+    if designations.length() > 0 {
+        r4:CodeSystemConceptDesignation[] conceptDesignations = [];
+        foreach ConceptDesignationRow row in designations {
+            r4:CodeSystemConceptDesignation designation = {value: row.value};
+            string? language = row.language;
+            if language is string {
+                designation.language = language;
+            }
+            [string?, string?, string?] [useSystem, useCode, useDisplay] = [row.useSystem, row.useCode, row.useDisplay];
+            if useSystem is string || useCode is string || useDisplay is string {
+                r4:Coding designationUse = {};
+                if useSystem is string {
+                    designationUse.system = useSystem;
+                }
+                if useCode is string {
+                    designationUse.code = useCode;
+                }
+                if useDisplay is string {
+                    designationUse.display = useDisplay;
+                }
+                designation.use = designationUse;
+            }
+            conceptDesignations.push(designation);
+        }
+        concept.designation = conceptDesignations;
+    }
+    return concept;
+}
+
+isolated function isColumnarConcept(r4:CodeSystemConcept concept, r4:CodeSystemConcept columnar) returns boolean {
+    foreach string 'field in concept.keys() {
+        if columnarConceptFields.indexOf('field) is () {
+            return false;
+        }
+    }
+    return concept.property == columnar.property && concept.designation == columnar.designation;
+}
+
+# Select list of a concept read through its columns, for queries on `concepts` aliased as `c`.
+# The attributes are left joined, so concepts without columns are still found and read from their JSON.
+#
+# + return - `SELECT ... FROM` clause, to be followed by joins and a `WHERE` clause
+isolated function selectConceptColumns() returns sql:ParameterizedQuery {
+    return sql:queryConcat(
+            `SELECT c.`, escapeToQuery("conceptId"), `, c.`, escapeToQuery("code"), `, c.`, escapeToQuery("display"), `, c.`, escapeToQuery("definition"),
+            `, ca.`, escapeToQuery("propertyCount"), `, ca.`, escapeToQuery("designationCount"), `, ca.`, escapeToQuery("opaque"),
+            ` FROM `, escapeToQuery("concepts"), ` c LEFT JOIN `, escapeToQuery(CONCEPT_ATTRIBUTES_TABLE), ` ca ON ca.`, escapeToQuery("conceptId"), ` = c.`, escapeToQuery("conceptId")
+    );
+}
+
+# Reads the concept columns matched by a query built on `selectConceptColumns`.
+#
+# + sqlQuery - Query selecting the concept
+# + return - The first matching concept, nil if none matched, or an error
+isolated function getConceptColumns(sql:ParameterizedQuery sqlQuery) returns ConceptColumns|error? {
+    stream<ConceptColumns, persist:Error?> conceptStream = sClient->queryNativeSQL(sqlQuery);
+    ConceptColumns[] concepts = check from ConceptColumns concept in conceptStream
+        limit 1
+        select concept;
+    return concepts.length() > 0 ? concepts[0] : ();
+}
+
+# Materializes a concept read through its columns. Properties and designations are read from their tables
+# only when the concept has any, and the JSON document is decoded only for concepts flagged opaque or
+# stored before the columns existed.
+#
+# + row - Columns of the concept
+# + return - The concept or an error
+isolated function toCodeSystemConcept(ConceptColumns row) returns r4:CodeSystemConcept|error {
+    if row.opaque is () || row.opaque == true {
+        sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+                `SELECT `, escapeToQuery("concept"), ` FROM `, escapeToQuery("concepts"), ` WHERE `, escapeToQuery("conceptId"), ` = ${row.conceptId}`
+        );
+        stream<ConceptBytes, persist:Error?> conceptStream = sClient->queryNativeSQL(sqlQuery);
+        ConceptBytes[] documents = check from ConceptBytes document in conceptStream
+            select document;
+        if documents.length() == 0 {
+            return error(string `Concept ${row.conceptId} not found`);
+        }
+        return byteToConcept(documents[0].concept);
+    }
+
+    ConceptPropertyRow[] properties = [];
+    if (row.propertyCount ?: 0) > 0 {
+        stream<ConceptPropertyRow, persist:Error?> propertyStream = sClient->queryNativeSQL(sql:queryConcat(
+                `SELECT `, escapeToQuery("conceptId"), `, `, escapeToQuery("code"), `, `, escapeToQuery("valueType"), `, `, escapeToQuery("value"),
+                `, `, escapeToQuery("valueSystem"), `, `, escapeToQuery("valueDisplay"), ` FROM `, escapeToQuery(CONCEPT_PROPERTIES_TABLE),
+                ` WHERE `, escapeToQuery("conceptId"), ` = ${row.conceptId} ORDER BY `, escapeToQuery("conceptPropertyId")
+        ));
+        properties = check from ConceptPropertyRow property in propertyStream
+            select property;
+    }
+
+    ConceptDesignationRow[] designations = [];
+    if (row.designationCount ?: 0) > 0 {
+        stream<ConceptDesignationRow, persist:Error?> designationStream = sClient->queryNativeSQL(sql:queryConcat(
+                `SELECT `, escapeToQuery("conceptId"), `, `, escapeToQuery("language"), `, `, escapeToQuery("useSystem"), `, `, escapeToQuery("useCode"),
+                `, `, escapeToQuery("useDisplay"), `, `, escapeToQuery("value"), ` FROM `, escapeToQuery(CONCEPT_DESIGNATIONS_TABLE),
+                ` WHERE `, escapeToQuery("conceptId"), ` = ${row.conceptId} ORDER BY `, escapeToQuery("conceptDesignationId")
+        ));
+        designations = check from ConceptDesignationRow designation in designationStream
+            select designation;
+    }
+
+    return buildConceptFromColumns(row.code, row.display, row.definition, properties, designations);
+}
+
+# Materializes many concepts read through their columns, like `toCodeSystemConcept` but with one query for the
+# properties, one for the designations and one for the JSON documents of all of them.
+#
+# + rows - Columns of the concepts, at most `CONCEPT_LOOKUP_CHUNK_SIZE`
+# + return - The concepts, in the order of `rows`, or an error
+isolated function toCodeSystemConcepts(ConceptColumns[] rows) returns r4:CodeSystemConcept[]|error {
+    int[] documentIds = [];
+    int[] propertyIds = [];
+    int[] designationIds = [];
+    foreach ConceptColumns row in rows {
+        if row.opaque is () || row.opaque == true {
+            documentIds.push(row.conceptId);
+        } else {
+            if (row.propertyCount ?: 0) > 0 {
+                propertyIds.push(row.conceptId);
+            }
+            if (row.designationCount ?: 0) > 0 {
+                designationIds.push(row.conceptId);
+            }
+        }
+    }
+
+    map<byte[]> documents = {};
+    if documentIds.length() > 0 {
+        stream<ConceptDocument, persist:Error?> documentStream = sClient->queryNativeSQL(sql:queryConcat(
+                `SELECT `, escapeToQuery("conceptId"), `, `, escapeToQuery("codesystemCodeSystemId"), ` AS `, escapeToQuery("codeSystemId"),
+                `, `, escapeToQuery("concept"), ` FROM `, escapeToQuery("concepts"),
+                ` WHERE `, escapeToQuery("conceptId"), ` IN (`, sql:arrayFlattenQuery(documentIds), `)`
+        ));
+        check from ConceptDocument document in documentStream
+            do {
+                documents[document.conceptId.toString()] = document.concept;
+            };
+    }
+
+    map<ConceptPropertyRow[]> properties = {};
+    if propertyIds.length() > 0 {
+        stream<ConceptPropertyRow, persist:Error?> propertyStream = sClient->queryNativeSQL(sql:queryConcat(
+                `SELECT `, escapeToQuery("conceptId"), `, `, escapeToQuery("code"), `, `, escapeToQuery("valueType"), `, `, escapeToQuery("value"),
+                `, `, escapeToQuery("valueSystem"), `, `, escapeToQuery("valueDisplay"), ` FROM `, escapeToQuery(CONCEPT_PROPERTIES_TABLE),
+                ` WHERE `, escapeToQuery("conceptId"), ` IN (`, sql:arrayFlattenQuery(propertyIds), `) ORDER BY `,
+                escapeToQuery("conceptId"), `, `, escapeToQuery("conceptPropertyId")
+        ));
+        check from ConceptPropertyRow property in propertyStream
+            do {
+                ConceptPropertyRow[] conceptProperties = properties[property.conceptId.toString()] ?: [];
+                conceptProperties.push(property);
+                properties[property.conceptId.toString()] = conceptProperties;
+            };
+    }
+
+    map<ConceptDesignationRow[]> designations = {};
+    if designationIds.length() > 0 {
+        stream<ConceptDesignationRow, persist:Error?> designationStream = sClient->queryNativeSQL(sql:queryConcat(
+                `SELECT `, escapeToQuery("conceptId"), `, `, escapeToQuery("language"), `, `, escapeToQuery("useSystem"), `, `, escapeToQuery("useCode"),
+                `, `, escapeToQuery("useDisplay"), `, `, escapeToQuery("value"), ` FROM `, escapeToQuery(CONCEPT_DESIGNATIONS_TABLE),
+                ` WHERE `, escapeToQuery("conceptId"), ` IN (`, sql:arrayFlattenQuery(designationIds), `) ORDER BY `,
+                escapeToQuery("conceptId"), `, `, escapeToQuery("conceptDesignationId")
+        ));
+        check from ConceptDesignationRow designation in designationStream
+            do {
+                ConceptDesignationRow[] conceptDesignations = designations[designation.conceptId.toString()] ?: [];
+                conceptDesignations.push(designation);
+                designations[designation.conceptId.toString()] = conceptDesignations;
+            };
+    }
+
+    r4:CodeSystemConcept[] concepts = [];
+    foreach ConceptColumns row in rows {
+        byte[]? document = documents[row.conceptId.toString()];
+        if row.opaque is () || row.opaque == true {
+            if document is () {
+                return error(string `Concept ${row.conceptId} not found`);
+            }
+            concepts.push(check byteToConcept(document));
+        } else {
+            concepts.push(check buildConceptFromColumns(row.code, row.display, row.definition,
+                    properties[row.conceptId.toString()] ?: [], designations[row.conceptId.toString()] ?: []));
+        }
+    }
+    return concepts;
+}
@@ -0,0 +1,328 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.store;
+
+import ballerina/log;
+import ballerina/persist;
+import ballerina/sql;
+import ballerina/time;
+import ballerinax/health.fhir.r4;
+
+# Writes the concept tree of a CodeSystem level by level, in batches of `concept_batch_size`.
+# The generated ids of one level are the parent ids of the next level, so parents are resolved
+# without per-row lookups. The ancestry closure of every concept (see `concept_closure`), its text
+# index entries and its status, property and designation columns are written alongside each batch,
+# the closure from the ancestor chain carried down from the previous level. Callers are expected to run this inside a transaction, so that a
+# failure leaves no partially imported CodeSystem behind.
+#
+# + concepts - Top level concepts of the CodeSystem
+# + codeSystemId - Database id of the CodeSystem the concepts belong to
+# + return - Ingestion summary or an error if a batch could not be written
+isolated function ingestCodeSystemConcepts(r4:CodeSystemConcept[] concepts, int codeSystemId) returns ConceptIngestionSummary|error {
+    decimal startTime = time:monotonicNow();
+    int conceptCount = 0;
+    int levelCount = 0;
+
+    PendingConcept[] level = from r4:CodeSystemConcept concept in concepts
+        select {concept, parentId: ()};
+
+    while level.length() > 0 {
+        PendingConcept[] nextLevel = [];
+
+        int batchStart = 0;
+        while batchStart < level.length() {
+            PendingConcept[] batch = level.slice(batchStart, int:min(batchStart + concept_batch_size, level.length()));
+            int[] conceptIds = check saveCodeSystemConceptBatch(batch, codeSystemId);
+            check saveConceptClosureBatch(batch, conceptIds, codeSystemId);
+            check saveConceptTextIndex(from int i in 0 ..< batch.length()
+                select {
+                    conceptId: conceptIds[i],
+                    codeSystemId,
+                    display: batch[i].concept.display,
+                    definition: batch[i].concept.definition
+                });
+            check saveConceptColumnsBatch(from PendingConcept pending in batch
+                select pending.concept, conceptIds, codeSystemId);
+
+            foreach int i in 0 ..< batch.length() {
+                r4:CodeSystemConcept[]? children = batch[i].concept.concept;
+                if children is r4:CodeSystemConcept[] {
+                    int[] ancestorIds = [conceptIds[i], ...batch[i].ancestorIds];
+                    foreach r4:CodeSystemConcept child in children {
+                        nextLevel.push({concept: child, parentId: conceptIds[i], ancestorIds});
+                    }
+                }
+            }
+            batchStart += concept_batch_size;
+        }
+
+        conceptCount += level.length();
+        levelCount += 1;
+        level = nextLevel;
+    }
+
+    decimal elapsedSeconds = time:monotonicNow() - startTime;
+    return {
+        codeSystemId,
+        conceptCount,
+        levelCount,
+        elapsedSeconds,
+        rowsPerSecond: elapsedSeconds > 0d ? <int>(<decimal>conceptCount / elapsedSeconds) : conceptCount
+    };
+}
+
+isolated function saveCodeSystemConceptBatch(PendingConcept[] batch, int codeSystemId) returns int[]|error {
+    store:ConceptInsert[] dbConceptInserts = [];
+    foreach PendingConcept pending in batch {
+        dbConceptInserts.push({
+            code: pending.concept.code,
+            display: pending.concept.display,
+            definition: pending.concept.definition,
+            concept: conceptToByte(pending.concept),
+            codesystemCodeSystemId: codeSystemId,
+            parentConceptId: pending.parentId
+        });
+    }
+
+    int[] conceptIds = check sClient->/concepts.post(dbConceptInserts);
+    if conceptIds.length() != dbConceptInserts.length() {
+        return error(string `Expected ${dbConceptInserts.length()} generated concept ids but received ${conceptIds.length()}`);
+    }
+    return conceptIds;
+}
+
+// rows per INSERT statement, kept low enough to stay below the bind parameter limit of every dialect
+const CLOSURE_INSERT_CHUNK_SIZE = 250;
+
+# Writes the closure rows of a batch of freshly inserted concepts: one self row (depth 0) per concept
+# and one row per ancestor, with the distance to that ancestor as depth.
+#
+# + batch - Concepts of the batch, with their ancestor chains
+# + conceptIds - Generated ids of the concepts in the batch, in the same order
+# + codeSystemId - Database id of the CodeSystem the concepts belong to
+# + return - An error if the rows could not be written
+isolated function saveConceptClosureBatch(PendingConcept[] batch, int[] conceptIds, int codeSystemId) returns error? {
+    ConceptClosure[] rows = [];
+    foreach int i in 0 ..< batch.length() {
+        rows.push({ancestorConceptId: conceptIds[i], descendantConceptId: conceptIds[i], depth: 0});
+        foreach int j in 0 ..< batch[i].ancestorIds.length() {
+            rows.push({ancestorConceptId: batch[i].ancestorIds[j], descendantConceptId: conceptIds[i], depth: j + 1});
+        }
+    }
+
+    return insertConceptClosureRows(rows, codeSystemId);
+}
+
+isolated function insertConceptClosureRows(ConceptClosure[] rows, int codeSystemId) returns error? {
+    int chunkStart = 0;
+    while chunkStart < rows.length() {
+        ConceptClosure[] chunk = rows.slice(chunkStart, int:min(chunkStart + CLOSURE_INSERT_CHUNK_SIZE, rows.length()));
+
+        sql:ParameterizedQuery[] queryParts = [
+            `INSERT INTO `, escapeToQuery(CONCEPT_CLOSURE_TABLE), ` (`,
+            escapeToQuery("ancestorConceptId"), `, `, escapeToQuery("descendantConceptId"), `, `,
+            escapeToQuery("depth"), `, `, escapeToQuery("codeSystemId"), `) VALUES `
+        ];
+        foreach int i in 0 ..< chunk.length() {
+            ConceptClosure row = chunk[i];
+            if i > 0 {
+                queryParts.push(`, `);
+            }
+            queryParts.push(`(${row.ancestorConceptId}, ${row.descendantConceptId}, ${row.depth}, ${codeSystemId})`);
+        }
+        _ = check sClient->executeNativeSQL(sql:queryConcat(...queryParts));
+
+        chunkStart += CLOSURE_INSERT_CHUNK_SIZE;
+    }
+}
+
+// codes or ids per lookup query, kept below the bind parameter limit of every dialect
+const CONCEPT_LOOKUP_CHUNK_SIZE = 1000;
+
+# Writes a chunk of concepts that name their parents through `parent` properties instead of nesting them,
+# as in poly-hierarchies where a concept can have more than one parent. The parents of every concept must come
+# before it, in an earlier chunk or earlier in the same chunk. Parent ids and the closure rows of parents from
+# earlier chunks are read with one query per chunk of codes, the closure rows of a concept are derived from
+# those of its parents, keeping the shortest distance to every ancestor. A batch ends early at a concept whose
+# parent is in the same batch, so chunks ordered by level are written in about one batch per level. The first
+# parent is stored as `parentConceptId`. Callers are expected to run this inside a transaction.
+#
+# + concepts - Concepts of the chunk, parents before their children
+# + codeSystemId - Database id of the CodeSystem the concepts belong to
+# + return - Ingestion summary or an error if a parent is missing or a batch could not be written
+isolated function ingestConceptGraphChunk(r4:CodeSystemConcept[] concepts, int codeSystemId) returns ConceptIngestionSummary|error {
+    decimal startTime = time:monotonicNow();
+
+    map<()> chunkCodes = {};
+    foreach r4:CodeSystemConcept concept in concepts {
+        chunkCodes[concept.code] = ();
+    }
+    map<()> parentCodes = {};
+    map<()> storedParentCodes = {};
+    foreach r4:CodeSystemConcept concept in concepts {
+        foreach string parentCode in getParentCodes(concept) {
+            parentCodes[parentCode] = ();
+            if !chunkCodes.hasKey(parentCode) {
+                storedParentCodes[parentCode] = ();
+            }
+        }
+    }
+    map<int> parentIds = check getConceptIdsByCode(storedParentCodes.keys(), codeSystemId);
+    map<map<int>> parentAncestry = check getConceptAncestry(parentIds.toArray());
+
+    int batchStart = 0;
+    while batchStart < concepts.length() {
+        int batchEnd = batchStart;
+        map<()> batchCodes = {};
+        while batchEnd < concepts.length() && batchEnd - batchStart < concept_batch_size {
+            boolean parentInBatch = false;
+            foreach string parentCode in getParentCodes(concepts[batchEnd]) {
+                parentInBatch = parentInBatch || batchCodes.hasKey(parentCode);
+            }
+            if parentInBatch {
+                break;
+            }
+            batchCodes[concepts[batchEnd].code] = ();
+            batchEnd += 1;
+        }
+        r4:CodeSystemConcept[] batch = concepts.slice(batchStart, batchEnd);
+
+        PendingConcept[] pendingBatch = [];
+        int[][] batchParentIds = [];
+        foreach r4:CodeSystemConcept concept in batch {
+            int[] conceptParentIds = [];
+            foreach string parentCode in getParentCodes(concept) {
+                int? parentId = parentIds[parentCode];
+                if parentId is () {
+                    return error(string `Parent concept ${parentCode} of ${concept.code} was not imported before it`);
+                }
+                conceptParentIds.push(parentId);
+            }
+            pendingBatch.push({concept, parentId: conceptParentIds.length() > 0 ? conceptParentIds[0] : ()});
+            batchParentIds.push(conceptParentIds);
+        }
+
+        int[] conceptIds = check saveCodeSystemConceptBatch(pendingBatch, codeSystemId);
+
+        ConceptClosure[] closureRows = [];
+        foreach int i in 0 ..< batch.length() {
+            map<int> depths = {[conceptIds[i].toString()]: 0};
+            foreach int parentId in batchParentIds[i] {
+                map<int> parentAncestors = parentAncestry[parentId.toString()] ?: {};
+                foreach [string, int] [ancestorId, depth] in parentAncestors.entries() {
+                    int? known = depths[ancestorId];
+                    if known is () || depth + 1 < known {
+                        depths[ancestorId] = depth + 1;
+                    }
+                }
+            }
+            foreach [string, int] [ancestorId, depth] in depths.entries() {
+                closureRows.push({ancestorConceptId: check int:fromString(ancestorId), descendantConceptId: conceptIds[i], depth});
+            }
+
+            // concepts of this chunk that are parents of later concepts of the chunk
+            if parentCodes.hasKey(batch[i].code) {
+                parentIds[batch[i].code] = conceptIds[i];
+                parentAncestry[conceptIds[i].toString()] = depths;
+            }
+        }
+        check insertConceptClosureRows(closureRows, codeSystemId);
+
+        check saveConceptTextIndex(from int i in 0 ..< batch.length()
+            select {
+                conceptId: conceptIds[i],
+                codeSystemId,
+                display: batch[i].display,
+                definition: batch[i].definition
+            });
+        check saveConceptColumnsBatch(batch, conceptIds, codeSystemId);
+
+        batchStart = batchEnd;
+    }
+
+    decimal elapsedSeconds = time:monotonicNow() - startTime;
+    return {
+        codeSystemId,
+        conceptCount: concepts.length(),
+        levelCount: 1,
+        elapsedSeconds,
+        rowsPerSecond: elapsedSeconds > 0d ? <int>(<decimal>concepts.length() / elapsedSeconds) : concepts.length()
+    };
+}
+
+isolated function getParentCodes(r4:CodeSystemConcept concept) returns string[] {
+    string[] parentCodes = [];
+    foreach r4:CodeSystemConceptProperty property in concept.property ?: [] {
+        string? parentCode = property.valueCode;
+        if property.code == PARENT_PROPERTY && parentCode is string {
+            parentCodes.push(parentCode);
+        }
+    }
+    return parentCodes;
+}
+
+isolated function getConceptIdsByCode(string[] codes, int codeSystemId) returns map<int>|error {
+    map<int> conceptIds = {};
+    int chunkStart = 0;
+    while chunkStart < codes.length() {
+        string[] chunk = codes.slice(chunkStart, int:min(chunkStart + CONCEPT_LOOKUP_CHUNK_SIZE, codes.length()));
+        sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+                `SELECT `, escapeToQuery("conceptId"), `, `, escapeToQuery("code"), ` FROM `, escapeToQuery("concepts"),
+                ` WHERE `, escapeToQuery("codesystemCodeSystemId"), ` = ${codeSystemId} AND `, escapeToQuery("code"),
+                ` IN (`, sql:arrayFlattenQuery(chunk), `)`
+        );
+        stream<ConceptCodeId, persist:Error?> rows = sClient->queryNativeSQL(sqlQuery);
+        check from ConceptCodeId row in rows
+            do {
+                conceptIds[row.code] = row.conceptId;
+            };
+        chunkStart += CONCEPT_LOOKUP_CHUNK_SIZE;
+    }
+    return conceptIds;
+}
+
+// ancestors of the given concepts, including the concepts themselves, keyed by concept id and then ancestor id
+isolated function getConceptAncestry(int[] conceptIds) returns map<map<int>>|error {
+    map<map<int>> ancestry = {};
+    int chunkStart = 0;
+    while chunkStart < conceptIds.length() {
+        int[] chunk = conceptIds.slice(chunkStart, int:min(chunkStart + CONCEPT_LOOKUP_CHUNK_SIZE, conceptIds.length()));
+        sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+                `SELECT `, escapeToQuery("ancestorConceptId"), `, `, escapeToQuery("descendantConceptId"), `, `,
+                escapeToQuery("depth"), ` FROM `, escapeToQuery(CONCEPT_CLOSURE_TABLE),
+                ` WHERE `, escapeToQuery("descendantConceptId"), ` IN (`, sql:arrayFlattenQuery(chunk), `)`
+        );
+        stream<ConceptClosure, persist:Error?> rows = sClient->queryNativeSQL(sqlQuery);
+        check from ConceptClosure row in rows
+            do {
+                string key = row.descendantConceptId.toString();
+                map<int> ancestors = ancestry[key] ?: {};
+                ancestors[row.ancestorConceptId.toString()] = row.depth;
+                ancestry[key] = ancestors;
+            };
+        chunkStart += CONCEPT_LOOKUP_CHUNK_SIZE;
+    }
+    return ancestry;
+}
+
+isolated function logConceptIngestionSummary(string codeSystem, ConceptIngestionSummary summary) {
+    log:printInfo(string `CodeSystem ${codeSystem} imported`,
+            codeSystemId = summary.codeSystemId,
+            concepts = summary.conceptCount,
+            levels = summary.levelCount,
+            elapsedSeconds = summary.elapsedSeconds,
+            rowsPerSecond = summary.rowsPerSecond);
+}
@@ -21,6 +21,17 @@ const ZIP_FILE_NAME = "/terminology.zip";
 const ZIP_FILE_EXTRACTION_PATH = "/extracted";
 const FHIR_PACKAGE_PATH = "/hl7.terminology.r4/package";
 const TEMPORARY_FILES_DIRECTORY_NAME = "temp_files";
+const UPLOAD_JOB_PATH = "/fhir/r4/$upload/";
+const CONTENT_LOCATION = "Content-Location";
+const X_PROGRESS = "X-Progress";
+
+// $expand parameter carrying the continuation token of a streamed expansion
+const CONTINUATION = "_continuation";
+
+// ValueSet compose filters resolved through the concept closure table
+const CONCEPT_PROPERTY = "concept";
+const IS_A_FILTER = "is-a";
+const DESCENDENT_OF_FILTER = "descendent-of";
 
 // enums
 enum SearchCodeProperties {
@@ -36,6 +47,30 @@ enum ContentType {
     ZIP = "application/zip"
 }
 
+// operations whose responses carry validators and a Cache-Control policy
+enum CacheOperation {
+    CACHE_READ = "read",
+    CACHE_EXPAND = "expand",
+    CACHE_LOOKUP = "lookup"
+}
+
+enum UploadJobStatus {
+    JOB_QUEUED = "queued",
+    JOB_RUNNING = "running",
+    JOB_COMPLETED = "completed",
+    JOB_FAILED = "failed",
+    JOB_CANCELLED = "cancelled"
+}
+
+enum UploadJobPhase {
+    PHASE_QUEUED = "queued",
+    PHASE_EXTRACTING = "extracting",
+    PHASE_IMPORTING = "importing",
+    // a running job was asked to stop and rolls back its import
+    PHASE_CANCELLING = "cancelling",
+    PHASE_DONE = "done"
+}
+
 enum TerminologyType {
     SNOMED = "SNOMED",
     LOINC = "LOINC",
@@ -46,3 +81,33 @@ enum TerminologyType {
 
 // Configurable Parameters
 configurable string db_type = "postgresql";
+// apply pending terminology store schema migrations on startup
+configurable boolean auto_migrate_schema = true;
+// number of concepts written per batch insert when importing a CodeSystem
+configurable int concept_batch_size = 1000;
+// maximum number of CodeSystems and of ValueSets kept in the in-process resource cache
+configurable int resource_cache_capacity = 500;
+// seconds after which a cached CodeSystem or ValueSet is read from the store again
+configurable decimal resource_cache_max_age = 3600;
+// number of ValueSets validated in parallel by a batch `$validate-code` request
+configurable int batch_validation_workers = 4;
+// number of CodeSystems of a FHIR package imported in parallel by `$upload`
+configurable int package_import_workers = 4;
+// number of `$upload` jobs imported at the same time, further jobs wait in a queue
+configurable int upload_job_workers = 1;
+// directory the uploaded archives are kept in until their job has finished, survives restarts
+configurable string upload_jobs_directory = "upload_jobs";
+// times an upload job is started, restarts included, before a job interrupted by a restart is marked as failed
+configurable int upload_job_max_attempts = 3;
+// seconds after its last lease renewal an upload job is taken over by another instance, leases are renewed every third
+configurable decimal upload_job_lease_timeout = 60;
+// store connection pool settings keyed by `db_type`, replacing the defaults of that database
+configurable map<StorePoolConfig> & readonly store_pool = {};
+// seconds between two samples of the store connection pool usage published as metrics
+configurable decimal store_pool_metrics_interval = 5;
+// snapshot file served instead of the store when set, the service is read-only then
+configurable string snapshot_file = "";
+// file a snapshot of the store is written to on startup when set
+configurable string snapshot_export_file = "";
+// Cache-Control header keyed by operation (`read`, `expand`, `lookup`), replacing the default of that operation
+configurable map<string> & readonly cache_control = {};
@@ -102,20 +102,39 @@ isolated function stringToParameterizedQuery(string queryStr) returns sql:Parame
     return query;
 }
 
-isolated function codeSystemToByte(r4:CodeSystem codeSystem) returns byte[]|r4:FHIRError {
-    // remove concepts from the codeSystem object
-    // because concepts are stored in separate table in database
-    r4:CodeSystem codeSystemWithoutConcepts = codeSystem.clone();
-    codeSystemWithoutConcepts.concept = ();
+isolated function codeSystemToInsert(r4:CodeSystem codeSystem) returns store:CodeSystemInsert|r4:FHIRError {
+    return {
+        id: codeSystem.id ?: "",
+        url: codeSystem.url ?: "",
+        version: codeSystem.version ?: "",
+        name: codeSystem.name ?: "",
+        title: codeSystem.title ?: "",
+        status: codeSystem.status,
+        date: codeSystem.date ?: "",
+        publisher: codeSystem.publisher ?: "",
+        codeSystem: check codeSystemToByte(codeSystem)
+    };
+}
 
-    byte[] byteArray = codeSystemWithoutConcepts.toJsonString().toBytes();
+# Serializes a CodeSystem without its concepts, which are stored in a table of their own. Only the top level
+# fields are copied, the concept tree is neither copied nor serialized. The serialized resource is parsed again
+# to validate it, since the `$upload` importers build CodeSystems in code; without concepts that is cheap.
+#
+# + codeSystem - The CodeSystem
+# + return - The serialized CodeSystem, without concepts, or an error if it is not valid
+isolated function codeSystemToByte(r4:CodeSystem codeSystem) returns byte[]|r4:FHIRError {
+    byte[] byteArray;
+    if codeSystem.concept is () {
+        byteArray = codeSystem.toJsonString().toBytes();
+    } else {
+        r4:CodeSystem codeSystemWithoutConcepts = {...codeSystem};
+        codeSystemWithoutConcepts.concept = ();
+        byteArray = codeSystemWithoutConcepts.toJsonString().toBytes();
+    }
 
     // check whether the conversion was successful
     r4:CodeSystem|error parsedcs = byteToCodeSystem(byteArray);
-
-    if parsedcs is r4:CodeSystem {
-        return byteArray;
-    } else {
+    if parsedcs is error {
         return r4:createFHIRError(
                 "Error while converting CodeSystem to byte, CodeSystem is not valid, " + parsedcs.message(),
                 r4:ERROR,
@@ -123,6 +142,7 @@ isolated function codeSystemToByte(r4:CodeSystem codeSystem) returns byte[]|r4:F
                 cause = parsedcs,
                 httpStatusCode = http:STATUS_BAD_REQUEST);
     }
+    return byteArray;
 }
 
 isolated function byteToCodeSystem(byte[] byteArray) returns r4:CodeSystem|error {
@@ -132,11 +152,18 @@ isolated function byteToCodeSystem(byte[] byteArray) returns r4:CodeSystem|error
     return parsedCodeSystem;
 }
 
-isolated function conceptToByte(r4:CodeSystemConcept concept) returns byte[]|r4:FHIRError {
-    r4:CodeSystemConcept conceptWithoutInternlConcept = concept.clone();
-    conceptWithoutInternlConcept.concept = ();
-
-    return conceptWithoutInternlConcept.toJsonString().toBytes();
+# Serializes a concept without its child concepts, which are stored as rows of their own. Only the top level
+# fields of a concept with children are copied.
+#
+# + concept - The concept
+# + return - The serialized concept, without child concepts
+isolated function conceptToByte(r4:CodeSystemConcept concept) returns byte[] {
+    if concept.concept is () {
+        return concept.toJsonString().toBytes();
+    }
+    r4:CodeSystemConcept conceptWithoutChildren = {...concept};
+    conceptWithoutChildren.concept = ();
+    return conceptWithoutChildren.toJsonString().toBytes();
 }
 
 isolated function byteToConcept(byte[] byteArray) returns r4:CodeSystemConcept|error {
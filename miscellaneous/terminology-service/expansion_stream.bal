@@ -0,0 +1,117 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import ballerina/io;
+import ballerinax/health.fhir.r4;
+
+// concepts read from the store and written to the response per chunk of a streamed expansion
+const EXPANSION_CHUNK_SIZE = 1000;
+
+# Serializes a page of the materialized expansion of a stored ValueSet as a stream of JSON chunks. The ValueSet
+# and its expansion, as built by `terminology:valueSetExpansion` without the concepts, are written first, then the
+# `contains` array is read from the store and written one chunk at a time, so neither the concepts nor the
+# serialized response are held in memory at once.
+#
+# + valueSet - The expanded ValueSet, without the concepts of its expansion
+# + page - Page of the expansion the concepts are read from
+# + chunkSize - Concepts read from the store per chunk
+# + return - The response body
+isolated function streamValueSetExpansion(r4:ValueSet valueSet, DeferredExpansion page, int chunkSize = EXPANSION_CHUNK_SIZE)
+        returns stream<byte[], io:Error?> {
+    map<json> header = {};
+    foreach [string, json] [key, value] in (<map<json>>valueSet.toJson()).entries() {
+        if key != "expansion" {
+            header[key] = value;
+        }
+    }
+    map<json> expansion = {};
+    foreach [string, json] [key, value] in (<map<json>>(valueSet.expansion ?: {timestamp: ""}).toJson()).entries() {
+        if key != "contains" {
+            expansion[key] = value;
+        }
+    }
+
+    // both objects are written without their closing brace, the `contains` array and the braces follow
+    string headerJson = header.toJsonString();
+    string expansionJson = expansion.toJsonString();
+    string prefix = headerJson.substring(0, headerJson.length() - 1) + ", \"expansion\":"
+        + expansionJson.substring(0, expansionJson.length() - 1) + ", \"contains\":[";
+
+    ExpansionChunks chunks = new (prefix, page.valueSetId, page.filter, page.offset, page.count, chunkSize);
+    return new stream<byte[], io:Error?>(chunks);
+}
+
+# Chunks of a streamed expansion response. Chunks are pulled while the response is written, after the request
+# has returned its store connection, so every read leases a connection of its own.
+isolated class ExpansionChunks {
+    private final int valueSetId;
+    private final string? filter;
+    private final int chunkSize;
+    private string? prefix;
+    // index of the next concept to read
+    private int position;
+    private int remaining;
+    private boolean separated = false;
+    private boolean done = false;
+
+    isolated function init(string prefix, int valueSetId, string? filter, int offset, int count, int chunkSize) {
+        self.prefix = prefix;
+        self.valueSetId = valueSetId;
+        self.filter = filter;
+        self.position = offset;
+        self.remaining = count;
+        self.chunkSize = int:max(chunkSize, 1);
+    }
+
+    public isolated function next() returns record {|byte[] value;|}|io:Error? {
+        lock {
+            if self.done {
+                return;
+            }
+
+            string chunk = self.prefix ?: "";
+            self.prefix = ();
+            r4:ValueSetExpansionContains[] concepts = [];
+            if self.remaining > 0 {
+                r4:ValueSetExpansionContains[]|r4:FHIRError page = readExpansionChunk(self.valueSetId, self.filter, self.position,
+                        int:min(self.chunkSize, self.remaining));
+                if page is r4:FHIRError {
+                    self.done = true;
+                    return error io:GenericError("Error while streaming ValueSet expansion, " + page.message(), page);
+                }
+                concepts = page;
+            }
+
+            foreach r4:ValueSetExpansionContains concept in concepts {
+                chunk += (self.separated ? ", " : "") + toExpansionContains(concept).toJsonString();
+                self.separated = true;
+            }
+            self.position += concepts.length();
+            self.remaining -= concepts.length();
+            // an empty chunk means the expansion was dropped while it was written, the page ends there
+            if self.remaining <= 0 || concepts.length() == 0 {
+                chunk += "]}}";
+                self.done = true;
+            }
+            return {value: chunk.toBytes()};
+        }
+    }
+}
+
+isolated function readExpansionChunk(int valueSetId, string? filter, int position, int count) returns r4:ValueSetExpansionContains[]|r4:FHIRError {
+    return filter is string
+        ? readFilteredValueSetExpansion(valueSetId, filter, position, count)
+        : readValueSetExpansionRange(valueSetId, position - 1, count);
+}
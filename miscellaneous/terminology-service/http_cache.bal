@@ -0,0 +1,244 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.store;
+
+import ballerina/crypto;
+import ballerina/http;
+import ballerina/log;
+import ballerina/persist;
+import ballerina/regex;
+import ballerina/sql;
+import ballerina/time;
+
+// kinds of the entries of `resource_versions`, an expansion is keyed by the database id of its ValueSet
+const RESOURCE_VERSION_CODESYSTEM = "CodeSystem";
+const RESOURCE_VERSION_VALUESET = "ValueSet";
+const RESOURCE_VERSION_EXPANSION = "ValueSetExpansion";
+
+const ETAG = "ETag";
+const LAST_MODIFIED = "Last-Modified";
+const CACHE_CONTROL = "Cache-Control";
+const IF_NONE_MATCH = "If-None-Match";
+
+// used for every operation missing from `cache_control`
+final readonly & map<string> DEFAULT_CACHE_CONTROL = {
+    read: "public, max-age=300",
+    expand: "public, max-age=300",
+    lookup: "public, max-age=300"
+};
+
+# Cache-Control policy of an operation, `cache_control` entries take precedence over the defaults.
+#
+# + operation - Cached operation
+# + return - Cache-Control header value
+isolated function getCacheControl(CacheOperation operation) returns string {
+    return cache_control[operation] ?: DEFAULT_CACHE_CONTROL[operation] ?: "no-cache";
+}
+
+# Records the validators of a stored resource or expansion, replacing the ones recorded before. The ETag is
+# derived from the database row the content was written to and the time it was written, so it changes with
+# every ingest and is never computed from the content at request time.
+#
+# + resourceType - One of the `RESOURCE_VERSION_*` kinds
+# + resourceKey - Database id of the CodeSystem or ValueSet
+# + version - Canonical url and business version of the resource, or the build time of an expansion
+# + dbClient - Store client to write through
+# + return - An error if the validators could not be stored
+isolated function saveResourceVersion(string resourceType, int resourceKey, string version, store:Client dbClient = sClient) returns error? {
+    string lastModified = time:utcToEmailString(time:utcNow(), "GMT");
+    string etag = createETag(resourceType, resourceKey, version + "|" + lastModified);
+
+    check deleteResourceVersion(resourceType, resourceKey, dbClient);
+    _ = check dbClient->executeNativeSQL(sql:queryConcat(
+            `INSERT INTO `, escapeToQuery(RESOURCE_VERSIONS_TABLE),
+            ` (`, escapeToQuery("resourceType"), `, `, escapeToQuery("resourceKey"), `, `, escapeToQuery("etag"), `, `, escapeToQuery("lastModified"), `)`,
+            ` VALUES (${resourceType}, ${resourceKey}, ${etag}, ${lastModified})`
+    ));
+}
+
+isolated function deleteResourceVersion(string resourceType, int resourceKey, store:Client dbClient = sClient) returns error? {
+    _ = check dbClient->executeNativeSQL(sql:queryConcat(
+            `DELETE FROM `, escapeToQuery(RESOURCE_VERSIONS_TABLE),
+            ` WHERE `, escapeToQuery("resourceType"), ` = ${resourceType} AND `, escapeToQuery("resourceKey"), ` = ${resourceKey}`
+    ));
+}
+
+isolated function createETag(string resourceType, int resourceKey, string seed) returns string {
+    return string `W/"${resourceType}-${resourceKey}-${crypto:crc32b(seed.toBytes())}"`;
+}
+
+# Records the validators of every stored CodeSystem and ValueSet that has none, from their metadata columns.
+#
+# + dbClient - Store client of the database to migrate
+# + return - An error if the store could not be read or written
+isolated function rebuildResourceVersions(store:Client dbClient = sClient) returns error? {
+    // kind, table and key column of every versioned resource
+    [string, string, string][] resourceTables = [
+        [RESOURCE_VERSION_CODESYSTEM, "codesystems", "codeSystemId"],
+        [RESOURCE_VERSION_VALUESET, "valuesets", "valueSetId"]
+    ];
+    foreach [string, string, string] [resourceType, tableName, keyColumn] in resourceTables {
+        sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+                `SELECT r.`, escapeToQuery(keyColumn), ` AS `, escapeToQuery("resourceKey"), `, r.`, escapeToQuery("url"), `, r.`, escapeToQuery("version"),
+                ` FROM `, escapeToQuery(tableName), ` r LEFT JOIN `, escapeToQuery(RESOURCE_VERSIONS_TABLE), ` rv ON rv.`, escapeToQuery("resourceKey"),
+                ` = r.`, escapeToQuery(keyColumn), ` AND rv.`, escapeToQuery("resourceType"), ` = ${resourceType}`,
+                ` WHERE rv.`, escapeToQuery("etag"), ` IS NULL`
+        );
+        stream<ResourceVersionSource, persist:Error?> sourceStream = dbClient->queryNativeSQL(sqlQuery);
+        ResourceVersionSource[] sources = check from ResourceVersionSource source in sourceStream
+            select source;
+        foreach ResourceVersionSource source in sources {
+            check saveResourceVersion(resourceType, source.resourceKey, source.url + "|" + source.'version, dbClient);
+        }
+    }
+}
+
+# Validators of a stored CodeSystem or ValueSet, read by id (`id` or `id|version`) from the metadata columns.
+#
+# + resourceType - `RESOURCE_VERSION_CODESYSTEM` or `RESOURCE_VERSION_VALUESET`
+# + id - Resource id, optionally followed by `|version`
+# + return - The validators, or nil if the resource has none or is unknown
+isolated function getResourceVersionById(string resourceType, string id) returns ResourceVersion? {
+    string[] split = regex:split(id, string `\|`);
+    sql:ParameterizedQuery whereClause = split.length() > 1
+        ? fillQueryTemplate(queryTemplates.byIdAndVersion, split[0], split[1])
+        : fillQueryTemplate(queryTemplates.latestById, split[0]);
+    return findResourceVersion(resourceType, resourceType, whereClause);
+}
+
+# Validators of a stored CodeSystem or ValueSet, read by canonical url (`url` or `url|version`).
+#
+# + resourceType - `RESOURCE_VERSION_CODESYSTEM` or `RESOURCE_VERSION_VALUESET`
+# + url - Canonical url, optionally followed by `|version`
+# + version - Business version, used when the url carries none
+# + return - The validators, or nil if the resource has none or is unknown
+isolated function getResourceVersionByUrl(string resourceType, string url, string? version = ()) returns ResourceVersion? {
+    string[] split = regex:split(url, string `\|`);
+    string? resourceVersion = split.length() > 1 ? split[1] : version;
+    sql:ParameterizedQuery whereClause = resourceVersion is string
+        ? fillQueryTemplate(queryTemplates.byUrlAndVersion, split[0], resourceVersion)
+        : fillQueryTemplate(queryTemplates.latestByUrl, split[0]);
+    return findResourceVersion(resourceType, resourceType, whereClause);
+}
+
+# Validators of the materialized expansion of a stored ValueSet.
+#
+# + id - ValueSet id, optionally followed by `|version`
+# + url - ValueSet canonical url, optionally followed by `|version`, used when no id is given
+# + version - ValueSet business version, used when neither carries one
+# + return - The validators, or nil if the ValueSet is unknown or its expansion is not materialized
+isolated function getExpansionVersion(string? id, string? url, string? version = ()) returns ResourceVersion? {
+    if id is string {
+        string[] split = regex:split(id, string `\|`);
+        return findResourceVersion(RESOURCE_VERSION_EXPANSION, RESOURCE_VERSION_VALUESET, split.length() > 1
+            ? fillQueryTemplate(queryTemplates.byIdAndVersion, split[0], split[1])
+            : fillQueryTemplate(queryTemplates.latestById, split[0]));
+    }
+    if url is () {
+        return;
+    }
+    string[] split = regex:split(url, string `\|`);
+    string? valueSetVersion = split.length() > 1 ? split[1] : version;
+    return findResourceVersion(RESOURCE_VERSION_EXPANSION, RESOURCE_VERSION_VALUESET, valueSetVersion is string
+        ? fillQueryTemplate(queryTemplates.byUrlAndVersion, split[0], valueSetVersion)
+        : fillQueryTemplate(queryTemplates.latestByUrl, split[0]));
+}
+
+# Reads the validators of the resource matched by `whereClause`, joining only the metadata columns of the
+# resource table, so that neither the resource nor its concepts are loaded. Validators are an optimization,
+# a failed read is logged and answered as if there were none.
+#
+# + resourceType - Kind of the validators to read
+# + tableType - Kind of the table `whereClause` applies to
+# + whereClause - Query template on the url, id and version columns
+# + return - The validators, or nil
+isolated function findResourceVersion(string resourceType, string tableType, sql:ParameterizedQuery whereClause) returns ResourceVersion? {
+    // the whole snapshot is versioned at once
+    TerminologySnapshot? snapshot = terminologySnapshot;
+    if snapshot is TerminologySnapshot {
+        return getSnapshotVersion(snapshot);
+    }
+
+    [string, string] [tableName, keyColumn] = getResourceTable(tableType);
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT rv.`, escapeToQuery("etag"), `, rv.`, escapeToQuery("lastModified"),
+            ` FROM `, escapeToQuery(tableName), ` JOIN `, escapeToQuery(RESOURCE_VERSIONS_TABLE), ` rv ON rv.`, escapeToQuery("resourceKey"),
+            ` = `, escapeToQuery(tableName), `.`, escapeToQuery(keyColumn), ` AND rv.`, escapeToQuery("resourceType"), ` = ${resourceType}`,
+            ` WHERE `, whereClause
+    );
+    stream<ResourceVersion, persist:Error?> versionStream = sClient->queryNativeSQL(sqlQuery);
+    ResourceVersion[]|error versions = from ResourceVersion resourceVersion in versionStream
+        select resourceVersion;
+    if versions is error {
+        log:printDebug("Resource validators not read, " + versions.message(), resourceType = resourceType);
+        return;
+    }
+    return versions.length() > 0 ? versions[0] : ();
+}
+
+isolated function getSnapshotVersion(TerminologySnapshot snapshot) returns ResourceVersion {
+    time:Utc|error createdAt = time:utcFromString(snapshot.createdAt);
+    return {
+        etag: createETag("snapshot", 0, snapshot.createdAt),
+        lastModified: time:utcToEmailString(createdAt is time:Utc ? createdAt : time:utcNow(), "GMT")
+    };
+}
+
+# Answers a conditional GET without reading the resource, when an `If-None-Match` ETag of the request matches
+# the current one. ETags are compared weakly, as required for `If-None-Match`.
+#
+# + request - The request
+# + resourceVersion - Current validators of the requested resource
+# + operation - Cached operation
+# + return - A `304 Not Modified` response, or nil if the resource has to be sent
+isolated function getNotModifiedResponse(http:Request request, ResourceVersion? resourceVersion, CacheOperation operation) returns http:Response? {
+    if resourceVersion is () {
+        return;
+    }
+    string|http:HeaderNotFoundError ifNoneMatch = request.getHeader(IF_NONE_MATCH);
+    if ifNoneMatch is http:HeaderNotFoundError {
+        return;
+    }
+
+    string current = weakETag(resourceVersion.etag);
+    foreach string candidate in regex:split(ifNoneMatch, ",") {
+        string etag = weakETag(candidate.trim());
+        if etag == "*" || etag == current {
+            http:Response response = new;
+            response.statusCode = http:STATUS_NOT_MODIFIED;
+            setCacheHeaders(response, resourceVersion, operation);
+            return response;
+        }
+    }
+    return;
+}
+
+# Adds the validators and the Cache-Control policy of an operation to its response.
+#
+# + response - Response of the operation
+# + resourceVersion - Validators of the returned resource, if it has any
+# + operation - Cached operation
+isolated function setCacheHeaders(http:Response response, ResourceVersion? resourceVersion, CacheOperation operation) {
+    if resourceVersion is ResourceVersion {
+        response.setHeader(ETAG, resourceVersion.etag);
+        response.setHeader(LAST_MODIFIED, resourceVersion.lastModified);
+    }
+    response.setHeader(CACHE_CONTROL, getCacheControl(operation));
+}
+
+isolated function weakETag(string etag) returns string {
+    return etag.startsWith("W/") ? etag.substring(2) : etag;
+}
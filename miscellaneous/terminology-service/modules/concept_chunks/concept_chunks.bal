@@ -0,0 +1,95 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import ballerinax/health.fhir.r4;
+
+# Function type that receives the concepts read from the files of a terminology release, one chunk at a time
+public type ConceptChunkConsumer isolated function (r4:CodeSystemConcept[] concepts) returns error?;
+
+# Hands out the codes of a hierarchy level by level, in chunks, so that every code comes after all of its parents.
+# A code whose parents are not all in the hierarchy, or that is part of a cycle, is never handed out.
+public class LevelOrder {
+    // children and the number of parents not handed out yet, to release codes level by level
+    private final map<string[]> children = {};
+    private final map<int> pendingParents = {};
+    private string[] level = [];
+    private int levelStart = 0;
+    private final int totalCount;
+    private int releasedCount = 0;
+
+    # Orders the codes of a hierarchy.
+    #
+    # + parents - Parent codes of every code, empty for the roots
+    public isolated function init(map<string[]> parents) {
+        self.totalCount = parents.length();
+        foreach [string, string[]] [code, codeParents] in parents.entries() {
+            if codeParents.length() == 0 {
+                self.level.push(code);
+                continue;
+            }
+            self.pendingParents[code] = codeParents.length();
+            foreach string parent in codeParents {
+                string[]? siblings = self.children[parent];
+                if siblings is string[] {
+                    siblings.push(code);
+                } else {
+                    self.children[parent] = [code];
+                }
+            }
+        }
+    }
+
+    # Returns the next chunk of codes. A chunk holds codes of a single level, the next level is released once the
+    # last chunk of a level has been handed out.
+    #
+    # + chunkSize - Maximum number of codes per chunk
+    # + return - Codes of the chunk, or nil once every reachable code has been handed out
+    public isolated function nextChunk(int chunkSize) returns string[]? {
+        if self.levelStart >= self.level.length() {
+            string[] nextLevel = [];
+            foreach string code in self.level {
+                string[]? levelChildren = self.children.removeIfHasKey(code);
+                foreach string child in levelChildren ?: [] {
+                    int remaining = self.pendingParents.get(child) - 1;
+                    self.pendingParents[child] = remaining;
+                    if remaining == 0 {
+                        nextLevel.push(child);
+                    }
+                }
+            }
+            self.level = nextLevel;
+            self.levelStart = 0;
+            if nextLevel.length() == 0 {
+                return ();
+            }
+        }
+
+        string[] chunk = self.level.slice(self.levelStart, int:min(self.levelStart + chunkSize, self.level.length()));
+        self.levelStart += chunk.length();
+        self.releasedCount += chunk.length();
+        return chunk;
+    }
+
+    # Checks that every code was handed out, once `nextChunk` has returned nil.
+    #
+    # + hierarchy - Name of the hierarchy, for the error message
+    # + return - Number of codes handed out, or an error if the hierarchy has a cycle
+    public isolated function checkComplete(string hierarchy) returns int|error {
+        if self.releasedCount != self.totalCount {
+            return error(string `${hierarchy} has a cycle, ${self.totalCount - self.releasedCount} concepts were not imported`);
+        }
+        return self.releasedCount;
+    }
+}
@@ -0,0 +1,100 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.concept_chunks;
+
+import ballerina/io;
+import ballerinax/health.fhir.r4;
+
+# Returns the ICD-10-CM CodeSystem resource without its concepts, for importers that stream the concepts separately.
+#
+# + version - ICD-10-CM version of the release, e.g. `2025`
+# + return - ICD-10-CM CodeSystem resource without concepts
+public isolated function createCodeSystem(string? version) returns r4:CodeSystem {
+    r4:CodeSystem codeSystem = {
+        resourceType: "CodeSystem",
+        id: "icd10cm",
+        url: ICD10CM_SYSTEM,
+        name: "ICD10CM",
+        title: "International Classification of Diseases, Tenth Revision, Clinical Modification",
+        status: r4:CODE_STATUS_ACTIVE,
+        content: r4:CODE_CONTENT_COMPLETE,
+        caseSensitive: true,
+        hierarchyMeaning: r4:CODE_HIERARCHYMEANING_IS_A,
+        property: [
+            {
+                code: PARENT_PROPERTY,
+                uri: "http://hl7.org/fhir/concept-properties#parent",
+                'type: "code"
+            },
+            {
+                code: NOT_SELECTABLE_PROPERTY,
+                uri: "http://hl7.org/fhir/concept-properties#notSelectable",
+                description: "Header code, not valid for billing",
+                'type: "boolean"
+            }
+        ]
+    };
+
+    if version is string {
+        codeSystem.version = version;
+    }
+    return codeSystem;
+}
+
+# Streams the ICD-10-CM order file (`icd10cm_order_<year>.txt`) line by line and hands the mapped concepts to
+# `consume` in chunks. The order file lists every category and code in tabular order, so the parent of a code is
+# the nearest preceding code that is a prefix of it, tracked with a stack of at most one code per level. Parents
+# are given as `parent` properties, header codes that are not valid for billing are flagged `notSelectable`.
+#
+# + filePath - Directory the ICD-10-CM release was extracted to
+# + chunkSize - Number of concepts per chunk
+# + consume - Function called with every chunk, in file order
+# + return - Number of concepts read or an error if the file could not be read or a chunk was not consumed
+public isolated function readConceptChunks(string filePath, int chunkSize, concept_chunks:ConceptChunkConsumer consume) returns int|error {
+    string? orderFile = check findOrderFile(filePath);
+    if orderFile is () {
+        return error(string `ICD-10-CM release does not contain an ${ORDER_FILE_PREFIX}<year>.txt file`);
+    }
+    stream<string, io:Error?> lines = check io:fileReadLinesAsStream(orderFile);
+
+    // codes from the current category down to the previous line
+    string[] ancestors = [];
+    r4:CodeSystemConcept[] chunk = [];
+    int conceptCount = 0;
+    check from string line in lines
+        do {
+            if line.length() > SHORT_DESCRIPTION_START {
+                string code = line.substring(CODE_START, CODE_END).trim();
+                while ancestors.length() > 0 && !code.startsWith(ancestors[ancestors.length() - 1]) {
+                    _ = ancestors.pop();
+                }
+                chunk.push(toR4Concept(line, code, ancestors.length() > 0 ? ancestors[ancestors.length() - 1] : ()));
+                ancestors.push(code);
+
+                if chunk.length() >= chunkSize {
+                    check consume(orderByLevel(chunk));
+                    conceptCount += chunk.length();
+                    chunk = [];
+                }
+            }
+        };
+
+    if chunk.length() > 0 {
+        check consume(orderByLevel(chunk));
+        conceptCount += chunk.length();
+    }
+    return conceptCount;
+}
@@ -0,0 +1,82 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import ballerina/file;
+import ballerina/io;
+import ballerinax/health.fhir.r4;
+
+public const string ICD10CM_SYSTEM = "http://hl7.org/fhir/sid/icd-10-cm";
+
+const string ORDER_FILE_PREFIX = "icd10cm_order_";
+const string PARENT_PROPERTY = "parent";
+const string NOT_SELECTABLE_PROPERTY = "notSelectable";
+const string BILLABLE = "1";
+
+// columns of the fixed width order file, zero based
+const int CODE_START = 6;
+const int CODE_END = 13;
+const int HEADER_FLAG_START = 14;
+const int SHORT_DESCRIPTION_START = 16;
+const int LONG_DESCRIPTION_START = 77;
+
+// Finds the first order file below `dirPath`
+isolated function findOrderFile(string dirPath) returns string|error? {
+    foreach file:MetaData item in check file:readDir(dirPath) {
+        if item.dir {
+            string? found = check findOrderFile(item.absPath);
+            if found is string {
+                return found;
+            }
+            continue;
+        }
+        string fileName = check file:basename(item.absPath);
+        if fileName.startsWith(ORDER_FILE_PREFIX) && fileName.endsWith(".txt") {
+            return item.absPath;
+        }
+    }
+    return ();
+}
+
+// Codes of the order file have no dot, FHIR uses the dotted form
+isolated function toDottedCode(string code) returns string {
+    return code.length() > 3 ? code.substring(0, 3) + "." + code.substring(3) : code;
+}
+
+isolated function toR4Concept(string line, string code, string? parent) returns r4:CodeSystemConcept {
+    string display = line.length() > LONG_DESCRIPTION_START
+        ? line.substring(LONG_DESCRIPTION_START).trim()
+        : line.substring(SHORT_DESCRIPTION_START).trim();
+
+    r4:CodeSystemConceptProperty[] properties = [];
+    if parent is string {
+        properties.push({code: PARENT_PROPERTY, valueCode: toDottedCode(parent)});
+    }
+    if line.substring(HEADER_FLAG_START, HEADER_FLAG_START + 1) != BILLABLE {
+        properties.push({code: NOT_SELECTABLE_PROPERTY, valueBoolean: true});
+    }
+
+    r4:CodeSystemConcept concept = {code: toDottedCode(code), display};
+    if properties.length() > 0 {
+        concept.property = properties;
+    }
+    return concept;
+}
+
+// Codes are shorter than their children, so ordering by length keeps every parent of the chunk before its children
+isolated function orderByLevel(r4:CodeSystemConcept[] chunk) returns r4:CodeSystemConcept[] {
+    return from r4:CodeSystemConcept concept in chunk
+        order by concept.code.length() ascending
+        select concept;
+}
@@ -13,6 +13,8 @@
 // KIND, either express or implied.  See the License for the
 // specific language governing permissions and limitations
 // under the License.
+import terminology_service.concept_chunks;
+
 import ballerina/io;
 import ballerinax/health.fhir.r4;
 
@@ -34,3 +36,42 @@ public isolated function convert(string filePath, string? version) returns error
     LoincConcept[] loincData = check readLoincCsv(filePath + LOINC_CSV_FILE_PATH);
     check exportCodeSystem(loincData, version, filePath + FHIR_LOINC_FILE_NAME);
 }
+
+# Returns the LOINC CodeSystem resource without its concepts, for importers that stream the concepts separately.
+#
+# + version - LOINC version of the release
+# + return - LOINC CodeSystem resource without concepts or an error
+public isolated function createCodeSystem(string? version) returns r4:CodeSystem|error {
+    r4:CodeSystem codeSystem = check createCodeSystemResource((), version);
+    codeSystem.concept = ();
+    return codeSystem;
+}
+
+# Streams `Loinc.csv` record by record and hands the mapped concepts to `consume` in chunks, so that no more than
+# one chunk of the release is held in memory at a time.
+#
+# + filePath - Directory the LOINC release was extracted to
+# + chunkSize - Number of concepts per chunk
+# + consume - Function called with every chunk, in file order
+# + return - Number of concepts read or an error if the file could not be read or a chunk was not consumed
+public isolated function readConceptChunks(string filePath, int chunkSize, concept_chunks:ConceptChunkConsumer consume) returns int|error {
+    stream<LoincConcept, io:Error?> loincStream = check io:fileReadCsvAsStream(filePath + LOINC_CSV_FILE_PATH);
+
+    LoincConcept[] chunk = [];
+    int conceptCount = 0;
+    check from LoincConcept loinc in loincStream
+        do {
+            chunk.push(loinc);
+            if chunk.length() >= chunkSize {
+                check consume(LoincConceptToR4Concept(chunk));
+                conceptCount += chunk.length();
+                chunk = [];
+            }
+        };
+
+    if chunk.length() > 0 {
+        check consume(LoincConceptToR4Concept(chunk));
+        conceptCount += chunk.length();
+    }
+    return conceptCount;
+}
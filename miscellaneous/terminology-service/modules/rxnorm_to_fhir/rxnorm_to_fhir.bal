@@ -0,0 +1,80 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.concept_chunks;
+
+import ballerinax/health.fhir.r4;
+
+# Returns the RxNorm CodeSystem resource without its concepts, for importers that stream the concepts separately.
+#
+# + version - RxNorm version of the release, e.g. `04072025`
+# + return - RxNorm CodeSystem resource without concepts
+public isolated function createCodeSystem(string? version) returns r4:CodeSystem {
+    r4:CodeSystem codeSystem = {
+        resourceType: "CodeSystem",
+        id: "rxnorm",
+        url: RXNORM_SYSTEM,
+        name: "RxNorm",
+        title: "RxNorm",
+        status: r4:CODE_STATUS_ACTIVE,
+        content: r4:CODE_CONTENT_COMPLETE,
+        caseSensitive: false,
+        hierarchyMeaning: r4:CODE_HIERARCHYMEANING_IS_A,
+        property: [
+            {
+                code: PARENT_PROPERTY,
+                uri: "http://hl7.org/fhir/concept-properties#parent",
+                'type: "code"
+            },
+            {
+                code: TERM_TYPE_PROPERTY,
+                description: "RxNorm term type of the display",
+                'type: "code"
+            }
+        ]
+    };
+
+    if version is string {
+        codeSystem.version = version;
+    }
+    return codeSystem;
+}
+
+# Reads the RxNorm concepts of an RRF release and hands them to `consume` in chunks. `RXNCONSO.RRF` and
+# `RXNREL.RRF` are streamed line by line, only the RXCUI, preferred name, term type and `isa` parents of every
+# concept from the RXNORM source that is not suppressed are kept in memory. Concepts are handed over level by level
+# along the `isa` relationships, so every concept comes after all of its parents, which are given as `parent`
+# properties.
+#
+# + filePath - Directory the RxNorm release was extracted to
+# + chunkSize - Number of concepts per chunk
+# + consume - Function called with every chunk
+# + return - Number of concepts read or an error if the release could not be read or a chunk was not consumed
+public isolated function readConceptChunks(string filePath, int chunkSize, concept_chunks:ConceptChunkConsumer consume) returns int|error {
+    map<RxNormConcept> concepts = check readConcepts(check getReleaseFile(filePath, CONCEPT_FILE_NAME));
+    check readIsARelationships(check getReleaseFile(filePath, RELATIONSHIP_FILE_NAME), concepts);
+
+    concept_chunks:LevelOrder levels = new (map from [string, RxNormConcept] [code, concept] in concepts.entries()
+        select [code, concept.parents]);
+    while true {
+        string[]? codes = levels.nextChunk(chunkSize);
+        if codes is () {
+            break;
+        }
+        check consume(from string code in codes
+            select toR4Concept(code, concepts.remove(code)));
+    }
+    return levels.checkComplete("RxNorm isa hierarchy");
+}
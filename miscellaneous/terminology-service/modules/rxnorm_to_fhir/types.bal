@@ -0,0 +1,25 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+
+// preferred name and is-a parents of an RxNorm concept, collected from RXNCONSO and RXNREL
+type RxNormConcept record {|
+    string display;
+    string termType;
+    // position of `termType` in TERM_TYPE_PREFERENCE, lower is preferred
+    int rank;
+    // RXCUIs of the is-a parents
+    string[] parents = [];
+|};
@@ -0,0 +1,107 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import ballerina/file;
+import ballerina/io;
+import ballerinax/health.fhir.r4;
+
+public const string RXNORM_SYSTEM = "http://www.nlm.nih.gov/research/umls/rxnorm";
+
+const string CONCEPT_FILE_NAME = "RXNCONSO.RRF";
+const string RELATIONSHIP_FILE_NAME = "RXNREL.RRF";
+const string RXNORM_SOURCE = "RXNORM";
+const string NOT_SUPPRESSED = "N";
+const string CONCEPT_LEVEL = "CUI";
+const string IS_A_RELATIONSHIP = "isa";
+const string PARENT_PROPERTY = "parent";
+const string TERM_TYPE_PROPERTY = "TTY";
+
+// term types in the order their names are preferred as display of a concept
+final readonly & string[] TERM_TYPE_PREFERENCE = ["SCD", "SBD", "GPCK", "BPCK", "SCDG", "SBDG", "SCDF", "SBDF",
+    "SCDC", "SBDC", "IN", "PIN", "MIN", "BN", "DF", "DFG", "PSN", "SY", "TMSY", "ET"];
+
+// Finds the file named `fileName` below `dirPath`
+isolated function findReleaseFile(string dirPath, string fileName) returns string|error? {
+    foreach file:MetaData item in check file:readDir(dirPath) {
+        if item.dir {
+            string? found = check findReleaseFile(item.absPath, fileName);
+            if found is string {
+                return found;
+            }
+        } else if check file:basename(item.absPath) == fileName {
+            return item.absPath;
+        }
+    }
+    return ();
+}
+
+isolated function getReleaseFile(string dirPath, string fileName) returns string|error {
+    string? path = check findReleaseFile(dirPath, fileName);
+    if path is () {
+        return error(string `RxNorm release does not contain ${fileName}`);
+    }
+    return path;
+}
+
+// RRF files are pipe delimited, without quoting
+isolated function splitRow(string line) returns string[] {
+    return re `\|`.split(line);
+}
+
+// Reads the RxNorm concepts that are not suppressed, with the name of their most preferred term type
+isolated function readConcepts(string path) returns map<RxNormConcept>|error {
+    map<RxNormConcept> concepts = {};
+    stream<string, io:Error?> lines = check io:fileReadLinesAsStream(path);
+    check from string line in lines
+        do {
+            // RXCUI|LAT|TS|LUI|STT|SUI|ISPREF|RXAUI|SAUI|SCUI|SDUI|SAB|TTY|CODE|STR|SRL|SUPPRESS|CVF|
+            string[] fields = splitRow(line);
+            if fields.length() >= 17 && fields[11] == RXNORM_SOURCE && fields[16] == NOT_SUPPRESSED {
+                int rank = TERM_TYPE_PREFERENCE.indexOf(fields[12]) ?: TERM_TYPE_PREFERENCE.length();
+                RxNormConcept? known = concepts[fields[0]];
+                if known is () || rank < known.rank {
+                    concepts[fields[0]] = {display: fields[14], termType: fields[12], rank};
+                }
+            }
+        };
+    return concepts;
+}
+
+// Sets the is-a parents of the concepts, ignoring relationships to concepts that were not read
+isolated function readIsARelationships(string path, map<RxNormConcept> concepts) returns error? {
+    stream<string, io:Error?> lines = check io:fileReadLinesAsStream(path);
+    check from string line in lines
+        do {
+            // RXCUI1|RXAUI1|STYPE1|REL|RXCUI2|RXAUI2|STYPE2|RELA|RUI|SRUI|SAB|SL|DIR|RG|SUPPRESS|CVF|
+            // RELA is the relationship of RXCUI2 to RXCUI1, so RXCUI2 "isa" RXCUI1
+            string[] fields = splitRow(line);
+            if fields.length() >= 11 && fields[10] == RXNORM_SOURCE && fields[7] == IS_A_RELATIONSHIP
+                && fields[2] == CONCEPT_LEVEL && fields[6] == CONCEPT_LEVEL
+                && fields[0] != fields[4] && concepts.hasKey(fields[0]) {
+                RxNormConcept? concept = concepts[fields[4]];
+                if concept is RxNormConcept && concept.parents.indexOf(fields[0]) is () {
+                    concept.parents.push(fields[0]);
+                }
+            }
+        };
+}
+
+isolated function toR4Concept(string code, RxNormConcept concept) returns r4:CodeSystemConcept {
+    r4:CodeSystemConceptProperty[] properties = [{code: TERM_TYPE_PROPERTY, valueCode: concept.termType}];
+    foreach string parent in concept.parents {
+        properties.push({code: PARENT_PROPERTY, valueCode: parent});
+    }
+    return {code, display: concept.display, property: properties};
+}
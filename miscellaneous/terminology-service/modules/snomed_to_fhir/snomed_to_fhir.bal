@@ -13,15 +13,71 @@
 // KIND, either express or implied.  See the License for the
 // specific language governing permissions and limitations
 // under the License.
-import ballerina/http;
+import terminology_service.concept_chunks;
+
 import ballerinax/health.fhir.r4;
 
-public const string FHIR_SNOMED_FILE_NAME = "/snomed-codesystem.json";
+# Returns the SNOMED CT CodeSystem resource without its concepts, for importers that stream the concepts separately.
+#
+# + version - SNOMED CT version of the release, e.g. `http://snomed.info/sct/900000000000207008/version/20250101`
+# + return - SNOMED CT CodeSystem resource without concepts
+public isolated function createCodeSystem(string? version) returns r4:CodeSystem {
+    r4:CodeSystem codeSystem = {
+        resourceType: "CodeSystem",
+        id: "sct",
+        url: SNOMED_SYSTEM,
+        name: "SNOMED_CT",
+        title: "SNOMED CT",
+        status: r4:CODE_STATUS_ACTIVE,
+        content: r4:CODE_CONTENT_COMPLETE,
+        caseSensitive: false,
+        hierarchyMeaning: r4:CODE_HIERARCHYMEANING_IS_A,
+        property: [
+            {
+                code: PARENT_PROPERTY,
+                uri: "http://hl7.org/fhir/concept-properties#parent",
+                'type: "code"
+            }
+        ]
+    };
+
+    if version is string {
+        codeSystem.version = version;
+    }
+    return codeSystem;
+}
+
+# Reads the active concepts of an RF2 snapshot and hands them to `consume` in chunks. The concept, description,
+# language reference set and relationship files are streamed line by line, only the SCTID, fully specified name,
+# preferred term (US English) and is-a parents of every active concept are kept in memory. Concepts are handed
+# over level by level along the is-a (116680003) hierarchy, so every concept comes after all of its parents.
+# Parents are given as `parent` properties, since a SNOMED CT concept can have more than one.
+#
+# + filePath - Directory the RF2 release was extracted to
+# + chunkSize - Number of concepts per chunk
+# + consume - Function called with every chunk
+# + return - Number of concepts read or an error if the release could not be read or a chunk was not consumed
+public isolated function readConceptChunks(string filePath, int chunkSize, concept_chunks:ConceptChunkConsumer consume) returns int|error {
+    map<SnomedConcept> concepts = check readActiveConcepts(check getReleaseFile(filePath, CONCEPT_FILE_PREFIX));
+
+    map<()> preferred = {};
+    string? languageRefsetPath = check findReleaseFile(filePath, LANGUAGE_REFSET_FILE_PREFIX);
+    if languageRefsetPath is string {
+        preferred = check readPreferredDescriptionIds(languageRefsetPath);
+    }
+    check readDescriptions(check getReleaseFile(filePath, DESCRIPTION_FILE_PREFIX), concepts, preferred);
+    preferred = {};
+    _ = check readIsARelationships(check getReleaseFile(filePath, RELATIONSHIP_FILE_PREFIX), concepts);
 
-public isolated function convert(string filePath, string? version) returns error? {
-    return r4:createFHIRError(
-                    "SNOMED upload is not implemented yet",
-            r4:ERROR,
-            r4:INVALID_REQUIRED,
-            httpStatusCode = http:STATUS_NOT_IMPLEMENTED);
+    concept_chunks:LevelOrder levels = new (map from [string, SnomedConcept] [code, concept] in concepts.entries()
+        select [code, concept.parents]);
+    while true {
+        string[]? codes = levels.nextChunk(chunkSize);
+        if codes is () {
+            break;
+        }
+        check consume(from string code in codes
+            select toR4Concept(code, concepts.remove(code)));
+    }
+    return levels.checkComplete("SNOMED CT is-a hierarchy");
 }
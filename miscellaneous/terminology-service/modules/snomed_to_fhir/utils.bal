@@ -0,0 +1,154 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import ballerina/file;
+import ballerina/io;
+import ballerinax/health.fhir.r4;
+
+public const string SNOMED_SYSTEM = "http://snomed.info/sct";
+
+const string ACTIVE = "1";
+const string IS_A_RELATIONSHIP = "116680003";
+const string FSN_DESCRIPTION = "900000000000003001";
+const string SYNONYM_DESCRIPTION = "900000000000013009";
+const string US_ENGLISH_LANGUAGE_REFSET = "900000000000509007";
+const string PREFERRED_ACCEPTABILITY = "900000000000548007";
+const string PARENT_PROPERTY = "parent";
+
+const string CONCEPT_FILE_PREFIX = "sct2_Concept_Snapshot";
+const string DESCRIPTION_FILE_PREFIX = "sct2_Description_Snapshot-en";
+const string RELATIONSHIP_FILE_PREFIX = "sct2_Relationship_Snapshot";
+const string LANGUAGE_REFSET_FILE_PREFIX = "der2_cRefset_LanguageSnapshot-en";
+
+// Finds the first RF2 file below `dirPath` whose name starts with `prefix`
+isolated function findReleaseFile(string dirPath, string prefix) returns string|error? {
+    foreach file:MetaData item in check file:readDir(dirPath) {
+        if item.dir {
+            string? found = check findReleaseFile(item.absPath, prefix);
+            if found is string {
+                return found;
+            }
+            continue;
+        }
+        string fileName = check file:basename(item.absPath);
+        if fileName.startsWith(prefix) && fileName.endsWith(".txt") {
+            return item.absPath;
+        }
+    }
+    return ();
+}
+
+isolated function getReleaseFile(string dirPath, string prefix) returns string|error {
+    string? path = check findReleaseFile(dirPath, prefix);
+    if path is () {
+        return error(string `SNOMED CT release does not contain a ${prefix} file`);
+    }
+    return path;
+}
+
+// RF2 files are tab separated, without quoting. The header row never has "1" in the active column,
+// so filtering rows on the active flag also skips the header.
+isolated function splitRow(string line) returns string[] {
+    return re `\t`.split(line.endsWith("\r") ? line.substring(0, line.length() - 1) : line);
+}
+
+// Reads the SCTIDs of the active concepts of the snapshot
+isolated function readActiveConcepts(string path) returns map<SnomedConcept>|error {
+    map<SnomedConcept> concepts = {};
+    stream<string, io:Error?> lines = check io:fileReadLinesAsStream(path);
+    check from string line in lines
+        do {
+            string[] fields = splitRow(line);
+            if fields.length() >= 5 && fields[2] == ACTIVE {
+                concepts[fields[0]] = {};
+            }
+        };
+    return concepts;
+}
+
+// Reads the ids of the descriptions preferred in the US English language reference set
+isolated function readPreferredDescriptionIds(string path) returns map<()>|error {
+    map<()> preferred = {};
+    stream<string, io:Error?> lines = check io:fileReadLinesAsStream(path);
+    check from string line in lines
+        do {
+            string[] fields = splitRow(line);
+            if fields.length() >= 7 && fields[2] == ACTIVE && fields[4] == US_ENGLISH_LANGUAGE_REFSET
+                && fields[6] == PREFERRED_ACCEPTABILITY {
+                preferred[fields[5]] = ();
+            }
+        };
+    return preferred;
+}
+
+// Sets the fully specified name and preferred term of the active concepts
+isolated function readDescriptions(string path, map<SnomedConcept> concepts, map<()> preferred) returns error? {
+    stream<string, io:Error?> lines = check io:fileReadLinesAsStream(path);
+    check from string line in lines
+        do {
+            string[] fields = splitRow(line);
+            if fields.length() >= 8 && fields[2] == ACTIVE {
+                SnomedConcept? concept = concepts[fields[4]];
+                if concept is SnomedConcept {
+                    if fields[6] == FSN_DESCRIPTION {
+                        concept.fsn = fields[7];
+                    } else if fields[6] == SYNONYM_DESCRIPTION && preferred.hasKey(fields[0]) {
+                        concept.preferredTerm = fields[7];
+                    }
+                }
+            }
+        };
+}
+
+// Sets the is-a parents of the active concepts, ignoring relationships to inactive concepts
+isolated function readIsARelationships(string path, map<SnomedConcept> concepts) returns int|error {
+    int relationshipCount = 0;
+    stream<string, io:Error?> lines = check io:fileReadLinesAsStream(path);
+    check from string line in lines
+        do {
+            string[] fields = splitRow(line);
+            if fields.length() >= 8 && fields[2] == ACTIVE && fields[7] == IS_A_RELATIONSHIP
+                && concepts.hasKey(fields[5]) {
+                SnomedConcept? concept = concepts[fields[4]];
+                if concept is SnomedConcept && concept.parents.indexOf(fields[5]) is () {
+                    concept.parents.push(fields[5]);
+                    relationshipCount += 1;
+                }
+            }
+        };
+    return relationshipCount;
+}
+
+isolated function toR4Concept(string code, SnomedConcept concept) returns r4:CodeSystemConcept {
+    string? fsn = concept.fsn;
+    r4:CodeSystemConcept r4Concept = {
+        code,
+        display: concept.preferredTerm ?: fsn ?: code
+    };
+    if fsn is string {
+        r4Concept.designation = [
+            {
+                language: "en",
+                use: {system: SNOMED_SYSTEM, code: FSN_DESCRIPTION, display: "Fully specified name"},
+                value: fsn
+            }
+        ];
+    }
+    if concept.parents.length() > 0 {
+        r4Concept.property = from string parent in concept.parents
+            select {code: PARENT_PROPERTY, valueCode: parent};
+    }
+    return r4Concept;
+}
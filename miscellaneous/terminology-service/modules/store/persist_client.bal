@@ -2,6 +2,8 @@
 
 // This file is an auto-generated file by Ballerina persistence layer for model.
 // It should not be modified by hand.
+// The `connectionPool` parameter of `init` is added after generation, see "Regenerating the Store Client" in the
+// README.
 
 import ballerina/jballerina.java;
 import ballerina/persist;
@@ -204,8 +206,8 @@ public isolated client class Client {
         }
     };
 
-    public isolated function init() returns persist:Error? {
-        jdbc:Client|error dbClient = new (url = url, user = user, password = password, options = connectionOptions);
+    public isolated function init(sql:ConnectionPool? connectionPool = ()) returns persist:Error? {
+        jdbc:Client|error dbClient = new (url = url, user = user, password = password, options = connectionOptions, connectionPool = connectionPool);
         if dbClient is error {
             return <persist:Error>error(dbClient.message());
         }
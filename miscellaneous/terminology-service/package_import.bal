@@ -0,0 +1,135 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.store;
+
+import ballerina/file;
+import ballerina/io;
+import ballerina/log;
+import ballerina/time;
+import ballerinax/health.fhir.r4;
+import ballerinax/health.fhir.r4.parser;
+import ballerinax/health.fhir.r4.terminology;
+
+const CODESYSTEM_FILE_PREFIX = "CodeSystem-";
+const VALUESET_FILE_PREFIX = "ValueSet-";
+const JSON_FILE_EXTENSION = ".json";
+
+# Imports the CodeSystems and ValueSets of an extracted FHIR package. Only the file list is read up front,
+# every resource is read, parsed and stored on its own, so memory stays bounded by the number of workers
+# rather than by the size of the package. CodeSystems are independent of each other and are imported by up to
+# `package_import_workers` strands at a time. ValueSets are imported afterwards, one by one in file order,
+# since they may reference the CodeSystems and other ValueSets of the package. Resources are stored one by one,
+# so a cancelled upload job stops between resources and keeps the resources stored so far.
+#
+# + packagePath - Directory holding the package resources
+# + jobId - Upload job the package belongs to, for progress and cancellation
+# + skipExisting - Whether resources whose url and version are already stored are skipped, when an interrupted
+# job is run again
+# + return - Import summary or an error if the package could not be listed or the job was cancelled
+isolated function importFhirPackage(string packagePath, string? jobId = (), boolean skipExisting = false)
+        returns PackageImportSummary|error {
+    decimal startTime = time:monotonicNow();
+    [string[], string[]] [codeSystemFiles, valueSetFiles] = check listPackageResources(packagePath);
+    PackageImportSummary summary = {};
+
+    int workers = int:max(package_import_workers, 1);
+    int waveStart = 0;
+    while waveStart < codeSystemFiles.length() {
+        if jobId is string {
+            check checkUploadJobCancelled(jobId);
+            uploadJobExecutor.addRows(jobId, int:min(workers, codeSystemFiles.length() - waveStart));
+        }
+        future<error?>[] running = [];
+        string[] wave = codeSystemFiles.slice(waveStart, int:min(waveStart + workers, codeSystemFiles.length()));
+        foreach string path in wave {
+            running.push(start importCodeSystemFile(path, skipExisting));
+        }
+        foreach int i in 0 ..< running.length() {
+            error? result = wait running[i];
+            if result is error {
+                recordPackageImportFailure(summary, wave[i], result);
+                log:printWarn("CodeSystem not imported, " + result.message(), file = wave[i]);
+            } else {
+                summary.codeSystemCount += 1;
+            }
+        }
+        waveStart += workers;
+    }
+
+    foreach string path in valueSetFiles {
+        if jobId is string {
+            check checkUploadJobCancelled(jobId);
+            uploadJobExecutor.addRows(jobId, 1);
+        }
+        error? result = importValueSetFile(path, skipExisting);
+        if result is error {
+            recordPackageImportFailure(summary, path, result);
+            log:printWarn("ValueSet not imported, " + result.message(), file = path);
+        } else {
+            summary.valueSetCount += 1;
+        }
+    }
+
+    summary.elapsedSeconds = time:monotonicNow() - startTime;
+    log:printInfo("FHIR package imported",
+            codeSystems = summary.codeSystemCount,
+            valueSets = summary.valueSetCount,
+            failed = summary.failedCount,
+            elapsedSeconds = summary.elapsedSeconds);
+    return summary;
+}
+
+isolated function recordPackageImportFailure(PackageImportSummary summary, string path, error failure) {
+    summary.failedCount += 1;
+    if summary.firstError is () {
+        string|error fileName = file:basename(path);
+        summary.firstError = string `${fileName is string ? fileName : path}: ${failure.message()}`;
+    }
+}
+
+isolated function listPackageResources(string packagePath) returns [string[], string[]]|error {
+    string[] codeSystemFiles = [];
+    string[] valueSetFiles = [];
+
+    foreach file:MetaData item in check file:readDir(packagePath) {
+        string fileName = check file:basename(item.absPath);
+        if item.dir || !fileName.endsWith(JSON_FILE_EXTENSION) {
+            continue;
+        }
+        if fileName.startsWith(CODESYSTEM_FILE_PREFIX) {
+            codeSystemFiles.push(item.absPath);
+        } else if fileName.startsWith(VALUESET_FILE_PREFIX) {
+            valueSetFiles.push(item.absPath);
+        }
+    }
+    return [codeSystemFiles.sort(), valueSetFiles.sort()];
+}
+
+isolated function importCodeSystemFile(string path, boolean skipExisting) returns error? {
+    r4:CodeSystem codeSystem = check parser:parse(check io:fileReadString(path)).ensureType();
+    if skipExisting && getStoreCodeSystemByURL(codeSystem.url ?: "", codeSystem.version) is store:CodeSystem {
+        return;
+    }
+    return terminology:addCodeSystem(codeSystem, terminology = terminology_source);
+}
+
+isolated function importValueSetFile(string path, boolean skipExisting) returns error? {
+    r4:ValueSet valueSet = check parser:parse(check io:fileReadString(path)).ensureType();
+    if skipExisting && getStoreValueSetByURL(valueSet.url ?: "", valueSet.version) is store:ValueSet {
+        return;
+    }
+    return terminology:addValueSet(valueSet, terminology = terminology_source);
+}
@@ -18,63 +18,137 @@ import ballerinax/persist.sql as psql;
 
 type SQLSyntax record {|
     psql:DataSourceSpecifics dataspecifics;
-    string regexOperator;
 |};
 
-isolated SQLSyntax syntax = initializeDataSourceSpecs();
+# SQL text of the queries built on every lookup, escaped once for the configured dialect. Each template holds
+# the strings around its parameters, see `fillQueryTemplate`.
+type QueryTemplates record {|
+    // WHERE clause matching a CodeSystem or ValueSet by url and version
+    string[] byUrlAndVersion;
+    // WHERE clause matching the highest version of a CodeSystem or ValueSet by url
+    string[] latestByUrl;
+    // WHERE clause matching a CodeSystem or ValueSet by id and version
+    string[] byIdAndVersion;
+    // WHERE clause matching the highest version of a CodeSystem or ValueSet by id
+    string[] latestById;
+    // existence check of a CodeSystem by url and version
+    string[] codeSystemExists;
+    // existence check of a ValueSet by url and version
+    string[] valueSetExists;
+    // query of a concept by code and CodeSystem id
+    string[] conceptByCode;
+    // WHERE clause matching the compose includes of a ValueSet
+    string[] includesByValueSet;
+|};
+
+// escape character of LIKE patterns, a backslash would itself need escaping in MySQL string literals
+const LIKE_ESCAPE_CHARACTER = "!";
+
+// resolved once, `db_type` can not change while the service runs, so query building needs no lock
+final readonly & SQLSyntax syntax = initializeDataSourceSpecs();
+
+final readonly & QueryTemplates queryTemplates = initializeQueryTemplates();
 
-isolated function initializeDataSourceSpecs() returns SQLSyntax {
+isolated function initializeDataSourceSpecs() returns readonly & SQLSyntax {
     match db_type {
         "mysql" => {
             return {
-                dataspecifics: psql:MYSQL_SPECIFICS,
-                regexOperator: " REGEXP "
+                dataspecifics: psql:MYSQL_SPECIFICS.cloneReadOnly()
             };
         }
         "postgresql" => {
             return {
-                dataspecifics: psql:POSTGRESQL_SPECIFICS,
-                regexOperator: " ~ "
+                dataspecifics: psql:POSTGRESQL_SPECIFICS.cloneReadOnly()
             };
         }
         "mssql" => {
             return {
-                dataspecifics: psql:MSSQL_SPECIFICS,
-                regexOperator: " LIKE "
+                dataspecifics: psql:MSSQL_SPECIFICS.cloneReadOnly()
             };
         }
         "h2" => {
             return {
-                dataspecifics: psql:H2_SPECIFICS,
-                regexOperator: " REGEXP "
+                dataspecifics: psql:H2_SPECIFICS.cloneReadOnly()
             };
         }
         _ => {
             return {
-                dataspecifics: psql:POSTGRESQL_SPECIFICS,
-                regexOperator: " ~ "
+                dataspecifics: psql:POSTGRESQL_SPECIFICS.cloneReadOnly()
             };
         }
     }
 }
 
+isolated function initializeQueryTemplates() returns readonly & QueryTemplates {
+    boolean isMSSQL = db_type == "mssql";
+    string latestVersion = string ` ORDER BY ${escape("version")} DESC ` + (isMSSQL
+        ? "OFFSET 0 ROWS FETCH NEXT 1 ROWS ONLY"
+        : "LIMIT 1");
+    string selectOne = isMSSQL ? "SELECT TOP 1 1 FROM " : "SELECT 1 FROM ";
+    string limitOne = isMSSQL ? "" : " LIMIT 1";
+    return {
+        byUrlAndVersion: [escape("url") + " = ", string ` AND ${escape("version")} = `, ""],
+        latestByUrl: [escape("url") + " = ", latestVersion],
+        byIdAndVersion: [escape("id") + " = ", string ` AND ${escape("version")} = `, ""],
+        latestById: [escape("id") + " = ", latestVersion],
+        codeSystemExists: [
+            string `${selectOne}${escape("codesystems")} WHERE ${escape("url")} = `,
+            string ` AND ${escape("version")} = `,
+            limitOne
+        ],
+        valueSetExists: [
+            string `${selectOne}${escape("valuesets")} WHERE ${escape("url")} = `,
+            string ` AND ${escape("version")} = `,
+            limitOne
+        ],
+        conceptByCode: [
+            string `SELECT * FROM ${escape("concepts")} WHERE ${escape("code")} = `,
+            string ` AND ${escape("codesystemCodeSystemId")} = `,
+            ""
+        ],
+        includesByValueSet: [escape("valuesetValueSetId") + " = ", ""]
+    };
+}
+
+# Builds a query from a prebuilt template, without concatenating its SQL text again.
+#
+# + strings - Template from `queryTemplates`
+# + values - Parameters of the template, in order
+# + return - Parameterized query
+isolated function fillQueryTemplate(readonly & string[] strings, sql:Value... values) returns sql:ParameterizedQuery {
+    sql:ParameterizedQuery query = ``;
+    query.strings = strings;
+    query.insertions = values;
+    return query;
+}
+
 isolated function escape(string value) returns string {
-    lock {
-        return syntax.dataspecifics.quoteOpen + value + syntax.dataspecifics.quoteClose;
-    }
+    return syntax.dataspecifics.quoteOpen + value + syntax.dataspecifics.quoteClose;
 }
 
 isolated function escapeToQuery(string value) returns sql:ParameterizedQuery {
-    lock {
-        string escapedValue = escape(value);
-        return stringToParameterizedQuery(escapedValue);
-    }
+    return stringToParameterizedQuery(escape(value));
 }
 
-isolated function getRegexOperator() returns sql:ParameterizedQuery {
-    lock {
-        return stringToParameterizedQuery(syntax.regexOperator);
+# Escapes the LIKE wildcards of a value, so that it is matched literally.
+# The result has to be used together with `getLikeEscapeClause()`.
+#
+# + value - Value to escape
+# + return - Escaped value
+isolated function escapeLikePattern(string value) returns string {
+    string escaped = "";
+    foreach string:Char character in value {
+        // `[` starts a character class in MSSQL
+        if character == LIKE_ESCAPE_CHARACTER || character == "%" || character == "_" || character == "[" {
+            escaped += LIKE_ESCAPE_CHARACTER;
+        }
+        escaped += character;
     }
+    return escaped;
+}
+
+isolated function getLikeEscapeClause() returns sql:ParameterizedQuery {
+    return stringToParameterizedQuery(string ` ESCAPE '${LIKE_ESCAPE_CHARACTER}'`);
 }
 
 isolated function getLimitClause(int count, int offset) returns sql:ParameterizedQuery {
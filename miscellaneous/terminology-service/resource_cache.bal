@@ -0,0 +1,114 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import ballerina/cache;
+import ballerina/log;
+import ballerina/observe;
+
+const CACHE_KEY_URL = "url";
+const CACHE_KEY_ID = "id";
+
+const CACHE_HITS_METRIC = "terminology_resource_cache_hits_total";
+const CACHE_MISSES_METRIC = "terminology_resource_cache_misses_total";
+
+final ResourceCache codeSystemCache = new ("CodeSystem");
+final ResourceCache valueSetCache = new ("ValueSet");
+
+# Bounded LRU cache of stored terminology resources, keyed by url or id and version. Entries are immutable,
+# so they are shared between requests without copying, and expire after `resource_cache_max_age` seconds.
+isolated class ResourceCache {
+    private final cache:Cache entries;
+    private final observe:Counter hits;
+    private final observe:Counter misses;
+
+    isolated function init(string resourceType) {
+        self.entries = new ({
+            capacity: resource_cache_capacity,
+            evictionFactor: 0.25,
+            defaultMaxAge: resource_cache_max_age
+        });
+
+        map<string> tags = {"resource": resourceType};
+        self.hits = new (CACHE_HITS_METRIC, "Lookups answered from the resource cache", tags);
+        self.misses = new (CACHE_MISSES_METRIC, "Lookups that had to read the resource from the store", tags);
+
+        error? registered = self.hits.register();
+        if registered is () {
+            registered = self.misses.register();
+        }
+        if registered is error {
+            log:printDebug("Resource cache metrics not registered, " + registered.message(), resourceType = resourceType);
+        }
+    }
+
+    # Looks up a cached entry. Hits and misses are counted by the caller, once per resource lookup, see `count`.
+    #
+    # + key - Cache key, see `resourceCacheKey`
+    # + return - The cached entry, or nil if it is missing or expired
+    isolated function get(string key) returns (anydata & readonly)? {
+        any|cache:Error entry = self.entries.get(key);
+        return entry is anydata & readonly ? entry : ();
+    }
+
+    # Counts a resource lookup.
+    #
+    # + hit - Whether the lookup was answered from the cache alone
+    isolated function count(boolean hit) {
+        if hit {
+            self.hits.increment();
+        } else {
+            self.misses.increment();
+        }
+    }
+
+    isolated function put(string key, anydata & readonly entry) {
+        cache:Error? result = self.entries.put(key, entry);
+        if result is cache:Error {
+            log:printDebug("Resource not cached, " + result.message(), key = key);
+        }
+    }
+
+    # Drops every entry of a resource, whatever version it was looked up with.
+    #
+    # + kind - Kind of the key, `CACHE_KEY_URL` or `CACHE_KEY_ID`
+    # + value - Url or id of the resource
+    isolated function invalidate(string kind, string value) {
+        string prefix = resourceCacheKey(kind, value, ());
+        foreach string key in self.entries.keys() {
+            if key.startsWith(prefix) {
+                _ = self.entries.invalidate(key);
+            }
+        }
+    }
+
+    isolated function getHitCount() returns int {
+        return self.hits.getValue();
+    }
+
+    isolated function getMissCount() returns int {
+        return self.misses.getValue();
+    }
+}
+
+# Builds the cache key of a resource lookup. A lookup without a version resolves to the latest version
+# and gets a key of its own.
+#
+# + kind - Kind of the key, `CACHE_KEY_URL` or `CACHE_KEY_ID`
+# + value - Url or id of the resource
+# + version - Requested version, if any
+# + return - Cache key
+isolated function resourceCacheKey(string kind, string value, string? version) returns string {
+    return string `${kind}|${value}|${version ?: ""}`;
+}
@@ -0,0 +1,274 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import ballerina/http;
+import ballerina/persist;
+import ballerina/regex;
+import ballerina/sql;
+import ballerina/time;
+import ballerinax/health.fhir.r4;
+import ballerinax/health.fhir.r4.terminology;
+
+const SUMMARY = "_summary";
+const ELEMENTS = "_elements";
+
+// resources returned with a subset of their elements are tagged as such
+const SUBSETTED_TAG_SYSTEM = "http://terminology.hl7.org/CodeSystem/v3-ObservationValue";
+const SUBSETTED_TAG_CODE = "SUBSETTED";
+
+// metadata columns of the `codesystems` and `valuesets` tables, a summary is built from these alone
+final readonly & string[] SUMMARY_ELEMENTS = ["id", "url", "version", "name", "title", "status", "date", "publisher"];
+
+# Table and key column of a stored resource type.
+#
+# + resourceType - `CodeSystem` or `ValueSet`
+# + return - Table name and key column
+isolated function getResourceTable(string resourceType) returns [string, string] {
+    return resourceType == RESOURCE_VERSION_CODESYSTEM ? ["codesystems", "codeSystemId"] : ["valuesets", "valueSetId"];
+}
+
+# Search condition on the metadata columns of a CodeSystem or ValueSet search.
+#
+# + params - Search parameters of the request
+# + return - The condition, or nil if no parameter restricts the search
+isolated function getSearchCondition(map<r4:RequestSearchParameter[]> params) returns sql:ParameterizedQuery? {
+    sql:ParameterizedQuery? condition = ();
+    foreach var [paramName, paramList] in params.entries() {
+        if terminology:CODESYSTEMS_SEARCH_PARAMS.hasKey(paramName) {
+            foreach var param in paramList {
+                sql:ParameterizedQuery fragment = sql:queryConcat(escapeToQuery(paramName == "system" ? "url" : paramName), ` = ${param.value}`);
+                condition = condition is () ? fragment : sql:queryConcat(condition, ` AND `, fragment);
+            }
+        }
+    }
+    return condition;
+}
+
+# Reads the `_summary` and `_elements` parameters of a search.
+#
+# + request - The search request
+# + return - The requested projection, nil if whole resources are requested, or an error if a value is not supported
+isolated function getSearchProjection(http:Request request) returns SearchProjection?|r4:FHIRError {
+    string? summary = request.getQueryParamValue(SUMMARY);
+    string? elements = request.getQueryParamValue(ELEMENTS);
+
+    SearchProjection projection = {};
+    if summary == "count" {
+        projection.countOnly = true;
+        return projection;
+    } else if summary == "true" {
+        projection.elements.push(...SUMMARY_ELEMENTS);
+    } else if summary is string && summary != "false" {
+        return r4:createFHIRError(
+                string `Unsupported ${SUMMARY} value: ${summary}`,
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                httpStatusCode = http:STATUS_BAD_REQUEST);
+    } else if elements is () {
+        return;
+    }
+
+    if elements is string {
+        foreach string element in regex:split(elements, ",") {
+            if element.trim() != "" && projection.elements.indexOf(element.trim()) is () {
+                projection.elements.push(element.trim());
+            }
+        }
+    }
+    return projection;
+}
+
+# Answers a CodeSystem or ValueSet search for a projection of the matches. Summaries and element lists within
+# the metadata columns are read from those columns only, other element lists decode the returned resources.
+#
+# + resourceType - `CodeSystem` or `ValueSet`
+# + request - The search request
+# + params - Search parameters of the request
+# + return - The search Bundle, nil if whole resources are requested, or an error
+isolated function searchResourceProjection(string resourceType, http:Request request, map<r4:RequestSearchParameter[]> params)
+        returns r4:Bundle|r4:FHIRError? {
+    SearchProjection? projection = check getSearchProjection(request);
+    if projection is () {
+        return;
+    }
+
+    r4:Bundle bundle = {
+        'type: r4:BUNDLE_TYPE_SEARCHSET,
+        meta: {
+            lastUpdated: time:utcToString(time:utcNow())
+        }
+    };
+    if projection.countOnly {
+        bundle.total = check countResources(resourceType, params);
+        return bundle;
+    }
+
+    string? countValue = request.getQueryParamValue("_count");
+    string? offsetValue = request.getQueryParamValue("_offset");
+    int|error count = countValue is string ? int:fromString(countValue) : terminology:TERMINOLOGY_SEARCH_DEFAULT_COUNT;
+    int|error offset = offsetValue is string ? int:fromString(offsetValue) : 0;
+    if count is error || offset is error || count < 0 || offset < 0 {
+        return r4:createFHIRError(
+                "Invalid _count or _offset value",
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                httpStatusCode = http:STATUS_BAD_REQUEST);
+    }
+
+    map<json>[] resources = [];
+    if projection.elements.every(element => SUMMARY_ELEMENTS.indexOf(element) is int) {
+        foreach map<string> columns in check readResourceColumns(resourceType, params, offset, count) {
+            resources.push(projectResourceColumns(resourceType, columns, projection.elements));
+        }
+    } else {
+        json[] decoded = resourceType == RESOURCE_VERSION_CODESYSTEM
+            ? from r4:CodeSystem codeSystem in check terminology_source.searchCodeSystem(params, offset, count)
+                select codeSystem.toJson()
+            : from r4:ValueSet valueSet in check terminology_source.searchValueSet(params, offset, count)
+                select valueSet.toJson();
+        foreach json item in decoded {
+            resources.push(projectResource(<map<json>>item, projection.elements));
+        }
+    }
+
+    r4:BundleEntry[] entries = from map<json> item in resources
+        select {'resource: item, search: {mode: r4:MATCH}};
+    bundle.total = entries.length();
+    bundle.entry = entries;
+    return bundle;
+}
+
+isolated function countResources(string resourceType, map<r4:RequestSearchParameter[]> params) returns int|r4:FHIRError {
+    TerminologySnapshot? snapshot = terminologySnapshot;
+    if snapshot is TerminologySnapshot {
+        map<string>[] columns = getSnapshotColumns(snapshot, resourceType);
+        return searchSnapshotResources(columns, params, (), ()).length();
+    }
+
+    [string, string] [tableName, _] = getResourceTable(resourceType);
+    sql:ParameterizedQuery? condition = getSearchCondition(params);
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT COUNT(*) AS `, escapeToQuery("total"), ` FROM `, escapeToQuery(tableName),
+            condition is sql:ParameterizedQuery ? sql:queryConcat(` WHERE `, condition) : ``
+    );
+    stream<ExpansionState, persist:Error?> countStream = sClient->queryNativeSQL(sqlQuery);
+    ExpansionState[]|error counts = from ExpansionState state in countStream
+        select state;
+    if counts is error {
+        return r4:createFHIRError(
+                counts.message(),
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = counts,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+    return counts.length() > 0 ? counts[0].total : 0;
+}
+
+# Reads the metadata columns of a page of CodeSystems or ValueSets, without the stored resources.
+#
+# + resourceType - `CodeSystem` or `ValueSet`
+# + params - Search parameters of the request
+# + offset - Index of the first match
+# + count - Maximum number of matches
+# + return - Metadata columns of the matches or an error
+isolated function readResourceColumns(string resourceType, map<r4:RequestSearchParameter[]> params, int offset, int count)
+        returns map<string>[]|r4:FHIRError {
+    TerminologySnapshot? snapshot = terminologySnapshot;
+    if snapshot is TerminologySnapshot {
+        map<string>[] columns = getSnapshotColumns(snapshot, resourceType);
+        return from int i in searchSnapshotResources(columns, params, offset, count)
+            select columns[i];
+    }
+
+    [string, string] [tableName, keyColumn] = getResourceTable(resourceType);
+    sql:ParameterizedQuery? condition = getSearchCondition(params);
+    string[] selectList = from string column in SUMMARY_ELEMENTS
+        select escape(column);
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT `, stringToParameterizedQuery(string:'join(", ", ...selectList)), ` FROM `, escapeToQuery(tableName),
+            condition is sql:ParameterizedQuery ? sql:queryConcat(` WHERE `, condition) : ``,
+            ` ORDER BY `, escapeToQuery(keyColumn), ` `, getLimitClause(count, offset)
+    );
+    stream<ResourceColumns, persist:Error?> columnStream = sClient->queryNativeSQL(sqlQuery);
+    ResourceColumns[]|error rows = from ResourceColumns row in columnStream
+        select row;
+    if rows is error {
+        return r4:createFHIRError(
+                rows.message(),
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = rows,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+    return from ResourceColumns row in rows
+        select <map<string>>row;
+}
+
+# Builds a subsetted resource from its metadata columns. Columns of absent elements are stored empty.
+#
+# + resourceType - `CodeSystem` or `ValueSet`
+# + columns - Metadata columns of the resource
+# + elements - Requested elements
+# + return - The subsetted resource
+isolated function projectResourceColumns(string resourceType, map<string> columns, string[] elements) returns map<json> {
+    map<json> projected = {resourceType, id: columns["id"] ?: "", meta: {tag: [subsettedTag()]}};
+    foreach string element in elements {
+        string? value = columns[element];
+        if value is string && value != "" {
+            projected[element] = value;
+        }
+    }
+    return projected;
+}
+
+# Keeps the requested elements of a decoded resource, together with its type, id and meta.
+#
+# + item - The resource
+# + elements - Requested elements
+# + return - The subsetted resource
+isolated function projectResource(map<json> item, string[] elements) returns map<json> {
+    map<json> projected = {};
+    foreach [string, json] [key, value] in item.entries() {
+        if key == "resourceType" || key == "id" || elements.indexOf(key) is int {
+            projected[key] = value;
+        }
+    }
+
+    map<json> meta = {};
+    json[] tags = [];
+    json itemMeta = item["meta"];
+    if itemMeta is map<json> {
+        meta = itemMeta.clone();
+        json itemTags = itemMeta["tag"];
+        tags = itemTags is json[] ? itemTags.clone() : [];
+    }
+    tags.push(subsettedTag());
+    meta["tag"] = tags;
+    projected["meta"] = meta;
+    return projected;
+}
+
+isolated function getSnapshotColumns(TerminologySnapshot snapshot, string resourceType) returns map<string>[] {
+    return resourceType == RESOURCE_VERSION_CODESYSTEM
+        ? from SnapshotCodeSystem codeSystem in snapshot.codeSystems
+            select codeSystem.columns
+        : from SnapshotValueSet valueSet in snapshot.valueSets
+            select valueSet.columns;
+}
+
+isolated function subsettedTag() returns map<json> {
+    return {system: SUBSETTED_TAG_SYSTEM, code: SUBSETTED_TAG_CODE};
+}
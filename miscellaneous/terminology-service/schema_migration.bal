@@ -0,0 +1,673 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.store;
+
+import ballerina/log;
+import ballerina/persist;
+import ballerina/sql;
+import ballerina/time;
+
+const SCHEMA_MIGRATIONS_TABLE = "schema_migrations";
+const CONCEPT_CLOSURE_TABLE = "concept_closure";
+const VALUESET_EXPANSIONS_TABLE = "valueset_expansions";
+const VALUESET_EXPANSION_STATES_TABLE = "valueset_expansion_states";
+const CONCEPT_TRIGRAMS_TABLE = "concept_trigrams";
+const CONCEPT_ATTRIBUTES_TABLE = "concept_attributes";
+const CONCEPT_PROPERTIES_TABLE = "concept_properties";
+const CONCEPT_DESIGNATIONS_TABLE = "concept_designations";
+const UPLOAD_JOBS_TABLE = "upload_jobs";
+const CODE_MEMBERSHIPS_TABLE = "code_memberships";
+const RESOURCE_VERSIONS_TABLE = "resource_versions";
+const STORE_GENERATION_TABLE = "store_generation";
+
+// data migrations, run after the tables and indexes of their schema migration exist
+const DATA_MIGRATION_CONCEPT_TEXT_INDEX = "concept-text-index";
+const DATA_MIGRATION_CONCEPT_COLUMNS = "concept-columns";
+const DATA_MIGRATION_CODE_MEMBERSHIPS = "code-memberships";
+const DATA_MIGRATION_STORE_GENERATION = "store-generation";
+const DATA_MIGRATION_RESOURCE_VERSIONS = "resource-versions";
+
+// databases whose DDL statements take part in a transaction, MySQL and H2 commit each of them implicitly
+final readonly & string[] TRANSACTIONAL_DDL_DB_TYPES = ["postgresql", "mssql"];
+
+enum ColumnType {
+    COLUMN_ID,
+    COLUMN_INT,
+    COLUMN_BOOLEAN,
+    COLUMN_STRING,
+    // unbounded text, not usable as an index key
+    COLUMN_TEXT,
+    COLUMN_BINARY
+}
+
+type ColumnDefinition record {|
+    string name;
+    ColumnType 'type;
+    boolean nullable = false;
+|};
+
+type ForeignKeyDefinition record {|
+    string column;
+    string refTable;
+    string refColumn;
+|};
+
+type TableDefinition record {|
+    string name;
+    ColumnDefinition[] columns;
+    string[] primaryKey;
+    ForeignKeyDefinition[] foreignKeys = [];
+|};
+
+type IndexDefinition record {|
+    string name;
+    string tableName;
+    string[] columns;
+    // non-key columns carried in the index so the lookup can be answered from the index alone
+    string[] include = [];
+|};
+
+type SchemaMigration record {|
+    int version;
+    string description;
+    TableDefinition[] tables = [];
+    IndexDefinition[] indexes = [];
+    string[] dataMigrations = [];
+|};
+
+type SchemaVersion record {|
+    int? 'version;
+|};
+
+// Ordered list of schema migrations. Never edit a released migration, append a new version instead.
+final readonly & SchemaMigration[] schemaMigrations = [
+    {
+        version: 1,
+        description: "Terminology store baseline schema",
+        tables: [
+            {
+                name: "codesystems",
+                columns: [
+                    {name: "codeSystemId", 'type: COLUMN_ID},
+                    {name: "id", 'type: COLUMN_STRING},
+                    {name: "url", 'type: COLUMN_STRING},
+                    {name: "version", 'type: COLUMN_STRING},
+                    {name: "name", 'type: COLUMN_STRING},
+                    {name: "title", 'type: COLUMN_STRING},
+                    {name: "status", 'type: COLUMN_STRING},
+                    {name: "date", 'type: COLUMN_STRING},
+                    {name: "publisher", 'type: COLUMN_STRING},
+                    {name: "codeSystem", 'type: COLUMN_BINARY}
+                ],
+                primaryKey: ["codeSystemId"]
+            },
+            {
+                name: "valuesets",
+                columns: [
+                    {name: "valueSetId", 'type: COLUMN_ID},
+                    {name: "id", 'type: COLUMN_STRING},
+                    {name: "url", 'type: COLUMN_STRING},
+                    {name: "version", 'type: COLUMN_STRING},
+                    {name: "name", 'type: COLUMN_STRING},
+                    {name: "title", 'type: COLUMN_STRING},
+                    {name: "status", 'type: COLUMN_STRING},
+                    {name: "date", 'type: COLUMN_STRING},
+                    {name: "publisher", 'type: COLUMN_STRING},
+                    {name: "valueSet", 'type: COLUMN_BINARY}
+                ],
+                primaryKey: ["valueSetId"]
+            },
+            {
+                name: "concepts",
+                columns: [
+                    {name: "conceptId", 'type: COLUMN_ID},
+                    {name: "code", 'type: COLUMN_STRING},
+                    {name: "display", 'type: COLUMN_STRING, nullable: true},
+                    {name: "definition", 'type: COLUMN_STRING, nullable: true},
+                    {name: "concept", 'type: COLUMN_BINARY},
+                    {name: "parentConceptId", 'type: COLUMN_INT, nullable: true},
+                    {name: "codesystemCodeSystemId", 'type: COLUMN_INT}
+                ],
+                primaryKey: ["conceptId"],
+                foreignKeys: [{column: "codesystemCodeSystemId", refTable: "codesystems", refColumn: "codeSystemId"}]
+            },
+            {
+                name: "valueset_compose_includes",
+                columns: [
+                    {name: "valueSetComposeIncludeId", 'type: COLUMN_ID},
+                    {name: "systemFlag", 'type: COLUMN_BOOLEAN},
+                    {name: "valueSetFlag", 'type: COLUMN_BOOLEAN},
+                    {name: "conceptFlag", 'type: COLUMN_BOOLEAN},
+                    {name: "codeSystemId", 'type: COLUMN_INT, nullable: true},
+                    {name: "valuesetValueSetId", 'type: COLUMN_INT}
+                ],
+                primaryKey: ["valueSetComposeIncludeId"],
+                foreignKeys: [{column: "valuesetValueSetId", refTable: "valuesets", refColumn: "valueSetId"}]
+            },
+            {
+                name: "valueset_compose_include_concepts",
+                columns: [
+                    {name: "valueSetComposeIncludeConceptId", 'type: COLUMN_ID},
+                    {name: "valuesetcomposeValueSetComposeIncludeId", 'type: COLUMN_INT},
+                    {name: "conceptConceptId", 'type: COLUMN_INT}
+                ],
+                primaryKey: ["valueSetComposeIncludeConceptId"],
+                foreignKeys: [
+                    {column: "valuesetcomposeValueSetComposeIncludeId", refTable: "valueset_compose_includes", refColumn: "valueSetComposeIncludeId"},
+                    {column: "conceptConceptId", refTable: "concepts", refColumn: "conceptId"}
+                ]
+            },
+            {
+                name: "valueset_compose_include_value_sets",
+                columns: [
+                    {name: "valueSetComposeIncludeValueSetId", 'type: COLUMN_ID},
+                    {name: "valuesetcomposeValueSetComposeIncludeId", 'type: COLUMN_INT},
+                    {name: "valuesetValueSetId", 'type: COLUMN_INT}
+                ],
+                primaryKey: ["valueSetComposeIncludeValueSetId"],
+                foreignKeys: [
+                    {column: "valuesetcomposeValueSetComposeIncludeId", refTable: "valueset_compose_includes", refColumn: "valueSetComposeIncludeId"},
+                    {column: "valuesetValueSetId", refTable: "valuesets", refColumn: "valueSetId"}
+                ]
+            }
+        ]
+    },
+    {
+        version: 2,
+        description: "Indexes for url/version, code and compose-include access paths",
+        indexes: [
+            {name: "idx_codesystems_url_version", tableName: "codesystems", columns: ["url", "version"]},
+            {name: "idx_codesystems_id_version", tableName: "codesystems", columns: ["id", "version"]},
+            {name: "idx_valuesets_url_version", tableName: "valuesets", columns: ["url", "version"]},
+            {name: "idx_valuesets_id_version", tableName: "valuesets", columns: ["id", "version"]},
+            {
+                name: "idx_concepts_codesystem_code",
+                tableName: "concepts",
+                columns: ["codesystemCodeSystemId", "code"],
+                include: ["parentConceptId"]
+            },
+            {name: "idx_concepts_parent", tableName: "concepts", columns: ["parentConceptId"]},
+            {name: "idx_vs_includes_valueset", tableName: "valueset_compose_includes", columns: ["valuesetValueSetId"]},
+            {name: "idx_vs_includes_codesystem", tableName: "valueset_compose_includes", columns: ["codeSystemId"]},
+            {
+                name: "idx_vs_include_concepts_include",
+                tableName: "valueset_compose_include_concepts",
+                columns: ["valuesetcomposeValueSetComposeIncludeId", "conceptConceptId"]
+            },
+            {
+                name: "idx_vs_include_valuesets_include",
+                tableName: "valueset_compose_include_value_sets",
+                columns: ["valuesetcomposeValueSetComposeIncludeId", "valuesetValueSetId"]
+            }
+        ]
+    },
+    {
+        version: 3,
+        description: "Concept ancestry closure table",
+        tables: [
+            {
+                name: CONCEPT_CLOSURE_TABLE,
+                columns: [
+                    {name: "ancestorConceptId", 'type: COLUMN_INT},
+                    {name: "descendantConceptId", 'type: COLUMN_INT},
+                    {name: "depth", 'type: COLUMN_INT},
+                    {name: "codeSystemId", 'type: COLUMN_INT}
+                ],
+                primaryKey: ["ancestorConceptId", "descendantConceptId"]
+            }
+        ],
+        indexes: [
+            {
+                name: "idx_concept_closure_descendant",
+                tableName: CONCEPT_CLOSURE_TABLE,
+                columns: ["descendantConceptId", "ancestorConceptId"],
+                include: ["depth"]
+            },
+            {name: "idx_concept_closure_codesystem", tableName: CONCEPT_CLOSURE_TABLE, columns: ["codeSystemId"]}
+        ]
+    },
+    {
+        version: 4,
+        description: "Materialized ValueSet expansions",
+        tables: [
+            {
+                name: VALUESET_EXPANSIONS_TABLE,
+                columns: [
+                    {name: "valueSetId", 'type: COLUMN_INT},
+                    {name: "position", 'type: COLUMN_INT},
+                    {name: "code", 'type: COLUMN_STRING},
+                    {name: "display", 'type: COLUMN_STRING, nullable: true},
+                    {name: "elementId", 'type: COLUMN_STRING, nullable: true}
+                ],
+                primaryKey: ["valueSetId", "position"]
+            },
+            {
+                name: VALUESET_EXPANSION_STATES_TABLE,
+                columns: [
+                    {name: "valueSetId", 'type: COLUMN_INT},
+                    {name: "total", 'type: COLUMN_INT},
+                    {name: "builtAt", 'type: COLUMN_STRING}
+                ],
+                primaryKey: ["valueSetId"]
+            }
+        ]
+    },
+    {
+        version: 5,
+        description: "Trigram text index over concept display and definition",
+        tables: [
+            {
+                name: CONCEPT_TRIGRAMS_TABLE,
+                columns: [
+                    {name: "conceptTrigramId", 'type: COLUMN_ID},
+                    {name: "property", 'type: COLUMN_STRING},
+                    {name: "trigram", 'type: COLUMN_STRING},
+                    {name: "conceptId", 'type: COLUMN_INT},
+                    {name: "codeSystemId", 'type: COLUMN_INT}
+                ],
+                // no natural key, accent-insensitive collations may consider two trigrams equal
+                primaryKey: ["conceptTrigramId"]
+            }
+        ],
+        indexes: [
+            {
+                name: "idx_concept_trigrams_trigram",
+                tableName: CONCEPT_TRIGRAMS_TABLE,
+                columns: ["property", "trigram"],
+                include: ["conceptId"]
+            }
+        ],
+        dataMigrations: [DATA_MIGRATION_CONCEPT_TEXT_INDEX]
+    },
+    {
+        version: 6,
+        description: "Columnar concept status, properties and designations",
+        tables: [
+            {
+                name: CONCEPT_ATTRIBUTES_TABLE,
+                columns: [
+                    {name: "conceptId", 'type: COLUMN_INT},
+                    {name: "codeSystemId", 'type: COLUMN_INT},
+                    {name: "status", 'type: COLUMN_STRING, nullable: true},
+                    {name: "propertyCount", 'type: COLUMN_INT},
+                    {name: "designationCount", 'type: COLUMN_INT},
+                    // the concept carries content the columns can not represent, read it from the JSON
+                    {name: "opaque", 'type: COLUMN_BOOLEAN}
+                ],
+                primaryKey: ["conceptId"]
+            },
+            {
+                name: CONCEPT_PROPERTIES_TABLE,
+                columns: [
+                    {name: "conceptPropertyId", 'type: COLUMN_ID},
+                    {name: "conceptId", 'type: COLUMN_INT},
+                    {name: "codeSystemId", 'type: COLUMN_INT},
+                    {name: "code", 'type: COLUMN_STRING},
+                    {name: "valueType", 'type: COLUMN_STRING},
+                    {name: "value", 'type: COLUMN_TEXT},
+                    {name: "valueSystem", 'type: COLUMN_STRING, nullable: true},
+                    {name: "valueDisplay", 'type: COLUMN_TEXT, nullable: true}
+                ],
+                primaryKey: ["conceptPropertyId"]
+            },
+            {
+                name: CONCEPT_DESIGNATIONS_TABLE,
+                columns: [
+                    {name: "conceptDesignationId", 'type: COLUMN_ID},
+                    {name: "conceptId", 'type: COLUMN_INT},
+                    {name: "codeSystemId", 'type: COLUMN_INT},
+                    {name: "language", 'type: COLUMN_STRING, nullable: true},
+                    {name: "useSystem", 'type: COLUMN_STRING, nullable: true},
+                    {name: "useCode", 'type: COLUMN_STRING, nullable: true},
+                    {name: "useDisplay", 'type: COLUMN_TEXT, nullable: true},
+                    {name: "value", 'type: COLUMN_TEXT}
+                ],
+                primaryKey: ["conceptDesignationId"]
+            }
+        ],
+        indexes: [
+            {
+                name: "idx_concept_attributes_status",
+                tableName: CONCEPT_ATTRIBUTES_TABLE,
+                columns: ["codeSystemId", "status"],
+                include: ["conceptId"]
+            },
+            {name: "idx_concept_properties_concept", tableName: CONCEPT_PROPERTIES_TABLE, columns: ["conceptId"]},
+            {
+                name: "idx_concept_properties_code",
+                tableName: CONCEPT_PROPERTIES_TABLE,
+                columns: ["codeSystemId", "code"],
+                include: ["conceptId"]
+            },
+            {name: "idx_concept_designations_concept", tableName: CONCEPT_DESIGNATIONS_TABLE, columns: ["conceptId"]}
+        ],
+        dataMigrations: [DATA_MIGRATION_CONCEPT_COLUMNS]
+    },
+    {
+        version: 7,
+        description: "Background upload jobs",
+        tables: [
+            {
+                name: UPLOAD_JOBS_TABLE,
+                columns: [
+                    {name: "jobId", 'type: COLUMN_STRING},
+                    {name: "terminologyType", 'type: COLUMN_STRING},
+                    {name: "version", 'type: COLUMN_STRING, nullable: true},
+                    {name: "status", 'type: COLUMN_STRING},
+                    {name: "phase", 'type: COLUMN_STRING},
+                    {name: "rowsProcessed", 'type: COLUMN_INT},
+                    {name: "rowsPerSecond", 'type: COLUMN_INT},
+                    {name: "attempts", 'type: COLUMN_INT},
+                    {name: "errorMessage", 'type: COLUMN_TEXT, nullable: true},
+                    {name: "owner", 'type: COLUMN_STRING, nullable: true},
+                    {name: "heartbeatAt", 'type: COLUMN_INT},
+                    {name: "cancelRequested", 'type: COLUMN_BOOLEAN},
+                    {name: "failedCount", 'type: COLUMN_INT},
+                    {name: "firstError", 'type: COLUMN_TEXT, nullable: true},
+                    {name: "createdAt", 'type: COLUMN_STRING},
+                    {name: "updatedAt", 'type: COLUMN_STRING}
+                ],
+                primaryKey: ["jobId"]
+            }
+        ],
+        indexes: [
+            {name: "idx_upload_jobs_status", tableName: UPLOAD_JOBS_TABLE, columns: ["status"]}
+        ]
+    },
+    {
+        version: 8,
+        description: "Code membership index of ValueSets",
+        tables: [
+            {
+                name: CODE_MEMBERSHIPS_TABLE,
+                columns: [
+                    {name: "valueSetId", 'type: COLUMN_INT},
+                    {name: "conceptId", 'type: COLUMN_INT},
+                    {name: "code", 'type: COLUMN_STRING}
+                ],
+                primaryKey: ["valueSetId", "conceptId"]
+            },
+            {
+                // one row counting the writes that added codes, the code membership filter is built for one count
+                name: STORE_GENERATION_TABLE,
+                columns: [
+                    {name: "generationId", 'type: COLUMN_INT},
+                    {name: "generation", 'type: COLUMN_INT}
+                ],
+                primaryKey: ["generationId"]
+            }
+        ],
+        indexes: [
+            {
+                name: "idx_code_memberships_code",
+                tableName: CODE_MEMBERSHIPS_TABLE,
+                columns: ["valueSetId", "code"],
+                include: ["conceptId"]
+            },
+            {
+                name: "idx_code_memberships_concept",
+                tableName: CODE_MEMBERSHIPS_TABLE,
+                columns: ["conceptId"],
+                include: ["valueSetId"]
+            }
+        ],
+        dataMigrations: [DATA_MIGRATION_STORE_GENERATION, DATA_MIGRATION_CODE_MEMBERSHIPS]
+    },
+    {
+        version: 9,
+        description: "Resource and expansion validators for conditional requests",
+        tables: [
+            {
+                name: RESOURCE_VERSIONS_TABLE,
+                columns: [
+                    {name: "resourceType", 'type: COLUMN_STRING},
+                    {name: "resourceKey", 'type: COLUMN_INT},
+                    {name: "etag", 'type: COLUMN_STRING},
+                    {name: "lastModified", 'type: COLUMN_STRING}
+                ],
+                primaryKey: ["resourceType", "resourceKey"]
+            }
+        ],
+        dataMigrations: [DATA_MIGRATION_RESOURCE_VERSIONS]
+    },
+    {
+        version: 10,
+        description: "Concept trigrams padded so that filters on the last characters of a text are found",
+        dataMigrations: [DATA_MIGRATION_CONCEPT_TEXT_INDEX]
+    }
+];
+
+# Brings the terminology store schema up to the latest version, or up to `targetVersion` when given.
+# Every generated statement is guarded (`IF NOT EXISTS` or an explicit existence check), so a migration
+# interrupted half way can simply be run again.
+#
+# + dbClient - Store client of the database to migrate
+# + targetVersion - Last migration version to apply
+# + return - An error if a migration step fails
+isolated function migrateSchema(store:Client dbClient = sClient, int? targetVersion = ()) returns error? {
+    _ = check dbClient->executeNativeSQL(createSchemaMigrationsTableQuery());
+    int currentVersion = check getSchemaVersion(dbClient);
+
+    foreach SchemaMigration migration in schemaMigrations {
+        if migration.version <= currentVersion || (targetVersion is int && migration.version > targetVersion) {
+            continue;
+        }
+
+        check applySchemaMigration(dbClient, migration);
+        log:printInfo(string `Terminology store schema migrated to version ${migration.version}: ${migration.description}`);
+    }
+}
+
+isolated function getSchemaVersion(store:Client dbClient = sClient) returns int|error {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT MAX(`, escapeToQuery("version"), `) AS `, escapeToQuery("version"), ` FROM `, escapeToQuery(SCHEMA_MIGRATIONS_TABLE)
+    );
+    stream<SchemaVersion, persist:Error?> versionStream = dbClient->queryNativeSQL(sqlQuery);
+    SchemaVersion[] versions = check from SchemaVersion schemaVersion in versionStream
+        select schemaVersion;
+
+    return versions.length() > 0 ? (versions[0].'version ?: 0) : 0;
+}
+
+isolated function getLatestSchemaVersion() returns int {
+    return schemaMigrations[schemaMigrations.length() - 1].version;
+}
+
+# Applies one migration version. On databases with transactional DDL, the statements, the data migrations and
+# the version row are committed together, so a failed version leaves no trace. The others commit every DDL
+# statement on its own and rely on the statements being guarded to run a failed version again.
+#
+# + dbClient - Store client of the database to migrate
+# + migration - The migration version
+# + return - An error if a migration step fails
+isolated function applySchemaMigration(store:Client dbClient, SchemaMigration migration) returns error? {
+    if TRANSACTIONAL_DDL_DB_TYPES.indexOf(db_type) is () {
+        return applySchemaMigrationSteps(dbClient, migration);
+    }
+
+    transaction {
+        check applySchemaMigrationSteps(dbClient, migration);
+        check commit;
+    }
+}
+
+isolated function applySchemaMigrationSteps(store:Client dbClient, SchemaMigration migration) returns error? {
+    foreach TableDefinition tableDef in migration.tables {
+        _ = check dbClient->executeNativeSQL(createTableQuery(tableDef));
+    }
+
+    foreach IndexDefinition indexDef in migration.indexes {
+        // MySQL has no `CREATE INDEX IF NOT EXISTS`, so the existence check is done separately
+        if db_type == "mysql" && check isMySQLIndexExist(dbClient, indexDef) {
+            continue;
+        }
+        _ = check dbClient->executeNativeSQL(createIndexQuery(indexDef));
+    }
+
+    foreach string dataMigration in migration.dataMigrations {
+        check applyDataMigration(dbClient, dataMigration);
+    }
+
+    _ = check dbClient->executeNativeSQL(sql:queryConcat(
+            `INSERT INTO `, escapeToQuery(SCHEMA_MIGRATIONS_TABLE),
+            ` (`, escapeToQuery("version"), `, `, escapeToQuery("description"), `, `, escapeToQuery("appliedAt"), `)`,
+            ` VALUES (${migration.version}, ${migration.description}, ${time:utcToString(time:utcNow())})`
+    ));
+}
+
+isolated function applyDataMigration(store:Client dbClient, string dataMigration) returns error? {
+    match dataMigration {
+        DATA_MIGRATION_CONCEPT_TEXT_INDEX => {
+            check rebuildConceptTextIndex(dbClient);
+        }
+        DATA_MIGRATION_CONCEPT_COLUMNS => {
+            check rebuildConceptColumns(dbClient);
+        }
+        DATA_MIGRATION_STORE_GENERATION => {
+            check initStoreGeneration(dbClient);
+        }
+        DATA_MIGRATION_CODE_MEMBERSHIPS => {
+            check rebuildCodeMembershipIndex(dbClient);
+        }
+        DATA_MIGRATION_RESOURCE_VERSIONS => {
+            check rebuildResourceVersions(dbClient);
+        }
+        _ => {
+            return error(string `Unknown data migration: ${dataMigration}`);
+        }
+    }
+}
+
+isolated function isMySQLIndexExist(store:Client dbClient, IndexDefinition indexDef) returns boolean|error {
+    sql:ParameterizedQuery sqlQuery = `SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = ${indexDef.tableName} AND index_name = ${indexDef.name} LIMIT 1`;
+    stream<record {}, persist:Error?> resultStream = dbClient->queryNativeSQL(sqlQuery);
+    record {}[] results = check from record {} result in resultStream
+        select result;
+
+    return results.length() > 0;
+}
+
+isolated function createSchemaMigrationsTableQuery() returns sql:ParameterizedQuery {
+    return createTableQuery({
+        name: SCHEMA_MIGRATIONS_TABLE,
+        columns: [
+            {name: "version", 'type: COLUMN_INT},
+            {name: "description", 'type: COLUMN_STRING},
+            {name: "appliedAt", 'type: COLUMN_STRING}
+        ],
+        primaryKey: ["version"]
+    });
+}
+
+isolated function createTableQuery(TableDefinition tableDef) returns sql:ParameterizedQuery {
+    string[] definitions = from ColumnDefinition column in tableDef.columns
+        select escape(column.name) + " " + getColumnType(column.'type)
+            + (column.nullable || column.'type == COLUMN_ID ? "" : " NOT NULL");
+
+    foreach ForeignKeyDefinition foreignKey in tableDef.foreignKeys {
+        definitions.push(string `FOREIGN KEY(${escape(foreignKey.column)}) REFERENCES ${escape(foreignKey.refTable)}(${escape(foreignKey.refColumn)})`);
+    }
+    string[] primaryKeyColumns = from string column in tableDef.primaryKey
+        select escape(column);
+    definitions.push(string `PRIMARY KEY(${string:'join(", ", ...primaryKeyColumns)})`);
+
+    string createTable = string `${escape(tableDef.name)} (${string:'join(", ", ...definitions)})`;
+    if db_type == "mssql" {
+        return stringToParameterizedQuery(string `IF OBJECT_ID(N'${tableDef.name}', N'U') IS NULL CREATE TABLE ${createTable}`);
+    }
+    return stringToParameterizedQuery(string `CREATE TABLE IF NOT EXISTS ${createTable}`);
+}
+
+isolated function createIndexQuery(IndexDefinition indexDef) returns sql:ParameterizedQuery {
+    string[] keyColumns = from string column in indexDef.columns
+        select escape(column);
+    string[] includeColumns = from string column in indexDef.include
+        select escape(column);
+
+    string includeClause = "";
+    if db_type == "mysql" || db_type == "h2" {
+        // no INCLUDE clause in these dialects, the covered columns become trailing key columns
+        keyColumns.push(...includeColumns);
+    } else if includeColumns.length() > 0 {
+        includeClause = string ` INCLUDE (${string:'join(", ", ...includeColumns)})`;
+    }
+
+    string createIndex = string `${escape(indexDef.name)} ON ${escape(indexDef.tableName)} (${string:'join(", ", ...keyColumns)})${includeClause}`;
+    match db_type {
+        "mssql" => {
+            return stringToParameterizedQuery(string `IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'${indexDef.name}') CREATE INDEX ${createIndex}`);
+        }
+        "mysql" => {
+            return stringToParameterizedQuery(string `CREATE INDEX ${createIndex}`);
+        }
+        _ => {
+            return stringToParameterizedQuery(string `CREATE INDEX IF NOT EXISTS ${createIndex}`);
+        }
+    }
+}
+
+isolated function getColumnType(ColumnType columnType) returns string {
+    match columnType {
+        COLUMN_ID => {
+            match db_type {
+                "mysql"|"h2" => {
+                    return "INT AUTO_INCREMENT";
+                }
+                "mssql" => {
+                    return "INT IDENTITY(1,1)";
+                }
+                _ => {
+                    return "SERIAL";
+                }
+            }
+        }
+        COLUMN_BOOLEAN => {
+            return db_type == "mssql" ? "BIT" : "BOOLEAN";
+        }
+        COLUMN_STRING => {
+            return "VARCHAR(191)";
+        }
+        COLUMN_TEXT => {
+            match db_type {
+                "h2" => {
+                    return "CLOB";
+                }
+                "mssql" => {
+                    return "NVARCHAR(MAX)";
+                }
+                _ => {
+                    return "TEXT";
+                }
+            }
+        }
+        COLUMN_BINARY => {
+            match db_type {
+                "mysql"|"h2" => {
+                    return "LONGBLOB";
+                }
+                "mssql" => {
+                    return "VARBINARY(MAX)";
+                }
+                _ => {
+                    return "BYTEA";
+                }
+            }
+        }
+        _ => {
+            return "INT";
+        }
+    }
+}
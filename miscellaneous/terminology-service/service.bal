@@ -14,12 +14,20 @@
 // specific language governing permissions and limitations
 // under the License.
 import ballerina/http;
+import ballerina/io;
 import ballerina/log;
 import ballerinax/health.fhir.r4;
 import ballerinax/health.fhir.r4.international401;
 
-listener http:Listener interceptorListener = new (9089, timeout = 0);
+listener http:Listener interceptorListener = new (9089);
 
+// JSON responses are gzip or deflate encoded when the client accepts it
+@http:ServiceConfig {
+    compression: {
+        enable: http:COMPRESSION_AUTO,
+        contentTypes: [FHIR_JSON, JSON]
+    }
+}
 service http:InterceptableService /fhir/r4 on interceptorListener {
 
     public function createInterceptors() returns FHIRResponseErrorInterceptor {
@@ -29,10 +37,24 @@ service http:InterceptableService /fhir/r4 on interceptorListener {
     isolated resource function get ValueSet/\$expand(http:RequestContext ctx, http:Request request) returns http:Response|r4:FHIRError {
         log:printDebug("FHIR Terminology request is received. Interaction: ValueSet Expand");
 
-        r4:ValueSet valueSet = check valueSetExpansionGet(request);
+        string? url = request.getQueryParamValue("url");
+        string? valueSetVersion = request.getQueryParamValue("valueSetVersion");
+        ResourceVersion? expansionVersion = getExpansionVersion((), url, valueSetVersion);
+        http:Response? notModified = getNotModifiedResponse(request, expansionVersion, CACHE_EXPAND);
+        if notModified is http:Response {
+            return notModified;
+        }
+
         http:Response response = new;
         response.statusCode = http:STATUS_OK;
-        response.setPayload(valueSet, FHIR_JSON);
+        stream<byte[], io:Error?>|r4:ValueSet expansion = check valueSetExpansionStreamGet(request);
+        if expansion is r4:ValueSet {
+            response.setPayload(expansion, FHIR_JSON);
+        } else {
+            response.setByteStream(expansion, FHIR_JSON);
+        }
+        // the expansion is materialized by the first request
+        setCacheHeaders(response, expansionVersion ?: getExpansionVersion((), url, valueSetVersion), CACHE_EXPAND);
         return response;
     }
 
@@ -69,10 +91,21 @@ service http:InterceptableService /fhir/r4 on interceptorListener {
     isolated resource function get ValueSet/[string id]/\$expand(http:RequestContext ctx, http:Request request) returns http:Response|r4:FHIRError {
         log:printDebug(string `FHIR Terminology request is received. Interaction: ValueSet Expand with ValueSet Id: ${id}`);
 
-        r4:ValueSet valueSet = check valueSetExpansionGet(request, id);
+        ResourceVersion? expansionVersion = getExpansionVersion(id, ());
+        http:Response? notModified = getNotModifiedResponse(request, expansionVersion, CACHE_EXPAND);
+        if notModified is http:Response {
+            return notModified;
+        }
+
         http:Response response = new;
         response.statusCode = http:STATUS_OK;
-        response.setPayload(valueSet, FHIR_JSON);
+        stream<byte[], io:Error?>|r4:ValueSet expansion = check valueSetExpansionStreamGet(request, id);
+        if expansion is r4:ValueSet {
+            response.setPayload(expansion, FHIR_JSON);
+        } else {
+            response.setByteStream(expansion, FHIR_JSON);
+        }
+        setCacheHeaders(response, expansionVersion ?: getExpansionVersion(id, ()), CACHE_EXPAND);
         return response;
     }
 
@@ -89,10 +122,17 @@ service http:InterceptableService /fhir/r4 on interceptorListener {
     isolated resource function get ValueSet/[string id](http:RequestContext ctx, http:Request request) returns http:Response|r4:FHIRError {
         log:printDebug(string `FHIR Terminology request is received. Interaction: ValueSet Get with ValueSet Id: ${id}`);
 
+        ResourceVersion? resourceVersion = getResourceVersionById(RESOURCE_VERSION_VALUESET, id);
+        http:Response? notModified = getNotModifiedResponse(request, resourceVersion, CACHE_READ);
+        if notModified is http:Response {
+            return notModified;
+        }
+
         r4:ValueSet valueSet = check readValueSetById(id);
         http:Response response = new;
         response.statusCode = http:STATUS_OK;
         response.setPayload(valueSet, FHIR_JSON);
+        setCacheHeaders(response, resourceVersion, CACHE_READ);
         return response;
     }
 
@@ -121,10 +161,20 @@ service http:InterceptableService /fhir/r4 on interceptorListener {
     isolated resource function get CodeSystem/\$lookup(http:RequestContext ctx, http:Request request) returns http:Response|r4:FHIRError {
         log:printDebug("FHIR Terminology request is received. Interaction: CodeSystem Lookup");
 
+        string? system = request.getQueryParamValue("system");
+        ResourceVersion? resourceVersion = system is string
+            ? getResourceVersionByUrl(RESOURCE_VERSION_CODESYSTEM, system, request.getQueryParamValue("version"))
+            : ();
+        http:Response? notModified = getNotModifiedResponse(request, resourceVersion, CACHE_LOOKUP);
+        if notModified is http:Response {
+            return notModified;
+        }
+
         international401:Parameters codeSystemLookUpResult = check codeSystemLookUpGet(ctx, request);
         http:Response response = new;
         response.statusCode = http:STATUS_OK;
         response.setPayload(codeSystemLookUpResult, FHIR_JSON);
+        setCacheHeaders(response, resourceVersion, CACHE_LOOKUP);
         return response;
     }
 
@@ -161,20 +211,34 @@ service http:InterceptableService /fhir/r4 on interceptorListener {
     isolated resource function get CodeSystem/[string id]/\$lookup(http:RequestContext ctx, http:Request request) returns http:Response|r4:FHIRError {
         log:printDebug(string `FHIR Terminology request is received. Interaction: CodeSystem Lookup with Id: ${id}`);
 
+        ResourceVersion? resourceVersion = getResourceVersionById(RESOURCE_VERSION_CODESYSTEM, id);
+        http:Response? notModified = getNotModifiedResponse(request, resourceVersion, CACHE_LOOKUP);
+        if notModified is http:Response {
+            return notModified;
+        }
+
         international401:Parameters codeSystemLookUpResult = check codeSystemLookUpGet(ctx, request, id);
         http:Response response = new;
         response.statusCode = http:STATUS_OK;
         response.setPayload(codeSystemLookUpResult, FHIR_JSON);
+        setCacheHeaders(response, resourceVersion, CACHE_LOOKUP);
         return response;
     }
 
     isolated resource function get CodeSystem/[string id](http:RequestContext ctx, http:Request request) returns http:Response|r4:FHIRError {
         log:printDebug(string `FHIR Terminology request is received. Interaction: CodeSystem Get with Id: ${id}`);
 
+        ResourceVersion? resourceVersion = getResourceVersionById(RESOURCE_VERSION_CODESYSTEM, id);
+        http:Response? notModified = getNotModifiedResponse(request, resourceVersion, CACHE_READ);
+        if notModified is http:Response {
+            return notModified;
+        }
+
         r4:CodeSystem codeSystem = check readCodeSystemById(id);
         http:Response response = new;
         response.statusCode = http:STATUS_OK;
         response.setPayload(codeSystem, FHIR_JSON);
+        setCacheHeaders(response, resourceVersion, CACHE_READ);
         return response;
     }
 
@@ -204,7 +268,7 @@ service http:InterceptableService /fhir/r4 on interceptorListener {
     isolated resource function post .(http:RequestContext ctx, http:Request request) returns http:Response|r4:FHIRError {
         log:printDebug("FHIR Terminology request is received. Interaction: Batch");
 
-        r4:Bundle result = check batchValidateValueSets(request);
+        r4:Bundle result = check processBatch(request);
         http:Response response = new;
         response.statusCode = http:STATUS_OK;
         response.setPayload(result, FHIR_JSON);
@@ -214,16 +278,37 @@ service http:InterceptableService /fhir/r4 on interceptorListener {
     isolated resource function post \$upload(http:RequestContext ctx, http:Request request) returns http:Response|r4:FHIRError {
         log:printDebug("FHIR Terminology request is received. Interaction: Create");
 
-        r4:FHIRError? response = upload(request);
+        UploadJob job = check upload(request);
+        http:Response response = new;
+        response.statusCode = http:STATUS_ACCEPTED;
+        response.setHeader(CONTENT_LOCATION, UPLOAD_JOB_PATH + job.jobId);
+        response.setPayload(uploadJobToParameters(job), FHIR_JSON);
+        return response;
+    }
+
+    isolated resource function get \$upload/[string jobId](http:RequestContext ctx, http:Request request) returns http:Response|r4:FHIRError {
+        log:printDebug("FHIR Terminology request is received. Interaction: Upload Status");
 
-        if response is r4:FHIRError {
-            return response;
+        UploadJob job = check getUploadJob(jobId);
+        http:Response response = new;
+        if job.status == JOB_QUEUED || job.status == JOB_RUNNING {
+            response.statusCode = http:STATUS_ACCEPTED;
+            response.setHeader(X_PROGRESS, string `${job.phase}, ${job.rowsProcessed} rows, ${job.rowsPerSecond} rows/s`);
         } else {
-            http:Response successResponse = new;
-            successResponse.statusCode = http:STATUS_CREATED;
-            successResponse.setJsonPayload(response.toJson());
-            return successResponse;
+            response.statusCode = http:STATUS_OK;
         }
+        response.setPayload(uploadJobToParameters(job), FHIR_JSON);
+        return response;
+    }
+
+    isolated resource function delete \$upload/[string jobId](http:RequestContext ctx, http:Request request) returns http:Response|r4:FHIRError {
+        log:printDebug("FHIR Terminology request is received. Interaction: Upload Cancel");
+
+        UploadJob job = check cancelUploadJob(jobId);
+        http:Response response = new;
+        response.statusCode = http:STATUS_ACCEPTED;
+        response.setPayload(uploadJobToParameters(job), FHIR_JSON);
+        return response;
     }
 
     isolated resource function get \$find\-code(http:RequestContext ctx, http:Request request) returns http:Response|r4:FHIRError {
@@ -0,0 +1,633 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.store;
+
+import ballerina/http;
+import ballerina/io;
+import ballerina/log;
+import ballerina/persist;
+import ballerina/sql;
+import ballerina/time;
+import ballerinax/health.fhir.r4;
+import ballerinax/health.fhir.r4.international401;
+import ballerinax/health.fhir.r4.parser;
+import ballerinax/health.fhir.r4.terminology;
+
+const SNAPSHOT_FORMAT_VERSION = 1;
+
+// concepts, parent links and expansion concepts per snapshot line
+const SNAPSHOT_CHUNK_SIZE = 1000;
+
+// kinds of the snapshot lines
+const SNAPSHOT_HEADER = "header";
+const SNAPSHOT_CODESYSTEM = "codeSystem";
+const SNAPSHOT_CONCEPTS = "concepts";
+const SNAPSHOT_PARENTS = "parents";
+const SNAPSHOT_VALUESET = "valueSet";
+const SNAPSHOT_EXPANSION = "expansion";
+
+// the snapshot served instead of the store, nil unless `snapshot_file` is set
+final readonly & TerminologySnapshot? terminologySnapshot = check loadConfiguredSnapshot();
+
+function loadConfiguredSnapshot() returns (readonly & TerminologySnapshot)|error? {
+    if snapshot_file == "" {
+        return;
+    }
+    return loadSnapshot(snapshot_file);
+}
+
+# Writes every CodeSystem and ValueSet of the store to a snapshot file. The file holds one JSON document per
+# line: a header, then every CodeSystem followed by its concepts and parent links, then every ValueSet followed
+# by its expansion. Concepts are numbered in file order, parent links and expansions refer to them by that
+# number, so every code is written once. Lines are written as the store is read, a chunk at a time.
+#
+# + path - File to write the snapshot to, replaced if it exists
+# + return - Snapshot summary or an error if the store could not be read or the file written
+isolated function exportSnapshot(string path) returns SnapshotSummary|error {
+    decimal startTime = time:monotonicNow();
+    io:WritableByteChannel byteChannel = check io:openWritableFile(path);
+    io:WritableCharacterChannel channel = new (byteChannel, io:DEFAULT_ENCODING);
+
+    SnapshotSummary|error summary = writeSnapshot(channel);
+    check channel.close();
+    if summary is error {
+        return summary;
+    }
+
+    summary.elapsedSeconds = time:monotonicNow() - startTime;
+    log:printInfo("Terminology snapshot exported",
+            path = path,
+            codeSystems = summary.codeSystemCount,
+            valueSets = summary.valueSetCount,
+            concepts = summary.conceptCount,
+            elapsedSeconds = summary.elapsedSeconds);
+    return summary;
+}
+
+isolated function writeSnapshot(io:WritableCharacterChannel channel) returns SnapshotSummary|error {
+    SnapshotSummary summary = {};
+    SnapshotHeader header = {kind: SNAPSHOT_HEADER, formatVersion: SNAPSHOT_FORMAT_VERSION, createdAt: time:utcToString(time:utcNow())};
+    check channel.writeLine(header.toJsonString());
+
+    // snapshot index of every exported concept, by concept id
+    map<int> conceptIndexes = {};
+
+    stream<store:CodeSystem, persist:Error?> codeSystemStream = sClient->/codesystems(store:CodeSystem);
+    store:CodeSystem[] codeSystems = check streamToStoreCodeSystem(codeSystemStream);
+    foreach store:CodeSystem codeSystem in codeSystems {
+        SnapshotResource line = {
+            kind: SNAPSHOT_CODESYSTEM,
+            columns: {
+                id: codeSystem.id,
+                url: codeSystem.url,
+                'version: codeSystem.'version,
+                name: codeSystem.name,
+                title: codeSystem.title,
+                status: codeSystem.status,
+                date: codeSystem.date,
+                publisher: codeSystem.publisher
+            },
+            'resource: check (check string:fromBytes(codeSystem.codeSystem)).fromJsonString()
+        };
+        check channel.writeLine(line.toJsonString());
+        check writeSnapshotConcepts(channel, codeSystem.codeSystemId, conceptIndexes);
+        check writeSnapshotParents(channel, codeSystem.codeSystemId, conceptIndexes);
+        summary.codeSystemCount += 1;
+    }
+    summary.conceptCount = conceptIndexes.length();
+
+    stream<store:ValueSet, persist:Error?> valueSetStream = sClient->/valuesets(store:ValueSet);
+    store:ValueSet[] valueSets = check streamToStoreValueSet(valueSetStream);
+    foreach store:ValueSet valueSet in valueSets {
+        SnapshotResource line = {
+            kind: SNAPSHOT_VALUESET,
+            columns: {
+                id: valueSet.id,
+                url: valueSet.url,
+                'version: valueSet.'version,
+                name: valueSet.name,
+                title: valueSet.title,
+                status: valueSet.status,
+                date: valueSet.date,
+                publisher: valueSet.publisher
+            },
+            'resource: check (check string:fromBytes(valueSet.valueSet)).fromJsonString()
+        };
+        check channel.writeLine(line.toJsonString());
+        check writeSnapshotExpansion(channel, valueSet.valueSetId, conceptIndexes);
+        summary.valueSetCount += 1;
+    }
+    return summary;
+}
+
+isolated function writeSnapshotConcepts(io:WritableCharacterChannel channel, int codeSystemId, map<int> conceptIndexes) returns error? {
+    int afterConceptId = 0;
+    while true {
+        stream<ConceptColumns, persist:Error?> conceptStream = sClient->queryNativeSQL(sql:queryConcat(
+                selectConceptColumns(),
+                ` WHERE c.`, escapeToQuery("codesystemCodeSystemId"), ` = ${codeSystemId} AND c.`, escapeToQuery("conceptId"), ` > ${afterConceptId}`,
+                ` ORDER BY c.`, escapeToQuery("conceptId"), ` `, getLimitClause(SNAPSHOT_CHUNK_SIZE, 0)
+        ));
+        ConceptColumns[] rows = check from ConceptColumns row in conceptStream
+            select row;
+        if rows.length() == 0 {
+            return;
+        }
+
+        SnapshotConcepts chunk = {kind: SNAPSHOT_CONCEPTS, codes: [], displays: [], definitions: [], details: []};
+        foreach ConceptColumns row in rows {
+            conceptIndexes[row.conceptId.toString()] = conceptIndexes.length();
+            chunk.codes.push(row.code);
+            chunk.displays.push(row.display);
+            chunk.definitions.push(row.definition);
+
+            // code, display and definition are all there is to most concepts
+            if (row.propertyCount ?: 1) == 0 && (row.designationCount ?: 1) == 0 && row.opaque == false {
+                chunk.details.push(());
+            } else {
+                r4:CodeSystemConcept concept = check toCodeSystemConcept(row);
+                concept.concept = ();
+                chunk.details.push(concept.toJsonString());
+            }
+        }
+        check channel.writeLine(chunk.toJsonString());
+        afterConceptId = rows[rows.length() - 1].conceptId;
+    }
+}
+
+isolated function writeSnapshotParents(io:WritableCharacterChannel channel, int codeSystemId, map<int> conceptIndexes) returns error? {
+    stream<SnapshotLinkRow, persist:Error?> linkStream = sClient->queryNativeSQL(sql:queryConcat(
+            `SELECT `, escapeToQuery("descendantConceptId"), ` AS `, escapeToQuery("childId"), `, `, escapeToQuery("ancestorConceptId"), ` AS `, escapeToQuery("parentId"),
+            ` FROM `, escapeToQuery(CONCEPT_CLOSURE_TABLE), ` WHERE `, escapeToQuery("codeSystemId"), ` = ${codeSystemId} AND `, escapeToQuery("depth"), ` = 1`
+    ));
+
+    SnapshotIndexes chunk = {kind: SNAPSHOT_PARENTS, indexes: []};
+    check from SnapshotLinkRow row in linkStream
+        do {
+            int? child = conceptIndexes[row.childId.toString()];
+            int? parent = conceptIndexes[row.parentId.toString()];
+            if child is int && parent is int {
+                chunk.indexes.push(child, parent);
+            }
+            if chunk.indexes.length() >= 2 * SNAPSHOT_CHUNK_SIZE {
+                check channel.writeLine(chunk.toJsonString());
+                chunk.indexes = [];
+            }
+        };
+    if chunk.indexes.length() > 0 {
+        check channel.writeLine(chunk.toJsonString());
+    }
+}
+
+isolated function writeSnapshotExpansion(io:WritableCharacterChannel channel, int valueSetId, map<int> conceptIndexes) returns error? {
+    _ = check ensureValueSetExpansion(valueSetId);
+
+    // expansion rows only hold codes, the membership index tells which concept they are
+    stream<SnapshotExpansionRow, persist:Error?> rowStream = sClient->queryNativeSQL(sql:queryConcat(
+            `SELECT e.`, escapeToQuery("position"), ` AS `, escapeToQuery("position"), `, MIN(m.`, escapeToQuery("conceptId"), `) AS `, escapeToQuery("conceptId"),
+            ` FROM `, escapeToQuery(VALUESET_EXPANSIONS_TABLE), ` e JOIN `, escapeToQuery(CODE_MEMBERSHIPS_TABLE), ` m`,
+            ` ON m.`, escapeToQuery("valueSetId"), ` = e.`, escapeToQuery("valueSetId"), ` AND m.`, escapeToQuery("code"), ` = e.`, escapeToQuery("code"),
+            ` WHERE e.`, escapeToQuery("valueSetId"), ` = ${valueSetId}`,
+            ` GROUP BY e.`, escapeToQuery("position"), ` ORDER BY e.`, escapeToQuery("position")
+    ));
+
+    SnapshotIndexes chunk = {kind: SNAPSHOT_EXPANSION, indexes: []};
+    check from SnapshotExpansionRow row in rowStream
+        do {
+            int? index = conceptIndexes[row.conceptId.toString()];
+            if index is int {
+                chunk.indexes.push(index);
+            }
+            if chunk.indexes.length() >= SNAPSHOT_CHUNK_SIZE {
+                check channel.writeLine(chunk.toJsonString());
+                chunk.indexes = [];
+            }
+        };
+    if chunk.indexes.length() > 0 {
+        check channel.writeLine(chunk.toJsonString());
+    }
+}
+
+# Reads a snapshot file written by `exportSnapshot`. The file is streamed a line at a time, the concepts go to
+# flat arrays and the parent links are packed into an offset array, so a lookup is a map access and a parent
+# walk is a few array reads. The snapshot is immutable once read and shared by every request without locking.
+#
+# + path - Snapshot file
+# + return - The snapshot or an error if the file could not be read or is not a snapshot
+isolated function loadSnapshot(string path) returns (readonly & TerminologySnapshot)|error {
+    decimal startTime = time:monotonicNow();
+    stream<string, io:Error?> lines = check io:fileReadLinesAsStream(path);
+
+    TerminologySnapshot snapshot = {};
+    // child and parent concept index of every parent link
+    int[] links = [];
+    check from string line in lines
+        where line.trim() != ""
+        do {
+            check addSnapshotLine(snapshot, links, line);
+        };
+    if snapshot.createdAt == "" {
+        return error(string `${path} is not a terminology snapshot`);
+    }
+
+    // counting sort of the links by child
+    int conceptCount = snapshot.codes.length();
+    int[] parentStart = [];
+    parentStart.setLength(conceptCount + 1);
+    int linkCount = links.length() / 2;
+    foreach int i in 0 ..< linkCount {
+        parentStart[links[2 * i] + 1] += 1;
+    }
+    foreach int i in 1 ... conceptCount {
+        parentStart[i] += parentStart[i - 1];
+    }
+    int[] parents = [];
+    parents.setLength(linkCount);
+    int[] nextParent = parentStart.slice(0, conceptCount);
+    foreach int i in 0 ..< linkCount {
+        int child = links[2 * i];
+        parents[nextParent[child]] = links[2 * i + 1];
+        nextParent[child] += 1;
+    }
+    snapshot.parentStart = parentStart;
+    snapshot.parents = parents;
+
+    snapshot.codeSystemIndex = indexSnapshotResources(from SnapshotCodeSystem codeSystem in snapshot.codeSystems
+        select codeSystem.columns);
+    snapshot.valueSetIndex = indexSnapshotResources(from SnapshotValueSet valueSet in snapshot.valueSets
+        select valueSet.columns);
+
+    readonly & TerminologySnapshot loaded = snapshot.cloneReadOnly();
+    log:printInfo("Terminology snapshot loaded",
+            path = path,
+            createdAt = loaded.createdAt,
+            codeSystems = loaded.codeSystems.length(),
+            valueSets = loaded.valueSets.length(),
+            concepts = conceptCount,
+            elapsedSeconds = time:monotonicNow() - startTime);
+    return loaded;
+}
+
+isolated function addSnapshotLine(TerminologySnapshot snapshot, int[] links, string line) returns error? {
+    map<json> entry = check line.fromJsonStringWithType();
+    json kind = entry["kind"];
+    if snapshot.createdAt == "" && kind != SNAPSHOT_HEADER {
+        return error("Snapshot header is missing");
+    }
+
+    match kind {
+        SNAPSHOT_HEADER => {
+            SnapshotHeader header = check entry.cloneWithType();
+            if header.formatVersion != SNAPSHOT_FORMAT_VERSION {
+                return error(string `Snapshot format version ${header.formatVersion} is not supported`);
+            }
+            snapshot.createdAt = header.createdAt;
+        }
+        SNAPSHOT_CODESYSTEM => {
+            SnapshotResource item = check entry.cloneWithType();
+            r4:CodeSystem codeSystem = check parser:parse(item.'resource).ensureType();
+            snapshot.codeSystems.push({columns: item.columns, 'resource: codeSystem, firstConcept: snapshot.codes.length()});
+        }
+        SNAPSHOT_CONCEPTS => {
+            SnapshotConcepts chunk = check entry.cloneWithType();
+            int codeSystemIndex = snapshot.codeSystems.length() - 1;
+            if codeSystemIndex < 0 {
+                return error("Snapshot concepts come before their CodeSystem");
+            }
+            SnapshotCodeSystem codeSystem = snapshot.codeSystems[codeSystemIndex];
+            foreach int i in 0 ..< chunk.codes.length() {
+                codeSystem.codes[chunk.codes[i]] = snapshot.codes.length();
+                snapshot.codes.push(chunk.codes[i]);
+                snapshot.displays.push(chunk.displays[i]);
+                snapshot.definitions.push(chunk.definitions[i]);
+                snapshot.details.push(chunk.details[i]);
+                snapshot.conceptCodeSystems.push(codeSystemIndex);
+            }
+            codeSystem.conceptCount += chunk.codes.length();
+        }
+        SNAPSHOT_PARENTS => {
+            SnapshotIndexes chunk = check entry.cloneWithType();
+            foreach int index in chunk.indexes {
+                check checkSnapshotConceptIndex(snapshot, index);
+            }
+            links.push(...chunk.indexes);
+        }
+        SNAPSHOT_VALUESET => {
+            SnapshotResource item = check entry.cloneWithType();
+            r4:ValueSet valueSet = check parser:parse(item.'resource).ensureType();
+            snapshot.valueSets.push({columns: item.columns, 'resource: valueSet});
+        }
+        SNAPSHOT_EXPANSION => {
+            SnapshotIndexes chunk = check entry.cloneWithType();
+            if snapshot.valueSets.length() == 0 {
+                return error("Snapshot expansion comes before its ValueSet");
+            }
+            SnapshotValueSet valueSet = snapshot.valueSets[snapshot.valueSets.length() - 1];
+            foreach int index in chunk.indexes {
+                check checkSnapshotConceptIndex(snapshot, index);
+                string code = snapshot.codes[index];
+                if !valueSet.codes.hasKey(code) {
+                    valueSet.codes[code] = index;
+                }
+                valueSet.expansion.push(index);
+            }
+        }
+        // lines added by later format versions are skipped
+    }
+}
+
+isolated function checkSnapshotConceptIndex(TerminologySnapshot snapshot, int index) returns error? {
+    if index < 0 || index >= snapshot.codes.length() {
+        return error(string `Snapshot concept ${index} does not exist`);
+    }
+}
+
+# Indexes CodeSystems or ValueSets by url and by id, with their version and without. Keys without version
+# resolve to the highest version, as in the store.
+#
+# + columns - Columns of the resources
+# + return - Resource index by `resourceCacheKey`
+isolated function indexSnapshotResources(map<string>[] columns) returns map<int> {
+    map<int> index = {};
+    foreach int i in 0 ..< columns.length() {
+        string 'version = columns[i]["version"] ?: "";
+        foreach string kind in [CACHE_KEY_URL, CACHE_KEY_ID] {
+            string value = columns[i][kind] ?: "";
+            string latestKey = resourceCacheKey(kind, value, ());
+            int? latest = index[latestKey];
+            if latest is () || 'version > (columns[latest]["version"] ?: "") {
+                index[latestKey] = i;
+            }
+            if 'version != "" {
+                index[resourceCacheKey(kind, value, 'version)] = i;
+            }
+        }
+    }
+    return index;
+}
+
+isolated function snapshotReadOnlyError() returns r4:FHIRError {
+    return r4:createFHIRError(
+            "The terminology service is serving a read-only snapshot",
+            r4:ERROR,
+            r4:INVALID_REQUIRED,
+            httpStatusCode = http:STATUS_METHOD_NOT_ALLOWED);
+}
+
+isolated function findSnapshotCodeSystem(TerminologySnapshot snapshot, string? system, string? id, string? version) returns SnapshotCodeSystem|r4:FHIRError {
+    int? index = id is string ? snapshot.codeSystemIndex[resourceCacheKey(CACHE_KEY_ID, id, version)]
+        : system is string ? snapshot.codeSystemIndex[resourceCacheKey(CACHE_KEY_URL, system, version)] : ();
+    if index is () {
+        return r4:createFHIRError(
+                "CodeSystem not found",
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = error("No matching CodeSystem found"),
+                httpStatusCode = http:STATUS_NOT_FOUND);
+    }
+    return snapshot.codeSystems[index];
+}
+
+isolated function findSnapshotValueSet(TerminologySnapshot snapshot, string? system, string? id, string? version) returns SnapshotValueSet|r4:FHIRError {
+    int? index = id is string ? snapshot.valueSetIndex[resourceCacheKey(CACHE_KEY_ID, id, version)]
+        : system is string ? snapshot.valueSetIndex[resourceCacheKey(CACHE_KEY_URL, system, version)] : ();
+    if index is () {
+        return r4:createFHIRError(
+                "ValueSet not found",
+                r4:ERROR,
+                r4:PROCESSING_NOT_FOUND,
+                cause = error("No matching ValueSet found"),
+                httpStatusCode = http:STATUS_NOT_FOUND);
+    }
+    return snapshot.valueSets[index];
+}
+
+# Finds a code in the ValueSet or, failing that, the CodeSystem with the given url, the same way the store
+# lookup does.
+#
+# + snapshot - Snapshot to look in
+# + system - Url of the ValueSet or CodeSystem
+# + code - Code to find
+# + version - Optional version of the ValueSet or CodeSystem
+# + return - The concept or a not found error
+isolated function findSnapshotConcept(TerminologySnapshot snapshot, string system, string code, string? version) returns terminology:CodeConceptDetails|r4:FHIRError {
+    int? index = ();
+    SnapshotValueSet|r4:FHIRError valueSet = findSnapshotValueSet(snapshot, system, (), version);
+    if valueSet is SnapshotValueSet {
+        index = valueSet.codes[code];
+    }
+    if index is () {
+        SnapshotCodeSystem|r4:FHIRError codeSystem = findSnapshotCodeSystem(snapshot, system, (), version);
+        if codeSystem is SnapshotCodeSystem {
+            index = codeSystem.codes[code];
+        }
+    }
+
+    if index is () {
+        return r4:createFHIRError(
+                "Concept not found",
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = error("No matching Concept found"),
+                httpStatusCode = http:STATUS_NOT_FOUND);
+    }
+    return {url: system, concept: check getSnapshotConcept(snapshot, index)};
+}
+
+isolated function getSnapshotConcept(TerminologySnapshot snapshot, int index) returns r4:CodeSystemConcept|r4:FHIRError {
+    string? detail = snapshot.details[index];
+    if detail is string {
+        r4:CodeSystemConcept|error concept = detail.fromJsonStringWithType();
+        if concept is error {
+            return r4:createFHIRError(
+                    "Error while parsing Concept, " + concept.message(),
+                    r4:ERROR,
+                    r4:INVALID_REQUIRED,
+                    cause = concept,
+                    httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+        }
+        return concept;
+    }
+
+    r4:CodeSystemConcept concept = {code: snapshot.codes[index]};
+    string? display = snapshot.displays[index];
+    if display is string {
+        concept.display = display;
+    }
+    string? definition = snapshot.definitions[index];
+    if definition is string {
+        concept.definition = definition;
+    }
+    return concept;
+}
+
+# Returns a page of the prebuilt expansion of a ValueSet, filtered like the store expansion.
+#
+# + valueSet - ValueSet of the snapshot
+# + snapshot - Snapshot holding the concepts
+# + filter - Optional text filter on the concept display
+# + offset - Number of matching concepts to skip
+# + count - Maximum number of concepts to return
+# + return - Page of concepts and the number of matching concepts
+isolated function expandSnapshotValueSet(TerminologySnapshot snapshot, SnapshotValueSet valueSet, string? filter, int offset, int count)
+        returns [r4:ValueSetExpansionContains[], int] {
+    r4:ValueSetExpansionContains[] page = [];
+    if filter is () {
+        foreach int index in valueSet.expansion.slice(int:min(int:max(offset, 0), valueSet.expansion.length()), int:min(int:max(offset, 0) + int:max(count, 0), valueSet.expansion.length())) {
+            page.push({code: snapshot.codes[index], display: snapshot.displays[index]});
+        }
+        return [page, valueSet.expansion.length()];
+    }
+
+    string pattern = filter.toUpperAscii();
+    int total = 0;
+    foreach int index in valueSet.expansion {
+        string? display = snapshot.displays[index];
+        if display is string && !display.toUpperAscii().includes(pattern) {
+            continue;
+        }
+        if total >= offset && page.length() < count {
+            page.push({code: snapshot.codes[index], display});
+        }
+        total += 1;
+    }
+    return [page, total];
+}
+
+# Tells whether one code of a CodeSystem subsumes the other by walking the parent links of the snapshot.
+#
+# + codeSystem - CodeSystem of the snapshot
+# + snapshot - Snapshot holding the concepts
+# + codeA - First code
+# + codeB - Second code
+# + return - Subsumption outcome or an error if a code is unknown
+isolated function snapshotSubsumes(TerminologySnapshot snapshot, SnapshotCodeSystem codeSystem, string codeA, string codeB)
+        returns international401:Parameters|r4:FHIRError {
+    if codeA == codeB {
+        return {'parameter: [{name: terminology:OUTCOME, valueCode: terminology:EQUIVALENT}]};
+    }
+
+    int? conceptA = codeSystem.codes[codeA];
+    int? conceptB = codeSystem.codes[codeB];
+    if conceptA is () || conceptB is () {
+        return r4:createFHIRError(
+                "Concept not found",
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = error("No matching Concept found"),
+                httpStatusCode = http:STATUS_NOT_FOUND);
+    }
+
+    if isSnapshotAncestor(snapshot, conceptA, conceptB) {
+        return {'parameter: [{name: terminology:OUTCOME, valueCode: terminology:SUBSUMED}]};
+    }
+    if isSnapshotAncestor(snapshot, conceptB, conceptA) {
+        return {'parameter: [{name: terminology:OUTCOME, valueCode: terminology:SUBSUMED_BY}]};
+    }
+    return {'parameter: [{name: terminology:OUTCOME, valueCode: terminology:NOT_SUBSUMED}]};
+}
+
+isolated function isSnapshotAncestor(TerminologySnapshot snapshot, int ancestor, int concept) returns boolean {
+    int[] pending = [concept];
+    map<boolean> visited = {};
+    while pending.length() > 0 {
+        int current = pending.pop();
+        foreach int parent in snapshot.parents.slice(snapshot.parentStart[current], snapshot.parentStart[current + 1]) {
+            if parent == ancestor {
+                return true;
+            }
+            string key = parent.toString();
+            if !visited.hasKey(key) {
+                visited[key] = true;
+                pending.push(parent);
+            }
+        }
+    }
+    return false;
+}
+
+# Searches the display or definition of every concept of the snapshot, ranked like the store search:
+# exact matches, then prefix matches, then substring matches.
+#
+# + snapshot - Snapshot to search
+# + property - Concept property to search in
+# + filter - Text to search for
+# + system - Optional CodeSystem url to restrict the search to
+# + offset - Number of ranked matches to skip
+# + count - Maximum number of matches to return
+# + return - Page of ranked matches
+isolated function searchSnapshotConcepts(TerminologySnapshot snapshot, DISPLAY|DEFINITION property, string filter, string? system,
+        int offset, int count) returns terminology:CodeConceptDetails[] {
+    (string?)[] texts = property == DISPLAY ? snapshot.displays : snapshot.definitions;
+    string pattern = filter.toUpperAscii();
+    int[][] ranks = [[], [], []];
+    foreach int index in 0 ..< texts.length() {
+        string? text = texts[index];
+        if text is () || (system is string && snapshot.codeSystems[snapshot.conceptCodeSystems[index]].columns["url"] != system) {
+            continue;
+        }
+        string upperText = text.toUpperAscii();
+        if upperText == pattern {
+            ranks[MATCH_RANK_EXACT].push(index);
+        } else if upperText.startsWith(pattern) {
+            ranks[MATCH_RANK_PREFIX].push(index);
+        } else if upperText.includes(pattern) {
+            ranks[MATCH_RANK_SUBSTRING].push(index);
+        }
+    }
+
+    int[] matches = [...ranks[MATCH_RANK_EXACT], ...ranks[MATCH_RANK_PREFIX], ...ranks[MATCH_RANK_SUBSTRING]];
+    terminology:CodeConceptDetails[] concepts = [];
+    foreach int index in matches.slice(int:min(int:max(offset, 0), matches.length()), int:min(int:max(offset, 0) + int:max(count, 0), matches.length())) {
+        r4:CodeSystemConcept concept = {code: snapshot.codes[index]};
+        string? display = snapshot.displays[index];
+        if display is string {
+            concept.display = display;
+        }
+        concepts.push({url: snapshot.codeSystems[snapshot.conceptCodeSystems[index]].columns["url"] ?: "", concept});
+    }
+    return concepts;
+}
+
+# Selects the CodeSystems or ValueSets whose columns equal every supported search parameter, like the store
+# search does.
+#
+# + columns - Columns of the resources
+# + params - Search parameters
+# + offset - Number of matching resources to skip, applied with `count` only
+# + count - Maximum number of resources to return
+# + return - Indexes of the matching resources
+isolated function searchSnapshotResources(map<string>[] columns, map<r4:RequestSearchParameter[]> params, int? offset, int? count) returns int[] {
+    int[] matches = [];
+    foreach int i in 0 ..< columns.length() {
+        boolean matched = true;
+        foreach var [paramName, paramList] in params.entries() {
+            if terminology:CODESYSTEMS_SEARCH_PARAMS.hasKey(paramName) {
+                foreach var param in paramList {
+                    matched = matched && columns[i][paramName == "system" ? "url" : paramName] == param.value;
+                }
+            }
+        }
+        if matched {
+            matches.push(i);
+        }
+    }
+
+    if offset is int && count is int {
+        return matches.slice(int:min(int:max(offset, 0), matches.length()), int:min(int:max(offset, 0) + int:max(count, 0), matches.length()));
+    }
+    return matches;
+}
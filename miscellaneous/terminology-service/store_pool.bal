@@ -0,0 +1,230 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import ballerina/file;
+import ballerina/io;
+import ballerina/jballerina.java;
+import ballerina/lang.runtime;
+import ballerina/log;
+import ballerina/observe;
+import ballerina/sql;
+
+const STORE_POOL_ACTIVE_METRIC = "terminology_store_pool_active_connections";
+const STORE_POOL_IDLE_METRIC = "terminology_store_pool_idle_connections";
+const STORE_POOL_TOTAL_METRIC = "terminology_store_pool_total_connections";
+const STORE_POOL_WAITING_METRIC = "terminology_store_pool_waiting_threads";
+
+// system property naming a properties file HikariCP applies to every pool it creates
+const HIKARI_CONFIGURATION_FILE_PROPERTY = "hikaricp.configurationFile";
+// JMX names of the HikariCP pools, registered once `enableStorePoolMBeans` has run
+const HIKARI_POOL_MBEANS = "com.zaxxer.hikari:type=Pool (*)";
+
+// defaults of every supported `db_type`, H2 writes through a single file so it gets fewer connections
+final readonly & map<StorePoolConfig> DEFAULT_STORE_POOLS = {
+    postgresql: {},
+    mysql: {},
+    mssql: {},
+    h2: {maxOpenConnections: 10, minIdleConnections: 10}
+};
+
+final StorePoolMonitor storePoolMonitor = new;
+
+# Pool settings of the `db_type` in use, `store_pool` entries take precedence over the defaults.
+#
+# + return - Pool settings of the configured database
+isolated function getStorePoolConfig() returns StorePoolConfig {
+    return store_pool[db_type] ?: DEFAULT_STORE_POOLS[db_type] ?: {};
+}
+
+# JDBC connection pool of the store client, built from the pool settings of the `db_type` in use.
+#
+# + return - The connection pool
+isolated function getStoreConnectionPool() returns sql:ConnectionPool {
+    StorePoolConfig config = getStorePoolConfig();
+    return {
+        maxOpenConnections: config.maxOpenConnections,
+        minIdleConnections: int:min(config.minIdleConnections, config.maxOpenConnections),
+        maxConnectionLifeTime: config.maxConnectionLifeTime,
+        connectionTimeout: config.connectionTimeout
+    };
+}
+
+# Makes HikariCP, the pool of the JDBC client, register the MXBean of every pool it creates afterwards, so that
+# `readStorePoolUsage` can read it. Must run before the store client is created. A configuration file given to
+# the JVM with `-Dhikaricp.configurationFile` is left in place and must set `registerMbeans=true` itself.
+#
+# + return - An error if the configuration file could not be written
+isolated function enableStorePoolMBeans() returns error? {
+    if java:toString(getSystemProperty(java:fromString(HIKARI_CONFIGURATION_FILE_PROPERTY))) is string {
+        return;
+    }
+    string configurationFile = check file:createTemp(".properties", "hikaricp");
+    check io:fileWriteString(configurationFile, "registerMbeans=true\n");
+    _ = setSystemProperty(java:fromString(HIKARI_CONFIGURATION_FILE_PROPERTY), java:fromString(configurationFile));
+}
+
+# Reads the usage of every HikariCP pool of the service from its MXBean.
+#
+# + return - Usage of every pool, or an error if an MXBean could not be read
+isolated function readStorePoolUsage() returns StorePoolUsage[]|error {
+    handle mBeanServer = getPlatformMBeanServer();
+    handle names = toArray(queryMBeanNames(mBeanServer, check newObjectName(java:fromString(HIKARI_POOL_MBEANS)), java:createNull()));
+
+    StorePoolUsage[] usage = [];
+    foreach int i in 0 ..< getArrayLength(names) {
+        handle name = getArrayElement(names, i);
+        // the pool name is the part of `Pool (<name>)` between the parentheses
+        string 'type = java:toString(getKeyProperty(name, java:fromString("type"))) ?: "";
+        usage.push({
+            pool: 'type.startsWith("Pool (") && 'type.endsWith(")") ? 'type.substring(6, 'type.length() - 1) : 'type,
+            activeConnections: check getIntAttribute(mBeanServer, name, "ActiveConnections"),
+            idleConnections: check getIntAttribute(mBeanServer, name, "IdleConnections"),
+            totalConnections: check getIntAttribute(mBeanServer, name, "TotalConnections"),
+            threadsAwaitingConnection: check getIntAttribute(mBeanServer, name, "ThreadsAwaitingConnection")
+        });
+    }
+    return usage;
+}
+
+isolated function getIntAttribute(handle mBeanServer, handle name, string attribute) returns int|error {
+    return intValue(check getAttribute(mBeanServer, name, java:fromString(attribute)));
+}
+
+# Publishes the connections in use, idle and open and the threads waiting for a connection of every pool, as
+# gauges tagged with the `db_type` and the pool name.
+isolated class StorePoolMonitor {
+    private final map<observe:Gauge> gauges = {};
+
+    # Sets the gauges of the pools.
+    #
+    # + usage - Usage of every pool
+    isolated function publish(readonly & StorePoolUsage[] usage) {
+        foreach StorePoolUsage pool in usage {
+            self.set(STORE_POOL_ACTIVE_METRIC, "Store connections in use", pool.pool, pool.activeConnections);
+            self.set(STORE_POOL_IDLE_METRIC, "Idle store connections", pool.pool, pool.idleConnections);
+            self.set(STORE_POOL_TOTAL_METRIC, "Open store connections", pool.pool, pool.totalConnections);
+            self.set(STORE_POOL_WAITING_METRIC, "Threads waiting for a store connection", pool.pool, pool.threadsAwaitingConnection);
+        }
+    }
+
+    # Last published value of a gauge.
+    #
+    # + name - Metric name
+    # + pool - Pool name
+    # + return - The value, or nil if it was never published
+    isolated function getValue(string name, string pool) returns float? {
+        lock {
+            return self.gauges[name + "|" + pool]?.getValue();
+        }
+    }
+
+    private isolated function set(string name, string description, string pool, int value) {
+        lock {
+            string key = name + "|" + pool;
+            observe:Gauge? gauge = self.gauges[key];
+            if gauge is observe:Gauge {
+                gauge.setValue(<float>value);
+                return;
+            }
+
+            observe:Gauge created = new (name, description, {"db_type": db_type, "pool": pool}, []);
+            error? registered = created.register();
+            if registered is error {
+                log:printDebug("Store pool metric not registered, " + registered.message(), metric = name, pool = pool);
+            }
+            created.setValue(<float>value);
+            self.gauges[key] = created;
+        }
+    }
+}
+
+# Publishes the usage of the store connection pool every `store_pool_metrics_interval` seconds until the service
+# stops.
+#
+# + monitor - Monitor the usage is published with
+isolated function monitorStorePool(StorePoolMonitor monitor) {
+    boolean reported = false;
+    while true {
+        StorePoolUsage[]|error usage = readStorePoolUsage();
+        if usage is StorePoolUsage[] && usage.length() > 0 {
+            monitor.publish(usage.cloneReadOnly());
+        } else if !reported {
+            // logged once, the pool MXBeans are either registered on startup or never
+            log:printWarn("Store pool usage not readable, the pool metrics are not published",
+                    'error = usage is error ? usage : error("No HikariCP pool MXBean registered"));
+            reported = true;
+        }
+        runtime:sleep(store_pool_metrics_interval);
+    }
+}
+
+isolated function getSystemProperty(handle key) returns handle = @java:Method {
+    name: "getProperty",
+    'class: "java.lang.System",
+    paramTypes: ["java.lang.String"]
+} external;
+
+isolated function setSystemProperty(handle key, handle value) returns handle = @java:Method {
+    name: "setProperty",
+    'class: "java.lang.System"
+} external;
+
+isolated function getPlatformMBeanServer() returns handle = @java:Method {
+    name: "getPlatformMBeanServer",
+    'class: "java.lang.management.ManagementFactory"
+} external;
+
+isolated function newObjectName(handle name) returns handle|error = @java:Constructor {
+    'class: "javax.management.ObjectName",
+    paramTypes: ["java.lang.String"]
+} external;
+
+isolated function queryMBeanNames(handle mBeanServer, handle name, handle query) returns handle = @java:Method {
+    name: "queryNames",
+    'class: "javax.management.MBeanServer",
+    paramTypes: ["javax.management.ObjectName", "javax.management.QueryExp"]
+} external;
+
+isolated function getAttribute(handle mBeanServer, handle name, handle attribute) returns handle|error = @java:Method {
+    name: "getAttribute",
+    'class: "javax.management.MBeanServer",
+    paramTypes: ["javax.management.ObjectName", "java.lang.String"]
+} external;
+
+isolated function getKeyProperty(handle name, handle key) returns handle = @java:Method {
+    name: "getKeyProperty",
+    'class: "javax.management.ObjectName"
+} external;
+
+isolated function toArray(handle collection) returns handle = @java:Method {
+    name: "toArray",
+    'class: "java.util.Collection",
+    paramTypes: []
+} external;
+
+isolated function getArrayLength(handle array) returns int = @java:Method {
+    name: "getLength",
+    'class: "java.lang.reflect.Array"
+} external;
+
+isolated function getArrayElement(handle array, int index) returns handle = @java:Method {
+    name: "get",
+    'class: "java.lang.reflect.Array"
+} external;
+
+isolated function intValue(handle number) returns int = @java:Method {
+    name: "intValue",
+    'class: "java.lang.Number"
+} external;
@@ -14,14 +14,19 @@
 // specific language governing permissions and limitations
 // under the License.
 
+import terminology_service.concept_chunks;
+import terminology_service.icd10_to_fhir as icd10;
 import terminology_service.loinc_to_fhir as loinc;
+import terminology_service.rxnorm_to_fhir as rxnorm;
 import terminology_service.snomed_to_fhir as snomed;
 
 import ballerina/data.jsondata;
 import ballerina/data.xmldata;
 import ballerina/http;
+import ballerina/io;
 import ballerina/regex;
 import ballerina/time;
+import ballerina/uuid;
 import ballerinax/health.fhir.r4;
 import ballerinax/health.fhir.r4.international401;
 import ballerinax/health.fhir.r4.terminology;
@@ -63,6 +68,11 @@ public isolated function readValueSetByUrl(string url) returns r4:ValueSet|r4:FH
 public isolated function searchValueSet(http:Request request) returns r4:Bundle|r4:FHIRError {
     map<string[]> searchParams = request.getQueryParams();
     map<r4:RequestSearchParameter[]> params = prepareRequestSearchParameter(searchParams);
+    // summaries and element subsets are read from the metadata columns
+    r4:Bundle? projected = check searchResourceProjection(RESOURCE_VERSION_VALUESET, request, params);
+    if projected is r4:Bundle {
+        return projected;
+    }
 
     r4:ValueSet[] valueSets = check terminology:searchValueSets(params, terminology = terminology_source);
 
@@ -81,6 +91,11 @@ public isolated function searchValueSet(http:Request request) returns r4:Bundle|
 public isolated function searchCodeSystem(http:Request request) returns r4:Bundle|r4:FHIRError {
     map<string[]> searchParams = request.getQueryParams();
     map<r4:RequestSearchParameter[]> params = prepareRequestSearchParameter(searchParams);
+    // summaries and element subsets are read from the metadata columns
+    r4:Bundle? projected = check searchResourceProjection(RESOURCE_VERSION_CODESYSTEM, request, params);
+    if projected is r4:Bundle {
+        return projected;
+    }
 
     r4:CodeSystem[] codeSystems = check terminology:searchCodeSystems(params, terminology = terminology_source);
 
@@ -96,22 +111,37 @@ public isolated function searchCodeSystem(http:Request request) returns r4:Bundl
     };
 }
 
-public isolated function valueSetExpansionGet(http:Request request, string? id = ()) returns r4:ValueSet|r4:FHIRError {
+public isolated function valueSetExpansionGet(http:Request request, string? id = (), TerminologySource terminologySource = terminology_source)
+        returns r4:ValueSet|r4:FHIRError {
     map<string[]> searchParams = request.getQueryParams();
     map<r4:RequestSearchParameter[]> searchParameters = prepareRequestSearchParameter(searchParams);
 
     r4:ValueSet valueSet = {status: "unknown"};
 
     if id is string {
-        valueSet = check terminology:valueSetExpansion(searchParameters, vs = check readValueSetById(id), terminology = terminology_source);
+        valueSet = check terminology:valueSetExpansion(searchParameters, vs = check readValueSetById(id), terminology = terminologySource);
     } else {
         string|() system = request.getQueryParamValue("url") ?: ();
-        valueSet = check terminology:valueSetExpansion(searchParameters, system = system, terminology = terminology_source);
+        valueSet = check terminology:valueSetExpansion(searchParameters, system = system, terminology = terminologySource);
     }
 
     return valueSet;
 }
 
+# Expands a ValueSet requested with GET like `valueSetExpansionGet`. The expansion of a stored ValueSet is built
+# without its concepts, which are streamed into the response, see `streamValueSetExpansion`.
+#
+# + request - The `$expand` request
+# + id - Id of the ValueSet, when expanded by id
+# + return - The response body, the expanded ValueSet if it is not streamed, or an error
+public isolated function valueSetExpansionStreamGet(http:Request request, string? id = ())
+        returns stream<byte[], io:Error?>|r4:ValueSet|r4:FHIRError {
+    TerminologySource terminologySource = new (deferExpansion = true);
+    r4:ValueSet valueSet = check valueSetExpansionGet(request, id, terminologySource);
+    DeferredExpansion? page = terminologySource.takeDeferredExpansion();
+    return page is DeferredExpansion ? streamValueSetExpansion(valueSet, page) : valueSet;
+}
+
 public isolated function valueSetExpansionPost(http:Request request, string? id = ()) returns r4:ValueSet|r4:FHIRError {
     map<string[]> searchParams = request.getQueryParams();
     map<r4:RequestSearchParameter[]> searchParameters = prepareRequestSearchParameter(searchParams);
@@ -176,6 +206,22 @@ public isolated function codeSystemLookUpGet(http:RequestContext ctx, http:Reque
                 httpStatusCode = http:STATUS_BAD_REQUEST);
     }
 
+    // repeated codes are looked up together, in one query per CodeSystem
+    string[] codeValues = request.getQueryParamValues("code") ?: [];
+    if codeValues.length() > 1 {
+        string? lookupSystem = id is string ? (check readCodeSystemById(id)).url : system;
+        if lookupSystem !is string {
+            return r4:createFHIRError(
+                    "Can not find a CodeSystem",
+                    r4:ERROR,
+                    r4:INVALID_REQUIRED,
+                    httpStatusCode = http:STATUS_BAD_REQUEST);
+        }
+        BatchLookupItem[] items = from int i in 0 ..< codeValues.length()
+            select {index: i, system: lookupSystem, version: 'version, code: codeValues[i]};
+        return toBatchLookupParameters(items, lookupCodesInBatch(items));
+    }
+
     r4:CodeSystemConcept[]|r4:CodeSystemConcept result;
 
     if id is string {
@@ -196,6 +242,7 @@ public isolated function codeSystemLookUpGet(http:RequestContext ctx, http:Reque
 public isolated function codeSystemLookUpPost(http:RequestContext ctx, http:Request request) returns international401:Parameters|r4:FHIRError {
     r4:Coding? codingValue = ();
     r4:uri? system = ();
+    r4:Coding[] codings = [];
 
     json|http:ClientError jsonPayload = request.getJsonPayload();
     if jsonPayload is json {
@@ -205,6 +252,9 @@ public isolated function codeSystemLookUpPost(http:RequestContext ctx, http:Requ
                 match item.name {
                     "coding" => {
                         codingValue = item.valueCoding;
+                        if codingValue is r4:Coding {
+                            codings.push(codingValue);
+                        }
                         if (<r4:Coding>codingValue).system is r4:uri {
                             system = (<r4:Coding>codingValue).system;
                         }
@@ -227,6 +277,24 @@ public isolated function codeSystemLookUpPost(http:RequestContext ctx, http:Requ
                 httpStatusCode = http:STATUS_BAD_REQUEST);
     }
 
+    // repeated codings are looked up together, in one query per CodeSystem
+    if codings.length() > 1 {
+        BatchLookupItem[] items = [];
+        foreach r4:Coding coding in codings {
+            string? codingSystem = coding.system;
+            string? code = coding.code;
+            if codingSystem is () || code is () {
+                return r4:createFHIRError(
+                        "Invalid request payload, every coding needs a system and a code",
+                        r4:ERROR,
+                        r4:INVALID_REQUIRED,
+                        httpStatusCode = http:STATUS_BAD_REQUEST);
+            }
+            items.push({index: items.length(), system: codingSystem, version: coding.'version, code});
+        }
+        return toBatchLookupParameters(items, lookupCodesInBatch(items));
+    }
+
     r4:CodeSystemConcept[]|r4:CodeSystemConcept result;
     if codingValue !is r4:Coding {
         return r4:createFHIRError(
@@ -404,7 +472,7 @@ public isolated function subsumesPost(http:RequestContext ctx, http:Request requ
     }
 }
 
-public isolated function batchValidateValueSets(http:Request request) returns r4:Bundle|r4:FHIRError {
+public isolated function processBatch(http:Request request) returns r4:Bundle|r4:FHIRError {
     json|error payload = request.getJsonPayload();
     if payload is error {
         return r4:createFHIRError(
@@ -430,45 +498,7 @@ public isolated function batchValidateValueSets(http:Request request) returns r4
                 httpStatusCode = http:STATUS_BAD_REQUEST);
     }
 
-    r4:BundleEntry[] responseEntries = [];
-    if bundleIn.entry is r4:BundleEntry[] {
-        foreach r4:BundleEntry entry in <r4:BundleEntry[]>bundleIn.entry {
-            if entry.request is r4:BundleEntryRequest {
-                // cast to http request
-                r4:BundleEntryRequest entryRequest = <r4:BundleEntryRequest>entry.request;
-
-                http:Request entryRequestHttp = new;
-
-                // split the url to get system and code
-                map<string> urlParts = getSystemAndCode(entryRequest.url);
-                string? system = urlParts["system"];
-                string? code = urlParts["code"];
-
-                international401:Parameters|r4:FHIRError result = valueSetLookUpGet(entryRequestHttp, reqSystem = system, reqCodeValue = code);
-
-                if result is international401:Parameters {
-                    responseEntries.push({
-                        'resource: check validationResultToParameters(result)
-                    });
-                } else {
-                    responseEntries.push({
-                        'resource: <international401:Parameters>{
-                            'parameter: [
-                                {
-                                    name: "result",
-                                    valueBoolean: false
-                                },
-                                {
-                                    name: "message",
-                                    valueString: result.message()
-                                }
-                            ]
-                        }
-                    });
-                }
-            }
-        }
-    } else {
+    if bundleIn.entry !is r4:BundleEntry[] {
         return r4:createFHIRError(
                 "No entries in the bundle",
                 r4:ERROR,
@@ -476,6 +506,56 @@ public isolated function batchValidateValueSets(http:Request request) returns r4
                 httpStatusCode = http:STATUS_BAD_REQUEST);
     }
 
+    BatchValidationItem[] items = [];
+    BatchLookupItem[] lookupItems = [];
+    international401:Parameters[] invalidEntries = [];
+    // response list and index of every answered entry, entries without a request get no response as before
+    [BatchEntryResult, int][] responseSlots = [];
+    foreach r4:BundleEntry entry in <r4:BundleEntry[]>bundleIn.entry {
+        r4:BundleEntryRequest? entryRequest = entry.request;
+        if entryRequest is () {
+            continue;
+        }
+
+        // split the url to get system and code
+        map<string> urlParts = getSystemAndCode(entryRequest.url);
+        string? system = urlParts["system"];
+        string? code = urlParts["code"];
+        string path = regex:split(entryRequest.url, string `\?`)[0];
+        boolean lookup = path.endsWith("$lookup") || path.endsWith("%24lookup");
+
+        if system is () || code is () || system == "" || code == "" {
+            string resourceType = lookup ? "CodeSystem" : "ValueSet";
+            responseSlots.push([BATCH_INVALID, invalidEntries.length()]);
+            invalidEntries.push({
+                'parameter: [
+                    {name: "result", valueBoolean: false},
+                    {name: "message", valueString: code is () || code == "" ? string `Can not find a ${resourceType}, Code value is missing` : string `Can not find a ${resourceType}`}
+                ]
+            });
+            continue;
+        }
+
+        if lookup {
+            responseSlots.push([BATCH_LOOKUP, lookupItems.length()]);
+            lookupItems.push({index: lookupItems.length(), system, version: urlParts["codeSystemVersion"], code});
+            continue;
+        }
+
+        responseSlots.push([BATCH_VALIDATE_CODE, items.length()]);
+        string? 'version = urlParts["version"];
+        items.push({index: items.length(), system, version: 'version, code});
+    }
+
+    international401:Parameters[] results = items.length() > 0 ? validateCodesInBatch(items) : [];
+    international401:Parameters[] lookupResults = lookupCodesInBatch(lookupItems);
+
+    r4:BundleEntry[] responseEntries = from [BatchEntryResult, int] [kind, index] in responseSlots
+        select {
+            'resource: kind == BATCH_VALIDATE_CODE ? results[index]
+                : kind == BATCH_LOOKUP ? lookupResults[index] : invalidEntries[index]
+        };
+
     return {
         'type: r4:BUNDLE_TYPE_BATCH_RESPONSE,
         entry: responseEntries
@@ -497,6 +577,8 @@ isolated function getSystemAndCode(string input) returns map<string> {
 
     string system = "";
     string code = "";
+    string? 'version = ();
+    string? codeSystemVersion = ();
 
     foreach var param in params {
         // Split each parameter by '='
@@ -506,11 +588,22 @@ isolated function getSystemAndCode(string input) returns map<string> {
                 system = keyValue[1];
             } else if keyValue[0] == "code" {
                 code = keyValue[1];
+            } else if keyValue[0] == "valueSetVersion" {
+                'version = keyValue[1];
+            } else if keyValue[0] == "version" {
+                codeSystemVersion = keyValue[1];
             }
         }
     }
 
-    return {"system": system, "code": code};
+    map<string> systemAndCode = {"system": system, "code": code};
+    if 'version is string {
+        systemAndCode["version"] = 'version;
+    }
+    if codeSystemVersion is string {
+        systemAndCode["codeSystemVersion"] = codeSystemVersion;
+    }
+    return systemAndCode;
 }
 
 public isolated function addCodeSystem(http:Request req) returns r4:FHIRError? {
@@ -640,7 +733,11 @@ public isolated function addValueSet(http:Request req) returns r4:FHIRError? {
     }
 }
 
-public isolated function upload(http:Request payload) returns r4:FHIRError? {
+public isolated function upload(http:Request payload) returns UploadJob|r4:FHIRError {
+    if terminologySnapshot !is () {
+        return snapshotReadOnlyError();
+    }
+
     if payload.getContentType() != ZIP {
         return r4:createFHIRError(
                 "Invalid request payload, content type is not supported",
@@ -658,56 +755,38 @@ public isolated function upload(http:Request payload) returns r4:FHIRError? {
                     string `Missing ${TYPE_HEADER} header in the request`,
                     r4:ERROR,
                     r4:INVALID_REQUIRED,
-                    diagnostic = string `The request should contains ${TYPE_HEADER} header and supported values are: FHIR, LOINC and SNOMED`,
+                    diagnostic = string `The request should contains ${TYPE_HEADER} header and supported values are: FHIR, LOINC, SNOMED, ICD10 and RXNORM`,
                     httpStatusCode = http:STATUS_BAD_REQUEST);
         }
-        else if typeHeader != FHIR && typeHeader != LOINC && typeHeader != SNOMED {
+        else if typeHeader != FHIR && typeHeader != LOINC && typeHeader != SNOMED && typeHeader != ICD10 && typeHeader != RXNORM {
             return r4:createFHIRError(
                     string `Invalid ${TYPE_HEADER} header value`,
                     r4:ERROR,
                     r4:INVALID_REQUIRED,
-                    diagnostic = string `The request should contains ${TYPE_HEADER} header and supported values are: FHIR, LOINC and SNOMED`,
+                    diagnostic = string `The request should contains ${TYPE_HEADER} header and supported values are: FHIR, LOINC, SNOMED, ICD10 and RXNORM`,
                     httpStatusCode = http:STATUS_BAD_REQUEST);
         }
 
-        string dirPath = createNewTempDirectory();
-
-        check saveCompressedPayload(check payload.getByteStream(), dirPath);
-        check extractZipFile(dirPath);
-
-        r4:FHIRError? result = ();
-
-        // standard FHIR
-        if typeHeader == FHIR {
-            CodeSystemValueSetJson jsonArrays = check readFilesForUpload(dirPath + ZIP_FILE_EXTRACTION_PATH);
-
-            _ = terminology:addCodeSystemsAsJson(jsonArrays.codeSystems, terminology = terminology_source);
-            _ = terminology:addValueSetsAsJson(jsonArrays.valueSets, terminology = terminology_source);
-        }
-
-        // LOINC
-        else if typeHeader == LOINC {
-            string? version = payload.getQueryParamValue("loinc-version");
-            check loinc:convert(dirPath + ZIP_FILE_EXTRACTION_PATH, version);
-
-            r4:CodeSystem codeSystem = check readFileJsonAndReturnCodeSystem(dirPath + ZIP_FILE_EXTRACTION_PATH + loinc:FHIR_LOINC_FILE_NAME);
-
-            result = terminology:addCodeSystem(codeSystem, terminology = terminology_source);
-        }
-
-        // SNOMED
-        else if typeHeader == SNOMED {
-            string? version = payload.getQueryParamValue("snomed-version");
-            check snomed:convert(dirPath + ZIP_FILE_EXTRACTION_PATH, version);
-
-            r4:CodeSystem codeSystem = check readFileJsonAndReturnCodeSystem(dirPath + ZIP_FILE_EXTRACTION_PATH + snomed:FHIR_SNOMED_FILE_NAME);
-
-            result = terminology:addCodeSystem(codeSystem, terminology = terminology_source);
-        }
-
-        _ = start removeDirectory(dirPath);
-
-        return result;
+        // the archive is kept until the job has finished, the import itself runs in the background
+        string jobId = uuid:createType4AsString();
+        check saveCompressedPayload(check payload.getByteStream(), uploadJobDirectory(jobId));
+
+        string now = time:utcToString(time:utcNow());
+        UploadJob job = {
+            jobId,
+            terminologyType: typeHeader,
+            // loinc-version, snomed-version, icd10-version or rxnorm-version
+            version: payload.getQueryParamValue(typeHeader.toLowerAscii() + "-version"),
+            status: JOB_QUEUED,
+            phase: PHASE_QUEUED,
+            owner: uploadJobOwner,
+            heartbeatAt: time:utcNow()[0],
+            createdAt: now,
+            updatedAt: now
+        };
+        check insertUploadJob(job);
+        uploadJobExecutor.submit(jobId);
+        return job;
     } on fail var e {
         return r4:createFHIRError(
                 "Invalid request payload, " + e.message(),
@@ -718,6 +797,67 @@ public isolated function upload(http:Request payload) returns r4:FHIRError? {
     }
 }
 
+# Imports an extracted upload archive, for the upload job it belongs to. CodeSystems read in chunks are written in
+# a single transaction, which rolls back when the job is cancelled or the service stops.
+#
+# + job - Upload job of the archive
+# + releasePath - Directory the archive was extracted to
+# + return - An error if the release could not be imported or the job was cancelled
+isolated function importTerminologyRelease(UploadJob job, string releasePath) returns error? {
+    final string jobId = job.jobId;
+    string? version = job.version;
+
+    // standard FHIR
+    if job.terminologyType == FHIR {
+        // resources stored by an interrupted earlier attempt are not imported again
+        PackageImportSummary summary = check importFhirPackage(releasePath + FHIR_PACKAGE_PATH, jobId,
+                skipExisting = job.attempts > 1);
+        job.failedCount = summary.failedCount;
+        job.firstError = summary.firstError;
+        if summary.codeSystemCount + summary.valueSetCount == 0 {
+            string? firstError = summary.firstError;
+            return error(firstError is string
+                ? string `None of the ${summary.failedCount} resources of the package could be imported, ${firstError}`
+                : "The package contains no CodeSystem or ValueSet resources");
+        }
+    }
+
+    // LOINC
+    else if job.terminologyType == LOINC {
+        // concepts are streamed from the CSV straight into the store, chunk by chunk
+        _ = check importCodeSystemInChunks(check loinc:createCodeSystem(version),
+                isolated function(concept_chunks:ConceptChunkConsumer consume) returns error? {
+            _ = check loinc:readConceptChunks(releasePath, concept_batch_size, monitorUploadJob(jobId, consume));
+        });
+    }
+
+    // SNOMED
+    else if job.terminologyType == SNOMED {
+        // the RF2 snapshot is streamed level by level along the is-a hierarchy, concepts may have several parents
+        _ = check importCodeSystemInChunks(snomed:createCodeSystem(version),
+                isolated function(concept_chunks:ConceptChunkConsumer consume) returns error? {
+            _ = check snomed:readConceptChunks(releasePath, concept_batch_size, monitorUploadJob(jobId, consume));
+        }, PARENT_PROPERTIES);
+    }
+
+    // ICD-10-CM
+    else if job.terminologyType == ICD10 {
+        // the order file lists parents before their children, chunks are written level by level
+        _ = check importCodeSystemInChunks(icd10:createCodeSystem(version),
+                isolated function(concept_chunks:ConceptChunkConsumer consume) returns error? {
+            _ = check icd10:readConceptChunks(releasePath, concept_batch_size, monitorUploadJob(jobId, consume));
+        }, PARENT_PROPERTIES);
+    }
+
+    // RxNorm
+    else if job.terminologyType == RXNORM {
+        _ = check importCodeSystemInChunks(rxnorm:createCodeSystem(version),
+                isolated function(concept_chunks:ConceptChunkConsumer consume) returns error? {
+            _ = check rxnorm:readConceptChunks(releasePath, concept_batch_size, monitorUploadJob(jobId, consume));
+        }, PARENT_PROPERTIES);
+    }
+}
+
 public isolated function findCodeGet(http:Request request) returns r4:Bundle|r4:FHIRError {
     string property = request.getQueryParamValue("property") ?: DISPLAY;
     string? system = request.getQueryParamValue("system");
@@ -17,7 +17,6 @@
 import terminology_service.store;
 
 import ballerina/http;
-import ballerina/lang.regexp;
 import ballerina/log;
 import ballerina/persist;
 import ballerina/regex;
@@ -29,42 +28,71 @@ import ballerinax/health.fhir.r4.terminology;
 final store:Client sClient = check initializeClient();
 
 function initializeClient() returns store:Client|error {
-    return new ();
+    check enableStorePoolMBeans();
+    return new (getStoreConnectionPool());
 }
 
 public isolated class TerminologySource {
     *terminology:Terminology;
 
+    // expansions of stored ValueSets are built without their concepts, which are streamed into the response
+    private final boolean deferExpansion;
+    private DeferredExpansion? deferred = ();
+
+    public isolated function init(boolean deferExpansion = false) {
+        self.deferExpansion = deferExpansion;
+    }
+
+    # Takes the page of the last expansion built without its concepts.
+    #
+    # + return - The page, or nil if the expansion was built with its concepts
+    isolated function takeDeferredExpansion() returns DeferredExpansion? {
+        lock {
+            DeferredExpansion? deferred = self.deferred;
+            self.deferred = ();
+            return deferred.cloneReadOnly();
+        }
+    }
+
     public isolated function addCodeSystem(r4:CodeSystem codeSystem) returns r4:FHIRError? {
-        // add the code system to the database
-        store:CodeSystemInsert dbCodeSystemInsert = {
-            id: codeSystem.id ?: "",
-            url: codeSystem.url ?: "",
-            version: codeSystem.version ?: "",
-            name: codeSystem.name ?: "",
-            title: codeSystem.title ?: "",
-            status: codeSystem.status,
-            date: codeSystem.date ?: "",
-            publisher: codeSystem.publisher ?: "",
-            codeSystem: check codeSystemToByte(codeSystem)
-        };
+        if terminologySnapshot !is () {
+            return snapshotReadOnlyError();
+        }
 
-        int[]|persist:Error response = sClient->/codesystems.post([dbCodeSystemInsert]);
-        if (response is persist:Error) {
+        // add the code system to the database
+        store:CodeSystemInsert dbCodeSystemInsert = check codeSystemToInsert(codeSystem);
+
+        // the CodeSystem and all of its concepts are written in a single transaction
+        transaction {
+            int[] codeSystemIds = check sClient->/codesystems.post([dbCodeSystemInsert]);
+            ConceptIngestionSummary summary = check ingestCodeSystemConcepts(codeSystem.concept ?: [], codeSystemIds[0]);
+            check saveResourceVersion(RESOURCE_VERSION_CODESYSTEM, codeSystemIds[0], string `${codeSystem.url ?: ""}|${codeSystem.version ?: ""}`);
+            int generation = check advanceStoreGeneration();
+            check commit;
+
+            logConceptIngestionSummary(string `${codeSystem.url ?: ""}|${codeSystem.version ?: ""}`, summary);
+            error? indexed = indexCodeSystemMemberships(codeSystemIds[0], generation);
+            if indexed is error {
+                log:printWarn("Code membership filter disabled, CodeSystem codes not added", indexed);
+            }
+        } on fail error e {
             // error while adding code system to the database
             return r4:createFHIRError(
-                    "Error while adding CodeSystem, " + response.message(),
+                    "Error while adding CodeSystem, " + e.message(),
                     r4:ERROR,
                     r4:INVALID_REQUIRED,
-                    cause = error("Error while adding CodeSystem"),
+                    cause = e,
                     httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
         }
 
-        // extract the concepts from the codesystem and add them to the database
-        extractConceptsFromCodeSystem(codeSystem, response[0]);
+        return invalidateCodeSystem(codeSystem);
     }
 
     public isolated function addValueSet(r4:ValueSet valueSet) returns r4:FHIRError? {
+        if terminologySnapshot !is () {
+            return snapshotReadOnlyError();
+        }
+
         // add the value set to the database
         store:ValueSetInsert dbValueSetInsert = {
             id: valueSet.id ?: "",
@@ -78,22 +106,42 @@ public isolated class TerminologySource {
             valueSet: check valueSetToByte(valueSet)
         };
 
-        int[]|persist:Error response = sClient->/valuesets.post([dbValueSetInsert]);
-        if (response is persist:Error) {
+        // the ValueSet, its includes, its membership index and its validators are written in a single transaction
+        transaction {
+            int[] valueSetIds = check sClient->/valuesets.post([dbValueSetInsert]);
+
+            // extract the concepts from the valueset and add them to the database
+            check extractConceptsFromValueSet(valueSet, valueSetIds[0]);
+            int[] indexedValueSetIds = check rebuildValueSetMemberships(valueSetIds[0]);
+            check saveResourceVersion(RESOURCE_VERSION_VALUESET, valueSetIds[0], string `${valueSet.url ?: ""}|${valueSet.version ?: ""}`);
+            check invalidateNestingValueSetExpansions(valueSet.url ?: "");
+            int generation = check advanceStoreGeneration();
+            check commit;
+
+            error? indexed = indexValueSetMemberships(indexedValueSetIds, generation);
+            if indexed is error {
+                log:printWarn("Code membership filter disabled, ValueSet codes not added", indexed);
+            }
+        } on fail error e {
             // error while adding value set to the database
             return r4:createFHIRError(
-                    "Error while adding ValueSet, " + response.message(),
+                    "Error while adding ValueSet, " + e.message(),
                     r4:ERROR,
                     r4:INVALID_REQUIRED,
-                    cause = error("Error while adding ValueSet"),
+                    cause = e,
                     httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
         }
 
-        // extract the concepts from the valueset and add them to the database
-        extractConceptsFromValueSet(valueSet, response[0]);
+        valueSetCache.invalidate(CACHE_KEY_URL, valueSet.url ?: "");
+        valueSetCache.invalidate(CACHE_KEY_ID, valueSet.id ?: "");
     }
 
     public isolated function findCodeSystem(r4:uri? system, string? id, string? version = ()) returns r4:CodeSystem|r4:FHIRError {
+        TerminologySnapshot? snapshot = terminologySnapshot;
+        if snapshot is TerminologySnapshot {
+            return (check findSnapshotCodeSystem(snapshot, system, id, version)).'resource.clone();
+        }
+
         r4:CodeSystem|r4:FHIRError|error? dbCodeSystem = ();
 
         if id != () {
@@ -116,11 +164,28 @@ public isolated class TerminologySource {
                 );
         }
 
-        return dbCodeSystem;
+        // cached resources are immutable and shared between requests, the terminology library gets a copy it may change
+        return dbCodeSystem.clone();
     }
 
     public isolated function findConcept(r4:uri system, r4:code code, string? version) returns terminology:CodeConceptDetails|r4:FHIRError {
-        // find the concept in the valueset table
+        TerminologySnapshot? snapshot = terminologySnapshot;
+        if snapshot is TerminologySnapshot {
+            return findSnapshotConcept(snapshot, system, code, version);
+        }
+
+        // codes unknown to every CodeSystem and ValueSet with this url are rejected without reading the concepts,
+        // as long as nothing was written to the store since the filter was built
+        if !codeMembershipFilter.mightContain(system, code) && isCodeMembershipFilterCurrent() {
+            return r4:createFHIRError(
+                    "Concept not found",
+                    r4:ERROR,
+                    r4:INVALID_REQUIRED,
+                    cause = error("No matching Concept found"),
+                    httpStatusCode = http:STATUS_NOT_FOUND);
+        }
+
+        // find the concept in the valueset membership index
         terminology:CodeConceptDetails|r4:FHIRError valuesetConceptDetails = findConceptInValueSet(system, code, version);
         if valuesetConceptDetails !is r4:FHIRError {
             return valuesetConceptDetails;
@@ -142,6 +207,11 @@ public isolated class TerminologySource {
     }
 
     public isolated function findValueSet(r4:uri? system, string? id, string? version) returns r4:ValueSet|r4:FHIRError {
+        TerminologySnapshot? snapshot = terminologySnapshot;
+        if snapshot is TerminologySnapshot {
+            return (check findSnapshotValueSet(snapshot, system, id, version)).'resource.clone();
+        }
+
         r4:ValueSet|r4:FHIRError|error dbValueSet;
 
         if id != () {
@@ -171,10 +241,16 @@ public isolated class TerminologySource {
                 );
         }
 
-        return dbValueSet;
+        // cached resources are immutable and shared between requests, the terminology library gets a copy it may change
+        return dbValueSet.clone();
     }
 
     public isolated function isCodeSystemExist(r4:uri system, string version) returns boolean {
+        TerminologySnapshot? snapshot = terminologySnapshot;
+        if snapshot is TerminologySnapshot {
+            return snapshot.codeSystemIndex.hasKey(resourceCacheKey(CACHE_KEY_URL, system, version));
+        }
+
         // TODO: Replace the manual query-based search operation below with the commented logic once the following persist issue is resolved:
         // https://github.com/ballerina-platform/ballerina-library/issues/7920
         //
@@ -184,7 +260,7 @@ public isolated class TerminologySource {
         //     select codesystem;
         // return codeSystems.length() > 0;
 
-        sql:ParameterizedQuery sqlQuery = sql:queryConcat(`SELECT 1 FROM `, escapeToQuery("codesystems"), ` WHERE `, escapeToQuery("url"), ` = ${system} AND `, escapeToQuery("version"), ` = ${version} LIMIT 1`);
+        sql:ParameterizedQuery sqlQuery = fillQueryTemplate(queryTemplates.codeSystemExists, system, version);
 
         stream<record {}, persist:Error?> resultStream = sClient->queryNativeSQL(sqlQuery);
         record {}[]|error results = from record {} result in resultStream
@@ -194,6 +270,11 @@ public isolated class TerminologySource {
     }
 
     public isolated function isValueSetExist(r4:uri system, string version) returns boolean {
+        TerminologySnapshot? snapshot = terminologySnapshot;
+        if snapshot is TerminologySnapshot {
+            return snapshot.valueSetIndex.hasKey(resourceCacheKey(CACHE_KEY_URL, system, version));
+        }
+
         // TODO: Replace the manual query-based search operation below with the commented logic once the following persist issue is resolved:
         // https://github.com/ballerina-platform/ballerina-library/issues/7920
         //
@@ -202,7 +283,7 @@ public isolated class TerminologySource {
         //     select valueSet;
         // return valueSets.length() > 0;
 
-        sql:ParameterizedQuery sqlQuery = sql:queryConcat(`SELECT 1 FROM `, escapeToQuery("valuesets"), ` WHERE `, escapeToQuery("url"), ` = ${system} AND `, escapeToQuery("version"), ` = ${version} LIMIT 1`);
+        sql:ParameterizedQuery sqlQuery = fillQueryTemplate(queryTemplates.valueSetExists, system, version);
 
         stream<record {}, persist:Error?> resultStream = sClient->queryNativeSQL(sqlQuery);
         record {}[]|error results = from record {} result in resultStream
@@ -212,25 +293,16 @@ public isolated class TerminologySource {
     }
 
     public isolated function searchCodeSystem(map<r4:RequestSearchParameter[]> params, int? offset, int? count) returns r4:CodeSystem[]|r4:FHIRError {
-        sql:ParameterizedQuery whereClause = ``;
-        boolean isFirst = true;
-
-        foreach var [paramName, paramList] in params.entries() {
-            if terminology:CODESYSTEMS_SEARCH_PARAMS.hasKey(paramName) {
-                foreach var param in paramList {
-                    sql:ParameterizedQuery fragment = sql:queryConcat(escapeToQuery(paramName == "system" ? "url" : paramName), ` = ${param.value}`);
-                    if fragment.strings.length() > 0 {
-                        if isFirst {
-                            whereClause = fragment;
-                            isFirst = false;
-                        } else {
-                            whereClause = sql:queryConcat(whereClause, ` AND `, fragment);
-                        }
-                    }
-                }
-            }
+        TerminologySnapshot? snapshot = terminologySnapshot;
+        if snapshot is TerminologySnapshot {
+            int[] matches = searchSnapshotResources(from SnapshotCodeSystem codeSystem in snapshot.codeSystems
+                select codeSystem.columns, params, offset, count);
+            return from int i in matches
+                select snapshot.codeSystems[i].'resource;
         }
 
+        sql:ParameterizedQuery whereClause = getSearchCondition(params) ?: ``;
+
         if offset is int && count is int {
             whereClause = sql:queryConcat(whereClause, getLimitClause(count, offset));
         }
@@ -261,25 +333,16 @@ public isolated class TerminologySource {
     }
 
     public isolated function searchValueSet(map<r4:RequestSearchParameter[]> params, int? offset, int? count) returns r4:ValueSet[]|r4:FHIRError {
-        sql:ParameterizedQuery whereClause = ``;
-        boolean isFirst = true;
-
-        foreach var [paramName, paramList] in params.entries() {
-            if terminology:CODESYSTEMS_SEARCH_PARAMS.hasKey(paramName) {
-                foreach var param in paramList {
-                    sql:ParameterizedQuery fragment = sql:queryConcat(escapeToQuery(paramName == "system" ? "url" : paramName), ` = ${param.value}`);
-                    if fragment.strings.length() > 0 {
-                        if isFirst {
-                            whereClause = fragment;
-                            isFirst = false;
-                        } else {
-                            whereClause = sql:queryConcat(whereClause, ` AND `, fragment);
-                        }
-                    }
-                }
-            }
+        TerminologySnapshot? snapshot = terminologySnapshot;
+        if snapshot is TerminologySnapshot {
+            int[] matches = searchSnapshotResources(from SnapshotValueSet valueSet in snapshot.valueSets
+                select valueSet.columns, params, offset, count);
+            return from int i in matches
+                select snapshot.valueSets[i].'resource;
         }
 
+        sql:ParameterizedQuery whereClause = getSearchCondition(params) ?: ``;
+
         if offset is int && count is int {
             whereClause = sql:queryConcat(whereClause, getLimitClause(count, offset));
         }
@@ -310,6 +373,21 @@ public isolated class TerminologySource {
     }
 
     public isolated function expandValueSet(map<r4:RequestSearchParameter[]> searchParameters, r4:ValueSet valueSet, int offset, int count) returns r4:ValueSet|r4:FHIRError {
+        string? filter = searchParameters.hasKey(terminology:FILTER) ? searchParameters.get(terminology:FILTER)[0].value : ();
+        TerminologySnapshot? snapshot = terminologySnapshot;
+        if snapshot is TerminologySnapshot {
+            // the prebuilt expansion is paged by offset, a continuation token is not needed
+            SnapshotValueSet snapshotValueSet = check findSnapshotValueSet(snapshot, valueSet.url, (), valueSet.version);
+            [r4:ValueSetExpansionContains[], int] [pagedConcepts, totalCount] = expandSnapshotValueSet(snapshot, snapshotValueSet, filter, offset, count);
+            r4:ValueSetExpansion expansion = createExpandedValueSet(valueSet, pagedConcepts);
+            expansion.total = totalCount;
+            expansion.offset = offset;
+
+            r4:ValueSet expandedValueSet = {...valueSet};
+            expandedValueSet.expansion = expansion;
+            return expandedValueSet;
+        }
+
         store:ValueSet|error dbValueSet = getStoreValueSetByURL(valueSet.url.toString(), valueSet.version);
         if dbValueSet is error {
             return r4:createFHIRError(
@@ -319,124 +397,51 @@ public isolated class TerminologySource {
                     cause = dbValueSet,
                     httpStatusCode = http:STATUS_NOT_FOUND);
         }
-        int valueSetId = dbValueSet.valueSetId;
-
-        // Get all includes for this ValueSet
-        sql:ParameterizedQuery includeQuery = sql:queryConcat(escapeToQuery("valuesetValueSetId"), ` = ${valueSetId}`);
-        stream<store:ValueSetComposeInclude, persist:Error?> includeStream = sClient->/valuesetcomposeincludes(store:ValueSetComposeInclude, whereClause = includeQuery);
-        store:ValueSetComposeInclude[]|error includes = from store:ValueSetComposeInclude inc in includeStream
-            select inc;
-        if includes is error {
-            return r4:createFHIRError(
-                    "Error fetching ValueSet includes: " + includes.message(),
-                    r4:ERROR,
-                    r4:PROCESSING_NOT_FOUND,
-                    cause = includes,
-                    httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
-        }
-
-        r4:ValueSetExpansionContains[] allConcepts = [];
-        string? filter = searchParameters.hasKey(terminology:FILTER) ? searchParameters.get(terminology:FILTER)[0].value : ();
-
-        foreach store:ValueSetComposeInclude include in includes {
-            // If conceptFlag, get concepts from valueset_compose_include_concepts
-            if include.conceptFlag {
-                sql:ParameterizedQuery q = sql:queryConcat(
-                        `SELECT c.* FROM `, escapeToQuery("concepts"), ` c JOIN `, escapeToQuery("valueset_compose_include_concepts"), ` vcic ON c.`, escapeToQuery("conceptId"), ` = vcic.`, escapeToQuery("conceptConceptId"),
-                        ` WHERE vcic.`, escapeToQuery("valuesetcomposeValueSetComposeIncludeId"), ` = ${include.valueSetComposeIncludeId}`
-                );
-                stream<store:Concept, persist:Error?> conceptStream = sClient->queryNativeSQL(q);
-                store:Concept[]|error dbConcepts = from store:Concept c in conceptStream
-                    select c;
-                if dbConcepts is error {
-                    continue;
-                }
-                foreach store:Concept c in dbConcepts {
-                    r4:CodeSystemConcept|error concept = byteToConcept(c.concept);
-                    if concept is r4:CodeSystemConcept {
-                        if filter is string {
-                            if concept.display is string && !regexp:isFullMatch(re `.*${filter.toUpperAscii()}.*`, (<string>concept.display).toUpperAscii()) {
-                                continue;
-                            }
-                        }
-                        r4:ValueSetExpansionContains exp = {code: concept.code, display: concept.display, id: concept.id};
-                        allConcepts.push(exp);
-                    }
-                }
+        r4:ValueSetExpansion expansion;
+        if searchParameters.hasKey(CONTINUATION) {
+            // streamed expansion, the total is not known without reading the whole expansion
+            [r4:ValueSetExpansionContains[], string?] [pagedConcepts, next] = check getValueSetExpansionStreamPage(
+                    dbValueSet.valueSetId, filter, searchParameters.get(CONTINUATION)[0].value, count);
+            expansion = createExpandedValueSet(valueSet, pagedConcepts);
+            if next is string {
+                expansion.parameter = [{name: "continuation", valueString: next}];
             }
-            // If systemFlag, get all concepts for the code system
-            else if include.systemFlag && include.codeSystemId is int {
-                sql:ParameterizedQuery query = sql:queryConcat(escapeToQuery("codesystemCodeSystemId"), ` = ${include.codeSystemId}`);
-                stream<store:Concept, persist:Error?> conceptStream = sClient->/concepts(store:Concept, query);
-                store:Concept[]|error dbConcepts = from store:Concept c in conceptStream
-                    select c;
-                if dbConcepts is error {
-                    continue;
-                }
-                foreach store:Concept c in dbConcepts {
-                    r4:CodeSystemConcept|error concept = byteToConcept(c.concept);
-                    if concept is r4:CodeSystemConcept {
-                        if filter is string {
-                            if concept.display is string && !regexp:isFullMatch(re `.*${filter.toUpperAscii()}.*`, (<string>concept.display).toUpperAscii()) {
-                                continue;
-                            }
-                        }
-                        r4:ValueSetExpansionContains exp = {code: concept.code, display: concept.display, id: concept.id};
-                        allConcepts.push(exp);
-                    }
-                }
+        } else if self.deferExpansion {
+            int total = check ensureValueSetExpansion(dbValueSet.valueSetId);
+            if filter is string {
+                total = check countFilteredValueSetExpansion(dbValueSet.valueSetId, filter);
             }
-            // If valueSetFlag, get nested value sets and expand recursively
-            else if include.valueSetFlag {
-                sql:ParameterizedQuery q = sql:queryConcat(
-                        `SELECT vs.* FROM `, escapeToQuery("valuesets"), ` vs JOIN `, escapeToQuery("valueset_compose_include_value_sets"), ` vcivs ON vs.`, escapeToQuery("valueSetId"), ` = vcivs.`, escapeToQuery("valuesetValueSetId"),
-                        ` WHERE vcivs.`, escapeToQuery("valuesetcomposeValueSetComposeIncludeId"), ` = ${include.valueSetComposeIncludeId}`
-                );
-                stream<store:ValueSet, persist:Error?> vsStream = sClient->queryNativeSQL(q);
-                store:ValueSet[]|error nestedVS = from store:ValueSet v in vsStream
-                    select v;
-                if nestedVS is error {
-                    continue;
-                }
-                foreach store:ValueSet v in nestedVS {
-                    r4:ValueSet|error parsedVS = byteToValueSet(v.valueSet);
-                    if parsedVS is r4:ValueSet {
-                        r4:ValueSet|r4:FHIRError expanded = self.expandValueSet(searchParameters, parsedVS, 0, 1000); // Recursively expand, no offset/count for nested
-                        if expanded is r4:ValueSet {
-                            if expanded.expansion is r4:ValueSetExpansion {
-                                r4:ValueSetExpansion expansionVal = <r4:ValueSetExpansion>expanded.expansion;
-                                if expansionVal.contains is r4:ValueSetExpansionContains[] {
-                                    r4:ValueSetExpansionContains[] containsArr = <r4:ValueSetExpansionContains[]>expansionVal.contains;
-                                    foreach r4:ValueSetExpansionContains c in containsArr {
-                                        allConcepts.push(c);
-                                    }
-                                }
-                            }
-                        }
-                    }
-                }
+            expansion = createExpandedValueSet(valueSet, []);
+            expansion.total = total;
+            expansion.offset = offset;
+            DeferredExpansion page = {
+                valueSetId: dbValueSet.valueSetId,
+                filter,
+                offset,
+                count: int:max(int:min(count, total - offset), 0)
+            };
+            lock {
+                self.deferred = page.cloneReadOnly();
             }
-        }
-
-        // Pagination
-        int totalCount = allConcepts.length();
-        r4:ValueSetExpansionContains[] pagedConcepts;
-        if totalCount > offset + count {
-            pagedConcepts = allConcepts.slice(offset, offset + count);
-        } else if totalCount >= offset {
-            pagedConcepts = allConcepts.slice(offset);
         } else {
-            pagedConcepts = [];
+            [r4:ValueSetExpansionContains[], int] [pagedConcepts, totalCount] = check getValueSetExpansionPage(dbValueSet.valueSetId, filter, offset, count);
+            expansion = createExpandedValueSet(valueSet, pagedConcepts);
+            expansion.total = totalCount;
+            expansion.offset = offset;
         }
 
-        r4:ValueSetExpansion expansion = createExpandedValueSet(valueSet, pagedConcepts);
-        expansion.total = totalCount;
-        expansion.offset = offset;
-        valueSet.expansion = expansion.clone();
-        return valueSet;
+        // the given ValueSet may be a shared, immutable cache entry
+        r4:ValueSet expandedValueSet = {...valueSet};
+        expandedValueSet.expansion = expansion;
+        return expandedValueSet;
     }
 
     public isolated function subsumes(r4:uri system, r4:code codeA, r4:code codeB, string? version) returns international401:Parameters|r4:FHIRError {
+        TerminologySnapshot? snapshot = terminologySnapshot;
+        if snapshot is TerminologySnapshot {
+            return snapshotSubsumes(snapshot, check findSnapshotCodeSystem(snapshot, system, (), version), codeA, codeB);
+        }
+
         var codeSystem = getStoreCodeSystemByURL(system, version);
 
         if codeSystem !is store:CodeSystem {
@@ -452,17 +457,34 @@ public isolated class TerminologySource {
             return {'parameter: [{name: terminology:OUTCOME, valueCode: terminology:EQUIVALENT}]};
         }
 
-        ConceptNode conceptA = check getConceptNode(codeA, codeSystem.codeSystemId);
-        ConceptNode conceptB = check getConceptNode(codeB, codeSystem.codeSystemId);
+        boolean aSubsumesB = false;
+        boolean bSubsumesA = false;
+        boolean aIndexed = false;
+        boolean bIndexed = false;
+
+        // single probe of the closure table, the self rows (depth 0) tell that both concepts are indexed
+        foreach ConceptClosureCode row in check getConceptClosureByCodes(codeSystem.codeSystemId, codeA, codeB) {
+            if row.depth == 0 {
+                aIndexed = aIndexed || row.descendantCode == codeA;
+                bIndexed = bIndexed || row.descendantCode == codeB;
+            } else if row.ancestorCode == codeA {
+                aSubsumesB = true;
+            } else {
+                bSubsumesA = true;
+            }
+        }
+
+        if !aIndexed || !bIndexed {
+            // unknown code, or a CodeSystem imported before the closure table existed
+            ConceptNode conceptA = check getConceptNode(codeA, codeSystem.codeSystemId);
+            ConceptNode conceptB = check getConceptNode(codeB, codeSystem.codeSystemId);
+            aSubsumesB = isInParentChain(conceptA.conceptId, conceptB);
+            bSubsumesA = !aSubsumesB && isInParentChain(conceptB.conceptId, conceptA);
+        }
 
-        // Check if A is ancestor of B
-        boolean aSubsumesB = isInParentChain(conceptA.conceptId, conceptB);
         if aSubsumesB {
             return {'parameter: [{name: terminology:OUTCOME, valueCode: terminology:SUBSUMED}]};
         }
-
-        // Check if B is ancestor of A
-        boolean bSubsumesA = isInParentChain(conceptB.conceptId, conceptA);
         if bSubsumesA {
             return {'parameter: [{name: terminology:OUTCOME, valueCode: terminology:SUBSUMED_BY}]};
         }
@@ -471,15 +493,12 @@ public isolated class TerminologySource {
     }
 
     public isolated function searchConcept(DISPLAY|DEFINITION property, string filter, string? system, int offset, int count) returns terminology:CodeConceptDetails[]|r4:FHIRError {
-        sql:ParameterizedQuery whereClause = sql:queryConcat(
-                escapeToQuery(property), getRegexOperator(), stringToParameterizedQuery("'.*" + filter + ".*'"),
-                    system is () ? `` : sql:queryConcat(` AND c.`, escapeToQuery("url"), ` = ${system}`),
-                getLimitClause(count, offset)
-        );
+        TerminologySnapshot? snapshot = terminologySnapshot;
+        if snapshot is TerminologySnapshot {
+            return searchSnapshotConcepts(snapshot, property, filter, system, offset, count);
+        }
 
-        stream<store:ConceptWithRelations, persist:Error?> conceptStream = sClient->/concepts(store:ConceptWithRelations, whereClause);
-        store:ConceptWithRelations[]|error dbConcepts = from store:ConceptWithRelations concept in conceptStream
-            select concept;
+        ConceptSearchRow[]|error dbConcepts = searchConceptText(property, filter, system, offset, count);
 
         if dbConcepts is error {
             return r4:createFHIRError(
@@ -490,24 +509,41 @@ public isolated class TerminologySource {
                     httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
         }
 
+        // `$find-code` only returns codings, so the concepts are built from their columns
         terminology:CodeConceptDetails[] concepts = [];
-        foreach store:ConceptWithRelations dbConcept in dbConcepts {
-            r4:CodeSystemConcept|error codeSystemConcept = byteToConcept(<byte[]>dbConcept.concept);
-            if codeSystemConcept is error {
-                // Skip this Concept if parsing fails
-                continue;
+        foreach ConceptSearchRow dbConcept in dbConcepts {
+            r4:CodeSystemConcept concept = {code: dbConcept.code};
+            string? display = dbConcept.display;
+            if display is string {
+                concept.display = display;
             }
-            terminology:CodeConceptDetails details = {
-                url: dbConcept.codeSystem?.url ?: "",
-                concept: codeSystemConcept
-            };
-            concepts.push(details);
+            concepts.push({url: dbConcept.url, concept});
         }
 
         return concepts;
     }
 }
 
+# Drops everything derived from an earlier version of a CodeSystem that was just stored: its cached
+# entries and the materialized expansions of the ValueSets including it.
+#
+# + codeSystem - The stored CodeSystem
+# + return - An error if the expansions could not be removed
+isolated function invalidateCodeSystem(r4:CodeSystem codeSystem) returns r4:FHIRError? {
+    codeSystemCache.invalidate(CACHE_KEY_URL, codeSystem.url ?: "");
+    codeSystemCache.invalidate(CACHE_KEY_ID, codeSystem.id ?: "");
+
+    error? invalidated = invalidateCodeSystemExpansions(codeSystem.url ?: "");
+    if invalidated is error {
+        return r4:createFHIRError(
+                "Error while invalidating ValueSet expansions, " + invalidated.message(),
+                r4:ERROR,
+                r4:PROCESSING_NOT_FOUND,
+                cause = invalidated,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+}
+
 isolated function isInParentChain(int targetAncestorId, ConceptNode currentNode) returns boolean {
     int? parentId = currentNode.parentConceptId;
 
@@ -539,38 +575,23 @@ isolated function findConceptInValueSet(r4:uri system, r4:code code, string? ver
                 httpStatusCode = http:STATUS_NOT_FOUND);
     }
 
-    // checks for valueset concepts
-    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
-            `SELECT c.* FROM `, escapeToQuery("concepts"),
-            ` c JOIN `, escapeToQuery("valueset_compose_include_concepts"), ` vcic ON c.`, escapeToQuery("conceptId"), ` = vcic.`, escapeToQuery("conceptConceptId"),
-            `JOIN `, escapeToQuery("valueset_compose_includes"), ` vci ON vcic.`, escapeToQuery("valuesetcomposeValueSetComposeIncludeId"), ` = vci.`, escapeToQuery("valueSetComposeIncludeId"),
-            `JOIN "valuesets" vs ON vci.`, escapeToQuery("valuesetValueSetId"), ` = vs.`, escapeToQuery("valueSetId"),
-            `WHERE vs.`, escapeToQuery("valueSetId"), ` = ${valueset.valueSetId} AND c.`, escapeToQuery("code"), ` = ${code};`
-        );
-
-    store:Concept|r4:FHIRError dbConcept = getStoreConcept(sqlQuery);
-    if dbConcept !is r4:FHIRError {
-        r4:CodeSystemConcept|error valueSetConcept = byteToConcept(dbConcept.concept);
-
-        if valueSetConcept !is error {
-            return {
-                url: system,
-                concept: valueSetConcept
-            };
-        }
+    // the membership index covers listed concepts, whole CodeSystems and nested ValueSets alike
+    ConceptColumns|error? dbConcept = getConceptColumns(sql:queryConcat(
+            selectConceptColumns(),
+            ` JOIN `, escapeToQuery(CODE_MEMBERSHIPS_TABLE), ` m ON m.`, escapeToQuery("conceptId"), ` = c.`, escapeToQuery("conceptId"),
+            ` WHERE m.`, escapeToQuery("valueSetId"), ` = ${valueset.valueSetId} AND m.`, escapeToQuery("code"), ` = ${code}`
+    ));
+    if dbConcept is error {
+        return r4:createFHIRError(
+                "Error while searching for Concept, " + dbConcept.message(),
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = dbConcept,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
     }
 
-    // checks for code systems
-    sqlQuery = sql:queryConcat(
-            `SELECT c.* FROM `, escapeToQuery("concepts"), ` c JOIN `, escapeToQuery("codesystems"), ` cs ON c.`, escapeToQuery("codesystemCodeSystemId"), ` = cs.`, escapeToQuery("codeSystemId"),
-            ` JOIN `, escapeToQuery("valueset_compose_includes"), ` vci ON cs.`, escapeToQuery("codeSystemId"), ` = vci.`, escapeToQuery("codeSystemId"),
-            ` JOIN `, escapeToQuery("valuesets"), ` vs ON vci.`, escapeToQuery("valuesetValueSetId"), ` = vs.`, escapeToQuery("valueSetId"),
-            ` WHERE vs.`, escapeToQuery("valueSetId"), ` = ${valueset.valueSetId} AND c.`, escapeToQuery("code"), ` = ${code};`
-    );
-
-    dbConcept = getStoreConcept(sqlQuery);
-    if dbConcept !is r4:FHIRError {
-        r4:CodeSystemConcept|error valueSetConcept = byteToConcept(dbConcept.concept);
+    if dbConcept is ConceptColumns {
+        r4:CodeSystemConcept|error valueSetConcept = toCodeSystemConcept(dbConcept);
 
         if valueSetConcept !is error {
             return {
@@ -580,35 +601,6 @@ isolated function findConceptInValueSet(r4:uri system, r4:code code, string? ver
         }
     }
 
-    // checks for nested valueset references
-    sqlQuery = sql:queryConcat(
-            `SELECT vs_included.* FROM `, escapeToQuery("valuesets"), ` vs_parent JOIN `, escapeToQuery("valueset_compose_includes"), ` vci ON vs_parent.`, escapeToQuery("valueSetId"), ` = vci.`, escapeToQuery("valuesetValueSetId"),
-            ` JOIN `, escapeToQuery("valueset_compose_include_value_sets"), ` vcivs ON vci.`, escapeToQuery("valueSetComposeIncludeId"), ` = vcivs.`, escapeToQuery("valuesetcomposeValueSetComposeIncludeId"),
-            ` JOIN `, escapeToQuery("valuesets"), ` vs_included ON vcivs.`, escapeToQuery("valuesetValueSetId"), ` = vs_included.`, escapeToQuery("valueSetId"),
-            ` WHERE vs_parent.`, escapeToQuery("valueSetId"), ` = ${valueset.valueSetId};`
-    );
-
-    stream<store:ValueSet, persist:Error?> valueSetStream = sClient->queryNativeSQL(sqlQuery);
-    store:ValueSet[]|error nestedValueSets = streamToStoreValueSet(valueSetStream);
-
-    if nestedValueSets is error {
-        return r4:createFHIRError(
-                "Error while searching for Concept, " + nestedValueSets.message(),
-                r4:ERROR,
-                r4:INVALID_REQUIRED,
-                cause = nestedValueSets,
-                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
-    }
-
-    if nestedValueSets.length() > 0 {
-        foreach store:ValueSet nestedValueSet in nestedValueSets {
-            var result = findConceptInValueSet(nestedValueSet.url, code, nestedValueSet.version);
-            if result !is r4:FHIRError {
-                return result;
-            }
-        }
-    }
-
     // not found in the value set
     return r4:createFHIRError(
             "Concept not found",
@@ -631,12 +623,28 @@ isolated function findConceptInCodeSystem(r4:uri system, r4:code code, string? v
                 httpStatusCode = http:STATUS_NOT_FOUND);
     }
 
-    var dbConcept = getStoreConceptByCode(codeSystem.codeSystemId, code);
+    ConceptColumns|error? dbConcept = getConceptColumns(sql:queryConcat(
+            selectConceptColumns(),
+            ` WHERE c.`, escapeToQuery("codesystemCodeSystemId"), ` = ${codeSystem.codeSystemId} AND c.`, escapeToQuery("code"), ` = ${code}`
+    ));
     if dbConcept is error {
-        return dbConcept;
+        return r4:createFHIRError(
+                "Error while searching for Concept, " + dbConcept.message(),
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = dbConcept,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+    if dbConcept is () {
+        return r4:createFHIRError(
+                "Concept not found",
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = error("No matching Concept found"),
+                httpStatusCode = http:STATUS_NOT_FOUND);
     }
 
-    r4:CodeSystemConcept|error codeSystemConcept = byteToConcept(dbConcept.concept);
+    r4:CodeSystemConcept|error codeSystemConcept = toCodeSystemConcept(dbConcept);
 
     if codeSystemConcept is error {
         return r4:createFHIRError(
@@ -654,6 +662,14 @@ isolated function findConceptInCodeSystem(r4:uri system, r4:code code, string? v
 }
 
 isolated function getCodeSystemByID(string id, string? version = ()) returns r4:CodeSystem|error {
+    string cacheKey = resourceCacheKey(CACHE_KEY_ID, id, version);
+    anydata cached = codeSystemCache.get(cacheKey);
+    // entries holding only the store row still have to parse the resource
+    codeSystemCache.count(cached is CachedCodeSystem && cached.codeSystem is r4:CodeSystem);
+    if cached is CachedCodeSystem && cached.codeSystem is r4:CodeSystem {
+        return <r4:CodeSystem>cached.codeSystem;
+    }
+
     // TODO: Replace the manual query-based search operation below with the commented logic once the following persist issue is resolved:
     // https://github.com/ballerina-platform/ballerina-library/issues/7920
     //
@@ -671,8 +687,8 @@ isolated function getCodeSystemByID(string id, string? version = ()) returns r4:
     // }
 
     sql:ParameterizedQuery sqlQueryWhereClause = version is ()
-        ? sql:queryConcat(escapeToQuery("id"), ` = ${id} ORDER BY `, escapeToQuery("version"), ` DESC LIMIT 1`)
-        : sql:queryConcat(escapeToQuery("id"), ` = ${id} AND `, escapeToQuery("version"), ` = ${version}`);
+        ? fillQueryTemplate(queryTemplates.latestById, id)
+        : fillQueryTemplate(queryTemplates.byIdAndVersion, id, version);
 
     stream<store:CodeSystem, persist:Error?> codeSystemStream = sClient->/codesystems(store:CodeSystem, whereClause = sqlQueryWhereClause);
     store:CodeSystem[] codeSystems = check streamToStoreCodeSystem(codeSystemStream);
@@ -686,16 +702,46 @@ isolated function getCodeSystemByID(string id, string? version = ()) returns r4:
                 httpStatusCode = http:STATUS_NOT_FOUND);
     }
 
-    return byteToCodeSystem(codeSystems[0].codeSystem);
+    return parseAndCacheCodeSystem(cacheKey, codeSystems[0]);
 }
 
 isolated function getCodeSystemByURL(string system, string? version = ()) returns r4:CodeSystem|error {
-    store:CodeSystem storeCodeSystem = check getStoreCodeSystemByURL(system, version);
+    string cacheKey = resourceCacheKey(CACHE_KEY_URL, system, version);
+    anydata cached = codeSystemCache.get(cacheKey);
+    // entries holding only the store row still have to parse the resource
+    codeSystemCache.count(cached is CachedCodeSystem && cached.codeSystem is r4:CodeSystem);
+    if cached is CachedCodeSystem && cached.codeSystem is r4:CodeSystem {
+        return <r4:CodeSystem>cached.codeSystem;
+    }
 
-    return byteToCodeSystem(storeCodeSystem.codeSystem);
+    store:CodeSystem storeCodeSystem = cached is CachedCodeSystem ? cached.storeCodeSystem : check readStoreCodeSystemByURL(cacheKey, system, version);
+    return parseAndCacheCodeSystem(cacheKey, storeCodeSystem);
+}
+
+isolated function parseAndCacheCodeSystem(string cacheKey, store:CodeSystem storeCodeSystem) returns r4:CodeSystem|error {
+    r4:CodeSystem & readonly codeSystem = (check byteToCodeSystem(storeCodeSystem.codeSystem)).cloneReadOnly();
+    CachedCodeSystem entry = {storeCodeSystem: storeCodeSystem.cloneReadOnly(), codeSystem};
+    codeSystemCache.put(cacheKey, entry);
+    return codeSystem;
 }
 
 isolated function getStoreCodeSystemByURL(string system, string? version = ()) returns store:CodeSystem|error {
+    string cacheKey = resourceCacheKey(CACHE_KEY_URL, system, version);
+    anydata cached = codeSystemCache.get(cacheKey);
+    codeSystemCache.count(cached is CachedCodeSystem);
+    if cached is CachedCodeSystem {
+        return cached.storeCodeSystem;
+    }
+    return readStoreCodeSystemByURL(cacheKey, system, version);
+}
+
+# Reads the store row of a CodeSystem and caches it, without its parsed resource.
+#
+# + cacheKey - Cache key of the lookup
+# + system - Url of the CodeSystem
+# + version - Requested version, if any
+# + return - The store row or an error if it is not found
+isolated function readStoreCodeSystemByURL(string cacheKey, string system, string? version) returns store:CodeSystem|error {
     // TODO: Replace the manual query-based search operation below with the commented logic once the following persist issue is resolved:
     // https://github.com/ballerina-platform/ballerina-library/issues/7920
     //
@@ -714,8 +760,8 @@ isolated function getStoreCodeSystemByURL(string system, string? version = ()) r
     // }
 
     sql:ParameterizedQuery sqlQueryWhereClause = version is ()
-        ? sql:queryConcat(escapeToQuery("url"), ` = ${system} ORDER BY `, escapeToQuery("version"), ` DESC LIMIT 1`)
-        : sql:queryConcat(escapeToQuery("url"), ` = ${system} AND `, escapeToQuery("version"), ` = ${version}`);
+        ? fillQueryTemplate(queryTemplates.latestByUrl, system)
+        : fillQueryTemplate(queryTemplates.byUrlAndVersion, system, version);
 
     stream<store:CodeSystem, persist:Error?> codeSystemStream = sClient->/codesystems(store:CodeSystem, whereClause = sqlQueryWhereClause);
     store:CodeSystem[] codeSystems = check streamToStoreCodeSystem(codeSystemStream);
@@ -728,10 +774,21 @@ isolated function getStoreCodeSystemByURL(string system, string? version = ()) r
                 cause = error("No matching CodeSystem found"),
                 httpStatusCode = http:STATUS_NOT_FOUND);
     }
-    return codeSystems[0];
+
+    CachedCodeSystem entry = {storeCodeSystem: codeSystems[0].cloneReadOnly(), codeSystem: ()};
+    codeSystemCache.put(cacheKey, entry);
+    return entry.storeCodeSystem;
 }
 
 isolated function getValueSetByID(string id, string? version = ()) returns r4:ValueSet|error {
+    string cacheKey = resourceCacheKey(CACHE_KEY_ID, id, version);
+    anydata cached = valueSetCache.get(cacheKey);
+    // entries holding only the store row still have to parse the resource
+    valueSetCache.count(cached is CachedValueSet && cached.valueSet is r4:ValueSet);
+    if cached is CachedValueSet && cached.valueSet is r4:ValueSet {
+        return <r4:ValueSet>cached.valueSet;
+    }
+
     // TODO: Replace the manual query-based search operation below with the commented logic once the following persist issue is resolved:
     // https://github.com/ballerina-platform/ballerina-library/issues/7920
     //
@@ -749,8 +806,8 @@ isolated function getValueSetByID(string id, string? version = ()) returns r4:Va
     // }
 
     sql:ParameterizedQuery sqlQueryWhereClause = version is ()
-        ? sql:queryConcat(escapeToQuery("id"), ` = ${id} ORDER BY `, escapeToQuery("version"), ` DESC LIMIT 1`)
-        : sql:queryConcat(escapeToQuery("id"), ` = ${id} AND `, escapeToQuery("version"), ` = ${version}`);
+        ? fillQueryTemplate(queryTemplates.latestById, id)
+        : fillQueryTemplate(queryTemplates.byIdAndVersion, id, version);
 
     stream<store:ValueSet, persist:Error?> valueSetStream = sClient->/valuesets(store:ValueSet, whereClause = sqlQueryWhereClause);
     store:ValueSet[] valueSets = check streamToStoreValueSet(valueSetStream);
@@ -764,17 +821,46 @@ isolated function getValueSetByID(string id, string? version = ()) returns r4:Va
                 httpStatusCode = http:STATUS_NOT_FOUND);
     }
 
-    // Assuming byteToValueSet is available similar to byteToCodeSystem
-    return byteToValueSet(valueSets[0].valueSet);
+    return parseAndCacheValueSet(cacheKey, valueSets[0]);
 }
 
 isolated function getValueSetByURL(string system, string? version = ()) returns r4:ValueSet|error {
-    store:ValueSet storeValueSet = check getStoreValueSetByURL(system, version);
+    string cacheKey = resourceCacheKey(CACHE_KEY_URL, system, version);
+    anydata cached = valueSetCache.get(cacheKey);
+    // entries holding only the store row still have to parse the resource
+    valueSetCache.count(cached is CachedValueSet && cached.valueSet is r4:ValueSet);
+    if cached is CachedValueSet && cached.valueSet is r4:ValueSet {
+        return <r4:ValueSet>cached.valueSet;
+    }
 
-    return byteToValueSet(storeValueSet.valueSet);
+    store:ValueSet storeValueSet = cached is CachedValueSet ? cached.storeValueSet : check readStoreValueSetByURL(cacheKey, system, version);
+    return parseAndCacheValueSet(cacheKey, storeValueSet);
+}
+
+isolated function parseAndCacheValueSet(string cacheKey, store:ValueSet storeValueSet) returns r4:ValueSet|error {
+    r4:ValueSet & readonly valueSet = (check byteToValueSet(storeValueSet.valueSet)).cloneReadOnly();
+    CachedValueSet entry = {storeValueSet: storeValueSet.cloneReadOnly(), valueSet};
+    valueSetCache.put(cacheKey, entry);
+    return valueSet;
 }
 
 isolated function getStoreValueSetByURL(string system, string? version = ()) returns store:ValueSet|error {
+    string cacheKey = resourceCacheKey(CACHE_KEY_URL, system, version);
+    anydata cached = valueSetCache.get(cacheKey);
+    valueSetCache.count(cached is CachedValueSet);
+    if cached is CachedValueSet {
+        return cached.storeValueSet;
+    }
+    return readStoreValueSetByURL(cacheKey, system, version);
+}
+
+# Reads the store row of a ValueSet and caches it, without its parsed resource.
+#
+# + cacheKey - Cache key of the lookup
+# + system - Url of the ValueSet
+# + version - Requested version, if any
+# + return - The store row or an error if it is not found
+isolated function readStoreValueSetByURL(string cacheKey, string system, string? version) returns store:ValueSet|error {
     // TODO: Replace the manual query-based search operation below with the commented logic once the following persist issue is resolved:
     // https://github.com/ballerina-platform/ballerina-library/issues/7920
     //
@@ -792,8 +878,8 @@ isolated function getStoreValueSetByURL(string system, string? version = ()) ret
     // }
 
     sql:ParameterizedQuery sqlQueryWhereClause = version is ()
-        ? sql:queryConcat(escapeToQuery("url"), ` = ${system} ORDER BY `, escapeToQuery("version"), ` DESC LIMIT 1`)
-        : sql:queryConcat(escapeToQuery("url"), ` = ${system} AND `, escapeToQuery("version"), ` = ${version}`);
+        ? fillQueryTemplate(queryTemplates.latestByUrl, system)
+        : fillQueryTemplate(queryTemplates.byUrlAndVersion, system, version);
 
     stream<store:ValueSet, persist:Error?> valueSetStream = sClient->/valuesets(store:ValueSet, whereClause = sqlQueryWhereClause);
     store:ValueSet[] valueSets = check streamToStoreValueSet(valueSetStream);
@@ -806,7 +892,10 @@ isolated function getStoreValueSetByURL(string system, string? version = ()) ret
                 cause = error("No matching ValueSet found"),
                 httpStatusCode = http:STATUS_NOT_FOUND);
     }
-    return valueSets[0];
+
+    CachedValueSet entry = {storeValueSet: valueSets[0].cloneReadOnly(), valueSet: ()};
+    valueSetCache.put(cacheKey, entry);
+    return entry.storeValueSet;
 }
 
 isolated function getStoreConceptByCode(int codeSystemId, r4:code code) returns store:Concept|r4:FHIRError {
@@ -828,7 +917,7 @@ isolated function getStoreConceptByCode(int codeSystemId, r4:code code) returns
     //             httpStatusCode = http:STATUS_NOT_FOUND);
     // }
 
-    return getStoreConcept(sql:queryConcat(`SELECT * FROM `, escapeToQuery("concepts"), ` WHERE `, escapeToQuery("code"), ` = ${code} AND `, escapeToQuery("codesystemCodeSystemId"), ` = ${codeSystemId}`));
+    return getStoreConcept(fillQueryTemplate(queryTemplates.conceptByCode, code, codeSystemId));
 }
 
 isolated function getStoreConcept(sql:ParameterizedQuery sqlQuery) returns store:Concept|r4:FHIRError {
@@ -857,6 +946,52 @@ isolated function getStoreConcept(sql:ParameterizedQuery sqlQuery) returns store
             httpStatusCode = http:STATUS_NOT_FOUND);
 }
 
+# Reads the closure rows linking two concepts of a CodeSystem, including their self rows.
+#
+# + codeSystemId - Database id of the CodeSystem
+# + codeA - Code of the first concept
+# + codeB - Code of the second concept
+# + return - Closure rows between the two concepts or an error
+isolated function getConceptClosureByCodes(int codeSystemId, string codeA, string codeB) returns ConceptClosureCode[]|r4:FHIRError {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT a.`, escapeToQuery("code"), ` AS `, escapeToQuery("ancestorCode"), `, d.`, escapeToQuery("code"), ` AS `, escapeToQuery("descendantCode"),
+            `, cc.`, escapeToQuery("depth"), ` FROM `, escapeToQuery(CONCEPT_CLOSURE_TABLE), ` cc`,
+            ` JOIN `, escapeToQuery("concepts"), ` a ON a.`, escapeToQuery("conceptId"), ` = cc.`, escapeToQuery("ancestorConceptId"),
+            ` JOIN `, escapeToQuery("concepts"), ` d ON d.`, escapeToQuery("conceptId"), ` = cc.`, escapeToQuery("descendantConceptId"),
+            ` WHERE a.`, escapeToQuery("codesystemCodeSystemId"), ` = ${codeSystemId} AND a.`, escapeToQuery("code"), ` IN (${codeA}, ${codeB})`,
+            ` AND d.`, escapeToQuery("codesystemCodeSystemId"), ` = ${codeSystemId} AND d.`, escapeToQuery("code"), ` IN (${codeA}, ${codeB})`
+    );
+    stream<ConceptClosureCode, persist:Error?> closureStream = sClient->queryNativeSQL(sqlQuery);
+    ConceptClosureCode[]|error rows = from ConceptClosureCode row in closureStream
+        select row;
+    if rows is error {
+        return r4:createFHIRError(
+                "Error while checking concept subsumption, " + rows.message(),
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                cause = rows,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+    return rows;
+}
+
+# Reads the closure rows of a concept and all of its descendants. The concept itself is returned
+# with depth 0, so an empty result means the code is unknown or the CodeSystem has no closure rows.
+#
+# + codeSystemId - Database id of the CodeSystem
+# + code - Code of the ancestor concept
+# + return - Closure rows of the descendants or an error
+isolated function getConceptDescendants(int codeSystemId, string code) returns ConceptClosure[]|error {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT cc.`, escapeToQuery("ancestorConceptId"), `, cc.`, escapeToQuery("descendantConceptId"), `, cc.`, escapeToQuery("depth"),
+            ` FROM `, escapeToQuery(CONCEPT_CLOSURE_TABLE), ` cc JOIN `, escapeToQuery("concepts"), ` a ON a.`, escapeToQuery("conceptId"), ` = cc.`, escapeToQuery("ancestorConceptId"),
+            ` WHERE a.`, escapeToQuery("codesystemCodeSystemId"), ` = ${codeSystemId} AND a.`, escapeToQuery("code"), ` = ${code}`
+    );
+    stream<ConceptClosure, persist:Error?> closureStream = sClient->queryNativeSQL(sqlQuery);
+    return from ConceptClosure row in closureStream
+        select row;
+}
+
 isolated function getConceptNode(string code, int codeSystemId) returns ConceptNode|r4:FHIRError {
     // TODO: Replace the manual query-based search operation below with the commented logic once the following persist issue is resolved:
     // https://github.com/ballerina-platform/ballerina-library/issues/7920
@@ -893,76 +1028,58 @@ isolated function getConceptNode(string code, int codeSystemId) returns ConceptN
             httpStatusCode = http:STATUS_NOT_FOUND);
 }
 
-isolated function extractConceptsFromCodeSystem(r4:CodeSystem codeSystem, int codeSystemId) {
-    if codeSystem.concept !is () {
-        foreach var concept in <r4:CodeSystemConcept[]>codeSystem.concept {
-            _ = start extractConceptsFromCodeSystemRecursive(concept.clone(), codeSystemId);
-        }
-    }
-}
-
-isolated function extractConceptsFromCodeSystemRecursive(r4:CodeSystemConcept var_concept, int codeSystemId, int? parentId = ()) {
-    int|error result = saveCodeSystemConcept(var_concept, codeSystemId, parentId);
-    if result is error {
-        log:printError("Error while saving concept: " + result.message());
-    }
-
-    if var_concept.concept !is () {
-        foreach var subConcept in <r4:CodeSystemConcept[]>var_concept.concept {
-            _ = start extractConceptsFromCodeSystemRecursive(subConcept.clone(), codeSystemId, (result is int) ? result : ());
-        }
-    }
-}
-
-isolated function saveCodeSystemConcept(r4:CodeSystemConcept concept, int codeSystemId, int? parentId) returns int|error {
-    store:ConceptInsert dbConceptInsert = {
-        code: concept.code,
-        display: concept.display,
-        definition: concept.definition,
-        concept: check conceptToByte(concept),
-        codesystemCodeSystemId: codeSystemId,
-        parentConceptId: parentId
-    };
-
-    int[] id = check sClient->/concepts.post([dbConceptInsert]);
-    return id[0];
-}
-
 // Extract concepts from a ValueSet and save them recursively
-isolated function extractConceptsFromValueSet(r4:ValueSet valueSet, int valueSetId) {
+isolated function extractConceptsFromValueSet(r4:ValueSet valueSet, int valueSetId) returns error? {
     if valueSet.compose is r4:ValueSetCompose {
         foreach r4:ValueSetComposeInclude include in (<r4:ValueSetCompose>valueSet.compose).include {
-            error? result = saveValueSetComposeInclude(include, valueSetId);
-            if result is error {
-                log:printError("Error while saving ValueSet concept: " + result.message());
-            }
+            check saveValueSetComposeInclude(include, valueSetId);
         }
     }
 }
 
-// Save a ValueSet concept to the database
+// Save a ValueSet concept to the database. The parts of the include are saved one after the other, in the
+// transaction storing the ValueSet. A CodeSystem, concept or ValueSet that is not in the store is skipped as
+// before, any other error fails the include.
 isolated function saveValueSetComposeInclude(r4:ValueSetComposeInclude include, int valueSetId) returns error? {
     // concept can be a code system or a set of concepts
     if include.system is r4:uri {
         // find he CodeSystem in the database
-        store:CodeSystem codesystem = check getStoreCodeSystemByURL(<string>include.system, include.'version);
+        store:CodeSystem|error codesystem = getStoreCodeSystemByURL(<string>include.system, include.'version);
+        if codesystem is error {
+            return skipMissingReference(codesystem);
+        }
 
         if include.concept is r4:ValueSetComposeIncludeConcept[] {
             foreach r4:ValueSetComposeIncludeConcept item in <r4:ValueSetComposeIncludeConcept[]>include.concept {
                 // save valueset concept
-                _ = start saveValueSetConcept(item.clone(), valueSetId, codesystem.codeSystemId);
+                check skipMissingReference(saveValueSetConcept(item, valueSetId, codesystem.codeSystemId));
             }
+        } else if include.filter is r4:ValueSetComposeIncludeFilter[] && isHierarchyFilter(<r4:ValueSetComposeIncludeFilter[]>include.filter) {
+            // resolve is-a / descendent-of filters against the closure table
+            check saveValueSetHierarchyFilter(<r4:ValueSetComposeIncludeFilter[]>include.filter, valueSetId, codesystem.codeSystemId);
         } else {
             // save valueset code system
-            _ = start saveValueSetCodeSystem(valueSetId, codesystem.codeSystemId);
+            check saveValueSetCodeSystem(valueSetId, codesystem.codeSystemId);
         }
     }
 
     // check for nested ValueSet references
     else if include.valueSet is r4:canonical[] {
         // save valueset reference
-        _ = start saveValueSetValueSet(valueSetId, <r4:canonical[]>include.valueSet.clone());
+        check skipMissingReference(saveValueSetValueSet(valueSetId, <r4:canonical[]>include.valueSet));
+    }
+}
+
+# Logs and skips a compose include reference that is not in the store.
+#
+# + result - Result of saving the reference
+# + return - The error, if it is not a missing reference
+isolated function skipMissingReference(error? result) returns error? {
+    if result is r4:FHIRError && result.detail().httpStatusCode == http:STATUS_NOT_FOUND {
+        log:printError("Error while saving ValueSet concept: " + result.message());
+        return;
     }
+    return result;
 }
 
 isolated function saveValueSetConcept(r4:ValueSetComposeIncludeConcept concept, int valueSetId, int codeSystemId) returns error? {
@@ -997,6 +1114,61 @@ isolated function saveValueSetCodeSystem(int valueSetId, int codeSystemId) retur
     _ = check sClient->/valuesetcomposeincludes.post([dbValueSetComposeIncludeInsert]);
 }
 
+isolated function isHierarchyFilter(r4:ValueSetComposeIncludeFilter[] filters) returns boolean {
+    if filters.length() == 0 {
+        return false;
+    }
+    foreach r4:ValueSetComposeIncludeFilter filter in filters {
+        if filter.property != CONCEPT_PROPERTY || (filter.op != IS_A_FILTER && filter.op != DESCENDENT_OF_FILTER) {
+            return false;
+        }
+    }
+    return true;
+}
+
+isolated function saveValueSetHierarchyFilter(r4:ValueSetComposeIncludeFilter[] filters, int valueSetId, int codeSystemId) returns error? {
+    map<int>? selected = ();
+
+    // several filters on one include are combined with AND
+    foreach r4:ValueSetComposeIncludeFilter filter in filters {
+        ConceptClosure[] descendants = check getConceptDescendants(codeSystemId, filter.value);
+        if descendants.length() == 0 && getConceptNode(filter.value, codeSystemId) is ConceptNode {
+            // the CodeSystem was imported before the closure table existed, include it as a whole as before
+            return saveValueSetCodeSystem(valueSetId, codeSystemId);
+        }
+
+        map<int> matched = {};
+        foreach ConceptClosure row in descendants {
+            string key = row.descendantConceptId.toString();
+            if (filter.op == IS_A_FILTER || row.depth > 0) && (selected is () || selected.hasKey(key)) {
+                matched[key] = row.descendantConceptId;
+            }
+        }
+        selected = matched;
+    }
+
+    check saveValueSetConceptIds(valueSetId, (selected ?: {}).toArray());
+}
+
+isolated function saveValueSetConceptIds(int valueSetId, int[] conceptIds) returns error? {
+    store:ValueSetComposeIncludeInsert dbValueSetComposeIncludeInsert = {
+        systemFlag: false,
+        valueSetFlag: false,
+        conceptFlag: true,
+        valuesetValueSetId: valueSetId,
+        codeSystemId: ()
+    };
+    int[] result = check sClient->/valuesetcomposeincludes.post([dbValueSetComposeIncludeInsert]);
+
+    int batchStart = 0;
+    while batchStart < conceptIds.length() {
+        store:ValueSetComposeIncludeConceptInsert[] dbConceptInserts = from int conceptId in conceptIds.slice(batchStart, int:min(batchStart + concept_batch_size, conceptIds.length()))
+            select {valuesetcomposeValueSetComposeIncludeId: result[0], conceptConceptId: conceptId};
+        _ = check sClient->/valuesetcomposeincludeconcepts.post(dbConceptInserts);
+        batchStart += concept_batch_size;
+    }
+}
+
 isolated function saveValueSetValueSet(int valueSetId, r4:canonical[] valueSets) returns error? {
     // valueset reference can't be with a system or concepts
     store:ValueSetComposeIncludeInsert dbValueSetComposeIncludeInsert = {
@@ -0,0 +1,265 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.concept_chunks;
+
+import ballerina/file;
+import ballerina/http;
+import ballerina/io;
+import ballerina/os;
+import ballerina/test;
+import ballerina/time;
+import ballerinax/health.fhir.r4;
+
+// comma separated concept counts of the synthetic CodeSystems, one benchmark run per count
+const BENCHMARK_SCALES_ENV_VARIABLE = "TERMINOLOGY_BENCHMARK_SCALES";
+// requests timed per operation and scale
+const BENCHMARK_REQUESTS_ENV_VARIABLE = "TERMINOLOGY_BENCHMARK_REQUESTS";
+// file the report is written to
+const BENCHMARK_REPORT_ENV_VARIABLE = "TERMINOLOGY_BENCHMARK_REPORT";
+
+const DEFAULT_BENCHMARK_SCALES = "10000,100000,1000000";
+const DEFAULT_BENCHMARK_REQUESTS = 500;
+const DEFAULT_BENCHMARK_REPORT = "target/terminology-benchmark.json";
+
+// children per concept of the synthetic hierarchy, 1M concepts are 13 levels deep
+const BENCHMARK_BRANCHING = 3;
+const BENCHMARK_CHUNK_SIZE = 1000;
+// concepts listed by the ValueSet that enumerates its codes
+const BENCHMARK_LISTED_CONCEPTS = 1000;
+const BENCHMARK_PAGE_SIZE = 100;
+
+type BenchmarkOperation record {|
+    string name;
+    int requests;
+    int errors;
+    decimal p50Ms;
+    decimal p95Ms;
+    decimal p99Ms;
+    decimal requestsPerSecond;
+|};
+
+type BenchmarkScale record {|
+    int conceptCount;
+    int levelCount;
+    decimal codeSystemIngestSeconds;
+    int conceptsPerSecond;
+    decimal valueSetIngestSeconds;
+    BenchmarkOperation[] operations;
+|};
+
+type BenchmarkReport record {|
+    string createdAt;
+    string dbType;
+    int requestsPerOperation;
+    BenchmarkScale[] scales;
+|};
+
+// builds the request of the i-th timed call of an operation
+type BenchmarkRequest function (int i) returns http:Response|error;
+
+@test:Config {
+    groups: ["benchmark"]
+}
+public function benchmarkTerminologyOperations() returns error? {
+    if os:getEnv(BENCHMARK_ENV_VARIABLE) != "true" {
+        return;
+    }
+
+    string scalesSetting = os:getEnv(BENCHMARK_SCALES_ENV_VARIABLE);
+    string requestsSetting = os:getEnv(BENCHMARK_REQUESTS_ENV_VARIABLE);
+    string reportPath = os:getEnv(BENCHMARK_REPORT_ENV_VARIABLE);
+    int requests = requestsSetting == "" ? DEFAULT_BENCHMARK_REQUESTS : check int:fromString(requestsSetting);
+
+    BenchmarkReport report = {
+        createdAt: time:utcToString(time:utcNow()),
+        dbType: db_type,
+        requestsPerOperation: requests,
+        scales: []
+    };
+    foreach string scale in re `,`.split(scalesSetting == "" ? DEFAULT_BENCHMARK_SCALES : scalesSetting) {
+        BenchmarkScale result = check benchmarkScale(check int:fromString(scale.trim()), requests);
+        report.scales.push(result);
+        io:println(string `Benchmark over ${result.conceptCount} concepts: ${result.conceptsPerSecond} concepts/s ingested`);
+        foreach BenchmarkOperation operation in result.operations {
+            io:println(string `  ${operation.name}: p50 ${operation.p50Ms}ms, p95 ${operation.p95Ms}ms, p99 ${operation.p99Ms}ms, ${operation.requestsPerSecond} requests/s, ${operation.errors} errors`);
+        }
+    }
+
+    check writeBenchmarkReport(reportPath == "" ? DEFAULT_BENCHMARK_REPORT : reportPath, report.toJson());
+}
+
+function writeBenchmarkReport(string path, json report) returns error? {
+    string directory = check file:parentPath(path);
+    boolean exists = directory == "" || check file:test(directory, file:EXISTS);
+    if !exists {
+        check file:createDir(directory, file:RECURSIVE);
+    }
+    check io:fileWriteJson(path, report);
+    io:println(string `Benchmark report written to ${path}`);
+}
+
+function benchmarkScale(int conceptCount, int requests) returns BenchmarkScale|error {
+    string url = string `http://example.org/benchmark/${conceptCount}`;
+    string allUrl = url + "/vs/all";
+    string nestedUrl = url + "/vs/nested";
+
+    ConceptIngestionSummary ingested = check importCodeSystemInChunks(benchmarkCodeSystem(conceptCount, url),
+            generateBenchmarkConcepts(conceptCount), PARENT_PROPERTIES);
+
+    decimal startTime = time:monotonicNow();
+    check terminology_source.addValueSet(benchmarkValueSet(allUrl, [{system: url}]));
+    check terminology_source.addValueSet(benchmarkValueSet(url + "/vs/listed", [
+        {
+            system: url,
+            concept: from int i in 0 ..< int:min(BENCHMARK_LISTED_CONCEPTS, conceptCount)
+                select {code: benchmarkCode(i * conceptCount / int:min(BENCHMARK_LISTED_CONCEPTS, conceptCount))}
+        }
+    ]));
+    // a subtree through the hierarchy filter, and the listed concepts through a nested ValueSet
+    check terminology_source.addValueSet(benchmarkValueSet(nestedUrl, [
+        {system: url, filter: [{property: CONCEPT_PROPERTY, op: IS_A_FILTER, value: benchmarkCode(1)}]},
+        {valueSet: [url + "/vs/listed"]}
+    ]));
+    decimal valueSetIngestSeconds = time:monotonicNow() - startTime;
+
+    // codes spread over the whole CodeSystem
+    function (int i) returns int pick = i => (i * 7919) % conceptCount;
+    BenchmarkOperation[] operations = [
+        check timeOperation("$lookup", requests, i => csClient->get(
+                string `/%24lookup?system=${url}&code=${benchmarkCode(pick(i))}`)),
+        check timeOperation("$validate-code", requests, i => vsClient->get(
+                string `/%24validate-code?system=${nestedUrl}&code=${benchmarkCode(pick(i))}`)),
+        check timeOperation("$expand", requests, i => vsClient->get(
+                string `/%24expand?url=${allUrl}&_offset=${(pick(i) / BENCHMARK_PAGE_SIZE) * BENCHMARK_PAGE_SIZE}&_count=${BENCHMARK_PAGE_SIZE}`)),
+        check timeOperation("$expand filtered", requests, i => vsClient->get(
+                string `/%24expand?url=${allUrl}&filter=concept%20${pick(i) % 1000}&_count=${BENCHMARK_PAGE_SIZE}`)),
+        check timeOperation("$subsumes", requests, i => csClient->get(
+                string `/%24subsumes?system=${url}&codeA=${benchmarkCode(benchmarkAncestor(pick(i), 2))}&codeB=${benchmarkCode(pick(i))}`)),
+        check timeOperation("$find-code", requests, i => baseClient->get(
+                string `/%24find-code?filter=concept%20${pick(i) % 1000}&system=${url}&_count=10`))
+    ];
+
+    return {
+        conceptCount,
+        levelCount: benchmarkDepth(conceptCount - 1) + 1,
+        codeSystemIngestSeconds: ingested.elapsedSeconds,
+        conceptsPerSecond: ingested.rowsPerSecond,
+        valueSetIngestSeconds,
+        operations
+    };
+}
+
+function timeOperation(string name, int requests, BenchmarkRequest request) returns BenchmarkOperation|error {
+    decimal[] latencies = [];
+    int errors = 0;
+    decimal startTime = time:monotonicNow();
+    foreach int i in 0 ..< requests {
+        decimal requestStart = time:monotonicNow();
+        http:Response|error response = request(i);
+        latencies.push((time:monotonicNow() - requestStart) * 1000);
+        if response is error || response.statusCode != http:STATUS_OK {
+            errors += 1;
+        }
+    }
+    decimal elapsedSeconds = time:monotonicNow() - startTime;
+
+    decimal[] sorted = latencies.sort();
+    return {
+        name,
+        requests,
+        errors,
+        p50Ms: percentile(sorted, 50),
+        p95Ms: percentile(sorted, 95),
+        p99Ms: percentile(sorted, 99),
+        requestsPerSecond: elapsedSeconds > 0d ? <decimal>requests / elapsedSeconds : 0
+    };
+}
+
+// nearest rank percentile of sorted values
+function percentile(decimal[] sorted, int rank) returns decimal {
+    if sorted.length() == 0 {
+        return 0;
+    }
+    int index = (rank * sorted.length() + 99) / 100 - 1;
+    return sorted[int:max(0, int:min(index, sorted.length() - 1))];
+}
+
+function benchmarkCodeSystem(int conceptCount, string url) returns r4:CodeSystem {
+    return {
+        id: string `benchmark-${conceptCount}`,
+        url,
+        version: "1.0.0",
+        name: "Benchmark",
+        title: string `Benchmark CodeSystem of ${conceptCount} concepts`,
+        status: "active",
+        content: r4:CODE_CONTENT_COMPLETE,
+        hierarchyMeaning: r4:CODE_HIERARCHYMEANING_IS_A
+    };
+}
+
+function benchmarkValueSet(string url, r4:ValueSetComposeInclude[] include) returns r4:ValueSet {
+    string id = re `[^A-Za-z0-9]+`.replaceAll(url.substring(url.indexOf("benchmark") ?: 0), "-");
+    return {id, url, version: "1.0.0", name: "Benchmark", status: "active", compose: {include}};
+}
+
+# Supplies the concepts of a complete tree with `BENCHMARK_BRANCHING` children per concept, level by level,
+# so that every concept comes after its parent.
+#
+# + conceptCount - Number of concepts
+# + return - Chunk producer of the concepts
+function generateBenchmarkConcepts(int conceptCount) returns ConceptChunkProducer {
+    return isolated function(concept_chunks:ConceptChunkConsumer consume) returns error? {
+        int chunkStart = 0;
+        while chunkStart < conceptCount {
+            r4:CodeSystemConcept[] chunk = [];
+            foreach int i in chunkStart ..< int:min(chunkStart + BENCHMARK_CHUNK_SIZE, conceptCount) {
+                r4:CodeSystemConcept concept = {
+                    code: benchmarkCode(i),
+                    display: string `Benchmark concept ${i}`,
+                    definition: string `Synthetic concept ${i} at depth ${benchmarkDepth(i)}`
+                };
+                if i > 0 {
+                    concept.property = [{code: PARENT_PROPERTY, valueCode: benchmarkCode((i - 1) / BENCHMARK_BRANCHING)}];
+                }
+                chunk.push(concept);
+            }
+            check consume(chunk);
+            chunkStart += BENCHMARK_CHUNK_SIZE;
+        }
+    };
+}
+
+isolated function benchmarkCode(int i) returns string {
+    return string `C-${i}`;
+}
+
+isolated function benchmarkDepth(int i) returns int {
+    int depth = 0;
+    int concept = i;
+    while concept > 0 {
+        concept = (concept - 1) / BENCHMARK_BRANCHING;
+        depth += 1;
+    }
+    return depth;
+}
+
+function benchmarkAncestor(int i, int levels) returns int {
+    int concept = i;
+    foreach int _ in 0 ..< levels {
+        concept = concept > 0 ? (concept - 1) / BENCHMARK_BRANCHING : 0;
+    }
+    return concept;
+}
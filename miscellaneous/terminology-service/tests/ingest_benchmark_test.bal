@@ -0,0 +1,218 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import ballerina/io;
+import ballerina/jballerina.java;
+import ballerina/lang.runtime;
+import ballerina/os;
+import ballerina/test;
+import ballerina/time;
+import ballerinax/health.fhir.r4;
+
+// concepts of the synthetic CodeSystem, defaults to about the number of LOINC terms
+const INGEST_BENCHMARK_CONCEPTS_ENV_VARIABLE = "TERMINOLOGY_INGEST_BENCHMARK_CONCEPTS";
+const INGEST_BENCHMARK_REPORT_ENV_VARIABLE = "TERMINOLOGY_INGEST_BENCHMARK_REPORT";
+
+const DEFAULT_INGEST_BENCHMARK_CONCEPTS = 100000;
+const DEFAULT_INGEST_BENCHMARK_REPORT = "target/terminology-ingest-benchmark.json";
+
+// seconds between two heap samples taken while a CodeSystem is ingested
+const decimal HEAP_SAMPLE_INTERVAL = 0.01;
+
+// the LOINC axes, stored as concept properties
+final readonly & string[] LOINC_AXES = ["COMPONENT", "PROPERTY", "TIME_ASPCT", "SYSTEM", "SCALE_TYP", "METHOD_TYP", "CLASS"];
+
+type IngestBenchmarkReport record {|
+    string createdAt;
+    string dbType;
+    int conceptCount;
+    decimal ingestSeconds;
+    int conceptsPerSecond;
+    // heap in use once the CodeSystem is held in memory, before it is ingested
+    int baselineHeapBytes;
+    int peakHeapBytes;
+    // serialization of the CodeSystem and its concepts for storage alone, without the database writes
+    decimal serializeSeconds;
+    int serializePeakHeapBytes;
+|};
+
+@test:Config {
+    groups: ["benchmark"]
+}
+public function benchmarkCodeSystemIngest() returns error? {
+    if os:getEnv(BENCHMARK_ENV_VARIABLE) != "true" {
+        return;
+    }
+
+    string conceptsSetting = os:getEnv(INGEST_BENCHMARK_CONCEPTS_ENV_VARIABLE);
+    string reportPath = os:getEnv(INGEST_BENCHMARK_REPORT_ENV_VARIABLE);
+    int conceptCount = conceptsSetting == "" ? DEFAULT_INGEST_BENCHMARK_CONCEPTS : check int:fromString(conceptsSetting);
+
+    // the whole CodeSystem is held in memory, as it is after an upload is parsed
+    r4:CodeSystem codeSystem = loincLikeCodeSystem(conceptCount);
+    runGarbageCollector();
+    int baselineHeapBytes = getUsedHeapBytes();
+
+    HeapSampler serializeSampler = new (baselineHeapBytes);
+    future<()> serializeSampling = start sampleHeap(serializeSampler);
+    decimal serializeStartTime = time:monotonicNow();
+    error? serialized = serializeCodeSystem(codeSystem);
+    decimal serializeSeconds = time:monotonicNow() - serializeStartTime;
+    int serializePeakHeapBytes = serializeSampler.stop();
+    _ = wait serializeSampling;
+    check serialized;
+    runGarbageCollector();
+
+    HeapSampler sampler = new (baselineHeapBytes);
+    future<()> sampling = start sampleHeap(sampler);
+    decimal startTime = time:monotonicNow();
+    r4:FHIRError? added = terminology_source.addCodeSystem(codeSystem);
+    decimal ingestSeconds = time:monotonicNow() - startTime;
+    int peakHeapBytes = sampler.stop();
+    _ = wait sampling;
+    if added is r4:FHIRError {
+        return added;
+    }
+
+    IngestBenchmarkReport report = {
+        createdAt: time:utcToString(time:utcNow()),
+        dbType: db_type,
+        conceptCount,
+        ingestSeconds,
+        conceptsPerSecond: ingestSeconds > 0d ? <int>(<decimal>conceptCount / ingestSeconds) : conceptCount,
+        baselineHeapBytes,
+        peakHeapBytes,
+        serializeSeconds,
+        serializePeakHeapBytes
+    };
+    io:println(string `Ingest of ${conceptCount} concepts: ${ingestSeconds}s, ${report.conceptsPerSecond} concepts/s, `
+            + string `peak heap ${peakHeapBytes / 1048576}MB over a baseline of ${baselineHeapBytes / 1048576}MB, `
+            + string `serialization alone ${serializeSeconds}s with a peak heap of ${serializePeakHeapBytes / 1048576}MB`);
+    check writeBenchmarkReport(reportPath == "" ? DEFAULT_INGEST_BENCHMARK_REPORT : reportPath, report.toJson());
+}
+
+# Serializes a CodeSystem and every concept the way they are stored, without writing them. The result is assigned
+# to `byte[]|error`, so that the benchmark also builds on trees where `conceptToByte` can fail.
+#
+# + codeSystem - The CodeSystem
+# + return - An error if the CodeSystem or a concept could not be serialized
+function serializeCodeSystem(r4:CodeSystem codeSystem) returns error? {
+    _ = check codeSystemToByte(codeSystem);
+    foreach r4:CodeSystemConcept concept in codeSystem.concept ?: [] {
+        byte[]|error serialized = conceptToByte(concept);
+        if serialized is error {
+            return serialized;
+        }
+    }
+}
+
+# Builds a flat CodeSystem shaped like LOINC: every concept has a display, a designation and one property
+# per LOINC axis.
+#
+# + conceptCount - Number of concepts
+# + return - The CodeSystem
+function loincLikeCodeSystem(int conceptCount) returns r4:CodeSystem {
+    r4:CodeSystemConcept[] concepts = [];
+    foreach int i in 0 ..< conceptCount {
+        r4:CodeSystemConceptProperty[] properties = from string axis in LOINC_AXES
+            select {code: axis, valueString: string `${axis} ${i % 997}`};
+        properties.push({code: "STATUS", valueString: "ACTIVE"});
+        concepts.push({
+            code: string `${i}-${i % 10}`,
+            display: string `Synthetic observation ${i} in serum or plasma`,
+            designation: [{use: {system: "http://loinc.org", code: "LONG_COMMON_NAME"}, value: string `Synthetic observation ${i} [Mass/volume] in Serum or Plasma`}],
+            property: properties
+        });
+    }
+
+    return {
+        id: string `ingest-benchmark-${conceptCount}`,
+        url: string `http://example.org/ingest-benchmark/${conceptCount}`,
+        version: "1.0.0",
+        name: "IngestBenchmark",
+        title: string `LOINC shaped CodeSystem of ${conceptCount} concepts`,
+        status: "active",
+        content: r4:CODE_CONTENT_COMPLETE,
+        property: from string axis in [...LOINC_AXES, "STATUS"]
+            select {code: axis, 'type: "string"},
+        concept: concepts
+    };
+}
+
+# Peak heap use observed by `sampleHeap`.
+isolated class HeapSampler {
+    private int peak;
+    private boolean running = true;
+
+    isolated function init(int baseline) {
+        self.peak = baseline;
+    }
+
+    isolated function sample() {
+        int used = getUsedHeapBytes();
+        lock {
+            self.peak = int:max(self.peak, used);
+        }
+    }
+
+    isolated function isRunning() returns boolean {
+        lock {
+            return self.running;
+        }
+    }
+
+    # Stops sampling.
+    #
+    # + return - The peak heap use, in bytes
+    isolated function stop() returns int {
+        self.sample();
+        lock {
+            self.running = false;
+            return self.peak;
+        }
+    }
+}
+
+isolated function sampleHeap(HeapSampler sampler) {
+    while sampler.isRunning() {
+        sampler.sample();
+        runtime:sleep(HEAP_SAMPLE_INTERVAL);
+    }
+}
+
+isolated function getUsedHeapBytes() returns int {
+    handle jvmRuntime = getJvmRuntime();
+    return getTotalMemory(jvmRuntime) - getFreeMemory(jvmRuntime);
+}
+
+isolated function getJvmRuntime() returns handle = @java:Method {
+    name: "getRuntime",
+    'class: "java.lang.Runtime"
+} external;
+
+isolated function getTotalMemory(handle jvmRuntime) returns int = @java:Method {
+    name: "totalMemory",
+    'class: "java.lang.Runtime"
+} external;
+
+isolated function getFreeMemory(handle jvmRuntime) returns int = @java:Method {
+    name: "freeMemory",
+    'class: "java.lang.Runtime"
+} external;
+
+isolated function runGarbageCollector() = @java:Method {
+    name: "gc",
+    'class: "java.lang.System"
+} external;
@@ -0,0 +1,150 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.store;
+
+import ballerina/file;
+import ballerina/io;
+import ballerina/os;
+import ballerina/persist;
+import ballerina/sql;
+import ballerina/test;
+import ballerina/time;
+
+// set this environment variable to "true" to run the benchmark tests
+const BENCHMARK_ENV_VARIABLE = "TERMINOLOGY_BENCHMARK";
+const BUNDLED_DATABASE_FILE = "resources/database/terminologyDB.mv.db";
+const BENCHMARK_DATABASE_DIRECTORY = "tests/benchmark";
+const BENCHMARK_CONCEPT_COUNT = 50000;
+const BENCHMARK_LOOKUP_COUNT = 2000;
+const SCHEMA_BENCHMARK_REPORT_ENV_VARIABLE = "TERMINOLOGY_SCHEMA_BENCHMARK_REPORT";
+const DEFAULT_SCHEMA_BENCHMARK_REPORT = "target/terminology-schema-benchmark.json";
+
+type SchemaBenchmarkReport record {|
+    string createdAt;
+    int conceptCount;
+    int lookupCount;
+    int schemaVersion;
+    // average seconds per lookup on the baseline schema and on the latest schema version
+    decimal secondsPerLookupBefore;
+    decimal secondsPerLookupAfter;
+|};
+
+@test:Config {
+    groups: ["schema_migration", "successful_scenario"]
+}
+public function testSchemaMigratedToLatestVersion() returns error? {
+    test:assertEquals(check getSchemaVersion(), getLatestSchemaVersion());
+
+    // running the migrations again must be a no-op
+    check migrateSchema();
+    test:assertEquals(check getSchemaVersion(), getLatestSchemaVersion());
+}
+
+@test:Config {
+    groups: ["schema_migration", "benchmark"]
+}
+public function benchmarkSchemaIndexes() returns error? {
+    if os:getEnv(BENCHMARK_ENV_VARIABLE) != "true" {
+        return;
+    }
+
+    // work on a copy so that the bundled database stays untouched
+    check removeDirectory(BENCHMARK_DATABASE_DIRECTORY);
+    check file:createDir(BENCHMARK_DATABASE_DIRECTORY, file:RECURSIVE);
+    check file:copy(BUNDLED_DATABASE_FILE, BENCHMARK_DATABASE_DIRECTORY + "/terminologyDB.mv.db", file:REPLACE_EXISTING);
+
+    store:H2Client h2Client = check new ("jdbc:h2:./" + BENCHMARK_DATABASE_DIRECTORY + "/terminologyDB", "sa", "");
+    store:Client benchmarkClient = test:mock(store:Client, h2Client);
+
+    // baseline schema only, no indexes
+    check migrateSchema(benchmarkClient, targetVersion = 1);
+    int codeSystemId = check seedBenchmarkCodeSystem(benchmarkClient, BENCHMARK_CONCEPT_COUNT);
+    decimal before = check timeConceptLookups(benchmarkClient, codeSystemId, BENCHMARK_CONCEPT_COUNT, BENCHMARK_LOOKUP_COUNT);
+
+    check migrateSchema(benchmarkClient);
+    decimal after = check timeConceptLookups(benchmarkClient, codeSystemId, BENCHMARK_CONCEPT_COUNT, BENCHMARK_LOOKUP_COUNT);
+
+    io:println(string `Concept lookup over ${BENCHMARK_CONCEPT_COUNT} concepts: ${before * 1000}ms/lookup without indexes, ${after * 1000}ms/lookup with schema version ${getLatestSchemaVersion()}`);
+    SchemaBenchmarkReport report = {
+        createdAt: time:utcToString(time:utcNow()),
+        conceptCount: BENCHMARK_CONCEPT_COUNT,
+        lookupCount: BENCHMARK_LOOKUP_COUNT,
+        schemaVersion: getLatestSchemaVersion(),
+        secondsPerLookupBefore: before,
+        secondsPerLookupAfter: after
+    };
+    string reportPath = os:getEnv(SCHEMA_BENCHMARK_REPORT_ENV_VARIABLE);
+    check writeBenchmarkReport(reportPath == "" ? DEFAULT_SCHEMA_BENCHMARK_REPORT : reportPath, report.toJson());
+
+    check h2Client.close();
+    check removeDirectory(BENCHMARK_DATABASE_DIRECTORY);
+}
+
+function seedBenchmarkCodeSystem(store:Client dbClient, int conceptCount) returns int|error {
+    int[] codeSystemIds = check dbClient->/codesystems.post([
+        {
+            id: "benchmark",
+            url: "http://example.org/benchmark",
+            version: "1.0.0",
+            name: "Benchmark",
+            title: "Benchmark",
+            status: "active",
+            date: "",
+            publisher: "",
+            codeSystem: "{}".toBytes()
+        }
+    ]);
+
+    store:ConceptInsert[] batch = [];
+    foreach int i in 0 ..< conceptCount {
+        batch.push({
+            code: string `BENCH-${i}`,
+            display: string `Benchmark concept ${i}`,
+            definition: (),
+            concept: string `{"code":"BENCH-${i}"}`.toBytes(),
+            parentConceptId: (),
+            codesystemCodeSystemId: codeSystemIds[0]
+        });
+
+        if batch.length() == 1000 {
+            _ = check dbClient->/concepts.post(batch);
+            batch = [];
+        }
+    }
+    if batch.length() > 0 {
+        _ = check dbClient->/concepts.post(batch);
+    }
+
+    return codeSystemIds[0];
+}
+
+function timeConceptLookups(store:Client dbClient, int codeSystemId, int conceptCount, int lookupCount) returns decimal|error {
+    decimal startTime = time:monotonicNow();
+
+    foreach int i in 0 ..< lookupCount {
+        string code = string `BENCH-${(i * 7919) % conceptCount}`;
+        sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+                `SELECT `, escapeToQuery("conceptId"), `, `, escapeToQuery("parentConceptId"), ` FROM `, escapeToQuery("concepts"),
+                ` WHERE `, escapeToQuery("code"), ` = ${code} AND `, escapeToQuery("codesystemCodeSystemId"), ` = ${codeSystemId}`
+        );
+        stream<ConceptNode, persist:Error?> conceptStream = dbClient->queryNativeSQL(sqlQuery);
+        ConceptNode[] concepts = check from ConceptNode concept in conceptStream
+            select concept;
+        test:assertEquals(concepts.length(), 1);
+    }
+
+    return (time:monotonicNow() - startTime) / <decimal>lookupCount;
+}
@@ -15,8 +15,13 @@
 // under the License.
 import terminology_service.store;
 
+import ballerina/file;
 import ballerina/http;
+import ballerina/io;
+import ballerina/lang.runtime;
+import ballerina/sql;
 import ballerina/test;
+import ballerina/time;
 import ballerinax/health.fhir.r4;
 import ballerinax/health.fhir.r4.international401;
 import ballerinax/health.fhir.r4.terminology;
@@ -28,6 +33,8 @@ http:Client vsClient = check new ("http://localhost:9089/fhir/r4/ValueSet");
 @test:BeforeSuite
 isolated function beforeSuite() returns error? {
     check store:setupTestDB();
+    check resetSchemaMigrations();
+    check migrateSchema();
     check addExampleDataToTestDB();
 }
 
@@ -38,7 +45,9 @@ function afterSuite() returns error? {
 
 @test:Mock {functionName: "initializeClient"}
 isolated function getMockClient() returns store:Client|error {
-    return test:mock(store:Client, check new store:H2Client("jdbc:h2:./tests/test", "sa", ""));
+    // the test client is sized like the store client, so both keep the generated `connectionPool` parameter
+    check enableStorePoolMBeans();
+    return test:mock(store:Client, check new store:H2Client("jdbc:h2:./tests/test", "sa", "", connectionPool = getStoreConnectionPool()));
 }
 
 @test:Config {
@@ -131,6 +140,39 @@ public function searchCodeSystem3() returns error? {
     test:assertEquals(actual.toJson(), expected.toJson());
 }
 
+@test:Config {
+    groups: ["codesystem", "search_codesystem", "successful_scenario"]
+}
+public function searchCodeSystemSummary() returns error? {
+    http:Response response = check csClient->get("?url=http://hl7.org/fhir/account-status&_summary=true");
+    r4:Bundle bundle = check (check response.getJsonPayload()).cloneWithType(r4:Bundle);
+    test:assertEquals(bundle.total, 1);
+
+    // built from the metadata columns, tagged as a subset of the resource
+    r4:BundleEntry[] entries = <r4:BundleEntry[]>bundle.entry;
+    map<json> summary = check entries[0].'resource.ensureType();
+    test:assertEquals(summary["url"], "http://hl7.org/fhir/account-status");
+    test:assertEquals(summary["status"], "draft");
+    test:assertFalse(summary.hasKey("concept"));
+    test:assertEquals(summary["meta"], {tag: [{system: SUBSETTED_TAG_SYSTEM, code: SUBSETTED_TAG_CODE}]});
+
+    // elements outside the metadata columns are taken from the decoded resource
+    response = check csClient->get("?url=http://hl7.org/fhir/account-status&_elements=url,content");
+    bundle = check (check response.getJsonPayload()).cloneWithType(r4:Bundle);
+    entries = <r4:BundleEntry[]>bundle.entry;
+    map<json> subset = check entries[0].'resource.ensureType();
+    test:assertEquals(subset["content"], "complete");
+    test:assertFalse(subset.hasKey("status"));
+
+    response = check csClient->get("?_summary=count");
+    bundle = check (check response.getJsonPayload()).cloneWithType(r4:Bundle);
+    test:assertTrue((bundle.total ?: 0) >= 3);
+    test:assertEquals(bundle.entry, ());
+
+    response = check csClient->get("?_summary=text");
+    test:assertEquals(response.statusCode, http:STATUS_BAD_REQUEST);
+}
+
 @test:Config {
     groups: ["codesystem", "lookup_codesystem", "successful_scenario"]
 }
@@ -251,6 +293,68 @@ public function lookupCodeSystem10() returns error? {
     test:assertEquals((<r4:CodeableConcept>actual.issue[0].details).text, "Can not find a CodeSystem");
 }
 
+@test:Config {
+    groups: ["codesystem", "lookup_codesystem", "successful_scenario"]
+}
+public function lookupCodeSystemBatch() returns error? {
+    international401:Parameters single = check returnCodeSystemData("account-status-inactive").cloneWithType();
+    international401:ParametersParameter[] expectedParts = [
+        {name: "code", valueCode: "inactive"},
+        {name: "system", valueUri: "http://hl7.org/fhir/account-status"},
+        ...(single.'parameter ?: [])
+    ];
+
+    // repeated codes get one group each, in the order requested
+    http:Response response = check csClient->get("/%24lookup?system=http://hl7.org/fhir/account-status&code=inactive&code=unknown&code=inactive");
+    international401:Parameters actual = check (check response.getJsonPayload()).cloneWithType();
+    international401:ParametersParameter[] groups = actual.'parameter ?: [];
+    test:assertEquals(groups.length(), 3);
+    test:assertEquals(groups[0].part, expectedParts);
+    test:assertEquals(groups[2].part, expectedParts);
+    international401:ParametersParameter[] unknownParts = groups[1].part ?: [];
+    test:assertEquals(unknownParts[0].valueCode, "unknown");
+    test:assertEquals(unknownParts[unknownParts.length() - 1].name, "message");
+
+    // as do repeated codings
+    international401:Parameters parameters = {
+        'parameter: [
+            {name: "coding", valueCoding: {system: "http://hl7.org/fhir/account-status", code: "inactive"}},
+            {name: "coding", valueCoding: {system: "http://hl7.org/fhir/account-status", code: "active"}}
+        ]
+    };
+    response = check csClient->post("/%24lookup", parameters);
+    actual = check (check response.getJsonPayload()).cloneWithType();
+    groups = actual.'parameter ?: [];
+    test:assertEquals(groups.length(), 2);
+    test:assertEquals(groups[0].part, expectedParts);
+    international401:ParametersParameter[] activeParts = groups[1].part ?: [];
+    test:assertEquals(activeParts[0].valueCode, "active");
+    test:assertEquals(activeParts[2].name, "name");
+}
+
+@test:Config {
+    groups: ["codesystem", "lookup_codesystem", "successful_scenario"]
+}
+public function lookupCodeSystemBatchBundle() returns error? {
+    json requestPayload = {
+        resourceType: "Bundle",
+        'type: "batch",
+        entry: [
+            {request: {method: "GET", url: "CodeSystem/%24lookup?system=http://hl7.org/fhir/account-status&code=inactive"}},
+            {request: {method: "GET", url: "/%24validate-code?system=http://hl7.org/fhir/ValueSet/account-status&code=inactive"}}
+        ]
+    };
+
+    http:Response response = check baseClient->post("/", requestPayload);
+    r4:Bundle bundle = check (check response.getJsonPayload()).cloneWithType(r4:Bundle);
+    r4:BundleEntry[] entries = <r4:BundleEntry[]>bundle.entry;
+    test:assertEquals(entries.length(), 2);
+    test:assertEquals(entries[0].'resource.toJson(), returnCodeSystemData("account-status-inactive"));
+
+    international401:Parameters validation = check entries[1].'resource.cloneWithType(international401:Parameters);
+    test:assertEquals((<international401:ParametersParameter[]>validation.'parameter)[0].valueBoolean, true);
+}
+
 @test:Config {
     groups: ["codesystem", "subsume_codesystem", "successful_scenario"]
 }
@@ -404,6 +508,89 @@ public function subsumeCodeSystem12() returns error? {
     test:assertEquals(actual, expected);
 }
 
+@test:Config {
+    dependsOn: [testAddValidCodeSystemJson],
+    groups: ["codesystem", "subsume_codesystem", "successful_scenario"]
+}
+public function conceptClosureDescendants() returns error? {
+    store:CodeSystem codeSystem = check getStoreCodeSystemByURL("urn:oid:2.16.840.1.113883.6.238");
+
+    // 2133-7 and its 43 descendants, the concept itself is its own depth 0 row
+    ConceptClosure[] descendants = check getConceptDescendants(codeSystem.codeSystemId, "2133-7");
+    test:assertEquals(descendants.length(), 44);
+    test:assertEquals(descendants.filter(row => row.depth == 0).length(), 1);
+}
+
+@test:Config {
+    groups: ["codesystem", "resource_cache", "successful_scenario"]
+}
+public function codeSystemResourceCache() returns error? {
+    string url = "http://hl7.org/fhir/abstract-types";
+    string cacheKey = resourceCacheKey(CACHE_KEY_URL, url, ());
+
+    codeSystemCache.invalidate(CACHE_KEY_URL, url);
+    int hits = codeSystemCache.getHitCount();
+    int misses = codeSystemCache.getMissCount();
+
+    // a miss reads the store row and parses the resource, it is counted once
+    r4:CodeSystem codeSystem = check getCodeSystemByURL(url);
+    test:assertEquals([codeSystemCache.getHitCount() - hits, codeSystemCache.getMissCount() - misses], [0, 1]);
+    anydata cached = codeSystemCache.get(cacheKey);
+    test:assertTrue(cached is CachedCodeSystem);
+    // the cached resource is shared, so it must be immutable
+    test:assertTrue(codeSystem is readonly);
+    test:assertEquals(check getCodeSystemByURL(url), codeSystem);
+    test:assertEquals([codeSystemCache.getHitCount() - hits, codeSystemCache.getMissCount() - misses], [1, 1]);
+
+    // the terminology library gets a copy it may change
+    r4:CodeSystem found = check terminology_source.findCodeSystem(url, ());
+    test:assertFalse(found is readonly);
+    test:assertEquals(found, codeSystem);
+
+    codeSystemCache.invalidate(CACHE_KEY_URL, url);
+    test:assertEquals(codeSystemCache.get(cacheKey), ());
+}
+
+@test:Config {
+    groups: ["concepts", "code_membership", "successful_scenario"]
+}
+
+@test:Config {
+    groups: ["concepts", "code_membership", "successful_scenario"],
+    dependsOn: [codeMembershipIndex]
+}
+public function codeMembershipFilterFollowsStoreGeneration() returns error? {
+    check rebuildCodeMembershipFilter();
+    test:assertTrue(isCodeMembershipFilterCurrent());
+
+    // a write committed by another instance sharing the database
+    _ = check advanceStoreGeneration();
+    test:assertFalse(isCodeMembershipFilterCurrent());
+    // a code the filter holds is still found, the staleness check only affects rejected codes
+    test:assertTrue(terminology_source.findConcept("http://hl7.org/fhir/account-status", "active", ()) is terminology:CodeConceptDetails);
+
+    // the filter is rebuilt in the background and trusted again
+    int attempts = 0;
+    while !isCodeMembershipFilterCurrent() && attempts < 50 {
+        runtime:sleep(0.1);
+        attempts += 1;
+    }
+    test:assertTrue(isCodeMembershipFilterCurrent());
+    test:assertFalse(codeMembershipFilter.mightContain("http://hl7.org/fhir/ValueSet/account-status", "not-a-status"));
+}
+public function codeMembershipIndex() returns error? {
+    test:assertTrue(codeMembershipFilter.mightContain("http://hl7.org/fhir/account-status", "active"));
+    test:assertTrue(codeMembershipFilter.mightContain("http://hl7.org/fhir/ValueSet/account-status", "active"));
+    test:assertFalse(codeMembershipFilter.mightContain("http://hl7.org/fhir/ValueSet/account-status", "not-a-status"));
+
+    store:CodeSystem codeSystem = check getStoreCodeSystemByURL("http://hl7.org/fhir/account-status");
+    store:ValueSet valueSet = check getStoreValueSetByURL("http://hl7.org/fhir/ValueSet/account-status");
+    store:Concept concept = check getStoreConceptByCode(codeSystem.codeSystemId, "active");
+    test:assertTrue((check getContainingValueSetIds(concept.conceptId)).indexOf(valueSet.valueSetId) is int);
+    // no stored ValueSet nests it, so storing another version re-indexes nothing else
+    test:assertEquals(check getNestingValueSetIdsByUrl(valueSet.valueSetId), []);
+}
+
 // ===========================Value set======================================
 
 @test:Config {
@@ -590,6 +777,171 @@ public function expandValueSet1() returns error? {
     test:assertTrue(assertValueSetExpansionsEqual(expected.expansion, actual.expansion), "ValueSet expansions are not equal");
 }
 
+@test:Config {
+    dependsOn: [expandValueSet1],
+    groups: ["valueset", "expand_valueset", "successful_scenario"]
+}
+public function expandValueSetMaterialized() returns error? {
+    store:ValueSet valueSet = check getStoreValueSetByURL("http://hl7.org/fhir/ValueSet/account-status");
+
+    // the first expansion is materialized
+    int? total = check getValueSetExpansionTotal(valueSet.valueSetId);
+    test:assertTrue(total is int);
+
+    // and dropped once the CodeSystem it depends on changes
+    check invalidateCodeSystemExpansions("http://hl7.org/fhir/account-status");
+    total = check getValueSetExpansionTotal(valueSet.valueSetId);
+    test:assertEquals(total, ());
+}
+
+@test:Config {
+    dependsOn: [expandValueSetMaterialized],
+    groups: ["valueset", "expand_valueset", "successful_scenario"]
+}
+public function expandValueSetPageFromDatabase() returns error? {
+    store:ValueSet valueSet = check getStoreValueSetByURL("http://hl7.org/fhir/ValueSet/account-status");
+
+    [r4:ValueSetExpansionContains[], int] [page, total] = check getValueSetExpansionPage(valueSet.valueSetId, (), 1, 2);
+    test:assertEquals(total, 5);
+    test:assertEquals(page.map(concept => concept.code), ["entered-in-error", "unknown"]);
+
+    // the filter is a literal substring, LIKE wildcards in it are escaped
+    [page, total] = check getValueSetExpansionPage(valueSet.valueSetId, "%", 0, 10);
+    test:assertEquals(total, 0);
+    [page, total] = check getValueSetExpansionPage(valueSet.valueSetId, "hold", 0, 10);
+    test:assertEquals(page.map(concept => concept.code), ["on-hold"]);
+}
+
+@test:Config {
+    dependsOn: [expandValueSetPageFromDatabase],
+    groups: ["valueset", "expand_valueset", "successful_scenario"]
+}
+public function expandValueSetNestingItself() returns error? {
+    string url = "http://example.org/fhir/ValueSet/nesting-itself";
+    check terminology_source.addValueSet({
+        id: "nesting-itself",
+        url,
+        version: "1.0.0",
+        name: "NestingItself",
+        status: "active",
+        compose: {include: [{valueSet: ["http://hl7.org/fhir/ValueSet/account-status", url]}]}
+    });
+    store:ValueSet valueSet = check getStoreValueSetByURL(url);
+
+    // the ValueSet is not expanded into itself again, materialized or streamed
+    [r4:ValueSetExpansionContains[], int] [expected, total] = check getValueSetExpansionPage(valueSet.valueSetId, (), 0, 10);
+    test:assertEquals(total, 5);
+    [r4:ValueSetExpansionContains[], string?] [page, next] = check getValueSetExpansionStreamPage(valueSet.valueSetId, (), "", 10);
+    test:assertEquals(page.map(concept => concept.code), expected.map(concept => concept.code));
+    test:assertEquals(next, ());
+}
+
+@test:Config {
+    groups: ["valueset", "expand_valueset", "successful_scenario"]
+}
+public function streamValueSetExpansion() returns error? {
+    store:ValueSet valueSet = check getStoreValueSetByURL("http://hl7.org/fhir/ValueSet/account-status");
+    [r4:ValueSetExpansionContains[], int] [expected, _] = check getValueSetExpansionPage(valueSet.valueSetId, (), 0, 10);
+
+    // pages of two, following the continuation tokens
+    string[] codes = [];
+    string? token = "";
+    int pages = 0;
+    while token is string {
+        [r4:ValueSetExpansionContains[], string?] [page, next] = check getValueSetExpansionStreamPage(valueSet.valueSetId, (), token, 2);
+        codes.push(...page.map(concept => concept.code));
+        token = next;
+        pages += 1;
+    }
+    test:assertEquals(codes, expected.map(concept => concept.code));
+    test:assertEquals(pages, 3);
+
+    // a page ending with the last concept gets no continuation token
+    [r4:ValueSetExpansionContains[], string?] [lastPage, next] = check getValueSetExpansionStreamPage(valueSet.valueSetId, (), "", expected.length());
+    test:assertEquals(lastPage.length(), expected.length());
+    test:assertEquals(next, ());
+
+    test:assertTrue(getValueSetExpansionStreamPage(valueSet.valueSetId, (), "not-a-token", 2) is r4:FHIRError);
+}
+
+@test:Config {
+    groups: ["valueset", "expand_valueset", "successful_scenario"]
+}
+public function streamValueSetExpansionResponse() returns error? {
+    store:ValueSet dbValueSet = check getStoreValueSetByURL("http://hl7.org/fhir/ValueSet/account-status");
+    TerminologySource terminologySource = new (deferExpansion = true);
+    r4:ValueSet valueSet = check terminologySource.expandValueSet({}, check readValueSetByUrl("http://hl7.org/fhir/ValueSet/account-status"), 1, 10);
+    DeferredExpansion page = check terminologySource.takeDeferredExpansion().ensureType();
+    test:assertEquals(page.valueSetId, dbValueSet.valueSetId);
+
+    // four concepts after the offset, written in chunks of two
+    stream<byte[], io:Error?> chunks = streamValueSetExpansion(valueSet, page, 2);
+    byte[] body = [];
+    int chunkCount = 0;
+    check from byte[] chunk in chunks
+        do {
+            body.push(...chunk);
+            chunkCount += 1;
+        };
+    test:assertEquals(chunkCount, 2);
+
+    r4:ValueSet streamed = check (check string:fromBytes(body)).fromJsonStringWithType();
+    [r4:ValueSetExpansionContains[], int] [concepts, total] = check getValueSetExpansionPage(dbValueSet.valueSetId, (), 1, 10);
+    r4:ValueSetExpansion expansion = <r4:ValueSetExpansion>streamed.expansion;
+    test:assertEquals(expansion.total, total);
+    test:assertEquals(expansion.offset, 1);
+    test:assertEquals(expansion.contains, concepts.map(concept => toExpansionContains(concept)));
+    test:assertEquals(streamed.url, valueSet.url);
+}
+
+@test:Config {
+    groups: ["valueset", "expand_valueset", "successful_scenario"]
+}
+public function streamedExpansionMatchesExpansion() returns error? {
+    // GET streams the expansion, POST without a payload expands the same ValueSet in memory
+    foreach string query in ["url=http://hl7.org/fhir/ValueSet/account-status&_count=3&_offset=1",
+            "url=http://hl7.org/fhir/ValueSet/account-status&filter=hold"] {
+        http:Response streamedResponse = check vsClient->get("/%24expand?" + query);
+        http:Response expandedResponse = check vsClient->post("/%24expand?" + query, ());
+        test:assertEquals(streamedResponse.statusCode, http:STATUS_OK);
+        test:assertEquals(expandedResponse.statusCode, http:STATUS_OK);
+
+        map<json> streamed = check (check streamedResponse.getJsonPayload()).ensureType();
+        map<json> expanded = check (check expandedResponse.getJsonPayload()).ensureType();
+        // only the time of the expansion differs
+        _ = (<map<json>>streamed["expansion"]).remove("timestamp");
+        _ = (<map<json>>expanded["expansion"]).remove("timestamp");
+        test:assertEquals(streamed, expanded);
+    }
+}
+
+@test:Config {
+    groups: ["snapshot", "successful_scenario"]
+}
+public function terminologySnapshotRoundTrip() returns error? {
+    string path = check file:createTemp(suffix = ".snapshot");
+    SnapshotSummary summary = check exportSnapshot(path);
+    TerminologySnapshot snapshot = check loadSnapshot(path);
+    check file:remove(path);
+
+    test:assertEquals(snapshot.codeSystems.length(), summary.codeSystemCount);
+    test:assertEquals(snapshot.valueSets.length(), summary.valueSetCount);
+    test:assertEquals(snapshot.codes.length(), summary.conceptCount);
+
+    terminology:CodeConceptDetails concept = check findSnapshotConcept(snapshot, "http://hl7.org/fhir/account-status", "active", ());
+    test:assertEquals(concept.concept, (check findConceptInCodeSystem("http://hl7.org/fhir/account-status", "active", ())).concept);
+    test:assertTrue(findSnapshotConcept(snapshot, "http://hl7.org/fhir/ValueSet/account-status", "not-a-status", ()) is r4:FHIRError);
+
+    // the prebuilt expansion pages like the store expansion
+    store:ValueSet valueSet = check getStoreValueSetByURL("http://hl7.org/fhir/ValueSet/account-status");
+    SnapshotValueSet snapshotValueSet = check findSnapshotValueSet(snapshot, valueSet.url, (), ());
+    [r4:ValueSetExpansionContains[], int] [page, total] = expandSnapshotValueSet(snapshot, snapshotValueSet, (), 1, 2);
+    test:assertEquals(total, 5);
+    test:assertEquals(page.map(contains => contains.code), ["entered-in-error", "unknown"]);
+    [page, total] = expandSnapshotValueSet(snapshot, snapshotValueSet, "hold", 0, 10);
+    test:assertEquals(page.map(contains => contains.code), ["on-hold"]);
+}
+
 @test:Config {
     groups: ["valueset", "expand_valueset", "successful_scenario"]
 }
@@ -774,6 +1126,37 @@ public function testBatchValidateValueSetsValid() returns error? {
     test:assertEquals(response.getJsonPayload(), expectedResponse);
 }
 
+@test:Config {
+    groups: ["valueset", "batch_validate_valueset", "successful_scenario"]
+}
+public function testBatchValidateValueSetsGrouped() returns error? {
+    string[] urls = [
+        "/%24validate-code?system=http://hl7.org/fhir/ValueSet/account-status&code=inactive",
+        "/%24validate-code?system=http://hl7.org/fhir/ValueSet/account-status&code=unknown",
+        "/%24validate-code?system=http://hl7.org/fhir/ValueSet/unknown&code=active",
+        "/%24validate-code?system=http://hl7.org/fhir/ValueSet/account-status&code=active",
+        "/%24validate-code?system=http://hl7.org/fhir/ValueSet/account-status&code=inactive"
+    ];
+    json requestPayload = {
+        resourceType: "Bundle",
+        'type: "batch",
+        entry: from string url in urls
+            select {request: {method: "GET", url}}
+    };
+
+    http:Response response = check baseClient->post("/", requestPayload);
+    r4:Bundle bundle = check (check response.getJsonPayload()).cloneWithType(r4:Bundle);
+    r4:BundleEntry[] entries = <r4:BundleEntry[]>bundle.entry;
+
+    // responses keep the order of the request entries, duplicates included
+    boolean[] results = [];
+    foreach r4:BundleEntry entry in entries {
+        international401:Parameters parameters = check entry.'resource.cloneWithType(international401:Parameters);
+        results.push((<international401:ParametersParameter[]>parameters.'parameter)[0].valueBoolean == true);
+    }
+    test:assertEquals(results, [true, false, false, true, true]);
+}
+
 @test:Config {
     groups: ["valueset", "batch_validate_valueset", "failure_scenario"]
 }
@@ -1003,7 +1386,8 @@ public function testUpload1() returns error? {
     req.setHeader(TYPE_HEADER, "FHIR");
 
     http:Response response = check baseClient->post("/%24upload?target-path=hl7.terminology.r4/package", req);
-    test:assertEquals(response.statusCode, 201);
+    test:assertEquals(response.statusCode, 202);
+    test:assertEquals(check waitForUploadJob(response), "completed");
 }
 
 @test:Config {
@@ -1046,7 +1430,238 @@ public function testUploadLoinc() returns error? {
     req.setHeader(TYPE_HEADER, "LOINC");
 
     http:Response response = check baseClient->post("/%24upload?loinc-version=2.80", req);
-    test:assertEquals(response.statusCode, 201);
+    test:assertEquals(response.statusCode, 202);
+    test:assertEquals(check waitForUploadJob(response), "completed");
+}
+
+@test:Config {
+    groups: ["upload", "successful_scenario", "snomed"]
+}
+public function testUploadSnomed() returns error? {
+    byte[] zipBytes = check readZipFileAsBytes("snomed.zip");
+
+    http:Request req = new;
+    req.setPayload(zipBytes, contentType = "application/zip");
+    req.setHeader(TYPE_HEADER, "SNOMED");
+
+    http:Response response = check baseClient->post("/%24upload", req);
+    test:assertEquals(response.statusCode, 202);
+    test:assertEquals(check waitForUploadJob(response), "completed");
+
+    // Myocardial infarction reaches Clinical finding through both of the parents of Heart disease
+    http:Response subsumes = check csClient->get("/%24subsumes?codeA=404684003&codeB=22298006&system=http://snomed.info/sct");
+    json outcome = check subsumes.getJsonPayload();
+    test:assertEquals(check outcome.'parameter, [{name: "outcome", valueCode: "subsumes"}]);
+
+    http:Response lookup = check csClient->get("/%24lookup?system=http://snomed.info/sct&code=56265001");
+    json lookupJson = check lookup.getJsonPayload();
+    test:assertTrue(lookupJson.toJsonString().includes("\"Heart disease\""));
+    test:assertFalse(lookupJson.toJsonString().includes("(acceptable)"));
+
+    // inactive concepts and is-a relationships to them are left out
+    http:Response inactive = check csClient->get("/%24lookup?system=http://snomed.info/sct&code=999999001");
+    test:assertEquals(inactive.statusCode, 404);
+}
+
+@test:Config {
+    groups: ["upload", "successful_scenario", "icd10"]
+}
+public function testUploadIcd10() returns error? {
+    byte[] zipBytes = check readZipFileAsBytes("icd10.zip");
+
+    http:Request req = new;
+    req.setPayload(zipBytes, contentType = "application/zip");
+    req.setHeader(TYPE_HEADER, "ICD10");
+
+    http:Response response = check baseClient->post("/%24upload?icd10-version=2025", req);
+    test:assertEquals(response.statusCode, 202);
+    test:assertEquals(check waitForUploadJob(response), "completed");
+
+    // the 7th character code hangs below the nearest preceding prefix, S00.00
+    http:Response subsumes = check csClient->get("/%24subsumes?codeA=S00&codeB=S00.00XA&system=http://hl7.org/fhir/sid/icd-10-cm");
+    json outcome = check subsumes.getJsonPayload();
+    test:assertEquals(check outcome.'parameter, [{name: "outcome", valueCode: "subsumes"}]);
+
+    http:Response notSubsumed = check csClient->get("/%24subsumes?codeA=A00&codeB=S00.0&system=http://hl7.org/fhir/sid/icd-10-cm");
+    json notSubsumedOutcome = check notSubsumed.getJsonPayload();
+    test:assertEquals(check notSubsumedOutcome.'parameter, [{name: "outcome", valueCode: "not-subsumed"}]);
+}
+
+@test:Config {
+    groups: ["upload", "successful_scenario", "rxnorm"]
+}
+public function testUploadRxNorm() returns error? {
+    byte[] zipBytes = check readZipFileAsBytes("rxnorm.zip");
+
+    http:Request req = new;
+    req.setPayload(zipBytes, contentType = "application/zip");
+    req.setHeader(TYPE_HEADER, "RXNORM");
+
+    http:Response response = check baseClient->post("/%24upload?rxnorm-version=04072025", req);
+    test:assertEquals(response.statusCode, 202);
+    test:assertEquals(check waitForUploadJob(response), "completed");
+
+    http:Response subsumes = check csClient->get("/%24subsumes?codeA=1152842&codeB=313782&system=http://www.nlm.nih.gov/research/umls/rxnorm");
+    json outcome = check subsumes.getJsonPayload();
+    test:assertEquals(check outcome.'parameter, [{name: "outcome", valueCode: "subsumes"}]);
+
+    // the SCD name is preferred over the PSN and suppressed concepts are left out
+    http:Response lookup = check csClient->get("/%24lookup?system=http://www.nlm.nih.gov/research/umls/rxnorm&code=313782");
+    json lookupJson = check lookup.getJsonPayload();
+    test:assertTrue(lookupJson.toJsonString().includes("\"Acetaminophen 325 MG Oral Tablet\""));
+
+    http:Response suppressed = check csClient->get("/%24lookup?system=http://www.nlm.nih.gov/research/umls/rxnorm&code=999999");
+    test:assertEquals(suppressed.statusCode, 404);
+}
+
+@test:Config {
+    groups: ["upload", "failure_scenario"]
+}
+public function testUploadJobStatus() returns error? {
+    http:Response unknown = check baseClient->get("/%24upload/unknown-job");
+    test:assertEquals(unknown.statusCode, 404);
+
+    byte[] zipBytes = check readZipFileAsBytes("icd10.zip");
+    http:Request req = new;
+    req.setPayload(zipBytes, contentType = "application/zip");
+    req.setHeader(TYPE_HEADER, "ICD10");
+
+    http:Response accepted = check baseClient->post("/%24upload?icd10-version=2024", req);
+    test:assertEquals(accepted.statusCode, 202);
+    test:assertTrue((check accepted.getHeader("Content-Location")).startsWith("/fhir/r4/$upload/"));
+    test:assertEquals(check waitForUploadJob(accepted), "completed");
+
+    // a finished job can not be cancelled
+    http:Client jobClient = check new ("http://localhost:9089");
+    http:Response cancelled = check jobClient->delete(check accepted.getHeader("Content-Location"));
+    test:assertEquals(cancelled.statusCode, 409);
+}
+
+@test:Config {
+    groups: ["upload", "failure_scenario"]
+}
+public function testUploadJobPackageFailures() returns error? {
+    string releasePath = "tests/resources/broken-release";
+    check file:createDir(releasePath + FHIR_PACKAGE_PATH, file:RECURSIVE);
+    check io:fileWriteString(releasePath + FHIR_PACKAGE_PATH + "/CodeSystem-broken.json", "{");
+    string now = time:utcToString(time:utcNow());
+    UploadJob job = {
+        jobId: "broken-package-job",
+        terminologyType: FHIR,
+        version: (),
+        status: JOB_RUNNING,
+        phase: PHASE_IMPORTING,
+        createdAt: now,
+        updatedAt: now
+    };
+
+    // nothing of the package was imported, the job fails and reports the first failure
+    error? result = importTerminologyRelease(job, releasePath);
+    check file:remove(releasePath, file:RECURSIVE);
+    test:assertTrue(result is error);
+    test:assertEquals(job.failedCount, 1);
+    test:assertTrue((<string>job.firstError).startsWith("CodeSystem-broken.json: "));
+
+    international401:ParametersParameter[] params = uploadJobToParameters(job).'parameter ?: [];
+    test:assertTrue(params.some(param => param.name == "failedCount" && param.valueInteger == 1));
+    test:assertTrue(params.some(param => param.name == "firstError"));
+}
+
+@test:Config {
+    groups: ["upload", "successful_scenario"]
+}
+public function testUploadJobCancelling() {
+    UploadJobExecutor executor = new (1);
+    executor.track("running-job", PHASE_IMPORTING);
+
+    // a running job is asked to stop and keeps the `cancelling` phase until it has
+    test:assertFalse(executor.cancel("running-job"));
+    test:assertTrue(executor.isCancelled("running-job"));
+    executor.setPhase("running-job", PHASE_IMPORTING);
+    test:assertEquals((<UploadJobProgress>executor.getProgress("running-job")).phase, PHASE_CANCELLING);
+}
+
+@test:Config {
+    groups: ["upload", "failure_scenario"]
+}
+public function testUploadJobAttemptsLimit() returns error? {
+    string now = time:utcToString(time:utcNow());
+    UploadJob job = {
+        jobId: "interrupted-job",
+        terminologyType: ICD10,
+        version: (),
+        status: JOB_RUNNING,
+        phase: PHASE_IMPORTING,
+        attempts: upload_job_max_attempts,
+        createdAt: now,
+        updatedAt: now
+    };
+    check insertUploadJob(job);
+    check file:createDir(uploadJobDirectory(job.jobId), file:RECURSIVE);
+    check io:fileWriteBytes(uploadJobDirectory(job.jobId) + ZIP_FILE_NAME, [0]);
+
+    // the archive is still there, but the job is not started again
+    check resumeUploadJobs();
+    UploadJob resumed = check getUploadJob(job.jobId);
+    test:assertEquals(resumed.status, JOB_FAILED);
+    test:assertEquals(resumed.attempts, upload_job_max_attempts);
+    test:assertFalse(check file:test(uploadJobDirectory(job.jobId), file:EXISTS));
+}
+
+@test:Config {
+    groups: ["upload", "successful_scenario"]
+}
+public function testUploadJobLease() returns error? {
+    string now = time:utcToString(time:utcNow());
+    UploadJob job = {
+        jobId: "leased-job",
+        terminologyType: ICD10,
+        version: (),
+        status: JOB_RUNNING,
+        phase: PHASE_IMPORTING,
+        owner: "other-instance",
+        heartbeatAt: time:utcNow()[0],
+        createdAt: now,
+        updatedAt: now
+    };
+    check insertUploadJob(job);
+
+    // the job is left to the instance renewing its lease
+    check resumeUploadJobs();
+    UploadJob running = check getUploadJob(job.jobId);
+    test:assertEquals(running.status, JOB_RUNNING);
+    test:assertEquals(running.owner, "other-instance");
+
+    // the cancellation is stored for the owner to read, the job keeps running until then
+    UploadJob cancelling = check cancelUploadJob(job.jobId);
+    test:assertEquals(cancelling.phase, PHASE_CANCELLING);
+    test:assertTrue((check getUploadJob(job.jobId)).cancelRequested);
+}
+
+@test:Config {
+    groups: ["upload", "successful_scenario"]
+}
+public function testUploadJobCancellationPolling() returns error? {
+    string now = time:utcToString(time:utcNow());
+    UploadJob job = {
+        jobId: "polled-job",
+        terminologyType: ICD10,
+        version: (),
+        status: JOB_RUNNING,
+        phase: PHASE_IMPORTING,
+        owner: uploadJobOwner,
+        heartbeatAt: time:utcNow()[0],
+        cancelRequested: true,
+        createdAt: now,
+        updatedAt: now
+    };
+    check insertUploadJob(job);
+    uploadJobExecutor.track(job.jobId, PHASE_IMPORTING);
+
+    // a cancellation stored by any instance stops the running job of this instance before its next chunk
+    check pollUploadJobCancellations();
+    test:assertTrue(uploadJobExecutor.isCancelled(job.jobId));
+    _ = uploadJobExecutor.finish(job.jobId);
 }
 
 @test:Config {
@@ -1092,6 +1707,7 @@ public function searchConcept1() returns error? {
     groups: ["concepts", "find_code", "successful_scenario"]
 }
 public function searchConcept2() returns error? {
+    // exact matches are ranked before "inactive", so the second page starts at the second exact match
     http:Response response = check baseClient->get("/%24find-code?filter=active&_count=2&_offset=1");
 
     json actualJson = check response.getJsonPayload();
@@ -1101,6 +1717,119 @@ public function searchConcept2() returns error? {
     test:assertTrue(assertBundleEqual(expected, actual));
 }
 
+@test:Config {
+    groups: ["concepts", "find_code", "successful_scenario"]
+}
+public function searchConceptInSystem() returns error? {
+    http:Response response = check baseClient->get("/%24find-code?filter=active&system=http://hl7.org/fhir/resource-status");
+
+    json actualJson = check response.getJsonPayload();
+    r4:Bundle actual = check actualJson.cloneWithType(r4:Bundle);
+    r4:Bundle expected = check returnConceptData("bundle-search-active-resource-status").cloneWithType(r4:Bundle);
+
+    test:assertTrue(assertBundleEqual(expected, actual));
+}
+
+@test:Config {
+    groups: ["concepts", "find_code", "successful_scenario"]
+}
+public function searchConceptInSystemWithPagination() returns error? {
+    // matching ignores case, and the exact match "active" is ranked before "inactive"
+    http:Response response = check baseClient->get("/%24find-code?filter=ACTIVE&system=http://hl7.org/fhir/resource-status&_count=2&_offset=1");
+
+    json actualJson = check response.getJsonPayload();
+    r4:Bundle actual = check actualJson.cloneWithType(r4:Bundle);
+    r4:Bundle expected = check returnConceptData("bundle-search-active-resource-status-with-pagination").cloneWithType(r4:Bundle);
+
+    test:assertTrue(assertBundleEqual(expected, actual));
+}
+
+@test:Config {
+    groups: ["concepts", "find_code", "successful_scenario"]
+}
+public function searchConceptInjectedFilter() returns error? {
+    // the filter is a bound parameter, not part of the SQL text
+    http:Response response = check baseClient->get("/%24find-code?filter=active'%20OR%20'1'='1");
+
+    test:assertEquals(response.statusCode, 200);
+    json actualJson = check response.getJsonPayload();
+    r4:Bundle actual = check actualJson.cloneWithType(r4:Bundle);
+    test:assertEquals(actual.total, 0);
+}
+
+@test:Config {
+    groups: ["concepts", "find_code", "successful_scenario"]
+}
+public function searchConceptLastCharacter() returns error? {
+    // "d" is the last character of "On Hold", found through the trailing padding of the indexed text
+    http:Response response = check baseClient->get("/%24find-code?filter=d&system=http://hl7.org/fhir/account-status");
+
+    json actualJson = check response.getJsonPayload();
+    r4:Bundle actual = check actualJson.cloneWithType(r4:Bundle);
+    string[] codes = [];
+    foreach r4:BundleEntry entry in actual.entry ?: [] {
+        r4:Coding coding = check entry.'resource.cloneWithType();
+        codes.push(coding.code ?: "");
+    }
+    test:assertEquals(codes.sort(), ["entered-in-error", "on-hold"]);
+}
+
+@test:Config {
+    groups: ["concepts", "find_code", "successful_scenario"]
+}
+public function conceptTrigrams() {
+    // indexed texts are padded, so that short queries, the last character included, are trigram prefixes
+    test:assertEquals(getTrigrams("Ab", true).sort(), [" ab", "ab ", "b  "]);
+    test:assertEquals(getTrigrams("Active", false).sort(), ["act", "cti", "ive", "tiv"]);
+    test:assertEquals(getTrigrams("ab", false), []);
+}
+
+@test:Config {
+    groups: ["codesystem", "add_codesystem", "successful_scenario"]
+}
+public function codeSystemStoredWithoutConcepts() returns error? {
+    r4:CodeSystem codeSystem = {
+        url: "http://example.org/header-only",
+        status: "active",
+        content: r4:CODE_CONTENT_COMPLETE,
+        concept: [{code: "parent", concept: [{code: "child"}]}]
+    };
+    store:CodeSystemInsert insert = check codeSystemToInsert(codeSystem);
+
+    // the header is validated by parsing it again, the concepts are left out and the given resource is unchanged
+    r4:CodeSystem stored = check byteToCodeSystem(insert.codeSystem);
+    test:assertEquals(stored.concept, ());
+    test:assertEquals(stored.url, codeSystem.url);
+    test:assertEquals((<r4:CodeSystemConcept[]>codeSystem.concept).length(), 1);
+}
+
+@test:Config {
+    groups: ["concepts", "concept_columns", "successful_scenario"]
+}
+public function conceptColumnsRoundTrip() returns error? {
+    r4:CodeSystemConcept concept = {
+        code: "active",
+        display: "Active",
+        property: [
+            {code: "status", valueCode: "retired"},
+            {code: "parent", valueCoding: {system: "http://example.org", code: "root"}},
+            {code: "weight", valueDecimal: 1.5}
+        ],
+        designation: [{language: "de", use: {code: "display"}, value: "Aktiv"}]
+    };
+    ConceptPropertyRow[] properties = getConceptPropertyRows(concept, 1);
+    ConceptDesignationRow[] designations = getConceptDesignationRows(concept, 1);
+
+    test:assertEquals(getConceptStatus(concept), "retired");
+    r4:CodeSystemConcept rebuilt = check buildConceptFromColumns("active", "Active", (), properties, designations);
+    test:assertEquals(rebuilt, concept);
+    test:assertTrue(isColumnarConcept(concept, rebuilt));
+
+    // element ids are not columnar, such concepts are read from their JSON document
+    r4:CodeSystemConcept withId = {id: "c1", code: "active"};
+    test:assertFalse(isColumnarConcept(withId, check buildConceptFromColumns("active", (), (), [], [])));
+}
+
 @test:Config {
     groups: ["concepts", "find_code", "failure_scenario"]
 }
@@ -1138,6 +1867,25 @@ public function searchConceptPost1() returns error? {
     test:assertTrue(assertBundleEqual(expected, actual));
 }
 
+@test:Config {
+    groups: ["concepts", "find_code", "successful_scenario"]
+}
+public function searchConceptPostInSystem() returns error? {
+    international401:ParametersParameter filterParam = {name: "filter", valueString: "active"};
+    international401:ParametersParameter systemParam = {name: "system", valueString: "http://hl7.org/fhir/resource-status"};
+    international401:ParametersParameter countParam = {name: "_count", valueInteger: 2};
+    international401:ParametersParameter offsetParam = {name: "_offset", valueInteger: 1};
+    international401:Parameters requestPayload = {'parameter: [filterParam, systemParam, countParam, offsetParam]};
+
+    http:Response response = check baseClient->post("/%24find-code", requestPayload);
+
+    json actualJson = check response.getJsonPayload();
+    r4:Bundle actual = check actualJson.cloneWithType(r4:Bundle);
+    r4:Bundle expected = check returnConceptData("bundle-search-active-resource-status-with-pagination").cloneWithType(r4:Bundle);
+
+    test:assertTrue(assertBundleEqual(expected, actual));
+}
+
 @test:Config {
     groups: ["concepts", "find_code", "failure_scenario"]
 }
@@ -1198,3 +1946,86 @@ public function getCapabilityStatementFromMetadata() returns error? {
     international401:CapabilityStatement|error capabilityStatement = payload.cloneWithType(international401:CapabilityStatement);
     test:assertTrue(capabilityStatement is international401:CapabilityStatement, "CapabilityStatement should not be an error");
 }
+
+@test:Config {
+    groups: ["store_pool", "successful_scenario"]
+}
+public function storeConnectionPool() {
+    // idle connections are capped at the pool size, the other settings reach the JDBC pool unchanged
+    test:assertEquals(getStoreConnectionPool(), {
+        maxOpenConnections: getStorePoolConfig().maxOpenConnections,
+        minIdleConnections: int:min(getStorePoolConfig().minIdleConnections, getStorePoolConfig().maxOpenConnections),
+        maxConnectionLifeTime: getStorePoolConfig().maxConnectionLifeTime,
+        connectionTimeout: getStorePoolConfig().connectionTimeout
+    });
+}
+
+@test:Config {
+    groups: ["store_pool", "successful_scenario"]
+}
+public function storePoolUsage() returns error? {
+    // the pool of the mock store client registers its MXBean, its connections are counted there
+    StorePoolUsage[] usage = check readStorePoolUsage();
+    test:assertTrue(usage.length() > 0, "A HikariCP pool MXBean should be registered");
+    foreach StorePoolUsage pool in usage {
+        test:assertEquals(pool.activeConnections + pool.idleConnections, pool.totalConnections);
+        test:assertTrue(pool.threadsAwaitingConnection >= 0);
+    }
+
+    StorePoolMonitor monitor = new;
+    monitor.publish(usage.cloneReadOnly());
+    test:assertEquals(monitor.getValue(STORE_POOL_TOTAL_METRIC, usage[0].pool), <float>usage[0].totalConnections);
+    test:assertEquals(monitor.getValue(STORE_POOL_TOTAL_METRIC, "unknown"), ());
+}
+
+@test:Config {
+    groups: ["query_builder", "successful_scenario"]
+}
+public function prebuiltQueryTemplates() {
+    // templates are built once for the configured dialect and shared between requests
+    test:assertTrue(queryTemplates is readonly);
+    sql:ParameterizedQuery query = fillQueryTemplate(queryTemplates.byUrlAndVersion, "http://loinc.org", "2.78");
+    test:assertEquals(query.strings, [string `"url" = `, string ` AND "version" = `, ""]);
+    test:assertEquals(query.insertions, ["http://loinc.org", "2.78"]);
+}
+
+@test:Config {
+    groups: ["http_cache", "successful_scenario"]
+}
+public function conditionalReadCodeSystem() returns error? {
+    http:Response response = check csClient->get("/account-status");
+    test:assertEquals(response.statusCode, http:STATUS_OK);
+    string etag = check response.getHeader(ETAG);
+    test:assertTrue(etag.startsWith("W/"));
+    test:assertEquals(check response.getHeader(CACHE_CONTROL), getCacheControl(CACHE_READ));
+
+    // the stored ETag answers the request, without a body
+    http:Response notModified = check csClient->get("/account-status", {[IF_NONE_MATCH]: etag});
+    test:assertEquals(notModified.statusCode, http:STATUS_NOT_MODIFIED);
+    test:assertEquals(check notModified.getHeader(ETAG), etag);
+
+    http:Response modified = check csClient->get("/account-status", {[IF_NONE_MATCH]: string `W/"CodeSystem-0-0"`});
+    test:assertEquals(modified.statusCode, http:STATUS_OK);
+
+    // lookups are validated by the CodeSystem they read
+    http:Response lookup = check csClient->get("/%24lookup?system=http://hl7.org/fhir/account-status&code=active", {[IF_NONE_MATCH]: etag});
+    test:assertEquals(lookup.statusCode, http:STATUS_NOT_MODIFIED);
+}
+
+@test:Config {
+    groups: ["http_cache", "successful_scenario"]
+}
+public function conditionalValueSetExpansion() returns error? {
+    http:Response response = check vsClient->get("/account-status/%24expand");
+    test:assertEquals(response.statusCode, http:STATUS_OK);
+    string etag = check response.getHeader(ETAG);
+    test:assertEquals(check response.getHeader(CACHE_CONTROL), getCacheControl(CACHE_EXPAND));
+
+    http:Response notModified = check vsClient->get("/account-status/%24expand", {[IF_NONE_MATCH]: etag});
+    test:assertEquals(notModified.statusCode, http:STATUS_NOT_MODIFIED);
+
+    // a rebuilt expansion gets a new ETag
+    check invalidateCodeSystemExpansions("http://hl7.org/fhir/account-status");
+    http:Response rebuilt = check vsClient->get("/account-status/%24expand", {[IF_NONE_MATCH]: etag});
+    test:assertEquals(rebuilt.statusCode, http:STATUS_OK);
+}
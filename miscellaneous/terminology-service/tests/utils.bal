@@ -14,7 +14,9 @@
 // specific language governing permissions and limitations
 // under the License.
 
+import ballerina/http;
 import ballerina/io;
+import ballerina/lang.runtime;
 import ballerina/test;
 import ballerinax/health.fhir.r4;
 import ballerinax/health.fhir.r4.international401;
@@ -91,6 +93,28 @@ public function readZipFileAsBytes(string fileName) returns byte[]|error {
     return io:fileReadBytes(filePath);
 }
 
+// polls the status url of an accepted $upload until its job has finished and returns the final job status
+function waitForUploadJob(http:Response accepted) returns string|error {
+    string location = check accepted.getHeader("Content-Location");
+    http:Client jobClient = check new ("http://localhost:9089");
+
+    foreach int _ in 0 ..< 600 {
+        http:Response response = check jobClient->get(location);
+        if response.statusCode != http:STATUS_ACCEPTED {
+            json[] params = check (check (check response.getJsonPayload()).'parameter).ensureType();
+            foreach json param in params {
+                json name = check param.name;
+                if name == "status" {
+                    return (check param.valueCode).ensureType();
+                }
+            }
+            return error("Upload job status is missing");
+        }
+        runtime:sleep(0.1);
+    }
+    return error("Upload job did not finish in time");
+}
+
 isolated function addExampleDataToTestDB() returns error? {
     string[] codeSystemList = ["http://hl7.org/fhir/account-status", "http://hl7.org/fhir/abstract-types", "http://hl7.org/fhir/resource-status"];
     string[] valueSetList = ["http://hl7.org/fhir/ValueSet/abstract-types", "http://hl7.org/fhir/ValueSet/account-status"];
@@ -187,3 +211,19 @@ function assertBundleEqual(r4:Bundle expected, r4:Bundle actual) returns boolean
 
     return true;
 }
+
+isolated function resetSchemaMigrations() returns error? {
+    // base tables are recreated by store:setupTestDB, so the recorded migrations no longer apply
+    _ = check sClient->executeNativeSQL(`DROP TABLE IF EXISTS "schema_migrations";`);
+    // tables owned by the migrations reference concept ids that are reused after the reset
+    _ = check sClient->executeNativeSQL(`DROP TABLE IF EXISTS "concept_closure";`);
+    _ = check sClient->executeNativeSQL(`DROP TABLE IF EXISTS "valueset_expansions";`);
+    _ = check sClient->executeNativeSQL(`DROP TABLE IF EXISTS "valueset_expansion_states";`);
+    _ = check sClient->executeNativeSQL(`DROP TABLE IF EXISTS "concept_trigrams";`);
+    _ = check sClient->executeNativeSQL(`DROP TABLE IF EXISTS "code_memberships";`);
+    _ = check sClient->executeNativeSQL(`DROP TABLE IF EXISTS "concept_attributes";`);
+    _ = check sClient->executeNativeSQL(`DROP TABLE IF EXISTS "concept_properties";`);
+    _ = check sClient->executeNativeSQL(`DROP TABLE IF EXISTS "concept_designations";`);
+    _ = check sClient->executeNativeSQL(`DROP TABLE IF EXISTS "upload_jobs";`);
+    _ = check sClient->executeNativeSQL(`DROP TABLE IF EXISTS "resource_versions";`);
+}
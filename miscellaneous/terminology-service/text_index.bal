@@ -0,0 +1,169 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.store;
+
+import ballerina/log;
+import ballerina/persist;
+import ballerina/sql;
+
+// rows per INSERT statement, kept low enough to stay below the bind parameter limit of every dialect
+const TRIGRAM_INSERT_CHUNK_SIZE = 250;
+
+// concepts read per query while rebuilding the index
+const TEXT_INDEX_REBUILD_BATCH_SIZE = 1000;
+
+// Match ranks of `$find-code` results, lower ranks come first
+const MATCH_RANK_EXACT = 0;
+const MATCH_RANK_PREFIX = 1;
+const MATCH_RANK_SUBSTRING = 2;
+
+# Splits a text into its distinct, lower cased trigrams. Indexed texts are padded with a space in front and
+# two behind, so that a trigram starts at every character of the text and every substring of one or two
+# characters, the last characters included, is the prefix of one of their trigrams. Only ASCII letters are
+# lower cased, so texts differing in the case of other letters share no trigrams there.
+#
+# + text - Text to split
+# + pad - Whether to pad the text, true for indexed texts and false for queries
+# + return - Distinct trigrams of the text
+isolated function getTrigrams(string text, boolean pad) returns string[] {
+    string normalized = pad ? " " + text.toLowerAscii() + "  " : text.toLowerAscii();
+
+    map<()> trigrams = {};
+    foreach int i in 0 ..< normalized.length() - 2 {
+        trigrams[normalized.substring(i, i + 3)] = ();
+    }
+    return trigrams.keys();
+}
+
+# Adds concepts to the trigram index of `display` and `definition`.
+#
+# + concepts - Texts of the concepts to index
+# + dbClient - Store client of the database holding the index
+# + return - An error if the index rows could not be written
+isolated function saveConceptTextIndex(ConceptText[] concepts, store:Client dbClient = sClient) returns error? {
+    sql:ParameterizedQuery[] rows = [];
+    foreach ConceptText concept in concepts {
+        foreach [string, string?] [property, text] in [[DISPLAY, concept.display], [DEFINITION, concept.definition]] {
+            if text is string {
+                foreach string trigram in getTrigrams(text, true) {
+                    rows.push(`(${property}, ${trigram}, ${concept.conceptId}, ${concept.codeSystemId})`);
+                }
+            }
+        }
+    }
+
+    int chunkStart = 0;
+    while chunkStart < rows.length() {
+        int chunkEnd = int:min(chunkStart + TRIGRAM_INSERT_CHUNK_SIZE, rows.length());
+
+        sql:ParameterizedQuery[] queryParts = [
+            `INSERT INTO `, escapeToQuery(CONCEPT_TRIGRAMS_TABLE), ` (`,
+            escapeToQuery("property"), `, `, escapeToQuery("trigram"), `, `,
+            escapeToQuery("conceptId"), `, `, escapeToQuery("codeSystemId"), `) VALUES `
+        ];
+        foreach int i in chunkStart ..< chunkEnd {
+            if i > chunkStart {
+                queryParts.push(`, `);
+            }
+            queryParts.push(rows[i]);
+        }
+        _ = check dbClient->executeNativeSQL(sql:queryConcat(...queryParts));
+
+        chunkStart = chunkEnd;
+    }
+}
+
+# Indexes every concept already in the store. Used when the index is introduced on an existing database.
+#
+# + dbClient - Store client of the database to index
+# + return - An error if the concepts could not be read or indexed
+isolated function rebuildConceptTextIndex(store:Client dbClient = sClient) returns error? {
+    _ = check dbClient->executeNativeSQL(sql:queryConcat(`DELETE FROM `, escapeToQuery(CONCEPT_TRIGRAMS_TABLE)));
+
+    int lastConceptId = 0;
+    int indexedCount = 0;
+    while true {
+        sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+                `SELECT `, escapeToQuery("conceptId"), `, `, escapeToQuery("codesystemCodeSystemId"), ` AS `, escapeToQuery("codeSystemId"),
+                `, `, escapeToQuery("display"), `, `, escapeToQuery("definition"), ` FROM `, escapeToQuery("concepts"),
+                ` WHERE `, escapeToQuery("conceptId"), ` > ${lastConceptId} ORDER BY `, escapeToQuery("conceptId"), ` `,
+                getLimitClause(TEXT_INDEX_REBUILD_BATCH_SIZE, 0)
+        );
+        stream<ConceptText, persist:Error?> conceptStream = dbClient->queryNativeSQL(sqlQuery);
+        ConceptText[] concepts = check from ConceptText concept in conceptStream
+            select concept;
+        if concepts.length() == 0 {
+            break;
+        }
+
+        check saveConceptTextIndex(concepts, dbClient);
+        lastConceptId = concepts[concepts.length() - 1].conceptId;
+        indexedCount += concepts.length();
+    }
+    log:printInfo("Concept text index rebuilt", concepts = indexedCount);
+}
+
+# Finds the concepts whose `display` or `definition` contains the filter, ignoring the case of ASCII letters.
+# Candidates come from the trigram index and are ranked exact match first, then prefix match, then any other
+# substring match. The case of other letters has to match, since the trigrams only fold ASCII letters and a
+# concept is only a candidate if it shares the trigrams of the filter.
+#
+# + property - Concept property to search in
+# + filter - Text to search for, passed to the database as a bound parameter
+# + system - Optional CodeSystem url to restrict the search to
+# + offset - Number of ranked matches to skip
+# + count - Maximum number of matches to return
+# + return - Page of ranked matches or an error
+isolated function searchConceptText(DISPLAY|DEFINITION property, string filter, string? system, int offset, int count) returns ConceptSearchRow[]|error {
+    sql:ParameterizedQuery column = sql:queryConcat(`UPPER(c.`, escapeToQuery(property), `)`);
+    string pattern = escapeLikePattern(filter);
+
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT c.`, escapeToQuery("conceptId"), `, cs.`, escapeToQuery("url"), `, c.`, escapeToQuery("code"), `, c.`, escapeToQuery("display"),
+            `, CASE WHEN `, column, ` = UPPER(${filter}) THEN ${MATCH_RANK_EXACT}`,
+            ` WHEN `, column, ` LIKE UPPER(${pattern + "%"})`, getLikeEscapeClause(), ` THEN ${MATCH_RANK_PREFIX}`,
+            ` ELSE ${MATCH_RANK_SUBSTRING} END AS `, escapeToQuery("matchRank"),
+            ` FROM `, escapeToQuery("concepts"), ` c JOIN `, escapeToQuery("codesystems"), ` cs ON cs.`, escapeToQuery("codeSystemId"), ` = c.`, escapeToQuery("codesystemCodeSystemId"),
+            ` WHERE c.`, escapeToQuery("conceptId"), ` IN (`, getTrigramCandidatesQuery(property, filter), `)`,
+            // the trigrams only narrow down the candidates, the match itself is checked on the text
+            ` AND `, column, ` LIKE UPPER(${"%" + pattern + "%"})`, getLikeEscapeClause(),
+            system is () ? `` : sql:queryConcat(` AND cs.`, escapeToQuery("url"), ` = ${system}`),
+            ` ORDER BY `, escapeToQuery("matchRank"), `, c.`, escapeToQuery("conceptId"), ` `, getLimitClause(count, offset)
+    );
+    stream<ConceptSearchRow, persist:Error?> resultStream = sClient->queryNativeSQL(sqlQuery);
+    return from ConceptSearchRow row in resultStream
+        select row;
+}
+
+isolated function getTrigramCandidatesQuery(DISPLAY|DEFINITION property, string filter) returns sql:ParameterizedQuery {
+    string[] trigrams = getTrigrams(filter, false);
+
+    sql:ParameterizedQuery selectCandidates = sql:queryConcat(
+            `SELECT t.`, escapeToQuery("conceptId"), ` FROM `, escapeToQuery(CONCEPT_TRIGRAMS_TABLE), ` t WHERE t.`, escapeToQuery("property"), ` = ${property}`
+    );
+    if trigrams.length() == 0 {
+        // one or two characters, a prefix of the padded trigrams
+        return sql:queryConcat(
+                selectCandidates, ` AND t.`, escapeToQuery("trigram"), ` LIKE ${escapeLikePattern(filter.toLowerAscii()) + "%"}`, getLikeEscapeClause()
+        );
+    }
+
+    // candidates have to contain every trigram of the filter
+    return sql:queryConcat(
+            selectCandidates, ` AND t.`, escapeToQuery("trigram"), ` IN (`, sql:arrayFlattenQuery(trigrams), `)`,
+            ` GROUP BY t.`, escapeToQuery("conceptId"), ` HAVING COUNT(DISTINCT t.`, escapeToQuery("trigram"), `) = ${trigrams.length()}`
+    );
+}
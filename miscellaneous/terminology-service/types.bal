@@ -13,7 +13,10 @@
 // KIND, either express or implied.  See the License for the
 // specific language governing permissions and limitations
 // under the License.
+import terminology_service.store;
+
 import ballerinax/health.fhir.r4;
+import ballerinax/health.fhir.r4.international401;
 import ballerinax/health.fhir.r4.terminology;
 
 type TerminologyConcept terminology:CodeConceptDetails;
@@ -23,11 +26,6 @@ type ConceptNode record {|
     int? parentConceptId;
 |};
 
-public type CodeSystemValueSetJson record {|
-    json[] codeSystems;
-    json[] valueSets;
-|};
-
 public type ParseCodeSystem record {|
     *r4:DomainResource;
 
@@ -189,3 +187,370 @@ type ValueContact record {
 type ValueHierarchyMeaning record {
     string value;
 };
+
+type PendingConcept record {|
+    r4:CodeSystemConcept concept;
+    int? parentId;
+    // ancestor concept ids, nearest first
+    int[] ancestorIds = [];
+|};
+
+type ConceptClosure record {|
+    int ancestorConceptId;
+    int descendantConceptId;
+    int depth;
+|};
+
+type ConceptClosureCode record {|
+    string ancestorCode;
+    string descendantCode;
+    int depth;
+|};
+
+type ConceptCodeId record {|
+    int conceptId;
+    string code;
+|};
+
+type ExpansionRow record {|
+    string code;
+    string? display;
+    string? elementId;
+|};
+
+type ExpansionState record {|
+    int total;
+|};
+
+// validators of a stored resource or materialized expansion, returned with conditional GET support
+type ResourceVersion record {|
+    // weak entity tag
+    string etag;
+    // ingest or build time as an HTTP date
+    string lastModified;
+|};
+
+// `_summary` and `_elements` of a CodeSystem or ValueSet search
+type SearchProjection record {|
+    // only the number of matches is returned
+    boolean countOnly = false;
+    // elements returned besides the resource type, id and meta
+    string[] elements = [];
+|};
+
+// metadata columns of a `codesystems` or `valuesets` row
+type ResourceColumns record {|
+    string id;
+    string url;
+    string 'version;
+    string name;
+    string title;
+    string status;
+    string date;
+    string publisher;
+|};
+
+// metadata columns a missing `resource_versions` row is derived from
+type ResourceVersionSource record {|
+    int resourceKey;
+    string url;
+    string 'version;
+|};
+
+// position reached by a streamed expansion: the row key last read from the source at `sourceIndex`
+type ExpansionCursor record {|
+    int valueSetId;
+    int sourceIndex = 0;
+    int lastKey = 0;
+|};
+
+// state of the expansion page being read by `walkValueSetExpansion`
+type ExpansionWalk record {|
+    // where the page starts
+    ExpansionCursor cursor;
+    int count;
+    string? filter;
+    // index of the next source visited
+    int sourceIndex = 0;
+    r4:ValueSetExpansionContains[] contains = [];
+    // where the next page starts, set once the page is full and more concepts follow
+    ExpansionCursor? next = ();
+|};
+
+type ExpansionSourceRow record {|
+    int rowKey;
+    string code;
+    string? display;
+|};
+
+type ValueSetIdRow record {|
+    int valueSetId;
+|};
+
+type ConceptText record {|
+    int conceptId;
+    int codeSystemId;
+    string? display;
+    string? definition;
+|};
+
+type ConceptSearchRow record {|
+    int conceptId;
+    string url;
+    string code;
+    string? display;
+    int matchRank;
+|};
+
+type ConceptColumns record {|
+    int conceptId;
+    string code;
+    string? display;
+    string? definition;
+    // nil when the concept was stored before the concept columns existed
+    int? propertyCount;
+    int? designationCount;
+    boolean? opaque;
+|};
+
+type ConceptPropertyRow record {|
+    int conceptId;
+    string code;
+    string valueType;
+    string value;
+    string? valueSystem = ();
+    string? valueDisplay = ();
+|};
+
+type ConceptDesignationRow record {|
+    int conceptId;
+    string? language;
+    string? useSystem;
+    string? useCode;
+    string? useDisplay;
+    string value;
+|};
+
+type ConceptDocument record {|
+    int conceptId;
+    int codeSystemId;
+    byte[] concept;
+|};
+
+type ConceptBytes record {|
+    byte[] concept;
+|};
+
+type CachedCodeSystem readonly & record {|
+    store:CodeSystem storeCodeSystem;
+    // parsed lazily, on the first lookup that needs the resource itself
+    r4:CodeSystem? codeSystem;
+|};
+
+type CachedValueSet readonly & record {|
+    store:ValueSet storeValueSet;
+    r4:ValueSet? valueSet;
+|};
+
+type BatchValidationItem record {|
+    // position of the entry in the request Bundle
+    int index;
+    string system;
+    string? version;
+    string code;
+|};
+
+type BatchValidationResult record {|
+    int index;
+    international401:Parameters parameters;
+|};
+
+type BatchLookupItem record {|
+    // position of the code in the request
+    int index;
+    string system;
+    string? version;
+    string code;
+|};
+
+type ValueSetMember record {|
+    string code;
+    string? display;
+    string? definition;
+|};
+
+type PackageImportSummary record {|
+    int codeSystemCount = 0;
+    int valueSetCount = 0;
+    // resources that could not be read or stored
+    int failedCount = 0;
+    // file and error of the first resource that could not be read or stored
+    string? firstError = ();
+    decimal elapsedSeconds = 0;
+|};
+
+type ConceptIngestionSummary record {|
+    int codeSystemId;
+    int conceptCount;
+    int levelCount;
+    decimal elapsedSeconds;
+    int rowsPerSecond;
+|};
+
+// a code of the store, with the url of its CodeSystem or of a ValueSet containing it
+type CodeFilterEntry record {|
+    string system;
+    string code;
+|};
+
+type StoreGeneration record {|
+    int generation;
+|};
+
+type UploadJob record {|
+    string jobId;
+    string terminologyType;
+    string? version;
+    string status;
+    string phase;
+    int rowsProcessed = 0;
+    int rowsPerSecond = 0;
+    // number of times the job was started, more than one after a restart
+    int attempts = 0;
+    string? errorMessage = ();
+    // instance running the job, which renews its lease by updating `heartbeatAt`
+    string? owner = ();
+    // epoch seconds of the last lease renewal, the job is taken over once it is older than `upload_job_lease_timeout`
+    int heartbeatAt = 0;
+    boolean cancelRequested = false;
+    // resources of a FHIR package that could not be imported
+    int failedCount = 0;
+    string? firstError = ();
+    string createdAt;
+    string updatedAt;
+|};
+
+// progress of a running upload job, kept in memory since the import transaction hides its rows until commit
+type UploadJobProgress record {|
+    string phase;
+    int rowsProcessed = 0;
+    decimal startedAt;
+|};
+
+// page of a materialized expansion whose concepts are streamed into the response, see `streamValueSetExpansion`
+type DeferredExpansion record {|
+    int valueSetId;
+    string? filter;
+    int offset;
+    // concepts in the page
+    int count;
+|};
+
+// store connection pool settings of one `db_type`
+type StorePoolConfig record {|
+    // connections open at the same time, further queries wait for one to be returned
+    int maxOpenConnections = 15;
+    // idle connections kept open, at most `maxOpenConnections`
+    int minIdleConnections = 15;
+    // seconds after which a connection is closed and replaced
+    decimal maxConnectionLifeTime = 1800;
+    // seconds a query waits for a connection before it fails
+    decimal connectionTimeout = 30;
+|};
+
+// usage of one store connection pool, read from its HikariCP MXBean
+type StorePoolUsage record {|
+    string pool;
+    // connections handed out to queries
+    int activeConnections;
+    int idleConnections;
+    // open connections, active and idle
+    int totalConnections;
+    // threads waiting for a connection
+    int threadsAwaitingConnection;
+|};
+
+// first line of a snapshot file
+type SnapshotHeader record {|
+    string kind;
+    int formatVersion;
+    string createdAt;
+|};
+
+// CodeSystem or ValueSet line of a snapshot file, followed by the lines of its concepts or expansion
+type SnapshotResource record {|
+    string kind;
+    // searchable columns of the store row
+    map<string> columns;
+    json 'resource;
+|};
+
+type SnapshotConcepts record {|
+    string kind;
+    string[] codes;
+    (string?)[] displays;
+    (string?)[] definitions;
+    // JSON of the concepts with properties or designations, nil for the others
+    (string?)[] details;
+|};
+
+// parent links, as child and parent concept index pairs, or expansion concept indexes
+type SnapshotIndexes record {|
+    string kind;
+    int[] indexes;
+|};
+
+type SnapshotCodeSystem record {|
+    map<string> columns;
+    r4:CodeSystem 'resource;
+    // concepts of a CodeSystem have consecutive indexes
+    int firstConcept;
+    int conceptCount = 0;
+    // concept index of every code
+    map<int> codes = {};
+|};
+
+type SnapshotValueSet record {|
+    map<string> columns;
+    r4:ValueSet 'resource;
+    // concept indexes, in expansion order
+    int[] expansion = [];
+    // concept index of every code, the first one in expansion order
+    map<int> codes = {};
+|};
+
+// terminology content of a snapshot file, concepts are addressed by their index in the concept arrays
+type TerminologySnapshot record {|
+    string createdAt = "";
+    SnapshotCodeSystem[] codeSystems = [];
+    SnapshotValueSet[] valueSets = [];
+    // CodeSystem and ValueSet index by url and by id, with and without version
+    map<int> codeSystemIndex = {};
+    map<int> valueSetIndex = {};
+    string[] codes = [];
+    (string?)[] displays = [];
+    (string?)[] definitions = [];
+    (string?)[] details = [];
+    // CodeSystem index of every concept
+    int[] conceptCodeSystems = [];
+    // parents of concept i are parents[parentStart[i] ..< parentStart[i + 1]]
+    int[] parentStart = [];
+    int[] parents = [];
+|};
+
+type SnapshotLinkRow record {|
+    int childId;
+    int parentId;
+|};
+
+type SnapshotExpansionRow record {|
+    int position;
+    int conceptId;
+|};
+
+type SnapshotSummary record {|
+    int codeSystemCount = 0;
+    int valueSetCount = 0;
+    int conceptCount = 0;
+    decimal elapsedSeconds = 0;
+|};
@@ -0,0 +1,521 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.concept_chunks;
+
+import ballerina/file;
+import ballerina/http;
+import ballerina/lang.runtime;
+import ballerina/log;
+import ballerina/persist;
+import ballerina/sql;
+import ballerina/time;
+import ballerina/uuid;
+import ballerinax/health.fhir.r4;
+import ballerinax/health.fhir.r4.international401;
+import ballerinax/persist.sql as psql;
+
+final UploadJobExecutor uploadJobExecutor = new (upload_job_workers);
+
+// owner of the upload jobs this instance runs, a restarted instance is a new owner
+final string uploadJobOwner = uuid:createType4AsString();
+
+# Runs `$upload` jobs in the background, at most `workers` at a time and in submission order. It also holds the
+# progress of the running jobs and their cancellation requests, since a job's rows only reach the store when its
+# import transaction commits.
+isolated class UploadJobExecutor {
+    private final int workers;
+    private string[] queue = [];
+    private int running = 0;
+    private map<UploadJobProgress> progress = {};
+    private map<()> cancellations = {};
+
+    isolated function init(int workers) {
+        self.workers = int:max(workers, 1);
+    }
+
+    isolated function submit(string jobId) {
+        boolean startWorker = false;
+        lock {
+            self.queue.push(jobId);
+            if self.running < self.workers {
+                self.running += 1;
+                startWorker = true;
+            }
+        }
+        if startWorker {
+            _ = start self.drain();
+        }
+    }
+
+    isolated function drain() {
+        while true {
+            string? jobId = ();
+            lock {
+                if self.queue.length() == 0 {
+                    self.running -= 1;
+                    return;
+                }
+                jobId = self.queue.shift();
+            }
+            if jobId is string {
+                runUploadJob(jobId);
+            }
+        }
+    }
+
+    # Takes a queued job off the queue, or asks a running job to stop before its next chunk. The running job is
+    # in the `cancelling` phase until it has stopped.
+    #
+    # + jobId - Id of the upload job
+    # + return - `true` if the job was still queued and will not run
+    isolated function cancel(string jobId) returns boolean {
+        lock {
+            int? index = self.queue.indexOf(jobId);
+            if index is int {
+                _ = self.queue.remove(index);
+                return true;
+            }
+            self.cancellations[jobId] = ();
+            UploadJobProgress? jobProgress = self.progress[jobId];
+            if jobProgress is UploadJobProgress {
+                jobProgress.phase = PHASE_CANCELLING;
+            }
+            return false;
+        }
+    }
+
+    isolated function isCancelled(string jobId) returns boolean {
+        lock {
+            return self.cancellations.hasKey(jobId);
+        }
+    }
+
+    isolated function track(string jobId, string phase) {
+        lock {
+            self.progress[jobId] = {phase, startedAt: time:monotonicNow()};
+        }
+    }
+
+    isolated function setPhase(string jobId, string phase) {
+        lock {
+            UploadJobProgress? jobProgress = self.progress[jobId];
+            // a cancelled job stays in the `cancelling` phase until it has stopped
+            if jobProgress is UploadJobProgress && !self.cancellations.hasKey(jobId) {
+                jobProgress.phase = phase;
+            }
+        }
+    }
+
+    isolated function addRows(string jobId, int rows) {
+        lock {
+            UploadJobProgress? jobProgress = self.progress[jobId];
+            if jobProgress is UploadJobProgress {
+                jobProgress.rowsProcessed += rows;
+            }
+        }
+    }
+
+    isolated function getProgress(string jobId) returns UploadJobProgress? {
+        lock {
+            return self.progress[jobId].clone();
+        }
+    }
+
+    isolated function finish(string jobId) returns UploadJobProgress? {
+        lock {
+            _ = self.cancellations.removeIfHasKey(jobId);
+            return self.progress.removeIfHasKey(jobId).clone();
+        }
+    }
+}
+
+# Wraps the chunk consumer of an upload job, so that the job counts the imported concepts and stops, rolling back
+# its transaction, when it is cancelled.
+#
+# + jobId - Id of the upload job
+# + consume - Chunk consumer writing the concepts
+# + return - Chunk consumer reporting to the upload job
+isolated function monitorUploadJob(string jobId, concept_chunks:ConceptChunkConsumer consume) returns concept_chunks:ConceptChunkConsumer {
+    return isolated function(r4:CodeSystemConcept[] concepts) returns error? {
+        check checkUploadJobCancelled(jobId);
+        check consume(concepts);
+        uploadJobExecutor.addRows(jobId, concepts.length());
+    };
+}
+
+isolated function checkUploadJobCancelled(string jobId) returns error? {
+    if uploadJobExecutor.isCancelled(jobId) {
+        return error("Upload job was cancelled");
+    }
+}
+
+isolated function uploadJobDirectory(string jobId) returns string {
+    return upload_jobs_directory + "/" + jobId;
+}
+
+isolated function runUploadJob(string jobId) {
+    UploadJob|error? stored = getStoredUploadJob(jobId);
+    if stored is error {
+        log:printError("Upload job could not be read", stored, jobId = jobId);
+        return;
+    }
+    // cancelled before it was taken off the queue, or taken over by another instance
+    if stored is () || stored.status != JOB_QUEUED || stored.owner != uploadJobOwner {
+        return;
+    }
+    if stored.cancelRequested {
+        error? cancelled = markUploadJobCancelled(stored);
+        if cancelled is error {
+            log:printError("Upload job state could not be saved", cancelled, jobId = jobId);
+        }
+        return;
+    }
+
+    UploadJob job = stored;
+    job.status = JOB_RUNNING;
+    job.phase = PHASE_EXTRACTING;
+    job.attempts += 1;
+    uploadJobExecutor.track(jobId, PHASE_EXTRACTING);
+
+    error? result = executeUploadJob(job);
+
+    boolean cancelled = uploadJobExecutor.isCancelled(jobId);
+    UploadJobProgress? progress = uploadJobExecutor.finish(jobId);
+    if progress is UploadJobProgress {
+        job = withProgress(job, progress);
+    }
+    job.phase = PHASE_DONE;
+    if result is error {
+        job.status = cancelled ? JOB_CANCELLED : JOB_FAILED;
+        job.errorMessage = cancelled ? () : result.message();
+    } else {
+        job.status = JOB_COMPLETED;
+    }
+
+    error? saved = updateUploadJob(job);
+    if saved is error {
+        log:printError("Upload job state could not be saved", saved, jobId = jobId);
+    }
+    error? removed = removeDirectory(uploadJobDirectory(jobId));
+    if removed is error {
+        log:printWarn("Upload job files could not be removed", removed, jobId = jobId);
+    }
+
+    log:printInfo("Upload job finished",
+            jobId = jobId,
+            terminologyType = job.terminologyType,
+            status = job.status,
+            rows = job.rowsProcessed,
+            rowsPerSecond = job.rowsPerSecond);
+}
+
+isolated function executeUploadJob(UploadJob job) returns error? {
+    check updateUploadJob(job);
+
+    string dirPath = uploadJobDirectory(job.jobId);
+    // a job resumed after a restart extracts its archive again
+    check removeDirectory(dirPath + ZIP_FILE_EXTRACTION_PATH);
+    check extractZipFile(dirPath);
+    check checkUploadJobCancelled(job.jobId);
+
+    job.phase = PHASE_IMPORTING;
+    uploadJobExecutor.setPhase(job.jobId, PHASE_IMPORTING);
+    check updateUploadJob(job);
+
+    return importTerminologyRelease(job, dirPath + ZIP_FILE_EXTRACTION_PATH);
+}
+
+isolated function withProgress(UploadJob job, UploadJobProgress progress) returns UploadJob {
+    decimal elapsedSeconds = time:monotonicNow() - progress.startedAt;
+    UploadJob current = job.clone();
+    current.phase = progress.phase;
+    current.rowsProcessed = progress.rowsProcessed;
+    current.rowsPerSecond = elapsedSeconds > 0d ? <int>(<decimal>progress.rowsProcessed / elapsedSeconds) : progress.rowsProcessed;
+    return current;
+}
+
+# Returns the state of an upload job, with the progress of the job if it is running.
+#
+# + jobId - Id of the upload job
+# + return - Upload job or an error if there is no such job
+isolated function getUploadJob(string jobId) returns UploadJob|r4:FHIRError {
+    UploadJob|error? stored = getStoredUploadJob(jobId);
+    if stored is error {
+        return r4:createFHIRError(
+                "Error while reading the upload job, " + stored.message(),
+                r4:ERROR,
+                r4:PROCESSING_NOT_FOUND,
+                cause = stored,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+    if stored is () {
+        return r4:createFHIRError(
+                "Upload job not found",
+                r4:ERROR,
+                r4:PROCESSING_NOT_FOUND,
+                diagnostic = string `No upload job with id ${jobId}`,
+                httpStatusCode = http:STATUS_NOT_FOUND);
+    }
+
+    UploadJobProgress? progress = uploadJobExecutor.getProgress(jobId);
+    return progress is UploadJobProgress ? withProgress(stored, progress) : stored;
+}
+
+# Cancels an upload job. A job queued on this instance is dropped right away. Otherwise the cancellation is stored
+# with the job, and the instance running it stops it before its next chunk, rolling back its import, once it has
+# read the cancellation.
+#
+# + jobId - Id of the upload job
+# + return - Upload job or an error if there is no such job or it has already finished
+isolated function cancelUploadJob(string jobId) returns UploadJob|r4:FHIRError {
+    UploadJob job = check getUploadJob(jobId);
+    if job.status != JOB_QUEUED && job.status != JOB_RUNNING {
+        return r4:createFHIRError(
+                "Upload job has already finished",
+                r4:ERROR,
+                r4:INVALID_REQUIRED,
+                diagnostic = string `Upload job ${jobId} is ${job.status}`,
+                httpStatusCode = http:STATUS_CONFLICT);
+    }
+
+    error? saved = uploadJobExecutor.cancel(jobId) ? markUploadJobCancelled(job) : requestUploadJobCancellation(job);
+    if saved is error {
+        return r4:createFHIRError(
+                "Error while cancelling the upload job, " + saved.message(),
+                r4:ERROR,
+                r4:PROCESSING_NOT_FOUND,
+                cause = saved,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+    return job;
+}
+
+isolated function markUploadJobCancelled(UploadJob job) returns error? {
+    job.status = JOB_CANCELLED;
+    job.phase = PHASE_DONE;
+    check updateUploadJob(job);
+    error? removed = removeDirectory(uploadJobDirectory(job.jobId));
+    if removed is error {
+        log:printWarn("Upload job files could not be removed", removed, jobId = job.jobId);
+    }
+}
+
+isolated function requestUploadJobCancellation(UploadJob job) returns error? {
+    job.phase = PHASE_CANCELLING;
+    job.cancelRequested = true;
+    _ = check sClient->executeNativeSQL(sql:queryConcat(
+            `UPDATE `, escapeToQuery(UPLOAD_JOBS_TABLE), ` SET `, escapeToQuery("cancelRequested"), ` = ${true} WHERE `,
+            escapeToQuery("jobId"), ` = ${job.jobId}`
+    ));
+}
+
+# Picks up the upload jobs that were queued or running on an instance that stopped, which no longer renews their
+# lease. Jobs whose lease has not expired are left to the instance running them. The import transaction of a running
+# job was rolled back with its connection, so the job is queued again and starts over from its archive. Jobs whose
+# archive is gone, and jobs already started `upload_job_max_attempts` times, which may be the ones stopping the
+# service, are marked as failed.
+#
+# + return - An error if the jobs could not be read or updated
+isolated function resumeUploadJobs() returns error? {
+    int expiredBefore = time:utcNow()[0] - <int>upload_job_lease_timeout;
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            selectUploadJobs(), ` WHERE `, escapeToQuery("status"), ` IN (${JOB_QUEUED}, ${JOB_RUNNING}) AND `,
+            escapeToQuery("heartbeatAt"), ` < ${expiredBefore} ORDER BY `, escapeToQuery("createdAt")
+    );
+    stream<UploadJob, persist:Error?> jobStream = sClient->queryNativeSQL(sqlQuery);
+    UploadJob[] unfinished = check from UploadJob job in jobStream
+        select job;
+
+    foreach UploadJob job in unfinished {
+        // another instance took the job over first, or its owner renewed the lease after all
+        boolean claimed = check claimUploadJob(job);
+        if !claimed {
+            continue;
+        }
+        job.rowsProcessed = 0;
+        job.rowsPerSecond = 0;
+        if job.cancelRequested {
+            check markUploadJobCancelled(job);
+        } else if job.attempts >= upload_job_max_attempts {
+            job.status = JOB_FAILED;
+            job.phase = PHASE_DONE;
+            job.errorMessage = string `Upload job was interrupted by a restart in each of its ${job.attempts} attempts`;
+            check updateUploadJob(job);
+            check removeDirectory(uploadJobDirectory(job.jobId));
+            log:printWarn("Upload job failed after too many attempts", jobId = job.jobId, attempts = job.attempts);
+        } else if check file:test(uploadJobDirectory(job.jobId) + ZIP_FILE_NAME, file:EXISTS) {
+            job.status = JOB_QUEUED;
+            job.phase = PHASE_QUEUED;
+            check updateUploadJob(job);
+            uploadJobExecutor.submit(job.jobId);
+            log:printInfo("Upload job resumed after a restart", jobId = job.jobId, attempts = job.attempts);
+        } else {
+            job.status = JOB_FAILED;
+            job.phase = PHASE_DONE;
+            job.errorMessage = "Upload job was interrupted by a restart and its archive is no longer available";
+            check updateUploadJob(job);
+        }
+    }
+}
+
+# Takes over an upload job whose lease has expired. The heartbeat read with the job is compared, so of several
+# instances taking over the same job only the first one gets it.
+#
+# + job - Upload job with an expired lease
+# + return - `true` if this instance owns the job now, or an error if the job could not be updated
+isolated function claimUploadJob(UploadJob job) returns boolean|error {
+    int now = time:utcNow()[0];
+    psql:ExecutionResult result = check sClient->executeNativeSQL(sql:queryConcat(
+            `UPDATE `, escapeToQuery(UPLOAD_JOBS_TABLE), ` SET `, escapeToQuery("owner"), ` = ${uploadJobOwner}, `,
+            escapeToQuery("heartbeatAt"), ` = ${now} WHERE `, escapeToQuery("jobId"), ` = ${job.jobId} AND `,
+            escapeToQuery("heartbeatAt"), ` = ${job.heartbeatAt}`
+    ));
+    if result.affectedRowCount != 1 {
+        return false;
+    }
+    job.owner = uploadJobOwner;
+    job.heartbeatAt = now;
+    return true;
+}
+
+# Renews the lease of the queued and running upload jobs of this instance.
+#
+# + return - An error if the jobs could not be updated
+isolated function renewUploadJobLeases() returns error? {
+    _ = check sClient->executeNativeSQL(sql:queryConcat(
+            `UPDATE `, escapeToQuery(UPLOAD_JOBS_TABLE), ` SET `, escapeToQuery("heartbeatAt"), ` = ${time:utcNow()[0]}`,
+            ` WHERE `, escapeToQuery("owner"), ` = ${uploadJobOwner} AND `, escapeToQuery("status"), ` IN (`,
+            `${JOB_QUEUED}, ${JOB_RUNNING})`
+    ));
+}
+
+# Stops the upload jobs of this instance whose cancellation was stored, by any instance, since the last poll.
+#
+# + return - An error if the jobs could not be read or updated
+isolated function pollUploadJobCancellations() returns error? {
+    stream<UploadJob, persist:Error?> jobStream = sClient->queryNativeSQL(sql:queryConcat(
+            selectUploadJobs(), ` WHERE `, escapeToQuery("owner"), ` = ${uploadJobOwner} AND `,
+            escapeToQuery("cancelRequested"), ` = ${true} AND `, escapeToQuery("status"), ` IN (${JOB_QUEUED}, ${JOB_RUNNING})`
+    ));
+    UploadJob[] cancelled = check from UploadJob job in jobStream
+        select job;
+    foreach UploadJob job in cancelled {
+        // a running job stops before its next chunk and is marked as cancelled when it has
+        if uploadJobExecutor.cancel(job.jobId) {
+            check markUploadJobCancelled(job);
+        }
+    }
+}
+
+# Renews the leases of the upload jobs of this instance, stops its cancelled jobs and takes over the jobs of stopped
+# instances, every third of `upload_job_lease_timeout`, until the service stops.
+isolated function maintainUploadJobs() {
+    while true {
+        runtime:sleep(upload_job_lease_timeout / 3);
+        error? renewed = renewUploadJobLeases();
+        if renewed is error {
+            log:printWarn("Upload job leases could not be renewed", renewed);
+        }
+        error? polled = pollUploadJobCancellations();
+        if polled is error {
+            log:printWarn("Upload job cancellations could not be read", polled);
+        }
+        error? resumed = resumeUploadJobs();
+        if resumed is error {
+            log:printWarn("Unfinished upload jobs could not be resumed", resumed);
+        }
+    }
+}
+
+isolated function uploadJobToParameters(UploadJob job) returns international401:Parameters {
+    international401:ParametersParameter[] params = [
+        {name: "jobId", valueString: job.jobId},
+        {name: "type", valueCode: job.terminologyType}
+    ];
+    string? version = job.version;
+    if version is string {
+        params.push({name: "version", valueString: version});
+    }
+    params.push(
+        {name: "status", valueCode: job.status},
+        {name: "phase", valueCode: job.phase},
+        {name: "rowsProcessed", valueInteger: job.rowsProcessed},
+        {name: "rowsPerSecond", valueInteger: job.rowsPerSecond},
+        {name: "attempts", valueInteger: job.attempts}
+    );
+    string? errorMessage = job.errorMessage;
+    if errorMessage is string {
+        params.push({name: "error", valueString: errorMessage});
+    }
+    if job.terminologyType == FHIR {
+        params.push({name: "failedCount", valueInteger: job.failedCount});
+    }
+    string? firstError = job.firstError;
+    if firstError is string {
+        params.push({name: "firstError", valueString: firstError});
+    }
+    params.push(
+        {name: "createdAt", valueDateTime: job.createdAt},
+        {name: "updatedAt", valueDateTime: job.updatedAt}
+    );
+    return {'parameter: params};
+}
+
+isolated function selectUploadJobs() returns sql:ParameterizedQuery {
+    return sql:queryConcat(
+            `SELECT `, escapeToQuery("jobId"), `, `, escapeToQuery("terminologyType"), `, `, escapeToQuery("version"), `, `,
+            escapeToQuery("status"), `, `, escapeToQuery("phase"), `, `, escapeToQuery("rowsProcessed"), `, `,
+            escapeToQuery("rowsPerSecond"), `, `, escapeToQuery("attempts"), `, `, escapeToQuery("errorMessage"), `, `,
+            escapeToQuery("owner"), `, `, escapeToQuery("heartbeatAt"), `, `, escapeToQuery("cancelRequested"), `, `,
+            escapeToQuery("failedCount"), `, `, escapeToQuery("firstError"), `, `,
+            escapeToQuery("createdAt"), `, `, escapeToQuery("updatedAt"), ` FROM `, escapeToQuery(UPLOAD_JOBS_TABLE)
+    );
+}
+
+isolated function getStoredUploadJob(string jobId) returns UploadJob|error? {
+    stream<UploadJob, persist:Error?> jobStream = sClient->queryNativeSQL(
+            sql:queryConcat(selectUploadJobs(), ` WHERE `, escapeToQuery("jobId"), ` = ${jobId}`));
+    UploadJob[] jobs = check from UploadJob job in jobStream
+        select job;
+    return jobs.length() > 0 ? jobs[0] : ();
+}
+
+isolated function insertUploadJob(UploadJob job) returns error? {
+    _ = check sClient->executeNativeSQL(sql:queryConcat(
+            `INSERT INTO `, escapeToQuery(UPLOAD_JOBS_TABLE), ` (`,
+            escapeToQuery("jobId"), `, `, escapeToQuery("terminologyType"), `, `, escapeToQuery("version"), `, `,
+            escapeToQuery("status"), `, `, escapeToQuery("phase"), `, `, escapeToQuery("rowsProcessed"), `, `,
+            escapeToQuery("rowsPerSecond"), `, `, escapeToQuery("attempts"), `, `, escapeToQuery("errorMessage"), `, `,
+            escapeToQuery("owner"), `, `, escapeToQuery("heartbeatAt"), `, `, escapeToQuery("cancelRequested"), `, `,
+            escapeToQuery("failedCount"), `, `, escapeToQuery("firstError"), `, `,
+            escapeToQuery("createdAt"), `, `, escapeToQuery("updatedAt"), `) VALUES (`,
+            `${job.jobId}, ${job.terminologyType}, ${job.version}, ${job.status}, ${job.phase}, ${job.rowsProcessed}, `,
+            `${job.rowsPerSecond}, ${job.attempts}, ${job.errorMessage}, ${job.owner}, ${job.heartbeatAt}, `,
+            `${job.cancelRequested}, ${job.failedCount}, ${job.firstError}, ${job.createdAt}, ${job.updatedAt})`
+    ));
+}
+
+isolated function updateUploadJob(UploadJob job) returns error? {
+    job.updatedAt = time:utcToString(time:utcNow());
+    _ = check sClient->executeNativeSQL(sql:queryConcat(
+            `UPDATE `, escapeToQuery(UPLOAD_JOBS_TABLE), ` SET `,
+            escapeToQuery("status"), ` = ${job.status}, `, escapeToQuery("phase"), ` = ${job.phase}, `,
+            escapeToQuery("rowsProcessed"), ` = ${job.rowsProcessed}, `, escapeToQuery("rowsPerSecond"), ` = ${job.rowsPerSecond}, `,
+            escapeToQuery("attempts"), ` = ${job.attempts}, `, escapeToQuery("errorMessage"), ` = ${job.errorMessage}, `,
+            escapeToQuery("failedCount"), ` = ${job.failedCount}, `, escapeToQuery("firstError"), ` = ${job.firstError}, `,
+            escapeToQuery("updatedAt"), ` = ${job.updatedAt} WHERE `, escapeToQuery("jobId"), ` = ${job.jobId}`
+    ));
+}
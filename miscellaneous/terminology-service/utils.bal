@@ -15,11 +15,11 @@
 // under the License.
 import ballerina/file;
 import ballerina/io;
+import ballerina/log;
 import ballerina/regex;
 import ballerina/time;
 import ballerinax/health.fhir.r4;
 import ballerinax/health.fhir.r4.international401;
-import ballerinax/health.fhir.r4.parser;
 
 import ballerinacentral/zip;
 
@@ -117,6 +117,10 @@ isolated function prepareRequestSearchParameter(map<string[]> params) returns ma
             "_offset" => {
                 searchParams["_offset"] = [createRequestSearchParameter("_offset", params.get("_offset")[0], 'type = r4:NUMBER)];
             }
+
+            CONTINUATION => {
+                searchParams[CONTINUATION] = [createRequestSearchParameter(CONTINUATION, params.get(CONTINUATION)[0])];
+            }
         }
     }
     return searchParams;
@@ -165,28 +169,6 @@ isolated function saveCompressedPayload(stream<byte[], io:Error?> payloadStream,
     check io:fileWriteBlocksFromStream(dirPath + ZIP_FILE_NAME, payloadStream);
 }
 
-isolated function readFilesForUpload(string path) returns CodeSystemValueSetJson|error {
-    file:MetaData[] readDir = check file:readDir(path + FHIR_PACKAGE_PATH);
-
-    CodeSystemValueSetJson jsonArrays = {
-        codeSystems: [],
-        valueSets: []
-    };
-
-    foreach var item in readDir {
-        string[] nonEmptyParts = regex:split(item.absPath, "\\\\").filter(s => s != "");
-        string lastPart = nonEmptyParts[nonEmptyParts.length() - 1];
-
-        if lastPart.endsWith(".json") && lastPart.startsWith("CodeSystem-") {
-            jsonArrays.codeSystems.push(check io:fileReadJson(item.absPath));
-        } else if lastPart.endsWith(".json") && lastPart.startsWith("ValueSet-") {
-            jsonArrays.valueSets.push(check io:fileReadJson(item.absPath));
-        }
-    }
-
-    return jsonArrays;
-}
-
 isolated function readFilesAsJsons(string path) returns json[]|error {
     file:MetaData[] readDir = check file:readDir(path);
 
@@ -204,21 +186,49 @@ isolated function readFilesAsJsons(string path) returns json[]|error {
     return jsonList;
 }
 
-isolated function readFileJsonAndReturnCodeSystem(string path) returns r4:CodeSystem|error {
-    string jsonString = check io:fileReadString(path);
-    return check parser:parse(jsonString).ensureType();
-}
-
 function init() returns error? {
     check removeDirectory(TEMPORARY_FILES_DIRECTORY_NAME);
+
+    if terminologySnapshot !is () {
+        // every operation is served from the snapshot, the store is not used
+        return;
+    }
+
+    if auto_migrate_schema {
+        check migrateSchema();
+    }
+
+    _ = start monitorStorePool(storePoolMonitor);
+
+    error? filtered = rebuildCodeMembershipFilter();
+    if filtered is error {
+        log:printWarn("Code membership filter not built, every code is looked up in the store", filtered);
+    }
+
+    error? resumed = resumeUploadJobs();
+    if resumed is error {
+        log:printWarn("Unfinished upload jobs could not be resumed", resumed);
+    }
+    _ = start maintainUploadJobs();
+
+    if snapshot_export_file != "" {
+        _ = check exportSnapshot(snapshot_export_file);
+    }
 }
 
 isolated function createExpandedValueSet(r4:ValueSet vs, r4:ValueSetExpansionContains[] concepts) returns r4:ValueSetExpansion {
     r4:ValueSetExpansionContains[] contains = [];
     foreach r4:ValueSetExpansionContains concept in concepts {
-        r4:ValueSetExpansionContains c = {code: concept.code, display: concept.display, id: concept.id};
-        contains.push(c);
+        contains.push(toExpansionContains(concept));
     }
     r4:ValueSetExpansion expansion = {timestamp: time:utcToString(time:utcNow()), contains: contains};
     return expansion;
 }
+
+# Expansion entry of a concept as it is returned by `$expand`.
+#
+# + concept - Concept read from an expansion
+# + return - The code, display and id of the concept
+isolated function toExpansionContains(r4:ValueSetExpansionContains concept) returns r4:ValueSetExpansionContains {
+    return {code: concept.code, display: concept.display, id: concept.id};
+}
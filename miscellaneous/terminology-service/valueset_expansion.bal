@@ -0,0 +1,495 @@
+// Copyright (c) 2025, WSO2 LLC. (http://www.wso2.com).
+
+// WSO2 LLC. licenses this file to you under the Apache License,
+// Version 2.0 (the "License"); you may not use this file except
+// in compliance with the License.
+// You may obtain a copy of the License at
+
+// http://www.apache.org/licenses/LICENSE-2.0
+
+// Unless required by applicable law or agreed to in writing,
+// software distributed under the License is distributed on an
+// "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+// KIND, either express or implied.  See the License for the
+// specific language governing permissions and limitations
+// under the License.
+import terminology_service.store;
+
+import ballerina/http;
+import ballerina/lang.array;
+import ballerina/persist;
+import ballerina/sql;
+import ballerina/time;
+import ballerinax/health.fhir.r4;
+import ballerinax/persist.sql as psql;
+
+# Returns one page of the expansion of a stored ValueSet, together with the total number of matching concepts.
+# Expansions are materialized in `valueset_expansions` on first use. Positions in that table are dense, so an
+# unfiltered page is a keyset range of the primary key, and a filtered page and its total are answered by the
+# database as well, without loading the rest of the expansion.
+#
+# + valueSetId - Database id of the ValueSet
+# + filter - Optional text filter on the concept display
+# + offset - Index of the first concept of the page
+# + count - Maximum number of concepts in the page
+# + return - Page of concepts and the total or an error
+isolated function getValueSetExpansionPage(int valueSetId, string? filter, int offset, int count)
+        returns [r4:ValueSetExpansionContains[], int]|r4:FHIRError {
+    int total = check ensureValueSetExpansion(valueSetId);
+
+    if filter is () {
+        return [check readValueSetExpansionRange(valueSetId, offset - 1, count), total];
+    }
+    return [check readFilteredValueSetExpansion(valueSetId, filter, offset, count), check countFilteredValueSetExpansion(valueSetId, filter)];
+}
+
+# Materializes the expansion of a stored ValueSet unless it already is.
+#
+# + valueSetId - Database id of the ValueSet
+# + path - Ids of the ValueSets being materialized that nest this one
+# + return - Number of concepts in the expansion or an error
+isolated function ensureValueSetExpansion(int valueSetId, map<boolean> path = {}) returns int|r4:FHIRError {
+    int? total = check getValueSetExpansionTotal(valueSetId);
+    if total is int {
+        return total;
+    }
+
+    int|error built = buildValueSetExpansion(valueSetId, path);
+    if built is int {
+        return built;
+    }
+
+    // a concurrent request may have materialized the same expansion first
+    total = check getValueSetExpansionTotal(valueSetId);
+    if total is int {
+        return total;
+    }
+    return r4:createFHIRError(
+            "Error while expanding ValueSet, " + built.message(),
+            r4:ERROR,
+            r4:PROCESSING_NOT_FOUND,
+            cause = built,
+            httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+}
+
+# Drops the materialized expansions of ValueSets that include any version of a CodeSystem,
+# and of every ValueSet nesting them.
+#
+# + url - Canonical url of the CodeSystem that changed
+# + return - An error if the expansions could not be removed
+isolated function invalidateCodeSystemExpansions(string url) returns error? {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT DISTINCT vci.`, escapeToQuery("valuesetValueSetId"), ` AS `, escapeToQuery("valueSetId"),
+            ` FROM `, escapeToQuery("valueset_compose_includes"), ` vci`,
+            ` LEFT JOIN `, escapeToQuery("valueset_compose_include_concepts"), ` vcic ON vcic.`, escapeToQuery("valuesetcomposeValueSetComposeIncludeId"), ` = vci.`, escapeToQuery("valueSetComposeIncludeId"),
+            ` LEFT JOIN `, escapeToQuery("concepts"), ` c ON c.`, escapeToQuery("conceptId"), ` = vcic.`, escapeToQuery("conceptConceptId"),
+            ` JOIN `, escapeToQuery("codesystems"), ` cs ON cs.`, escapeToQuery("codeSystemId"), ` = COALESCE(vci.`, escapeToQuery("codeSystemId"), `, c.`, escapeToQuery("codesystemCodeSystemId"), `)`,
+            ` WHERE cs.`, escapeToQuery("url"), ` = ${url}`
+    );
+    check invalidateValueSetExpansions(check queryValueSetIds(sqlQuery));
+}
+
+# Drops the materialized expansions of every ValueSet nesting any version of a ValueSet.
+#
+# + url - Canonical url of the ValueSet that changed
+# + return - An error if the expansions could not be removed
+isolated function invalidateNestingValueSetExpansions(string url) returns error? {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT `, escapeToQuery("valueSetId"), ` FROM `, escapeToQuery("valuesets"), ` WHERE `, escapeToQuery("url"), ` = ${url}`
+    );
+    check invalidateValueSetExpansions(check queryValueSetIds(sqlQuery));
+}
+
+# Drops the materialized expansions of the given ValueSets and, transitively, of every ValueSet nesting them.
+#
+# + valueSetIds - Database ids of the ValueSets whose content changed
+# + return - An error if the expansions could not be removed
+isolated function invalidateValueSetExpansions(int[] valueSetIds) returns error? {
+    map<int> visited = {};
+    int[] pending = valueSetIds;
+
+    while pending.length() > 0 {
+        int[] next = [];
+        foreach int valueSetId in pending {
+            if visited.hasKey(valueSetId.toString()) {
+                continue;
+            }
+            visited[valueSetId.toString()] = valueSetId;
+
+            check deleteValueSetExpansion(valueSetId);
+            next.push(...check getNestingValueSetIds(valueSetId));
+        }
+        pending = next;
+    }
+}
+
+# Materializes the expansion of a ValueSet with one INSERT ... SELECT per include, so that concepts never
+# leave the database. Nested ValueSets are materialized first and copied from their own expansion. Like the
+# streaming walk of `walkValueSetExpansion`, a nested ValueSet already being materialized is skipped, so a
+# ValueSet nesting itself, directly or through others, is not expanded again.
+#
+# + valueSetId - Database id of the ValueSet
+# + path - Ids of the ValueSets being materialized that nest this one
+# + return - Number of concepts in the expansion or an error
+isolated function buildValueSetExpansion(int valueSetId, map<boolean> path = {}) returns int|error {
+    // same include order as `walkValueSetExpansion`, so offset and continuation pages list concepts alike
+    sql:ParameterizedQuery includeQuery = sql:queryConcat(
+            fillQueryTemplate(queryTemplates.includesByValueSet, valueSetId), ` ORDER BY `, escapeToQuery("valueSetComposeIncludeId")
+    );
+    stream<store:ValueSetComposeInclude, persist:Error?> includeStream = sClient->/valuesetcomposeincludes(store:ValueSetComposeInclude, whereClause = includeQuery);
+    store:ValueSetComposeInclude[] includes = check from store:ValueSetComposeInclude inc in includeStream
+        select inc;
+
+    // nested expansions are built in their own transactions, before this one starts
+    map<boolean> nestedPath = {...path, [valueSetId.toString()]: true};
+    map<int[]> nestedValueSetIds = {};
+    foreach store:ValueSetComposeInclude include in includes {
+        if !include.conceptFlag && !include.systemFlag && include.valueSetFlag {
+            int[] ids = [];
+            foreach int nestedValueSetId in check getNestedValueSetIds(include.valueSetComposeIncludeId) {
+                if !nestedPath.hasKey(nestedValueSetId.toString()) {
+                    _ = check ensureValueSetExpansion(nestedValueSetId, nestedPath);
+                    ids.push(nestedValueSetId);
+                }
+            }
+            nestedValueSetIds[include.valueSetComposeIncludeId.toString()] = ids;
+        }
+    }
+
+    int total = 0;
+    transaction {
+        check deleteValueSetExpansion(valueSetId);
+
+        foreach store:ValueSetComposeInclude include in includes {
+            // If conceptFlag, take the concepts listed in valueset_compose_include_concepts
+            if include.conceptFlag {
+                total += check insertExpansionRows(valueSetId, total, sql:queryConcat(
+                        `c.`, escapeToQuery("code"), `, c.`, escapeToQuery("display"), `, NULL`,
+                        ` FROM `, escapeToQuery("concepts"), ` c JOIN `, escapeToQuery("valueset_compose_include_concepts"), ` vcic ON c.`, escapeToQuery("conceptId"), ` = vcic.`, escapeToQuery("conceptConceptId"),
+                        ` WHERE vcic.`, escapeToQuery("valuesetcomposeValueSetComposeIncludeId"), ` = ${include.valueSetComposeIncludeId}`
+                ), sql:queryConcat(`vcic.`, escapeToQuery("valueSetComposeIncludeConceptId")));
+            }
+            // If systemFlag, take all concepts of the code system
+            else if include.systemFlag && include.codeSystemId is int {
+                total += check insertExpansionRows(valueSetId, total, sql:queryConcat(
+                        `c.`, escapeToQuery("code"), `, c.`, escapeToQuery("display"), `, NULL`,
+                        ` FROM `, escapeToQuery("concepts"), ` c WHERE c.`, escapeToQuery("codesystemCodeSystemId"), ` = ${include.codeSystemId}`
+                ), sql:queryConcat(`c.`, escapeToQuery("conceptId")));
+            }
+            // If valueSetFlag, copy the materialized expansions of the nested value sets
+            else if include.valueSetFlag {
+                foreach int nestedValueSetId in nestedValueSetIds.get(include.valueSetComposeIncludeId.toString()) {
+                    total += check insertExpansionRows(valueSetId, total, sql:queryConcat(
+                            `e.`, escapeToQuery("code"), `, e.`, escapeToQuery("display"), `, e.`, escapeToQuery("elementId"),
+                            ` FROM `, escapeToQuery(VALUESET_EXPANSIONS_TABLE), ` e WHERE e.`, escapeToQuery("valueSetId"), ` = ${nestedValueSetId}`
+                    ), sql:queryConcat(`e.`, escapeToQuery("position")));
+                }
+            }
+        }
+
+        // the state row marks the expansion as complete
+        string builtAt = time:utcToString(time:utcNow());
+        _ = check sClient->executeNativeSQL(sql:queryConcat(
+                `INSERT INTO `, escapeToQuery(VALUESET_EXPANSION_STATES_TABLE),
+                ` (`, escapeToQuery("valueSetId"), `, `, escapeToQuery("total"), `, `, escapeToQuery("builtAt"), `)`,
+                ` VALUES (${valueSetId}, ${total}, ${builtAt})`
+        ));
+        check saveResourceVersion(RESOURCE_VERSION_EXPANSION, valueSetId, builtAt);
+        check commit;
+    }
+    return total;
+}
+
+# Appends the rows selected by `source` to an expansion, numbering them from `firstPosition` in `orderBy` order.
+#
+# + valueSetId - Database id of the ValueSet being expanded
+# + firstPosition - Position of the first appended row
+# + source - Select list (code, display, element id) followed by the FROM and WHERE clauses
+# + orderBy - Order of the appended rows
+# + return - Number of appended rows or an error
+isolated function insertExpansionRows(int valueSetId, int firstPosition, sql:ParameterizedQuery source, sql:ParameterizedQuery orderBy) returns int|error {
+    // ids and positions are inlined, a bind parameter in a select list has no type on some dialects
+    psql:ExecutionResult result = check sClient->executeNativeSQL(sql:queryConcat(
+            `INSERT INTO `, escapeToQuery(VALUESET_EXPANSIONS_TABLE), ` (`,
+            escapeToQuery("valueSetId"), `, `, escapeToQuery("position"), `, `, escapeToQuery("code"), `, `,
+            escapeToQuery("display"), `, `, escapeToQuery("elementId"), `) SELECT `,
+            stringToParameterizedQuery(valueSetId.toString()), `, `,
+            stringToParameterizedQuery((firstPosition - 1).toString()), ` + ROW_NUMBER() OVER (ORDER BY `, orderBy, `), `,
+            source
+    ));
+    return result.affectedRowCount ?: 0;
+}
+
+isolated function deleteValueSetExpansion(int valueSetId) returns error? {
+    check deleteResourceVersion(RESOURCE_VERSION_EXPANSION, valueSetId);
+    _ = check sClient->executeNativeSQL(sql:queryConcat(
+            `DELETE FROM `, escapeToQuery(VALUESET_EXPANSION_STATES_TABLE), ` WHERE `, escapeToQuery("valueSetId"), ` = ${valueSetId}`
+    ));
+    _ = check sClient->executeNativeSQL(sql:queryConcat(
+            `DELETE FROM `, escapeToQuery(VALUESET_EXPANSIONS_TABLE), ` WHERE `, escapeToQuery("valueSetId"), ` = ${valueSetId}`
+    ));
+}
+
+isolated function getValueSetExpansionTotal(int valueSetId) returns int?|r4:FHIRError {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT `, escapeToQuery("total"), ` FROM `, escapeToQuery(VALUESET_EXPANSION_STATES_TABLE), ` WHERE `, escapeToQuery("valueSetId"), ` = ${valueSetId}`
+    );
+    stream<ExpansionState, persist:Error?> stateStream = sClient->queryNativeSQL(sqlQuery);
+    ExpansionState[]|error states = from ExpansionState state in stateStream
+        select state;
+    if states is error {
+        return r4:createFHIRError(
+                "Error while reading ValueSet expansion, " + states.message(),
+                r4:ERROR,
+                r4:PROCESSING_NOT_FOUND,
+                cause = states,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+    return states.length() > 0 ? states[0].total : ();
+}
+
+isolated function readValueSetExpansionRange(int valueSetId, int afterPosition, int count) returns r4:ValueSetExpansionContains[]|r4:FHIRError {
+    // keyset page: positions are dense, so this is a bounded range scan of the primary key
+    return readExpansionRows(sql:queryConcat(
+            ` WHERE `, escapeToQuery("valueSetId"), ` = ${valueSetId}`,
+            ` AND `, escapeToQuery("position"), ` > ${afterPosition} AND `, escapeToQuery("position"), ` <= ${afterPosition + count}`,
+            ` ORDER BY `, escapeToQuery("position")
+    ));
+}
+
+isolated function readFilteredValueSetExpansion(int valueSetId, string filter, int offset, int count) returns r4:ValueSetExpansionContains[]|r4:FHIRError {
+    return readExpansionRows(sql:queryConcat(
+            getExpansionFilterClause(valueSetId, filter), ` ORDER BY `, escapeToQuery("position"), ` `, getLimitClause(count, offset)
+    ));
+}
+
+isolated function countFilteredValueSetExpansion(int valueSetId, string filter) returns int|r4:FHIRError {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT COUNT(*) AS `, escapeToQuery("total"), ` FROM `, escapeToQuery(VALUESET_EXPANSIONS_TABLE), getExpansionFilterClause(valueSetId, filter)
+    );
+    stream<ExpansionState, persist:Error?> countStream = sClient->queryNativeSQL(sqlQuery);
+    ExpansionState[]|error counts = from ExpansionState state in countStream
+        select state;
+    if counts is error {
+        return r4:createFHIRError(
+                "Error while reading ValueSet expansion, " + counts.message(),
+                r4:ERROR,
+                r4:PROCESSING_NOT_FOUND,
+                cause = counts,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+    return counts.length() > 0 ? counts[0].total : 0;
+}
+
+isolated function getExpansionFilterClause(int valueSetId, string filter) returns sql:ParameterizedQuery {
+    // case-insensitive substring match on the display, concepts without a display always match
+    string pattern = "%" + escapeLikePattern(filter.toUpperAscii()) + "%";
+    return sql:queryConcat(
+            ` WHERE `, escapeToQuery("valueSetId"), ` = ${valueSetId} AND (`, escapeToQuery("display"), ` IS NULL OR UPPER(`,
+            escapeToQuery("display"), `) LIKE ${pattern}`, getLikeEscapeClause(), `)`
+    );
+}
+
+isolated function readExpansionRows(sql:ParameterizedQuery whereClause) returns r4:ValueSetExpansionContains[]|r4:FHIRError {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT `, escapeToQuery("code"), `, `, escapeToQuery("display"), `, `, escapeToQuery("elementId"),
+            ` FROM `, escapeToQuery(VALUESET_EXPANSIONS_TABLE), whereClause
+    );
+    stream<ExpansionRow, persist:Error?> rowStream = sClient->queryNativeSQL(sqlQuery);
+    r4:ValueSetExpansionContains[]|error concepts = from ExpansionRow row in rowStream
+        select {code: row.code, display: row.display, id: row.elementId};
+    if concepts is error {
+        return r4:createFHIRError(
+                "Error while reading ValueSet expansion, " + concepts.message(),
+                r4:ERROR,
+                r4:PROCESSING_NOT_FOUND,
+                cause = concepts,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+    return concepts;
+}
+
+isolated function getNestedValueSetIds(int valueSetComposeIncludeId) returns int[]|error {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT `, escapeToQuery("valuesetValueSetId"), ` AS `, escapeToQuery("valueSetId"), ` FROM `, escapeToQuery("valueset_compose_include_value_sets"),
+            ` WHERE `, escapeToQuery("valuesetcomposeValueSetComposeIncludeId"), ` = ${valueSetComposeIncludeId}`,
+            ` ORDER BY `, escapeToQuery("valueSetComposeIncludeValueSetId")
+    );
+    return queryValueSetIds(sqlQuery);
+}
+
+isolated function getNestingValueSetIds(int valueSetId) returns int[]|error {
+    sql:ParameterizedQuery sqlQuery = sql:queryConcat(
+            `SELECT DISTINCT vci.`, escapeToQuery("valuesetValueSetId"), ` AS `, escapeToQuery("valueSetId"),
+            ` FROM `, escapeToQuery("valueset_compose_includes"), ` vci JOIN `, escapeToQuery("valueset_compose_include_value_sets"),
+            ` vcivs ON vcivs.`, escapeToQuery("valuesetcomposeValueSetComposeIncludeId"), ` = vci.`, escapeToQuery("valueSetComposeIncludeId"),
+            ` WHERE vcivs.`, escapeToQuery("valuesetValueSetId"), ` = ${valueSetId}`
+    );
+    return queryValueSetIds(sqlQuery);
+}
+
+isolated function queryValueSetIds(sql:ParameterizedQuery sqlQuery, store:Client dbClient = sClient) returns int[]|error {
+    stream<ValueSetIdRow, persist:Error?> idStream = dbClient->queryNativeSQL(sqlQuery);
+    return from ValueSetIdRow row in idStream
+        select row.valueSetId;
+}
+
+# Returns one page of the expansion of a stored ValueSet by walking its includes and nested ValueSets in
+# expansion order, without materializing the expansion. Each include is read as a keyset range, so only the
+# rows of the page are read, and the walk stops as soon as the page is full. The position reached is handed
+# back as an opaque continuation token, the walk of the next page resumes from it.
+#
+# + valueSetId - Database id of the ValueSet
+# + filter - Optional text filter on the concept display
+# + token - Continuation token of the previous page, empty for the first page
+# + count - Maximum number of concepts in the page
+# + return - Page of concepts and the token of the next page, nil after the last page, or an error
+isolated function getValueSetExpansionStreamPage(int valueSetId, string? filter, string token, int count)
+        returns [r4:ValueSetExpansionContains[], string?]|r4:FHIRError {
+    ExpansionCursor cursor = token == "" ? {valueSetId} : check decodeExpansionCursor(token, valueSetId);
+    ExpansionWalk walk = {cursor, count, filter};
+    if count <= 0 {
+        return [[], ()];
+    }
+
+    error? walked = walkValueSetExpansion(valueSetId, walk, {[valueSetId.toString()]: true});
+    if walked is error {
+        return r4:createFHIRError(
+                "Error while expanding ValueSet, " + walked.message(),
+                r4:ERROR,
+                r4:PROCESSING_NOT_FOUND,
+                cause = walked,
+                httpStatusCode = http:STATUS_INTERNAL_SERVER_ERROR);
+    }
+
+    ExpansionCursor? next = walk.next;
+    return [walk.contains, next is ExpansionCursor ? encodeExpansionCursor(next) : ()];
+}
+
+# Visits the includes of a ValueSet in expansion order, the same order `buildValueSetExpansion` materializes
+# them in, numbering every include that yields concepts as one source.
+#
+# + valueSetId - Database id of the ValueSet being visited
+# + walk - State of the page being read
+# + path - Ids of the ValueSets being visited, a ValueSet nesting itself is not visited again
+# + return - An error if the store could not be read
+isolated function walkValueSetExpansion(int valueSetId, ExpansionWalk walk, map<boolean> path) returns error? {
+    sql:ParameterizedQuery includeQuery = sql:queryConcat(
+            fillQueryTemplate(queryTemplates.includesByValueSet, valueSetId), ` ORDER BY `, escapeToQuery("valueSetComposeIncludeId")
+    );
+    stream<store:ValueSetComposeInclude, persist:Error?> includeStream = sClient->/valuesetcomposeincludes(store:ValueSetComposeInclude, whereClause = includeQuery);
+    store:ValueSetComposeInclude[] includes = check from store:ValueSetComposeInclude inc in includeStream
+        select inc;
+
+    foreach store:ValueSetComposeInclude include in includes {
+        if walk.next is ExpansionCursor {
+            return;
+        }
+        int? codeSystemId = include.codeSystemId;
+        if include.conceptFlag {
+            check readExpansionSource(walk, sql:queryConcat(
+                    `SELECT vcic.`, escapeToQuery("valueSetComposeIncludeConceptId"), ` AS `, escapeToQuery("rowKey"),
+                    `, c.`, escapeToQuery("code"), `, c.`, escapeToQuery("display"),
+                    ` FROM `, escapeToQuery("concepts"), ` c JOIN `, escapeToQuery("valueset_compose_include_concepts"), ` vcic ON c.`, escapeToQuery("conceptId"), ` = vcic.`, escapeToQuery("conceptConceptId"),
+                    ` WHERE vcic.`, escapeToQuery("valuesetcomposeValueSetComposeIncludeId"), ` = ${include.valueSetComposeIncludeId}`
+            ), sql:queryConcat(`vcic.`, escapeToQuery("valueSetComposeIncludeConceptId")));
+        } else if include.systemFlag && codeSystemId is int {
+            check readExpansionSource(walk, sql:queryConcat(
+                    `SELECT c.`, escapeToQuery("conceptId"), ` AS `, escapeToQuery("rowKey"),
+                    `, c.`, escapeToQuery("code"), `, c.`, escapeToQuery("display"),
+                    ` FROM `, escapeToQuery("concepts"), ` c WHERE c.`, escapeToQuery("codesystemCodeSystemId"), ` = ${codeSystemId}`
+            ), sql:queryConcat(`c.`, escapeToQuery("conceptId")));
+        } else if include.valueSetFlag {
+            foreach int nestedValueSetId in check getNestedValueSetIds(include.valueSetComposeIncludeId) {
+                string key = nestedValueSetId.toString();
+                if walk.next is ExpansionCursor || path.hasKey(key) {
+                    continue;
+                }
+                path[key] = true;
+                check walkValueSetExpansion(nestedValueSetId, walk, path);
+                _ = path.remove(key);
+            }
+        }
+    }
+}
+
+# Reads the next rows of one source into the page, unless the page starts after it. One row more than fits in
+# the page is read, so the continuation token is only issued if the expansion goes on after the page. A source
+# read once the page is full only looks for that row.
+#
+# + walk - State of the page being read
+# + source - Select list (row key, code, display) followed by the FROM and WHERE clauses
+# + rowKey - Column the rows are ordered and resumed by
+# + return - An error if the rows could not be read
+isolated function readExpansionSource(ExpansionWalk walk, sql:ParameterizedQuery source, sql:ParameterizedQuery rowKey) returns error? {
+    int sourceIndex = walk.sourceIndex;
+    walk.sourceIndex += 1;
+    if sourceIndex < walk.cursor.sourceIndex {
+        return;
+    }
+
+    int afterKey = sourceIndex == walk.cursor.sourceIndex ? walk.cursor.lastKey : 0;
+    int remaining = walk.count - walk.contains.length();
+    string? filter = walk.filter;
+    sql:ParameterizedQuery filterClause = ``;
+    if filter is string {
+        // same match as the materialized expansion, see `getExpansionFilterClause`
+        string pattern = "%" + escapeLikePattern(filter.toUpperAscii()) + "%";
+        filterClause = sql:queryConcat(
+                ` AND (c.`, escapeToQuery("display"), ` IS NULL OR UPPER(c.`, escapeToQuery("display"), `) LIKE ${pattern}`,
+                getLikeEscapeClause(), `)`
+        );
+    }
+
+    stream<ExpansionSourceRow, persist:Error?> rowStream = sClient->queryNativeSQL(sql:queryConcat(
+            source, ` AND `, rowKey, ` > ${afterKey}`, filterClause, ` ORDER BY `, rowKey, ` `, getLimitClause(remaining + 1, 0)
+    ));
+    ExpansionSourceRow[] rows = check from ExpansionSourceRow row in rowStream
+        select row;
+    foreach ExpansionSourceRow row in rows.slice(0, int:min(rows.length(), remaining)) {
+        walk.contains.push({code: row.code, display: row.display});
+    }
+
+    if rows.length() > remaining {
+        walk.next = {
+            valueSetId: walk.cursor.valueSetId,
+            sourceIndex,
+            lastKey: remaining > 0 ? rows[remaining - 1].rowKey : afterKey
+        };
+    }
+}
+
+isolated function encodeExpansionCursor(ExpansionCursor cursor) returns string {
+    string encoded = string `${cursor.valueSetId}.${cursor.sourceIndex}.${cursor.lastKey}`.toBytes().toBase64();
+    // URL safe, the token is sent back as a query parameter
+    encoded = re `/`.replaceAll(re `\+`.replaceAll(encoded, "-"), "_");
+    return re `=+$`.replace(encoded, "");
+}
+
+isolated function decodeExpansionCursor(string token, int valueSetId) returns ExpansionCursor|r4:FHIRError {
+    string padded = re `_`.replaceAll(re `-`.replaceAll(token, "+"), "/");
+    while padded.length() % 4 != 0 {
+        padded += "=";
+    }
+
+    do {
+        string[] parts = re `\.`.split(check string:fromBytes(check array:fromBase64(padded)));
+        if parts.length() == 3 {
+            ExpansionCursor cursor = {
+                valueSetId: check int:fromString(parts[0]),
+                sourceIndex: check int:fromString(parts[1]),
+                lastKey: check int:fromString(parts[2])
+            };
+            // a token only continues the expansion it was issued for
+            if cursor.valueSetId == valueSetId && cursor.sourceIndex >= 0 {
+                return cursor;
+            }
+        }
+    } on fail {
+    }
+    return r4:createFHIRError(
+            "Invalid continuation token",
+            r4:ERROR,
+            r4:INVALID_REQUIRED,
+            httpStatusCode = http:STATUS_BAD_REQUEST);
+}